@@ -0,0 +1,171 @@
+import atexit
+import csv
+import io
+import os
+import queue
+import threading
+import time
+import metrics
+from utils import logger
+
+OPORTUNIDADES = "oportunidades_perdidas.csv"
+PRECOS = "precos_log.csv"
+
+# Cabeçalho usado quando o arquivo ainda não existe; arquivos existentes mantêm a ordem do próprio cabeçalho
+COLUNAS = {
+    OPORTUNIDADES: ['timestamp', 'robot_name', 'par', 'timeframe', 'direcao', 'score_tecnico',
+                    'contributing_indicators', 'reason'],
+    PRECOS: ['timestamp', 'par', 'price'],
+}
+
+_AGORA = object()  # marcador de flush: grava o lote atual sem esperar o intervalo
+
+
+class AuditOutbox:
+    """
+    Fila de escrita em segundo plano para arquivos de auditoria (append-only).
+
+    enviar() só enfileira a linha; uma thread daemon agrupa o que chegar em até `intervalo`
+    segundos (ou `lote` linhas) e acrescenta cada arquivo com uma única escrita, com as linhas
+    codificadas pelo módulo csv. Cada lote vira um único write() em modo append, para que
+    processos diferentes (shards, dashboard) não intercalem linhas. A fila é limitada: se encher,
+    enviar() bloqueia até a thread liberar espaço. flush() espera tudo o que foi enfileirado chegar
+    ao disco; fechar() é registrado no atexit.
+    """
+    def __init__(self, intervalo=1.0, lote=1000, capacidade=100_000):
+        """
+        Args:
+            intervalo (float): Latência máxima (s) entre enviar() e a gravação.
+            lote (int): Máximo de linhas por gravação.
+            capacidade (int): Tamanho máximo da fila em memória.
+        """
+        self.intervalo = intervalo
+        self.lote = lote
+        self.capacidade = capacidade
+        self._lock = threading.Lock()
+        self._pid = None
+        self._thread = None
+        self._fila = None
+        atexit.register(self.fechar)
+
+    def _garantir_thread(self):
+        # Processos filhos (fork) herdam o objeto mas não a thread: recriam fila e thread
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            if self._pid != os.getpid():
+                self._fila = queue.Queue(maxsize=self.capacidade)
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._executar, name="audit-outbox", daemon=True)
+            self._thread.start()
+
+    def enviar(self, caminho, linha, colunas=None):
+        """
+        Enfileira uma linha para `caminho`.
+
+        Args:
+            caminho (str): Arquivo CSV de auditoria (relativo ao diretório atual no momento da chamada).
+            linha (dict): Valores por coluna (chaves fora do cabeçalho são descartadas).
+            colunas (list): Cabeçalho para criar o arquivo (padrão: COLUNAS[caminho] ou as chaves da linha).
+        """
+        # Resolvido aqui: um chdir antes da gravação em segundo plano não muda o destino
+        colunas = colunas or COLUNAS.get(caminho)
+        self._garantir_thread()
+        self._fila.put((os.path.abspath(caminho), dict(linha), colunas))
+
+    def flush(self, timeout=None):
+        """Bloqueia até todas as linhas enfileiradas até aqui estarem gravadas."""
+        if self._fila is None or self._pid != os.getpid():
+            return
+        self._garantir_thread()
+        self._fila.put(_AGORA)
+        if timeout is None:
+            self._fila.join()
+            return
+        prazo = time.monotonic() + timeout
+        while self._fila.unfinished_tasks and time.monotonic() < prazo:
+            time.sleep(0.01)
+
+    def fechar(self):
+        """Grava o que restar na fila (chamado no encerramento do processo)."""
+        if self._fila is None or self._pid != os.getpid():
+            return
+        if self._thread is not None and self._thread.is_alive():
+            self.flush(timeout=10)
+        restantes = []
+        while True:
+            try:
+                item = self._fila.get_nowait()
+            except queue.Empty:
+                break
+            self._fila.task_done()
+            if item is not _AGORA:
+                restantes.append(item)
+        if restantes:
+            self._gravar(restantes)
+
+    def _executar(self):
+        fila = self._fila
+        while True:
+            primeiro = fila.get()
+            lote = [] if primeiro is _AGORA else [primeiro]
+            retirados = 1
+            prazo = time.monotonic() + self.intervalo
+            while primeiro is not _AGORA and len(lote) < self.lote:
+                restante = prazo - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    item = fila.get(timeout=restante)
+                except queue.Empty:
+                    break
+                retirados += 1
+                if item is _AGORA:
+                    break
+                lote.append(item)
+            try:
+                if lote:
+                    self._gravar(lote)
+            except Exception as e:
+                logger.error(f"[AUDITORIA] Falha ao gravar {len(lote)} linhas: {e}")
+            finally:
+                for _ in range(retirados):
+                    fila.task_done()
+
+    def _gravar(self, itens):
+        por_arquivo = {}
+        for caminho, linha, colunas in itens:
+            por_arquivo.setdefault(caminho, ([], colunas))[0].append(linha)
+        with metrics.span("audit_write"):
+            for caminho, (linhas, colunas) in por_arquivo.items():
+                cabecalho = _cabecalho(caminho)
+                buffer = io.StringIO()
+                if not cabecalho:
+                    cabecalho = colunas or list(linhas[0])
+                    csv.writer(buffer).writerow(cabecalho)
+                escritor = csv.DictWriter(buffer, fieldnames=cabecalho, extrasaction='ignore', restval='')
+                escritor.writerows(linhas)
+                with open(caminho, "a", encoding="utf-8", newline="") as f:
+                    f.write(buffer.getvalue())
+        logger.debug(f"[AUDITORIA] {len(itens)} linhas gravadas em {list(por_arquivo)}.")
+
+
+def _cabecalho(caminho):
+    if not os.path.exists(caminho) or os.path.getsize(caminho) == 0:
+        return []
+    with open(caminho, encoding="utf-8", newline="") as f:
+        return next(csv.reader(f), [])
+
+
+outbox = AuditOutbox()
+
+
+def enviar(caminho, linha, colunas=None):
+    """Enfileira uma linha de auditoria na fila global (ver AuditOutbox.enviar)."""
+    outbox.enviar(caminho, linha, colunas)
+
+
+def flush(timeout=None):
+    outbox.flush(timeout)
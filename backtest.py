@@ -1,5 +1,6 @@
 import pandas as pd
 import numpy as np
+import os
 import uuid
 import json  # Importação adicionada para resolver os erros
 from utils import logger
@@ -76,4 +77,126 @@ def run_backtest(client, config, binance_utils, learning_engine, start_date, end
     save_indicator_stats(indicator_stats)
     save_report(start_date, end_date, df_sinais, indicator_stats)
     logger.info("Backtest concluído.")
-    return df_sinais
\ No newline at end of file
+    return df_sinais
+
+def run_backtest_intrabar(config, strategies, pairs, timeframes, start_date=None, end_date=None, data_dir=".", results_file="backtest_results.json", cache=True):
+    """
+    Backtest orientado a eventos sobre as velas locais (historical_data_*.csv).
+
+    Os sinais de cada timeframe são gerados de forma vetorizada e cada entrada é resolvida nas
+    velas de 1m alinhadas (intrabar.primeira_saida), que informam o primeiro toque de TP ou SL
+    e o horário exato da saída. Mantém no máximo uma posição por direção em cada
+    estratégia/par/timeframe.
+
+    Args:
+        config (dict): Configuração com tp_percent, sl_percent, leverage e score_tecnico_min padrão.
+        strategies (list): Estratégias (dicts com name e indicators/indicadores_ativos).
+        pairs (list): Pares a testar.
+        timeframes (list): Timeframes a testar.
+        start_date (str): Início do período (opcional).
+        end_date (str): Fim do período (opcional).
+        data_dir (str): Diretório dos arquivos de velas.
+        results_file (str): JSON de resultados por timeframe.
+        cache (bool | BacktestCache): Reaproveita trades de estratégias cujos parâmetros, código de
+            indicadores e arquivos de velas não mudaram (backtest_cache). False desativa.
+
+    Returns:
+        pd.DataFrame: Um registro por trade simulado.
+    """
+    from candle_store import CandleStore
+    from vectorized_signals import calcular_indicadores, pontuar_sinais, direcoes, indicadores_ativos
+    from intrabar import primeira_saida, TF_MS
+    from backtest_cache import BacktestCache, CACHE_DIR
+    from parameter_sweep import TAXA_TAKER
+
+    logger.info(f"Iniciando backtest intrabar de {start_date or 'início'} a {end_date or 'fim'}...")
+    store = CandleStore(data_dir)
+    if cache is True:
+        cache = BacktestCache(os.path.join(data_dir, CACHE_DIR))
+    inicio_ms = int(pd.Timestamp(start_date).value // 1_000_000) if start_date else None
+    fim_ms = int(pd.Timestamp(end_date).value // 1_000_000) if end_date else None
+    custo = 2 * TAXA_TAKER * 100
+    trades = []
+
+    for pair in pairs:
+        if not store.disponivel(pair, "1m"):
+            logger.warning(f"Sem velas de 1m para {pair}. Pulando...")
+            continue
+        velas_1m = store.get(pair, "1m")
+        for tf in timeframes:
+            if not store.disponivel(pair, tf):
+                logger.warning(f"Sem dados históricos para {pair} ({tf}). Pulando...")
+                continue
+            velas = store.get(pair, tf)
+            ts, close = velas["timestamp"], np.asarray(velas["close"])
+            indicadores = None
+            a = int(np.searchsorted(ts, inicio_ms)) if inicio_ms else 0
+            b = int(np.searchsorted(ts, fim_ms)) if fim_ms else len(ts)
+            for strategy in strategies:
+                if not strategy.get("enabled", True):
+                    continue
+                # Parâmetros efetivos: o que determina os trades (nome e campos irrelevantes ficam de fora)
+                params = {
+                    "ativos": sorted(indicadores_ativos(strategy)),
+                    "tp": float(strategy.get("tp_percent", config.get("tp_percent", 2.0))),
+                    "sl": float(strategy.get("sl_percent", config.get("sl_percent", 1.0))),
+                    "leverage": float(strategy.get("leverage", config.get("leverage", 1))),
+                    "score_min": strategy.get("score_tecnico_min", config.get("score_tecnico_min", 0.05)),
+                    "par": pair, "tf": tf, "inicio_ms": inicio_ms, "fim_ms": fim_ms, "custo": custo,
+                }
+                chave = cache.chave(params, (store.caminho_csv(pair, tf), store.caminho_csv(pair, "1m"))) if cache else None
+                linhas = cache.get(chave) if cache else None
+                if linhas is None:
+                    if indicadores is None:
+                        indicadores = calcular_indicadores(close)
+                    score, tem_long, tem_short = pontuar_sinais(indicadores, close, params["ativos"])
+                    direcao_arr = direcoes(score, tem_long, tem_short, params["score_min"])
+                    linhas = []
+                    livre_ms = {1: 0, -1: 0}
+                    for i in np.flatnonzero(direcao_arr[a:b]) + a:
+                        d = int(direcao_arr[i])
+                        entrada_ms = int(ts[i]) + TF_MS[tf]
+                        if entrada_ms < livre_ms[d]:
+                            continue
+                        entrada = float(close[i])
+                        tp_preco, sl_preco = entrada * (1 + d * params["tp"] / 100), entrada * (1 - d * params["sl"] / 100)
+                        saida_ms, saida, resultado = primeira_saida(velas_1m, entrada_ms, tp_preco, sl_preco, d, fim_ms)
+                        if saida is None:
+                            continue
+                        livre_ms[d] = saida_ms
+                        linhas.append({
+                            "signal_id": str(uuid.uuid4()),
+                            "par": pair,
+                            "timeframe": tf,
+                            "direcao": "LONG" if d == 1 else "SHORT",
+                            "timestamp": pd.Timestamp(entrada_ms, unit="ms").strftime("%Y-%m-%d %H:%M:%S"),
+                            "preco_entrada": entrada,
+                            "timestamp_saida": pd.Timestamp(saida_ms, unit="ms").strftime("%Y-%m-%d %H:%M:%S"),
+                            "preco_saida": saida,
+                            "resultado": resultado,
+                            "score_tecnico": float(score[i]),
+                            "lucro_percentual": (d * (saida / entrada - 1) * 100 - custo) * params["leverage"],
+                        })
+                    if cache:
+                        cache.set(chave, linhas)
+                trades.extend({"signal_id": linha["signal_id"], "strategy_name": strategy.get("name"), **linha} for linha in linhas)
+
+    if cache:
+        logger.info(f"[BACKTEST CACHE] {cache.acertos} estratégias reaproveitadas, {cache.falhas} recalculadas.")
+    df_trades = pd.DataFrame(trades)
+    resultados = {}
+    for tf in timeframes:
+        df_tf = df_trades[df_trades["timeframe"] == tf] if not df_trades.empty else df_trades
+        lucros = df_tf["lucro_percentual"].to_numpy() if not df_tf.empty else np.array([])
+        acumulado = np.r_[0.0, np.cumsum(lucros)]
+        resultados[tf] = {
+            "total_trades": int(len(lucros)),
+            "lucro_total": float(acumulado[-1]),
+            "taxa_acerto": float((lucros > 0).mean() * 100) if len(lucros) else 0,
+            "max_drawdown": float((np.maximum.accumulate(acumulado) - acumulado).max()),
+            "trades": df_tf.to_dict(orient="records") if not df_tf.empty else [],
+        }
+    with open(results_file, "w") as f:
+        json.dump(resultados, f)
+    logger.info(f"Backtest intrabar concluído: {len(df_trades)} trades. Resultados em {results_file}.")
+    return df_trades
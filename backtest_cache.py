@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import pickle
+import sys
+from utils import logger
+
+CACHE_DIR = ".backtest_cache"
+# Módulos cujo código define o resultado de um backtest; qualquer alteração invalida o cache
+MODULOS_CODIGO = ("vectorized_signals", "intrabar", "backtest", "parameter_sweep")
+
+_digest_arquivos = {}
+
+
+def hash_canonico(valor):
+    """Hash sha256 de um valor JSON-serializável, independente da ordem das chaves."""
+    texto = json.dumps(valor, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(texto.encode()).hexdigest()
+
+
+def fingerprint_arquivo(caminho):
+    """
+    Hash do conteúdo de um arquivo (blake2b). O resultado é memorizado por (tamanho, mtime),
+    então cada arquivo só é lido uma vez por processo enquanto não for alterado.
+
+    Returns:
+        str: Digest hexadecimal, ou None se o arquivo não existe.
+    """
+    try:
+        stat = os.stat(caminho)
+    except FileNotFoundError:
+        return None
+    marca = (caminho, stat.st_size, stat.st_mtime_ns)
+    if marca not in _digest_arquivos:
+        h = hashlib.blake2b(digest_size=16)
+        with open(caminho, "rb") as f:
+            for bloco in iter(lambda: f.read(1 << 20), b""):
+                h.update(bloco)
+        _digest_arquivos[marca] = h.hexdigest()
+    return _digest_arquivos[marca]
+
+
+def versao_codigo(modulos=MODULOS_CODIGO):
+    """Hash do código-fonte dos módulos de indicadores/simulação (versão do código)."""
+    partes = []
+    for nome in modulos:
+        modulo = sys.modules.get(nome) or __import__(nome)
+        partes.append(fingerprint_arquivo(modulo.__file__))
+    return hash_canonico(partes)
+
+
+class BacktestCache:
+    """
+    Cache de resultados de backtest em disco (um arquivo pickle por chave) com camada em memória.
+
+    A chave combina o hash canônico dos parâmetros, a versão do código dos indicadores e o
+    fingerprint do conteúdo dos arquivos de velas usados, de modo que um resultado só é
+    reaproveitado quando nada que o determina mudou.
+    """
+    def __init__(self, diretorio=CACHE_DIR, modulos=MODULOS_CODIGO):
+        """
+        Args:
+            diretorio (str): Diretório dos arquivos de cache.
+            modulos (tuple): Módulos cujo código entra na chave.
+        """
+        self.diretorio = diretorio
+        self.versao = versao_codigo(modulos)
+        self._memoria = {}
+        self.acertos = 0
+        self.falhas = 0
+
+    def chave(self, parametros, arquivos=()):
+        """
+        Monta a chave de um resultado.
+
+        Args:
+            parametros (dict): Parâmetros efetivos que determinam o resultado.
+            arquivos (iterable): Arquivos de velas lidos pelo cálculo.
+
+        Returns:
+            str: Chave hexadecimal.
+        """
+        return hash_canonico({
+            "parametros": parametros,
+            "versao": self.versao,
+            "dados": {os.path.basename(a): fingerprint_arquivo(a) for a in arquivos},
+        })
+
+    def _caminho(self, chave):
+        return os.path.join(self.diretorio, f"{chave}.pkl")
+
+    def get(self, chave):
+        """Retorna o resultado em cache ou None."""
+        if chave in self._memoria:
+            self.acertos += 1
+            return self._memoria[chave]
+        try:
+            with open(self._caminho(chave), "rb") as f:
+                valor = pickle.load(f)
+        except FileNotFoundError:
+            self.falhas += 1
+            return None
+        except Exception as e:
+            logger.warning(f"[BACKTEST CACHE] Entrada {chave[:12]} ilegível, ignorando: {e}")
+            self.falhas += 1
+            return None
+        self._memoria[chave] = valor
+        self.acertos += 1
+        return valor
+
+    def set(self, chave, valor):
+        """Grava um resultado (escrita atômica, segura entre processos)."""
+        self._memoria[chave] = valor
+        try:
+            os.makedirs(self.diretorio, exist_ok=True)
+            tmp = f"{self._caminho(chave)}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(valor, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._caminho(chave))
+        except Exception as e:
+            logger.error(f"[BACKTEST CACHE] Erro ao gravar entrada {chave[:12]}: {e}")
+
+    def obter_ou_calcular(self, chave, calcular):
+        """Retorna o resultado em cache ou executa calcular() e grava o resultado."""
+        valor = self.get(chave)
+        if valor is None:
+            valor = calcular()
+            self.set(chave, valor)
+        return valor
+
+    def limpar(self):
+        """Remove todas as entradas (memória e disco)."""
+        self._memoria.clear()
+        if os.path.isdir(self.diretorio):
+            for nome in os.listdir(self.diretorio):
+                if nome.endswith(".pkl"):
+                    os.remove(os.path.join(self.diretorio, nome))
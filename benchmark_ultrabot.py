@@ -0,0 +1,335 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import journal_schema
+from utils import logger
+
+BASELINE_FILE = "benchmark_baseline.json"
+TAMANHOS_PADRAO = (1_000, 10_000, 100_000)
+TOLERANCIA_PADRAO = 0.25
+# Colunas do diário (esquema atual, gravado por journal_schema.anexar)
+COLUNAS_DIARIO = journal_schema.COLUNAS
+ARQUIVOS_ESTADO = ("strategies.json", "robot_status.json")
+
+_benchmarks = []
+
+
+def benchmark(nome, por_tamanho=False, repeticoes=None):
+    """
+    Registra um benchmark. A função decorada recebe o Contexto e retorna o callable a medir
+    (a preparação fica fora da medição).
+
+    Args:
+        nome (str): Nome do caminho medido.
+        por_tamanho (bool): Repetido para cada tamanho de diário.
+        repeticoes (int): Repetições fixas (padrão: até ~1s de medição, entre 3 e 50).
+    """
+    def registrar(preparar):
+        _benchmarks.append({"nome": nome, "por_tamanho": por_tamanho, "repeticoes": repeticoes, "preparar": preparar})
+        return preparar
+    return registrar
+
+
+def gerar_diario(n, seed=42, abertas=0.05):
+    """
+    Gera um diário sintético (sinais_detalhados.csv) com n linhas, montado de forma vetorizada.
+
+    Returns:
+        pd.DataFrame: Linhas com as colunas de COLUNAS_DIARIO.
+    """
+    rng = np.random.default_rng(seed)
+    pares = np.array(["XRPUSDT", "DOGEUSDT", "TRXUSDT"])
+    timeframes = np.array(["1m", "5m", "15m", "1h", "4h", "1d"])
+    robos = np.array([f"Robo {i:02d}" for i in range(16)])
+    entrada = rng.uniform(0.1, 3.0, n)
+    lucro = rng.normal(0.2, 2.0, n)
+    aberta = rng.random(n) < abertas
+    inicio = pd.Timestamp("2025-03-19") + pd.to_timedelta(np.sort(rng.integers(0, 30 * 86400, n)), unit="s")
+    saida = inicio + pd.to_timedelta(rng.integers(60, 7200, n), unit="s")
+    tp = rng.choice([0.5, 1.0, 1.5, 2.0], n)
+    sl = rng.choice([0.5, 1.0, 1.5], n)
+    alavancagem = rng.choice([5, 10, 20], n)
+    df = pd.DataFrame({
+        "signal_id": [f"{v:032x}" for v in rng.integers(0, 2 ** 63, n)],
+        "par": rng.choice(pares, n),
+        "direcao": rng.choice(np.array(["LONG", "SHORT"]), n),
+        "preco_entrada": entrada,
+        "preco_saida": np.where(aberta, np.nan, entrada * (1 + lucro / 100)),
+        "quantity": rng.uniform(1, 100, n),
+        "lucro_percentual": np.where(aberta, np.nan, lucro),
+        "pnl_realizado": np.where(aberta, np.nan, lucro),
+        "resultado": np.where(aberta, None, np.where(lucro > 0, "TP", "SL")),
+        "timestamp": inicio.strftime("%Y-%m-%d %H:%M:%S"),
+        "timestamp_saida": np.where(aberta, None, saida.strftime("%Y-%m-%d %H:%M:%S")),
+        "estado": np.where(aberta, "aberto", "fechado"),
+        "strategy_name": rng.choice(robos, n),
+        "contributing_indicators": "EMA;RSI;MACD",
+        "localizadores": "{}",
+        "motivos": '["EMA12 > EMA50", "RSI < 30"]',
+        "timeframe": rng.choice(timeframes, n),
+        "aceito": True,
+        "parametros": [json.dumps({"tp_percent": float(a), "sl_percent": float(b), "leverage": int(c)})
+                       for a, b, c in zip(tp, sl, alavancagem)],
+        "quality_score": rng.uniform(0.5, 1.0, n),
+        "modo_contrario": False,
+        "visual_tag": "",
+        "mode": "dry_run",
+        "binance_order_id": None,
+        "tp_order_id": None,
+        "sl_order_id": None,
+        "dry_run_id": [f"dry-{v:016x}" for v in rng.integers(0, 2 ** 63, n)],
+        "score_tecnico": rng.uniform(0.5, 1.0, n),
+        "funding_rate": rng.normal(0.0001, 0.0002, n),
+        "timeframes_analisados": "1m;5m;15m",
+        "combination_key": "EMA;RSI;MACD",
+        "historical_win_rate": rng.uniform(0.3, 0.7, n),
+        "avg_pnl": rng.normal(0.1, 0.5, n),
+        "side_performance": "{}",
+        "timeframe_weight": rng.choice([0.5, 1.0, 1.5], n),
+    })
+    return df[COLUNAS_DIARIO]
+
+
+class Contexto:
+    """Dados fixos compartilhados pelos benchmarks (velas locais, estratégia, diário do tamanho atual)."""
+    def __init__(self, data_dir, diretorio):
+        from binance_utils import BinanceUtils
+        from candle_store import CandleStore
+        from config import CONFIG
+        self.data_dir = data_dir
+        self.diretorio = diretorio
+        self.config = dict(CONFIG)
+        self.binance_utils = BinanceUtils(None, self.config)
+        store = CandleStore(data_dir)
+        self.velas = {tf: store.como_dataframe("XRPUSDT", tf).tail(200).reset_index(drop=True)
+                      for tf in ("1m", "5m", "15m", "1h") if store.disponivel("XRPUSDT", tf)}
+        with open(os.path.join(data_dir, "strategies.json")) as f:
+            nome, estrategia = next(iter(json.load(f).items()))
+        self.estrategia = dict(estrategia, name=nome)
+        self.n = 0
+
+    def preparar_diario(self, n):
+        """Grava um diário de n linhas no diretório de trabalho."""
+        self.n = n
+        self.diario = gerar_diario(n)
+        self.diario.to_csv("sinais_detalhados.csv", index=False)
+
+
+@benchmark("calculate_indicators")
+def _bench_indicadores(ctx):
+    from indicators import calculate_indicators
+    velas = ctx.velas["1m"]
+    return lambda: calculate_indicators(velas, ctx.binance_utils)
+
+
+@benchmark("generate_signal")
+def _bench_sinal(ctx):
+    from indicators import calculate_indicators
+    from learning_engine import LearningEngine
+    from signal_generator import generate_signal
+    velas = calculate_indicators(ctx.velas["1m"], ctx.binance_utils)
+    engine = LearningEngine(model_path=os.path.join(ctx.diretorio, "modelo_vazio.pkl"))
+    return lambda: generate_signal(velas, "1m", ctx.estrategia, ctx.config, engine, ctx.binance_utils)
+
+
+@benchmark("generate_multi_timeframe_signal")
+def _bench_multi_tf(ctx):
+    from learning_engine import LearningEngine
+    from signal_generator import generate_multi_timeframe_signal
+    engine = LearningEngine(model_path=os.path.join(ctx.diretorio, "modelo_vazio.pkl"))
+    sinais = {tf: {"direction": "LONG" if i % 3 else "SHORT", "score": 0.8 + 0.05 * i,
+                   "details": {"reasons": [f"EMA {tf}"], "locators": {}},
+                   "contributing_indicators": "EMA;RSI", "strategy_name": ctx.estrategia["name"]}
+              for i, tf in enumerate(ctx.velas)}
+    return lambda: generate_multi_timeframe_signal(sinais, engine, "EMA;RSI")
+
+
+@benchmark("journal_schema.anexar", por_tamanho=True)
+def _bench_anexar(ctx):
+    linha = ctx.diario.iloc[0].to_dict()
+    return lambda: journal_schema.anexar([dict(linha, signal_id=f"bench-{time.perf_counter_ns()}")])
+
+
+@benchmark("close_order", por_tamanho=True)
+def _bench_close_order(ctx):
+    from order_executor import close_order
+    ids = iter(ctx.diario.loc[ctx.diario["estado"] == "aberto", "signal_id"].tolist() * 2)
+    return lambda: close_order(next(ids), 1.0, "TP")
+
+
+@benchmark("LearningEngine.train", por_tamanho=True, repeticoes=3)
+def _bench_train(ctx):
+    from learning_engine import LearningEngine
+    engine = LearningEngine(model_path=os.path.join(ctx.diretorio, "modelo.pkl"))
+    return engine.train
+
+
+@benchmark("run_backtest_intrabar", repeticoes=3)
+def _bench_backtest(ctx):
+    from backtest import run_backtest_intrabar
+    estrategias = [ctx.estrategia]
+    resultados = os.path.join(ctx.diretorio, "backtest_results.json")
+    return lambda: run_backtest_intrabar(ctx.config, estrategias, ["XRPUSDT"], ["5m", "15m", "1h"],
+                                         data_dir=ctx.data_dir, results_file=resultados, cache=False)
+
+
+@benchmark("dashboard.load_signals", por_tamanho=True)
+def _bench_load_signals(ctx):
+    from dashboard_utils import load_signals
+    return load_signals
+
+
+@benchmark("dashboard.calculate_advanced_metrics", por_tamanho=True)
+def _bench_metricas(ctx):
+    from dashboard_utils import calculate_advanced_metrics
+    fechadas = ctx.diario[ctx.diario["estado"] == "fechado"]
+    return lambda: calculate_advanced_metrics(fechadas)
+
+
+def medir(funcao, repeticoes=None, tempo_alvo=1.0, minimo=3, maximo=50):
+    """
+    Mede o tempo de execução de funcao() após uma execução de aquecimento.
+
+    Returns:
+        dict: mediana, mínimo, p95 (ms) e número de repetições.
+    """
+    funcao()
+    tempos = []
+    inicio = time.perf_counter()
+    while True:
+        t0 = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - t0)
+        if repeticoes is not None:
+            if len(tempos) >= repeticoes:
+                break
+        elif len(tempos) >= maximo or (len(tempos) >= minimo and time.perf_counter() - inicio >= tempo_alvo):
+            break
+    tempos = np.array(tempos) * 1000
+    return {"mediana_ms": float(np.median(tempos)), "min_ms": float(tempos.min()),
+            "p95_ms": float(np.percentile(tempos, 95)), "repeticoes": len(tempos)}
+
+
+def executar(tamanhos=TAMANHOS_PADRAO, filtro=None, data_dir="."):
+    """
+    Executa os benchmarks registrados em um diretório temporário (os arquivos reais não são tocados).
+
+    Args:
+        tamanhos (list): Tamanhos de diário para os caminhos que dependem dele.
+        filtro (str): Executa apenas benchmarks cujo nome contém este texto.
+        data_dir (str): Diretório das velas e do strategies.json.
+
+    Returns:
+        dict: {"nome[n=tamanho]": medição}; benchmarks que falharam ficam como {"erro": mensagem}.
+    """
+    data_dir = os.path.abspath(data_dir)
+    diretorio = tempfile.mkdtemp(prefix="benchmark_ultrabot_")
+    origem = os.getcwd()
+    resultados = {}
+    try:
+        for arquivo in ARQUIVOS_ESTADO:
+            if os.path.exists(os.path.join(data_dir, arquivo)):
+                shutil.copy(os.path.join(data_dir, arquivo), diretorio)
+        os.chdir(diretorio)
+        ctx = Contexto(data_dir, diretorio)
+        for b in _benchmarks:
+            if filtro and filtro not in b["nome"]:
+                continue
+            for n in (tamanhos if b["por_tamanho"] else (None,)):
+                ctx.preparar_diario(n or TAMANHOS_PADRAO[0])
+                chave = f"{b['nome']}[n={n}]" if n else b["nome"]
+                try:
+                    resultados[chave] = medir(b["preparar"](ctx), b["repeticoes"])
+                    logger.info(f"[BENCHMARK] {chave}: {resultados[chave]['mediana_ms']:.2f}ms")
+                except Exception as e:
+                    resultados[chave] = {"erro": str(e)}
+                    logger.error(f"[BENCHMARK] Erro em {chave}: {e}")
+    finally:
+        os.chdir(origem)
+        shutil.rmtree(diretorio, ignore_errors=True)
+    return resultados
+
+
+def comparar(resultados, baseline, tolerancia=TOLERANCIA_PADRAO):
+    """
+    Compara medianas com o baseline.
+
+    Um caminho do baseline que não foi medido (ausente ou com erro) também conta como falha,
+    para que um benchmark quebrado não passe despercebido pelo gate.
+
+    Returns:
+        list: (nome, baseline_ms, atual_ms, variação) dos caminhos que pioraram além da tolerância;
+        atual_ms e variação são None para caminhos ausentes ou com erro.
+    """
+    regressoes = []
+    for nome, anterior in baseline.items():
+        if not anterior or "mediana_ms" not in anterior:
+            continue
+        atual = resultados.get(nome)
+        if not atual or "mediana_ms" not in atual:
+            regressoes.append((nome, anterior["mediana_ms"], None, None))
+            continue
+        if anterior["mediana_ms"] <= 0:
+            continue
+        variacao = atual["mediana_ms"] / anterior["mediana_ms"] - 1
+        if variacao > tolerancia:
+            regressoes.append((nome, anterior["mediana_ms"], atual["mediana_ms"], variacao))
+    return regressoes
+
+
+def salvar_baseline(resultados, caminho=BASELINE_FILE):
+    with open(caminho, "w") as f:
+        json.dump({
+            "meta": {"data": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "python": platform.python_version(),
+                     "plataforma": platform.platform(), "cpus": os.cpu_count()},
+            "resultados": resultados,
+        }, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks dos caminhos críticos do UltraBot.")
+    parser.add_argument("--tamanhos", nargs="*", type=int, default=list(TAMANHOS_PADRAO),
+                        help="Tamanhos do diário (ex.: 1000 10000 100000 1000000)")
+    parser.add_argument("--filtro")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_PADRAO)
+    parser.add_argument("--salvar-baseline", action="store_true")
+    args = parser.parse_args()
+    resultados = executar(args.tamanhos, args.filtro)
+    erros = {nome: r["erro"] for nome, r in resultados.items() if "erro" in r}
+    for nome, r in resultados.items():
+        if nome in erros:
+            print(f"{nome:<50} ERRO: {erros[nome]}")
+        else:
+            print(f"{nome:<50} {r['mediana_ms']:>12.2f} ms  (min {r['min_ms']:.2f}, p95 {r['p95_ms']:.2f}, n={r['repeticoes']})")
+    if args.salvar_baseline:
+        if erros:
+            print(f"Baseline não gravado: {len(erros)} benchmark(s) com erro.")
+            sys.exit(1)
+        salvar_baseline(resultados, args.baseline)
+        print(f"Baseline gravado em {args.baseline}.")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["resultados"]
+        # Só cobra do baseline o que esta execução se propôs a medir (filtro e tamanhos pedidos)
+        pedidos = {f"[n={n}]" for n in args.tamanhos}
+        baseline = {nome: r for nome, r in baseline.items()
+                    if (not args.filtro or args.filtro in nome.split("[")[0])
+                    and ("[" not in nome or nome[nome.index("["):] in pedidos)}
+        regressoes = comparar(resultados, baseline, args.tolerancia)
+        for nome, antes, depois, variacao in regressoes:
+            if depois is None:
+                print(f"FALHA: {nome}: presente no baseline ({antes:.2f}ms) mas sem medição válida")
+            else:
+                print(f"REGRESSÃO: {nome}: {antes:.2f}ms -> {depois:.2f}ms (+{variacao:.0%}, tolerância {args.tolerancia:.0%})")
+        sys.exit(1 if regressoes or erros else 0)
+    else:
+        sys.exit(1 if erros else 0)
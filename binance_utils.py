@@ -1,5 +1,6 @@
 from binance.exceptions import BinanceAPIException
 from utils import api_call_with_retry, logger
+from data_manager import klines_para_dataframe
 import requests
 import pandas as pd
 
@@ -126,12 +127,7 @@ class BinanceUtils:
         """
         try:
             klines = api_call_with_retry(self.client.get_klines, symbol=symbol, interval=timeframe, limit=limit)
-            df = pd.DataFrame(klines, columns=[
-                'timestamp', 'open', 'high', 'low', 'close', 'volume',
-                'close_time', 'quote_asset_volume', 'number_of_trades',
-                'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'
-            ])
-            df['close'] = df['close'].astype(float)
+            df = klines_para_dataframe(klines, colunas=['close'])
             returns = df['close'].pct_change().dropna()
             volatility = returns.std() * (252 ** 0.5)  # Anualizado
             logger.debug(f"Volatilidade histórica para {symbol} ({timeframe}): {volatility}")
@@ -0,0 +1,69 @@
+import os
+import numpy as np
+import pandas as pd
+from utils import logger
+
+COLUNAS = ("timestamp", "open", "high", "low", "close", "volume")
+CACHE_DIR = ".candle_cache"
+
+
+class CandleStore:
+    """
+    Acesso somente-leitura às velas locais (historical_data_{PAR}_{TF}.csv) como arrays numpy.
+
+    Na primeira leitura cada CSV é convertido para arquivos .npy em `cache_dir`; as leituras
+    seguintes usam np.load(mmap_mode='r'), de modo que vários processos (ex.: workers de um
+    ProcessPoolExecutor) compartilham as mesmas páginas do sistema operacional em vez de
+    copiar os dados. `timestamp` é armazenado em epoch ms (int64).
+    """
+    def __init__(self, data_dir=".", cache_dir=None):
+        """
+        Args:
+            data_dir (str): Diretório dos arquivos historical_data_*.csv.
+            cache_dir (str): Diretório dos .npy (padrão: data_dir/.candle_cache).
+        """
+        self.data_dir = data_dir
+        self.cache_dir = cache_dir or os.path.join(data_dir, CACHE_DIR)
+        self._abertos = {}
+
+    def caminho_csv(self, par, tf):
+        return os.path.join(self.data_dir, f"historical_data_{par}_{tf}.csv")
+
+    def disponivel(self, par, tf):
+        return os.path.exists(self.caminho_csv(par, tf))
+
+    def get(self, par, tf):
+        """
+        Retorna as velas de um par/timeframe.
+
+        Returns:
+            dict: {coluna: np.ndarray} com as colunas de COLUNAS.
+        """
+        chave = (par, tf)
+        if chave not in self._abertos:
+            self._abertos[chave] = self._carregar(par, tf)
+        return self._abertos[chave]
+
+    def _carregar(self, par, tf):
+        origem = self.caminho_csv(par, tf)
+        stat = os.stat(origem)
+        prefixo = os.path.join(self.cache_dir, f"{par}_{tf}_{stat.st_size}_{int(stat.st_mtime)}")
+        if not all(os.path.exists(f"{prefixo}.{c}.npy") for c in COLUNAS):
+            os.makedirs(self.cache_dir, exist_ok=True)
+            df = pd.read_csv(origem)
+            arrays = {"timestamp": pd.to_datetime(df["timestamp"]).dt.as_unit("ms").astype("int64").to_numpy()}
+            arrays.update({c: df[c].to_numpy(dtype=np.float64) for c in COLUNAS[1:]})
+            for coluna, valores in arrays.items():
+                # Grava em arquivo temporário e renomeia para não expor .npy parcial a outros processos
+                tmp = f"{prefixo}.{coluna}.{os.getpid()}.tmp.npy"
+                np.save(tmp, valores)
+                os.replace(tmp, f"{prefixo}.{coluna}.npy")
+            logger.debug(f"[CANDLES] Cache numpy criado para {par} ({tf}): {len(df)} velas.")
+        return {c: np.load(f"{prefixo}.{c}.npy", mmap_mode="r") for c in COLUNAS}
+
+    def como_dataframe(self, par, tf):
+        """Retorna as velas como DataFrame no formato de get_historical_data."""
+        velas = self.get(par, tf)
+        df = pd.DataFrame({c: np.asarray(velas[c]) for c in COLUNAS[1:]})
+        df.insert(0, "timestamp", pd.to_datetime(np.asarray(velas["timestamp"]), unit="ms"))
+        return df
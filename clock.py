@@ -0,0 +1,138 @@
+import threading
+import time as _time
+from datetime import datetime
+
+
+class RelogioReal:
+    """Relógio do sistema (comportamento padrão do bot)."""
+    def now(self):
+        return datetime.now()
+
+    def time(self):
+        return _time.time()
+
+    def monotonic(self):
+        return _time.monotonic()
+
+    def sleep(self, segundos):
+        _time.sleep(segundos)
+
+    def wait(self, evento, timeout):
+        return evento.wait(timeout)
+
+
+class RelogioVirtual:
+    """
+    Relógio virtual para replay determinístico do loop principal.
+
+    O tempo só avança quando a thread condutora (a que criou o relógio, ou a definida em
+    `condutora`) chama sleep(); as demais threads que chamam sleep() ficam bloqueadas até o
+    instante virtual alcançar o seu prazo. A cada avanço a condutora espera que todas as
+    threads acordadas voltem a dormir (ou terminem) antes de seguir, de modo que threads de
+    simulação observam cada instante na mesma ordem em toda execução.
+    """
+    def __init__(self, inicio, velocidade=None, limite_espera=0.5):
+        """
+        Args:
+            inicio (float|datetime): Instante inicial (epoch em segundos ou datetime).
+            velocidade (float): Fator de aceleração em relação ao tempo real (ex.: 1000);
+                None avança o mais rápido possível.
+            limite_espera (float): Espera real máxima, em segundos, pelas threads acordadas
+                em cada avanço (evita travar em threads bloqueadas fora do relógio).
+        """
+        self._agora = inicio.timestamp() if isinstance(inicio, datetime) else float(inicio)
+        self.velocidade = velocidade
+        self.limite_espera = limite_espera
+        self.condutora = threading.current_thread()
+        self._cond = threading.Condition()
+        self._dormindo = {}
+        self._acordadas = set()
+        self._ouvintes = []
+
+    def ao_avancar(self, callback):
+        """Registra callback(agora_epoch_s) chamado na thread condutora a cada avanço."""
+        self._ouvintes.append(callback)
+
+    def now(self):
+        return datetime.fromtimestamp(self._agora)
+
+    def time(self):
+        return self._agora
+
+    monotonic = time
+
+    def avancar(self, segundos):
+        """Avança o tempo virtual, notifica os ouvintes e sincroniza as threads que dormem."""
+        if self.velocidade:
+            _time.sleep(segundos / self.velocidade)
+        with self._cond:
+            self._agora += segundos
+            agora = self._agora
+        for callback in self._ouvintes:
+            callback(agora)
+        with self._cond:
+            self._cond.notify_all()
+            limite = _time.monotonic() + self.limite_espera
+            while _time.monotonic() < limite:
+                self._acordadas = {t for t in self._acordadas if t.is_alive()}
+                prontas = not self._acordadas and all(alvo > agora for alvo in self._dormindo.values())
+                if prontas:
+                    break
+                self._cond.wait(0.001)
+
+    def sleep(self, segundos):
+        atual = threading.current_thread()
+        if atual is self.condutora:
+            self.avancar(max(segundos, 0.0))
+            return
+        with self._cond:
+            self._acordadas.discard(atual)
+            alvo = self._agora + max(segundos, 1e-9)
+            self._dormindo[atual] = alvo
+            self._cond.notify_all()
+            while self._agora < alvo:
+                self._cond.wait()
+            del self._dormindo[atual]
+            self._acordadas.add(atual)
+
+    def wait(self, evento, timeout):
+        if not evento.is_set():
+            self.sleep(timeout)
+        return evento.is_set()
+
+
+_relogio = RelogioReal()
+
+
+def definir_relogio(relogio):
+    """Substitui o relógio do processo (ex.: RelogioVirtual no modo replay)."""
+    global _relogio
+    _relogio = relogio
+
+
+def get_relogio():
+    return _relogio
+
+
+def now():
+    """Substituto de datetime.now() que respeita o relógio ativo."""
+    return _relogio.now()
+
+
+def time():
+    """Substituto de time.time() que respeita o relógio ativo."""
+    return _relogio.time()
+
+
+def monotonic():
+    return _relogio.monotonic()
+
+
+def sleep(segundos):
+    """Substituto de time.sleep() que respeita o relógio ativo."""
+    _relogio.sleep(segundos)
+
+
+def wait(evento, timeout):
+    """Substituto de threading.Event.wait() que respeita o relógio ativo."""
+    return _relogio.wait(evento, timeout)
@@ -26,6 +26,12 @@ CONFIG = {
     'timeout_ordem': 999999999999999999999999,
     'max_trades_simultaneos': 100,  # Aumentado para permitir mais ordens
     'price_cache_duration': 5,
+    'exchange_info_ttl': 3600,  # TTL (s) do cache de filtros/alavancagem por símbolo
+    'order_placement_mode': 'sequential',  # 'sequential' ou 'batch' (TP/SL via batchOrders)
+    'sharding': {'enabled': False, 'workers': None},  # Geração de sinais em processos por grupo de pares (None = núcleos)
+    'resample_from_1m': False,  # Deriva 5m..1d de um único fluxo de 1m (resampler.py)
+    'journal_archive': {'enabled': True, 'retention_days': 7, 'interval_seconds': 3600},  # Fechados antigos em partições mensais .csv.gz (journal_store.py)
+    'market_scanner': {'enabled': False, 'max_pairs': 50, 'refresh_seconds': 900},  # Universo dinâmico (ver market_scanner.SCANNER_PADRAO)
     'backtest_funding_rate': 0.0001,
     'learning_enabled': True,
     'learning_update_interval': 3600,
@@ -15,13 +15,18 @@ from learning_engine import LearningEngine
 from utils import logger, gerar_resumo, calcular_confiabilidade_historica
 from strategy_manager import load_strategies, save_strategies
 import uuid
+import journal_schema
+from journal_schema import ler_diario, escrever_diario
+import journal_store
 import toml
 import logging
 import shutil
 from dashboard_utils import calculate_advanced_metrics
+from monte_carlo import monte_carlo_por_estrategia
 from strategy_manager import sync_strategies_and_status
 from trade_manager import check_timeframe_direction_limit, check_active_trades, save_signal_log
 from notification_manager import send_telegram_alert
+from user_data_stream import load_stream_state
 
 st.set_page_config(page_title="UltraBot Dashboard 9.0", layout="wide")
 
@@ -31,14 +36,8 @@ STRATEGIES_FILE = "strategies.json"
 ROBOT_STATUS_FILE = "robot_status.json"
 MISSED_OPPORTUNITIES_FILE = "oportunidades_perdidas.csv"
 
-SINALS_HEADER = [
-    'signal_id','par','direcao','preco_entrada','preco_saida','quantity','lucro_percentual','pnl_realizado','resultado','timestamp','timestamp_saida','estado','strategy_name','contributing_indicators','localizadores','motivos','timeframe','aceito','parametros','quality_score','modo_contrario','visual_tag','mode','binance_order_id'
-]
-
 def ensure_sinals_file():
-    if not os.path.exists(SINALS_FILE) or os.stat(SINALS_FILE).st_size == 0:
-        df = pd.DataFrame(columns=SINALS_HEADER)
-        df.to_csv(SINALS_FILE, index=False)
+    journal_schema.garantir_diario(SINALS_FILE)
 
 # Removed invalid CSS-like block causing syntax errors
 # ...existing code...
@@ -993,8 +992,9 @@ def calculate_distances(entry_price, mark_price, tp_percent, sl_percent, directi
         distance_to_sl = (sl_price - mark_price) / mark_price * 100 if mark_price > 0 else float('inf')
     return distance_to_tp, distance_to_sl
 
+@journal_schema.com_trava
 def close_order_manually(signal_id, mark_price):
-    df = pd.read_csv(SINALS_FILE)
+    df = ler_diario(SINALS_FILE, compacto=False)
     order_idx = df.index[df['signal_id'] == signal_id].tolist()
     if not order_idx:
         st.error(f"Ordem {signal_id} não encontrada.")
@@ -1016,11 +1016,12 @@ def close_order_manually(signal_id, mark_price):
     df.at[order_idx, 'resultado'] = "Manual"
     df.at[order_idx, 'timestamp_saida'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     df.at[order_idx, 'estado'] = "fechado"
-    df.to_csv(SINALS_FILE, index=False)
+    escrever_diario(df, SINALS_FILE)
     st.success(f"Ordem {signal_id} fechada manualmente com PNL de {profit_percent:.2f}%.")
 
+@journal_schema.com_trava
 def close_order(signal_id, mark_price, reason):
-    df = pd.read_csv(SINALS_FILE)
+    df = ler_diario(SINALS_FILE, compacto=False)
     order_idx = df.index[df['signal_id'] == signal_id].tolist()
     if not order_idx:
         logger.error(f"Ordem {signal_id} não encontrada ao tentar fechar.")
@@ -1042,7 +1043,7 @@ def close_order(signal_id, mark_price, reason):
     df.at[order_idx, 'resultado'] = reason
     df.at[order_idx, 'timestamp_saida'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     df.at[order_idx, 'estado'] = "fechado"
-    df.to_csv(SINALS_FILE, index=False)
+    escrever_diario(df, SINALS_FILE)
     logger.info(f"Ordem {signal_id} fechada automaticamente com motivo {reason} e PNL de {profit_percent:.2f}%.")
     # Envia alerta para o Telegram em caso de TP, SL ou erro relevante
     if reason in ["TP", "SL"] or profit_percent < -5:
@@ -1100,11 +1101,7 @@ def generate_orders(robot_name, strategy_config):
         logger.error(f"Nome de robô inválido: {robot_name}")
         return None
 
-    if os.path.exists(SINALS_FILE):
-        df = pd.read_csv(SINALS_FILE)
-    else:
-        ensure_sinals_file()
-        df = pd.read_csv(SINALS_FILE)
+    ensure_sinals_file()
 
     params = {
         "tp_percent": strategy_config['tp_percent'],
@@ -1203,8 +1200,7 @@ def generate_orders(robot_name, strategy_config):
             'parametros': json.dumps(params),
             'quality_score': 0.5
         }
-        df = pd.concat([df, pd.DataFrame([new_order])], ignore_index=True)
-        df.to_csv(SINALS_FILE, index=False)
+        journal_schema.anexar([new_order], SINALS_FILE)
         logger.info(f"Ordem simulada gerada para {robot_name} no par {selected_pair}.")
         return new_order
     logger.warning(f"Nenhum timeframe gerou ordens para {robot_name} no par {selected_pair}.")
@@ -1256,7 +1252,7 @@ def check_alerts(df_open):
     if not os.path.exists(SINALS_FILE):
         return alerts
 
-    df = pd.read_csv(SINALS_FILE)
+    df = journal_store.consultar(SINALS_FILE, colunas=['estado', 'resultado'])
     df_closed = df[df['estado'] == 'fechado']
     if len(df_closed[df_closed['resultado'].isin(['TP', 'SL'])]) < 5:
         alerts.append("⚠️ Sistema: Modelo ML não treinado: menos de 5 ordens com TP/SL.")
@@ -1348,12 +1344,8 @@ def validate_robot_status_and_stats():
 # Chamar validação inicial
 validate_robot_status_and_stats()
 
-if os.path.exists(SINALS_FILE):
-    df = pd.read_csv(SINALS_FILE)
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-else:
-    ensure_sinals_file()
-    df = pd.read_csv(SINALS_FILE)
+ensure_sinals_file()
+df = journal_store.consultar(SINALS_FILE)
 
 if os.path.exists(MISSED_OPPORTUNITIES_FILE):
     df_missed = pd.read_csv(MISSED_OPPORTUNITIES_FILE)
@@ -1371,11 +1363,11 @@ df_closed = df[df['estado'] == 'fechado'].copy()
 
 # Após carregar df_open e df_closed, adicionar coluna visual para modo ao contrario
 if 'modo_contrario' in df_open.columns:
-    df_open.loc[:, 'modo_contrario_emoji'] = df_open['modo_contrario'].apply(lambda x: '🔵 [modo ao contrario]' if x else '')
+    df_open.loc[:, 'modo_contrario_emoji'] = df_open['modo_contrario'].apply(lambda x: '🔵 [modo ao contrario]' if pd.notna(x) and x else '')
 else:
     df_open.loc[:, 'modo_contrario_emoji'] = ''
 if 'modo_contrario' in df_closed.columns:
-    df_closed.loc[:, 'modo_contrario_emoji'] = df_closed['modo_contrario'].apply(lambda x: '🔵 [modo ao contrario]' if x else '')
+    df_closed.loc[:, 'modo_contrario_emoji'] = df_closed['modo_contrario'].apply(lambda x: '🔵 [modo ao contrario]' if pd.notna(x) and x else '')
 else:
     df_closed.loc[:, 'modo_contrario_emoji'] = ''
 
@@ -1606,6 +1598,34 @@ with tab1:
     else:
         st.info("Nenhuma ordem fechada para exibir métricas avançadas.")
 
+    # Monte Carlo: distribuição de drawdown e risco de ruína reamostrando as ordens fechadas
+    st.header("Monte Carlo de Risco por Robô")
+    if not df_closed.empty:
+        col_mc1, col_mc2, col_mc3 = st.columns(3)
+        with col_mc1:
+            alavancagens_mc = st.multiselect("Alavancagens", [1, 2, 5, 10, 20, 50], default=[5, 10, 20], key="mc_alavancagens")
+        with col_mc2:
+            bloco_mc = st.number_input("Tamanho do bloco", min_value=1, max_value=50, value=1, key="mc_bloco")
+        with col_mc3:
+            perda_ruina_mc = st.slider("Ruína (% de perda)", 10, 90, 50, key="mc_ruina") / 100
+        resultados_mc = monte_carlo_por_estrategia(
+            df_closed, alavancagens=alavancagens_mc or None, bloco=int(bloco_mc), perda_ruina=perda_ruina_mc
+        )
+        linhas_mc = [
+            {"Robô": robo, "Alavancagem": alavancagem, **metricas}
+            for robo, por_alavancagem in resultados_mc.items()
+            for alavancagem, metricas in por_alavancagem.items()
+        ]
+        if linhas_mc:
+            mc_df = pd.DataFrame(linhas_mc)
+            mc_df['risco_ruina'] = mc_df['risco_ruina'] * 100
+            st.dataframe(mc_df.style.format({c: '{:.2f}' for c in mc_df.columns if c.startswith(('drawdown', 'equity', 'risco'))}), use_container_width=True)
+            st.caption("Drawdown e risco de ruína em %; recuperação em número de trades abaixo do topo anterior.")
+        else:
+            st.info("Ainda não há ordens fechadas suficientes para a simulação de Monte Carlo.")
+    else:
+        st.info("Nenhuma ordem fechada para a simulação de Monte Carlo.")
+
     # Filtros para ativar/desativar cada robô
     #removido ativar desativar robos
 
@@ -2301,7 +2321,7 @@ with tab2:
                 "Historical Win Rate (%)": f"{win_rate:.1f}",
                 "Avg PNL (%)": f"{avg_pnl:.2f}",
                 "Total Signals": total_signals,
-                "Aceito": "Sim" if row['aceito'] else "Não",
+                "Aceito": "Sim" if pd.notna(row['aceito']) and row['aceito'] else "Não",
                 "TP Percent": params['tp_percent'],
                 "SL Percent": params['sl_percent'],
                 "Quality Score": f"{row['quality_score']:.2f}" if 'quality_score' in row else "N/A",
@@ -2440,7 +2460,7 @@ with tab2:
                 "Historical Win Rate (%)": f"{win_rate:.1f}",
                 "Avg PNL (%)": f"{avg_pnl:.2f}",
                 "Total Signals": total_signals,
-                "Aceito": "Sim" if row['aceito'] else "Não",
+                "Aceito": "Sim" if pd.notna(row['aceito']) and row['aceito'] else "Não",
                 "TP Percent": params['tp_percent'],
                 "SL Percent": params['sl_percent'],
                 "Quality Score": f"{row['quality_score']:.2f}" if 'quality_score' in row else "N/A",
@@ -2547,7 +2567,7 @@ with tab2:
                 "Direção": (row['direcao'] + ' ' + row.get('modo_contrario_emoji', '') + ' ' + row.get('visual_tag_emoji', '')),
                 "Estratégia": row['strategy_name'],
                 "Timeframe": row['timeframe'],
-                "Aceito": "Sim" if row['aceito'] else "Não",
+                "Aceito": "Sim" if pd.notna(row['aceito']) and row['aceito'] else "Não",
                 "Quality Score": f"{row['quality_score']:.2f}" if 'quality_score' in row else "N/A"
             })
 
@@ -2593,8 +2613,7 @@ with tab2:
     alerts.extend(check_alerts(filtered_open))
 
     # Recarregar o DataFrame após fechar ordens
-    df = pd.read_csv(SINALS_FILE)
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    df = journal_store.consultar(SINALS_FILE)
     df_open = df[df['estado'] == 'aberto']
     df_closed = df[df['estado'] == 'fechado']
     filtered_df = df[
@@ -2837,7 +2856,16 @@ with tab5:
 
     def get_open_binance_orders():
         try:
-            positions = binance_client.futures_account()['positions']
+            # Usa o estado publicado pelo user data stream do bot quando estiver atual
+            estado_stream = load_stream_state()
+            if estado_stream is not None:
+                positions = [
+                    {"symbol": symbol, "positionAmt": p["positionAmt"], "entryPrice": p["entryPrice"],
+                     "unrealizedProfit": p["unrealizedProfit"], "leverage": p.get("leverage", 0)}
+                    for symbol, p in estado_stream["posicoes"].items()
+                ]
+            else:
+                positions = binance_client.futures_account()['positions']
             open_orders = []
             for pos in positions:
                 amt = float(pos['positionAmt'])
@@ -4,6 +4,8 @@ import json
 import os
 from datetime import datetime
 import uuid
+import journal_schema
+import journal_store
 from config import CONFIG, SYMBOLS, TIMEFRAMES
 from utils import logger
 from trade_manager import check_timeframe_direction_limit, check_active_trades, check_global_and_robot_limit
@@ -22,6 +24,9 @@ def load_data(file_path="sinais_detalhados.csv", columns=None):
             logger.warning(f"Arquivo {file_path} não encontrado.")
             return pd.DataFrame(columns=columns if columns else [])
         
+        if os.path.basename(file_path) == journal_schema.ARQUIVO:
+            # Diário: dtypes do esquema, apenas as colunas pedidas, partições quente e frias
+            return journal_store.consultar(file_path, colunas=columns)
         df = pd.read_csv(file_path)
         if columns:
             missing_cols = [col for col in columns if col not in df.columns]
@@ -255,6 +260,7 @@ def calculate_distances(entry_price, current_price, tp_price, sl_price):
         logger.error(f"Erro ao calcular distâncias: {e}")
         return {"tp_distance_percent": 0.0, "sl_distance_percent": 0.0}
 
+@journal_schema.com_trava
 def close_order_manually(signal_id, current_price):
     """
     Fecha uma ordem manualmente com base no signal_id e preço atual.
@@ -264,7 +270,7 @@ def close_order_manually(signal_id, current_price):
             logger.error("Arquivo sinais_detalhados.csv não encontrado.")
             return False
 
-        df = pd.read_csv("sinais_detalhados.csv")
+        df = journal_schema.ler_diario("sinais_detalhados.csv", compacto=False)
         if signal_id not in df['signal_id'].values:
             logger.error(f"Ordem com signal_id {signal_id} não encontrada.")
             return False
@@ -287,13 +293,14 @@ def close_order_manually(signal_id, current_price):
         df.loc[order_index, 'timestamp_saida'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         df.loc[order_index, 'estado'] = "fechado"
 
-        df.to_csv("sinais_detalhados.csv", index=False)
+        journal_schema.escrever_diario(df, "sinais_detalhados.csv")
         logger.info(f"Ordem {signal_id} fechada manualmente: Preço de saída={current_price}, Lucro/Perda={lucro_percentual:.2f}%")
         return True
     except Exception as e:
         logger.error(f"Erro ao fechar ordem manualmente {signal_id}: {e}")
         return False
 
+@journal_schema.com_trava
 def close_order(signal_id, exit_price, result="Manual"):
     """
     Fecha uma ordem no arquivo sinais_detalhados.csv com preço de saída e resultado especificado.
@@ -303,7 +310,7 @@ def close_order(signal_id, exit_price, result="Manual"):
             logger.error("Arquivo sinais_detalhados.csv não encontrado.")
             return False
 
-        df = pd.read_csv("sinais_detalhados.csv")
+        df = journal_schema.ler_diario("sinais_detalhados.csv", compacto=False)
         if signal_id not in df['signal_id'].values:
             logger.error(f"Ordem com signal_id {signal_id} não encontrada.")
             return False
@@ -326,7 +333,7 @@ def close_order(signal_id, exit_price, result="Manual"):
         df.loc[order_index, 'timestamp_saida'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         df.loc[order_index, 'estado'] = "fechado"
 
-        df.to_csv("sinais_detalhados.csv", index=False)
+        journal_schema.escrever_diario(df, "sinais_detalhados.csv")
         logger.info(f"Ordem {signal_id} fechada: Preço de saída={exit_price}, Resultado={result}, Lucro/Perda={lucro_percentual:.2f}%")
         return True
     except Exception as e:
@@ -342,7 +349,7 @@ def get_tp_sl(signal_id):
             logger.error("Arquivo sinais_detalhados.csv não encontrado.")
             return None
 
-        df = pd.read_csv("sinais_detalhados.csv")
+        df = journal_schema.ler_diario("sinais_detalhados.csv", compacto=False)
         if signal_id not in df['signal_id'].values:
             logger.error(f"Ordem com signal_id {signal_id} não encontrada.")
             return None
@@ -378,7 +385,7 @@ def check_alerts(client, threshold_percent=0.1):
             logger.warning("Arquivo sinais_detalhados.csv não encontrado. Nenhum alerta verificado.")
             return []
 
-        df = pd.read_csv("sinais_detalhados.csv")
+        df = journal_schema.ler_diario("sinais_detalhados.csv", compacto=False)
         open_orders = df[df['estado'] == 'aberto']
         if open_orders.empty:
             logger.info("Nenhuma ordem aberta para verificar alertas.")
@@ -468,13 +475,7 @@ def reset_bot_data(password_input):
                 os.rename(file, backup_name)
         
         # Recriar arquivos vazios com estrutura correta
-        df_sinais = pd.DataFrame(columns=[
-            'signal_id', 'par', 'direcao', 'preco_entrada', 'preco_saida', 'quantity',
-            'lucro_percentual', 'pnl_realizado', 'resultado', 'timestamp', 'timestamp_saida',
-            'estado', 'strategy_name', 'contributing_indicators', 'localizadores',
-            'motivos', 'timeframe', 'aceito', 'parametros', 'quality_score'
-        ])
-        df_sinais.to_csv("sinais_detalhados.csv", index=False)
+        journal_schema.garantir_diario("sinais_detalhados.csv")
         
         df_missed = pd.DataFrame(columns=[
             'timestamp', 'robot_name', 'par', 'timeframe', 'direcao',
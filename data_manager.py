@@ -1,8 +1,18 @@
+import numpy as np
 import pandas as pd  # Importação adicionada para pd
-import os  # Importação adicionada para os
 from datetime import datetime, timedelta  # Importação adicionada para datetime e timedelta
 import pytz
 from utils import logger, api_call_with_retry
+import clock
+import audit_outbox
+
+# Quando definido (usar_resampler), os timeframes do resampler são derivados de um único fluxo de 1m
+_resampler = None
+
+def usar_resampler(resampler):
+    """Direciona get_historical_data para um resampler.Resampler (None volta às klines por timeframe)."""
+    global _resampler
+    _resampler = resampler
 
 def convert_timestamp_to_local(timestamp):
     """Converte timestamp da Binance (UTC) para horário local"""
@@ -10,6 +20,55 @@ def convert_timestamp_to_local(timestamp):
     local_timezone = datetime.now().astimezone().tzinfo
     return utc_time.astimezone(local_timezone)
 
+# Layout das klines da Binance (o 12º campo, "ignore", é descartado)
+KLINE_DTYPE = np.dtype([
+    ("timestamp", np.int64), ("open", np.float64), ("high", np.float64), ("low", np.float64),
+    ("close", np.float64), ("volume", np.float64), ("close_time", np.int64), ("quote_asset_volume", np.float64),
+    ("number_of_trades", np.int64), ("taker_buy_base_asset_volume", np.float64),
+    ("taker_buy_quote_asset_volume", np.float64),
+])
+OHLCV = ["timestamp", "open", "high", "low", "close", "volume"]
+
+def decodificar_klines(klines):
+    """
+    Converte a resposta de get_klines em um array estruturado tipado (KLINE_DTYPE) numa única passada.
+
+    Args:
+        klines (list): Linhas da Binance (timestamps em epoch ms, preços e volumes em string).
+
+    Returns:
+        np.ndarray: Array estruturado com os campos de KLINE_DTYPE (vazio se não houver klines).
+    """
+    campos = len(KLINE_DTYPE.names)
+    return np.fromiter((tuple(k[:campos]) for k in klines or ()), dtype=KLINE_DTYPE, count=len(klines or ()))
+
+def timestamps_locais(epoch_ms):
+    """Versão vetorizada de convert_timestamp_to_local para um array de epoch ms."""
+    local_timezone = datetime.now().astimezone().tzinfo
+    return pd.to_datetime(np.asarray(epoch_ms, dtype=np.int64), unit="ms", utc=True).tz_convert(local_timezone)
+
+def klines_para_dataframe(klines, colunas=OHLCV, horario_local=True):
+    """
+    Monta o DataFrame de klines já tipado a partir de decodificar_klines.
+
+    Args:
+        klines (list|np.ndarray): Resposta de get_klines ou array de decodificar_klines.
+        colunas (list): Campos de KLINE_DTYPE a incluir (padrão: OHLCV).
+        horario_local (bool): Converte timestamp/close_time para datetime no fuso local
+            (False mantém epoch ms).
+
+    Returns:
+        pd.DataFrame: Colunas pedidas, na ordem dada.
+    """
+    velas = klines if isinstance(klines, np.ndarray) else decodificar_klines(klines)
+    dados = {}
+    for coluna in colunas:
+        valores = velas[coluna]
+        if horario_local and coluna in ("timestamp", "close_time"):
+            valores = timestamps_locais(valores)
+        dados[coluna] = valores
+    return pd.DataFrame(dados, columns=list(colunas))
+
 def get_historical_data(client, symbol, timeframe, limit=100):
     """
     Obtém dados históricos de preços para um dado símbolo e timeframe.
@@ -24,28 +83,15 @@ def get_historical_data(client, symbol, timeframe, limit=100):
         pd.DataFrame: DataFrame com os dados históricos.
     """
     try:
+        if _resampler is not None and timeframe in _resampler.timeframes:
+            return _resampler.historico(client, symbol, timeframe, limit)
         logger.info(f"Obtendo dados históricos para {symbol} no timeframe {timeframe}...")
         klines = api_call_with_retry(client.get_klines, symbol=symbol, interval=timeframe, limit=limit)
         if not klines:
             logger.warning(f"Nenhum dado histórico retornado para {symbol} ({timeframe}).")
             return pd.DataFrame()
         
-        df = pd.DataFrame(klines, columns=[
-            'timestamp', 'open', 'high', 'low', 'close', 'volume',
-            'close_time', 'quote_asset_volume', 'number_of_trades',
-            'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'
-        ])
-        
-        # Converter timestamps para horário local
-        df['timestamp'] = df['timestamp'].apply(convert_timestamp_to_local)
-        df['close_time'] = df['close_time'].apply(convert_timestamp_to_local)
-        
-        df = df[['timestamp', 'open', 'high', 'low', 'close', 'volume']]
-        df['close'] = df['close'].astype(float)
-        df['open'] = df['open'].astype(float)
-        df['high'] = df['high'].astype(float)
-        df['low'] = df['low'].astype(float)
-        df['volume'] = df['volume'].astype(float)
+        df = klines_para_dataframe(klines)
         
         if len(df) < limit:
             logger.warning(f"Dados insuficientes para {symbol} no timeframe {timeframe}: {len(df)} candles obtidos, esperado {limit}.")
@@ -102,19 +148,12 @@ def get_current_price(client, symbol, config):
             return None
         price = float(price_data['price'])
         
-        # Registrar preço em precos_log.csv
-        log_entry = {
-            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        # Registrar preço em precos_log.csv (gravado em lote pela fila de auditoria)
+        audit_outbox.enviar(audit_outbox.PRECOS, {
+            'timestamp': clock.now().strftime("%Y-%m-%d %H:%M:%S"),
             'par': symbol,
             'price': price
-        }
-        columns = ['timestamp', 'par', 'price']
-        if os.path.exists("precos_log.csv"):
-            df = pd.read_csv("precos_log.csv")
-        else:
-            df = pd.DataFrame(columns=columns)
-        df = pd.concat([df, pd.DataFrame([log_entry])], ignore_index=True)
-        df.to_csv("precos_log.csv", index=False)
+        })
         logger.info(f"Preço salvo em 'precos_log.csv' para {symbol}: {price}")
         
         return price
@@ -167,7 +206,7 @@ def is_candle_closed(client, symbol, timeframe):
         
         close_time_ms = klines[0][6]  # Close time em milissegundos
         close_time = datetime.fromtimestamp(close_time_ms / 1000)
-        current_time = datetime.now()
+        current_time = clock.now()
         
         tf_minutes = {
             "1m": 1, "5m": 5, "15m": 15, "1h": 60,
@@ -0,0 +1,219 @@
+import threading
+from decimal import Decimal, ROUND_DOWN, ROUND_HALF_UP
+from binance.exceptions import BinanceAPIException
+import clock
+from utils import logger
+
+# Códigos da Binance que indicam que a configuração já está no valor pedido
+NO_NEED_TO_CHANGE_MARGIN_TYPE = -4046
+
+
+class SymbolFilterCache:
+    """
+    Cache de metadados por símbolo (filtros da exchange, alavancagem e tipo de margem).
+
+    Os filtros (stepSize, tickSize, minNotional) vêm de uma única chamada a
+    futures_exchange_info e a alavancagem/tipo de margem atuais de futures_symbol_config.
+    Tudo é recarregado quando o TTL expira, de modo que cada ordem custa apenas as
+    requisições de criação de ordem.
+    """
+    def __init__(self, client, ttl=3600):
+        """
+        Inicializa o cache sem chamar a API (o carregamento é feito no primeiro uso).
+
+        Args:
+            client: Cliente Binance (binance.client.Client).
+            ttl (int): Tempo de vida do cache em segundos.
+        """
+        self.client = client
+        self.ttl = ttl
+        self.filtros = {}
+        self.alavancagens = {}
+        self.margin_types = {}
+        self._carregado_em = 0.0
+        self._lock = threading.Lock()
+
+    def _expirado(self):
+        return not self.filtros or (clock.time() - self._carregado_em) > self.ttl
+
+    def carregar(self, forcar=False):
+        """
+        Carrega (ou recarrega) os filtros e a configuração de alavancagem de todos os símbolos.
+
+        Args:
+            forcar (bool): Se True, ignora o TTL e recarrega imediatamente.
+        """
+        with self._lock:
+            if not forcar and not self._expirado():
+                return
+            info = self.client.futures_exchange_info()
+            filtros = {}
+            for s in info.get('symbols', []):
+                f = {flt['filterType']: flt for flt in s.get('filters', [])}
+                lot = f.get('LOT_SIZE', {})
+                market_lot = f.get('MARKET_LOT_SIZE', lot)
+                filtros[s['symbol']] = {
+                    'step_size': Decimal(lot.get('stepSize', '0.001')),
+                    'min_qty': Decimal(lot.get('minQty', '0')),
+                    'market_step_size': Decimal(market_lot.get('stepSize', lot.get('stepSize', '0.001'))),
+                    'tick_size': Decimal(f.get('PRICE_FILTER', {}).get('tickSize', '0.0001')),
+                    'min_notional': Decimal(f.get('MIN_NOTIONAL', {}).get('notional', '0')),
+                }
+            self.filtros = filtros
+
+            try:
+                configs = self.client.futures_symbol_config()
+                self.alavancagens = {c['symbol']: int(c['leverage']) for c in configs if 'leverage' in c}
+                self.margin_types = {c['symbol']: str(c.get('marginType', '')).upper() for c in configs}
+            except Exception as e:
+                # Sem a configuração atual, a primeira ordem de cada símbolo envia a alavancagem
+                logger.warning(f"Não foi possível carregar alavancagem/margem atuais: {e}")
+                self.alavancagens = {}
+                self.margin_types = {}
+
+            self._carregado_em = clock.time()
+            logger.info(f"Cache de filtros da exchange carregado: {len(filtros)} símbolos (TTL {self.ttl}s)")
+
+    def obter_filtros(self, par):
+        """
+        Retorna os filtros de um símbolo, recarregando o cache se o TTL tiver expirado.
+
+        Args:
+            par (str): Par de negociação (ex.: "DOGEUSDT").
+
+        Returns:
+            dict: Filtros do símbolo ou None se o símbolo não existir.
+        """
+        if self._expirado():
+            self.carregar()
+        return self.filtros.get(par)
+
+    @staticmethod
+    def _formatar(valor):
+        return format(valor.normalize(), 'f')
+
+    def arredondar_quantidade(self, par, quantidade, mercado=True):
+        """
+        Arredonda a quantidade para baixo no múltiplo do stepSize do símbolo.
+
+        Args:
+            par (str): Par de negociação.
+            quantidade (float): Quantidade bruta.
+            mercado (bool): Se True, usa o MARKET_LOT_SIZE (ordens a mercado).
+
+        Returns:
+            str: Quantidade arredondada pronta para envio (ex.: "123.4").
+        """
+        filtros = self.obter_filtros(par)
+        if not filtros:
+            return str(quantidade)
+        step = filtros['market_step_size'] if mercado else filtros['step_size']
+        qtd = (Decimal(str(quantidade)) / step).to_integral_value(rounding=ROUND_DOWN) * step
+        return self._formatar(qtd)
+
+    def arredondar_preco(self, par, preco):
+        """
+        Arredonda o preço para o múltiplo mais próximo do tickSize do símbolo.
+
+        Args:
+            par (str): Par de negociação.
+            preco (float): Preço bruto.
+
+        Returns:
+            str: Preço arredondado pronto para envio.
+        """
+        filtros = self.obter_filtros(par)
+        if not filtros:
+            return str(preco)
+        tick = filtros['tick_size']
+        valor = (Decimal(str(preco)) / tick).to_integral_value(rounding=ROUND_HALF_UP) * tick
+        return self._formatar(valor)
+
+    def validar_notional(self, par, quantidade, preco):
+        """
+        Verifica se a ordem respeita minQty e minNotional do símbolo.
+
+        Args:
+            par (str): Par de negociação.
+            quantidade (str|float): Quantidade já arredondada.
+            preco (str|float): Preço de referência.
+
+        Returns:
+            bool: True se a ordem pode ser enviada.
+        """
+        filtros = self.obter_filtros(par)
+        if not filtros:
+            return True
+        qtd = Decimal(str(quantidade))
+        if qtd <= 0 or qtd < filtros['min_qty']:
+            return False
+        return qtd * Decimal(str(preco)) >= filtros['min_notional']
+
+    def garantir_alavancagem(self, par, leverage):
+        """
+        Altera a alavancagem apenas quando ela difere do valor em cache.
+
+        Args:
+            par (str): Par de negociação.
+            leverage (int): Alavancagem desejada.
+
+        Returns:
+            bool: True se uma chamada à API foi feita.
+        """
+        if self._expirado():
+            self.carregar()
+        leverage = int(leverage)
+        if self.alavancagens.get(par) == leverage:
+            logger.debug(f"Alavancagem de {par} já está em {leverage}x (cache). Chamada ignorada.")
+            return False
+        self.client.futures_change_leverage(symbol=par, leverage=leverage)
+        self.alavancagens[par] = leverage
+        return True
+
+    def garantir_margin_type(self, par, margin_type):
+        """
+        Altera o tipo de margem apenas quando ele difere do valor em cache.
+
+        Args:
+            par (str): Par de negociação.
+            margin_type (str): "ISOLATED" ou "CROSSED".
+
+        Returns:
+            bool: True se uma chamada à API foi feita.
+        """
+        if self._expirado():
+            self.carregar()
+        margin_type = margin_type.upper()
+        if self.margin_types.get(par) == margin_type:
+            return False
+        try:
+            self.client.futures_change_margin_type(symbol=par, marginType=margin_type)
+        except BinanceAPIException as e:
+            if e.code != NO_NEED_TO_CHANGE_MARGIN_TYPE:
+                raise
+        self.margin_types[par] = margin_type
+        return True
+
+
+_caches = {}
+
+
+def get_symbol_filters(client, ttl=None):
+    """
+    Retorna o cache de filtros compartilhado para um cliente Binance.
+
+    Args:
+        client: Cliente Binance.
+        ttl (int): Tempo de vida do cache em segundos (exchange_info_ttl). None mantém o TTL
+            do cache existente (3600 ao criar).
+
+    Returns:
+        SymbolFilterCache: Instância única por cliente.
+    """
+    cache = _caches.get(id(client))
+    if cache is None or cache.client is not client:
+        cache = SymbolFilterCache(client, ttl=3600 if ttl is None else ttl)
+        _caches[id(client)] = cache
+    elif ttl is not None:
+        cache.ttl = ttl
+    return cache
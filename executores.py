@@ -1,16 +1,20 @@
-import pandas as pd
 import json
+import uuid
 from binance.enums import SIDE_BUY, SIDE_SELL, ORDER_TYPE_MARKET, ORDER_TYPE_LIMIT
-from trade_manager import check_timeframe_direction_limit, check_active_trades
+import audit_outbox
+from trade_manager import check_timeframe_direction_limit, check_active_trades, get_local_timestamp
+from exchange_filters import get_symbol_filters
+from order_executor import enviar_protecoes_em_lote, gerar_client_order_id
 
 def configurar_alavancagem(client, par, leverage):
+    from config import CONFIG
     try:
-        client.futures_change_leverage(symbol=par.replace('/', ''), leverage=leverage)
-        print(f"[EXECUTOR] Alavancagem configurada para {par}: {leverage}x")
+        if get_symbol_filters(client, ttl=CONFIG.get('exchange_info_ttl', 3600)).garantir_alavancagem(par.replace('/', ''), leverage):
+            print(f"[EXECUTOR] Alavancagem configurada para {par}: {leverage}x")
     except Exception as e:
         print(f"[EXECUTOR] Erro ao configurar alavancagem: {e}")
 
-def executar_ordem(client, par, direcao, capital, stop_loss, take_profit, mercado='futures', dry_run=False):
+def executar_ordem(client, par, direcao, capital, stop_loss, take_profit, mercado='futures', dry_run=False, signal_id=None):
     # Checagem de pausa de ordens
     try:
         with open("config.json", "r") as f:
@@ -37,8 +41,10 @@ def executar_ordem(client, par, direcao, capital, stop_loss, take_profit, mercad
     )
     if not can_open:
         print(f"[EXECUTOR] Limite de trades simultâneos atingido para {strategy_name} em {par}/{timeframe}/{direcao}. Ordem não será criada.")
-        with open("oportunidades_perdidas.csv", "a") as f:
-            f.write(f"{{}} ,{{}},{{}},{{}},{{}},N/A,N/A,Limite de trades simultâneos atingido\n".format(pd.Timestamp.now(), strategy_name, par, timeframe, direcao))
+        audit_outbox.enviar(audit_outbox.OPORTUNIDADES, {
+            'timestamp': get_local_timestamp(), 'robot_name': strategy_name, 'par': par, 'timeframe': timeframe,
+            'direcao': direcao, 'reason': 'Limite de trades simultâneos atingido',
+        })
         return
 
     if dry_run:
@@ -46,38 +52,54 @@ def executar_ordem(client, par, direcao, capital, stop_loss, take_profit, mercad
         return
     
     lado = SIDE_BUY if direcao == "buy" else SIDE_SELL
+    # clientOrderIds derivados do signal_id permitem ao user data stream casar as execuções
+    signal_id = signal_id or str(uuid.uuid4())
     try:
         preco = float(client.futures_symbol_ticker(symbol=par.replace('/', ''))['price'])
-        quantidade = (capital * CONFIG["leverage"]) / preco
+        filtros = get_symbol_filters(client, ttl=CONFIG.get('exchange_info_ttl', 3600))
+        quantidade = filtros.arredondar_quantidade(par.replace('/', ''), (capital * CONFIG["leverage"]) / preco)
+        if not filtros.validar_notional(par.replace('/', ''), quantidade, preco):
+            print(f"[EXECUTOR] Quantidade {quantidade} abaixo do mínimo da exchange para {par}. Ordem não será criada.")
+            return
         
         if mercado == 'futures':
-            client.futures_change_margin_type(symbol=par.replace('/', ''), marginType=CONFIG["margin_type"])
+            filtros.garantir_margin_type(par.replace('/', ''), CONFIG["margin_type"])
             ordem = client.futures_create_order(
                 symbol=par.replace('/', ''),
                 side=lado,
                 type=ORDER_TYPE_MARKET,
-                quantity=quantidade
-            )
-            sl_preco = preco * (1 - stop_loss / 100) if direcao == "buy" else preco * (1 + stop_loss / 100)
-            tp_preco = preco * (1 + take_profit / 100) if direcao == "buy" else preco * (1 - take_profit / 100)
-            client.futures_create_order(
-                symbol=par.replace('/', ''),
-                side=SIDE_SELL if direcao == "buy" else SIDE_BUY,
-                type=ORDER_TYPE_LIMIT,
-                quantity=quantidade,
-                price=tp_preco,
-                stopPrice=tp_preco,
-                timeInForce='GTC'
-            )
-            client.futures_create_order(
-                symbol=par.replace('/', ''),
-                side=SIDE_SELL if direcao == "buy" else SIDE_BUY,
-                type=ORDER_TYPE_LIMIT,
                 quantity=quantidade,
-                price=sl_preco,
-                stopPrice=sl_preco,
-                timeInForce='GTC'
+                newClientOrderId=gerar_client_order_id(signal_id, "en")
             )
+            sl_preco = filtros.arredondar_preco(par.replace('/', ''), preco * (1 - stop_loss / 100) if direcao == "buy" else preco * (1 + stop_loss / 100))
+            tp_preco = filtros.arredondar_preco(par.replace('/', ''), preco * (1 + take_profit / 100) if direcao == "buy" else preco * (1 - take_profit / 100))
+            if CONFIG.get('order_placement_mode', 'sequential') == 'batch':
+                _, _, latencia = enviar_protecoes_em_lote(
+                    client, par.replace('/', ''), SIDE_SELL if direcao == "buy" else SIDE_BUY, quantidade, tp_preco, sl_preco,
+                    signal_id=signal_id
+                )
+                print(f"[EXECUTOR] TP/SL enviados em lote para {par} ({latencia:.1f}ms)")
+            else:
+                client.futures_create_order(
+                    symbol=par.replace('/', ''),
+                    side=SIDE_SELL if direcao == "buy" else SIDE_BUY,
+                    type=ORDER_TYPE_LIMIT,
+                    quantity=quantidade,
+                    price=tp_preco,
+                    stopPrice=tp_preco,
+                    timeInForce='GTC',
+                    newClientOrderId=gerar_client_order_id(signal_id, "tp")
+                )
+                client.futures_create_order(
+                    symbol=par.replace('/', ''),
+                    side=SIDE_SELL if direcao == "buy" else SIDE_BUY,
+                    type=ORDER_TYPE_LIMIT,
+                    quantity=quantidade,
+                    price=sl_preco,
+                    stopPrice=sl_preco,
+                    timeInForce='GTC',
+                    newClientOrderId=gerar_client_order_id(signal_id, "sl")
+                )
             print(f"[EXECUTOR] Ordem {direcao} executada em {par}: {ordem}")
     except Exception as e:
         print(f"[EXECUTOR] Erro ao executar ordem: {e}")
\ No newline at end of file
@@ -3,6 +3,7 @@ import numpy as np
 import uuid
 from datetime import datetime, timedelta
 import json
+from journal_schema import escrever_diario
 
 # Configurações
 PAIRS = ["XRPUSDT", "DOGEUSDT", "TRXUSDT"]
@@ -93,7 +94,7 @@ def generate_historical_data():
 
     # Criar DataFrame e salvar no arquivo
     df = pd.DataFrame(data, columns=COLUMNS)
-    df.to_csv("sinais_detalhados.csv", index=False)
+    escrever_diario(df, "sinais_detalhados.csv")
     print(f"Gerados {len(df)} sinais históricos. Total de TP: {len(df[df['resultado'] == 'TP'])}, Total de SL: {len(df[df['resultado'] == 'SL'])}")
     print("Dados salvos em 'sinais_detalhados.csv'.")
 
@@ -9,12 +9,13 @@ import time
 import logging
 from dotenv import load_dotenv
 from notification_manager import send_telegram_alert
+import metrics
+from utils import configurar_logging
+from market_scanner import universo_atual
+from journal_schema import ler_diario
+from collections import defaultdict
 
-logging.basicConfig(
-    filename="bot.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+configurar_logging()
 logger = logging.getLogger(__name__)
 
 load_dotenv()
@@ -27,17 +28,17 @@ class GrokPeriodicCheck:
         self.base_url = "https://api.x.ai/v1/chat/completions"
         self.last_check = {}
         self.cache_file = os.path.join(self.data_dir, "grok_insights_cache.json")
-        self.ma_history = {pair: [] for pair in ["TRXUSDT", "DOGEUSDT", "XRPUSDT"]}
-        self.pattern_history = {pair: [] for pair in ["TRXUSDT", "DOGEUSDT", "XRPUSDT"]}
+        self.ma_history = defaultdict(list)
+        self.pattern_history = defaultdict(list)
         self.ma_study_file = os.path.join(self.data_dir, "ma_study.json")
         self.pattern_study_file = os.path.join(self.data_dir, "pattern_study.json")
-        self.prediction_history = {pair: [] for pair in ["TRXUSDT", "DOGEUSDT", "XRPUSDT"]}
+        self.prediction_history = defaultdict(list)
         self.prediction_study_file = os.path.join(self.data_dir, "prediction_study.json")
         os.makedirs(self.data_dir, exist_ok=True)
 
     async def fetch_data(self):
         try:
-            ordens_df = pd.read_csv(os.path.join(self.data_dir, "sinais_detalhados.csv"))
+            ordens_df = ler_diario(os.path.join(self.data_dir, "sinais_detalhados.csv"))
             precos_df = pd.read_csv(os.path.join(self.data_dir, "precos_log.csv"))
             return ordens_df, precos_df
         except Exception as e:
@@ -56,33 +57,34 @@ class GrokPeriodicCheck:
         if cache_key in cache:
             logger.info(f"Usando cache para {pair}")
             return cache[cache_key]
-        async with aiohttp.ClientSession() as session:
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            payload = {
-                "model": "grok-3-latest",
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.3,
-                "max_tokens": 1200,
-                "stream": False
-            }
-            try:
-                async with session.post(self.base_url, json=payload, headers=headers) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        result = data["choices"][0]["message"]["content"]
-                        cache[cache_key] = result
-                        with open(self.cache_file, "w") as f:
-                            json.dump(cache, f)
-                        return result
-                    else:
-                        logger.error(f"Erro na API para {pair}: {response.status}")
-                        return None
-            except Exception as e:
-                logger.error(f"Exceção na API para {pair}: {e}")
-                return None
+        with metrics.span("grok", pair):
+            async with aiohttp.ClientSession() as session:
+                headers = {
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json"
+                }
+                payload = {
+                    "model": "grok-3-latest",
+                    "messages": [{"role": "user", "content": prompt}],
+                    "temperature": 0.3,
+                    "max_tokens": 1200,
+                    "stream": False
+                }
+                try:
+                    async with session.post(self.base_url, json=payload, headers=headers) as response:
+                        if response.status == 200:
+                            data = await response.json()
+                            result = data["choices"][0]["message"]["content"]
+                            cache[cache_key] = result
+                            with open(self.cache_file, "w") as f:
+                                json.dump(cache, f)
+                            return result
+                        else:
+                            logger.error(f"Erro na API para {pair}: {response.status}")
+                            return None
+                except Exception as e:
+                    logger.error(f"Exceção na API para {pair}: {e}")
+                    return None
 
     def study_moving_averages(self, pair, close, volume, ema12, ema50, sma20, ema12_prev, ema50_prev, sma20_prev, crossover_ema, crossover_sma, volume_increase):
         study_data = {
@@ -236,7 +238,8 @@ class GrokPeriodicCheck:
         ordens_df, precos_df = await self.fetch_data()
         if ordens_df is None or precos_df is None:
             return
-        for pair in ["TRXUSDT", "DOGEUSDT", "XRPUSDT"]:
+        # Mesmo universo do loop principal (publicado pelo market_scanner)
+        for pair in universo_atual():
             if pair in self.last_check and (datetime.now() - self.last_check[pair]).total_seconds() < 600:
                 continue
             open_orders = ordens_df[(ordens_df["par"] == pair) & (ordens_df["estado"] == "aberto")]
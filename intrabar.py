@@ -0,0 +1,71 @@
+import numpy as np
+
+MINUTO_MS = 60_000
+TF_MS = {"1m": MINUTO_MS, "5m": 5 * MINUTO_MS, "15m": 15 * MINUTO_MS, "1h": 60 * MINUTO_MS, "4h": 240 * MINUTO_MS, "1d": 1440 * MINUTO_MS}
+
+
+def primeira_saida(velas_1m, inicio_ms, tp_preco, sl_preco, direcao, limite_ms=None):
+    """
+    Encontra a primeira vela de 1m, a partir de inicio_ms, em que o TP ou o SL é tocado.
+
+    Em cada bloco calcula o máximo/mínimo acumulado de high/low (séries monotônicas) e localiza
+    o primeiro cruzamento de cada nível com searchsorted. Os blocos crescem geometricamente,
+    então trades curtos leem poucas velas e trades longos fazem poucas passadas.
+    Se TP e SL são tocados na mesma vela de 1m, assume o SL (conservador).
+
+    Args:
+        velas_1m (dict): Arrays timestamp (epoch ms), high, low e close de 1m.
+        inicio_ms (int): Instante da entrada (fechamento da vela do sinal).
+        tp_preco (float): Nível de take profit.
+        sl_preco (float): Nível de stop loss.
+        direcao (int): 1 para LONG, -1 para SHORT.
+        limite_ms (int): Fim da busca (exclusivo); a posição é encerrada por Timeout nesse ponto.
+
+    Returns:
+        tuple: (saida_ms, preco_saida, resultado) com resultado "TP", "SL" ou "Timeout";
+            preco_saida é None se não há velas de 1m após a entrada.
+    """
+    ts = velas_1m["timestamp"]
+    high, low = velas_1m["high"], velas_1m["low"]
+    a = int(np.searchsorted(ts, inicio_ms))
+    b = int(np.searchsorted(ts, limite_ms)) if limite_ms is not None else len(ts)
+    j, bloco = a, 256
+    while j < b:
+        k = min(j + bloco, b)
+        maximo = np.maximum.accumulate(high[j:k])
+        menos_minimo = -np.minimum.accumulate(low[j:k])
+        if direcao == 1:
+            i_tp = np.searchsorted(maximo, tp_preco)
+            i_sl = np.searchsorted(menos_minimo, -sl_preco)
+        else:
+            i_tp = np.searchsorted(menos_minimo, -tp_preco)
+            i_sl = np.searchsorted(maximo, sl_preco)
+        if i_sl < k - j and i_sl <= i_tp:
+            return int(ts[j + i_sl]), sl_preco, "SL"
+        if i_tp < k - j:
+            return int(ts[j + i_tp]), tp_preco, "TP"
+        j, bloco = k, bloco * 4
+    if b > a:
+        return int(ts[b - 1]) + MINUTO_MS, float(velas_1m["close"][b - 1]), "Timeout"
+    return inicio_ms, None, "Timeout"
+
+
+class ResolvedorIntrabar:
+    """
+    Resolve saídas de sinais de um timeframe maior usando as velas de 1m alinhadas.
+    Tem a mesma assinatura de parameter_sweep.resolver_mesmo_tf.
+    """
+    def __init__(self, velas_1m, tf):
+        self.velas_1m = velas_1m
+        self.tf_ms = TF_MS[tf]
+
+    def __call__(self, velas, i, fim, tp_preco, sl_preco, direcao):
+        ts = velas["timestamp"]
+        saida_ms, preco, resultado = primeira_saida(
+            self.velas_1m, int(ts[i]) + self.tf_ms, tp_preco, sl_preco, direcao, int(ts[fim - 1]) + self.tf_ms
+        )
+        if preco is None:
+            return i, float(velas["close"][i]), resultado
+        # Vela do timeframe do sinal em que a saída ocorreu (libera a próxima entrada)
+        j = max(int(np.searchsorted(ts, saida_ms, side="right")) - 1, i)
+        return j, preco, resultado
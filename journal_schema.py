@@ -0,0 +1,283 @@
+import functools
+import gzip
+import logging
+import os
+import threading
+try:
+    import fcntl
+except ImportError:  # Windows: só a trava entre threads
+    fcntl = None
+import numpy as np
+import pandas as pd
+import metrics
+
+logger = logging.getLogger("UltraBot")
+
+ARQUIVO = "sinais_detalhados.csv"
+# v1: cabeçalho variável, definido por quem criou o arquivo; v2: começa por COLUNAS (na ordem)
+VERSAO = 2
+FORMATO_DATA = "%Y-%m-%d %H:%M:%S"
+
+# Serializa, entre as threads do processo (loop principal, simulate_trade, user data stream),
+# as gravações e os ciclos ler-alterar-gravar do diário. Entre processos (bot, dashboard,
+# auto_close_orders) vale a trava de arquivo de trava_de(); anexar() e escrever_diario() tomam
+# as duas sempre; quem relê e regrava deve envolver o ciclo inteiro (ver com_trava).
+trava = threading.RLock()
+
+COLUNAS = [
+    'signal_id', 'par', 'direcao', 'preco_entrada', 'preco_saida', 'quantity',
+    'lucro_percentual', 'pnl_realizado', 'resultado', 'timestamp', 'timestamp_saida',
+    'estado', 'strategy_name', 'contributing_indicators', 'localizadores',
+    'motivos', 'timeframe', 'aceito', 'parametros', 'quality_score', 'modo_contrario', 'visual_tag', 'mode',
+    'binance_order_id', 'tp_order_id', 'sl_order_id', 'dry_run_id', 'score_tecnico', 'funding_rate',
+    'timeframes_analisados', 'combination_key', 'historical_win_rate', 'avg_pnl', 'side_performance',
+    'timeframe_weight',
+]
+
+CATEGORICAS = ('par', 'strategy_name', 'timeframe', 'estado', 'direcao', 'resultado', 'mode')
+FLOAT32 = ('preco_entrada', 'preco_saida', 'quantity', 'quality_score', 'score_tecnico', 'funding_rate',
+           'historical_win_rate', 'avg_pnl', 'timeframe_weight')
+FLOAT64 = ('lucro_percentual', 'pnl_realizado')
+BOOLEANAS = ('aceito', 'modo_contrario')
+DATAS = ('timestamp', 'timestamp_saida')
+TEXTO = tuple(c for c in COLUNAS if c not in CATEGORICAS + FLOAT32 + FLOAT64 + BOOLEANAS + DATAS)
+
+
+def tipos(compacto=True):
+    """
+    Dtypes de leitura por coluna.
+
+    Args:
+        compacto (bool): True para análise (categóricas, float32, datas e booleanos anuláveis);
+            False para ler-alterar-gravar (float64 e texto, datas mantidas como texto), sem perda
+            de precisão nem categorias fixas ao atribuir valores novos.
+
+    Returns:
+        dict: {coluna: dtype} (as colunas de DATAS ficam de fora; ver ler_diario).
+    """
+    if not compacto:
+        return {**{c: np.float64 for c in FLOAT32 + FLOAT64}, **{c: object for c in TEXTO + CATEGORICAS}}
+    return {
+        **{c: 'category' for c in CATEGORICAS},
+        **{c: np.float32 for c in FLOAT32},
+        **{c: np.float64 for c in FLOAT64},
+        **{c: 'boolean' for c in BOOLEANAS},
+        **{c: object for c in TEXTO},
+    }
+
+
+def cabecalho(caminho=ARQUIVO):
+    """Colunas do arquivo (primeira linha), ou [] se vazio. Aceita partições .csv.gz."""
+    abrir = gzip.open if caminho.endswith('.gz') else open
+    with abrir(caminho, 'rt', encoding='utf-8') as f:
+        linha = f.readline().strip()
+    return linha.split(',') if linha else []
+
+
+def versao(caminho=ARQUIVO):
+    """Versão do esquema de um diário existente, deduzida do cabeçalho."""
+    return VERSAO if cabecalho(caminho)[:len(COLUNAS)] == COLUNAS else 1
+
+
+def aplicar_tipos(df, compacto=True):
+    """Converte um DataFrame do diário para os dtypes do esquema (valores inválidos viram nulos)."""
+    df = df.copy()
+    for coluna, tipo in tipos(compacto).items():
+        if coluna not in df.columns:
+            continue
+        if tipo in (np.float32, np.float64):
+            df[coluna] = pd.to_numeric(df[coluna], errors='coerce').astype(tipo)
+        elif tipo == 'boolean':
+            df[coluna] = df[coluna].map({True: True, False: False, 'True': True, 'False': False,
+                                         'true': True, 'false': False}).astype('boolean')
+        else:
+            df[coluna] = df[coluna].astype(tipo)
+    if compacto:
+        for coluna in DATAS:
+            if coluna in df.columns and not pd.api.types.is_datetime64_any_dtype(df[coluna]):
+                df[coluna] = pd.to_datetime(df[coluna], errors='coerce', format='mixed')
+    return df
+
+
+def vazio(colunas, compacto=True):
+    """DataFrame sem linhas com as colunas pedidas e os dtypes do esquema."""
+    df = pd.DataFrame({c: pd.Series(dtype=tipos(compacto).get(c, object)) for c in colunas})
+    if compacto:
+        for coluna in DATAS:
+            if coluna in df.columns:
+                df[coluna] = pd.Series(dtype='datetime64[ns]')
+    return df
+
+
+def ler_diario(caminho=ARQUIVO, colunas=None, compacto=True):
+    """
+    Lê o diário com dtypes explícitos (sem inferência) e, opcionalmente, só as colunas pedidas.
+
+    Args:
+        caminho (str): Arquivo do diário.
+        colunas (list): Colunas a carregar (None = todas do arquivo). Colunas ausentes no arquivo
+            voltam vazias, com o dtype do esquema.
+        compacto (bool): Ver tipos().
+
+    Returns:
+        pd.DataFrame: Diário tipado.
+
+    Raises:
+        FileNotFoundError: Se o arquivo não existir (como pd.read_csv).
+    """
+    existentes = cabecalho(caminho)
+    if not existentes:
+        raise pd.errors.EmptyDataError(f"Diário {caminho} vazio.")
+    pedidas = list(colunas) if colunas else existentes
+    usar = [c for c in pedidas if c in existentes]
+    dtypes = {c: t for c, t in tipos(compacto).items() if c in usar}
+    datas = [c for c in DATAS if c in usar] if compacto else []
+    try:
+        df = pd.read_csv(caminho, usecols=usar, dtype=dtypes, parse_dates=datas, date_format=FORMATO_DATA)
+        if any(not pd.api.types.is_datetime64_any_dtype(df[c]) for c in datas):
+            df = aplicar_tipos(df, compacto)
+    except (ValueError, TypeError) as e:
+        # Linhas legadas fora do formato: lê como texto e converte tolerando valores inválidos
+        logger.debug("Leitura tipada de %s falhou (%s); convertendo de forma tolerante.", caminho, e)
+        df = aplicar_tipos(pd.read_csv(caminho, usecols=usar, dtype=str), compacto)
+    faltando = [c for c in pedidas if c not in df.columns]
+    if faltando:
+        preenchimento = vazio(faltando, compacto)
+        for coluna in faltando:
+            df[coluna] = preenchimento[coluna].reindex(df.index)
+    return df[pedidas]
+
+
+def normalizar_linha(dados):
+    """Linha pronta para o diário: registros de records.py são serializados aqui, na borda."""
+    return dados.para_journal() if hasattr(dados, 'para_journal') else dict(dados)
+
+
+def _formatar(df):
+    df = df.copy()
+    for coluna in DATAS:
+        if coluna in df.columns and pd.api.types.is_datetime64_any_dtype(df[coluna]):
+            df[coluna] = df[coluna].dt.strftime(FORMATO_DATA)
+    return df
+
+
+def garantir_diario(caminho=ARQUIVO):
+    """
+    Cria o diário com o cabeçalho do esquema ou migra um arquivo de versão anterior
+    (colunas reordenadas para COLUNAS; colunas desconhecidas vão para o fim).
+    """
+    if not os.path.exists(caminho) or os.path.getsize(caminho) == 0:
+        pd.DataFrame(columns=COLUNAS).to_csv(caminho, index=False)
+        logger.info(f"Diário {caminho} criado (esquema v{VERSAO}).")
+        return
+    if versao(caminho) == VERSAO:
+        return
+    df = pd.read_csv(caminho, dtype=str, keep_default_na=False, na_values=[''])
+    escrever_diario(df, caminho)
+    logger.info(f"Diário {caminho} migrado para o esquema v{VERSAO} ({len(df)} linhas).")
+
+
+def escrever_diario(df, caminho=ARQUIVO):
+    """
+    Regrava o diário inteiro na ordem do esquema, de forma atômica (arquivo temporário + replace).
+    Colunas fora do esquema são preservadas no fim. Caminhos .gz são gravados comprimidos.
+    """
+    extras = [c for c in df.columns if c not in COLUNAS]
+    temporario = f"{caminho}.tmp"
+    compressao = 'gzip' if caminho.endswith('.gz') else None
+    with trava_de(caminho), metrics.span("journal_write"):
+        _formatar(df).reindex(columns=COLUNAS + extras).to_csv(temporario, index=False, compression=compressao)
+        os.replace(temporario, caminho)
+
+
+def anexar(linhas, caminho=ARQUIVO):
+    """
+    Acrescenta linhas ao fim do diário sem reler o arquivo, na ordem do cabeçalho existente
+    (chaves fora do cabeçalho são descartadas).
+
+    Args:
+        linhas (list): Dicts ou registros (records.Signal/Position).
+        caminho (str): Arquivo do diário.
+    """
+    df = pd.DataFrame([normalizar_linha(linha) for linha in linhas])
+    with trava_de(caminho):
+        if not os.path.exists(caminho) or os.path.getsize(caminho) == 0:
+            garantir_diario(caminho)
+        colunas = cabecalho(caminho)
+        with metrics.span("journal_write"):
+            _formatar(df).reindex(columns=colunas).to_csv(caminho, mode='a', index=False, header=False)
+
+
+class TravaDiario:
+    """
+    Trava reentrante de um diário, válida entre threads e entre processos.
+
+    Toma `trava` (threads do processo) e, na primeira entrada da thread, um flock exclusivo em
+    `<caminho>.lock`. O arquivo de trava é separado porque escrever_diario() substitui o diário
+    por um arquivo novo (os.replace), e uma trava no próprio diário ficaria no arquivo antigo.
+    """
+    def __init__(self, caminho):
+        self.caminho = f"{caminho}.lock"
+        self._arquivo = None
+        self._profundidade = 0
+
+    def __enter__(self):
+        trava.acquire()
+        try:
+            if self._profundidade == 0 and fcntl is not None:
+                arquivo = open(self.caminho, "a")
+                try:
+                    fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX)
+                except BaseException:
+                    arquivo.close()
+                    raise
+                self._arquivo = arquivo
+        except BaseException:
+            trava.release()
+            raise
+        self._profundidade += 1
+        return self
+
+    def __exit__(self, *excecao):
+        self._profundidade -= 1
+        if self._profundidade == 0 and self._arquivo is not None:
+            fcntl.flock(self._arquivo.fileno(), fcntl.LOCK_UN)
+            self._arquivo.close()
+            self._arquivo = None
+        trava.release()
+
+
+_travas = {}
+
+
+def trava_de(caminho=ARQUIVO):
+    """TravaDiario do diário em `caminho` (uma por arquivo, compartilhada pelo processo)."""
+    chave = os.path.abspath(caminho)
+    with trava:
+        if chave not in _travas:
+            _travas[chave] = TravaDiario(chave)
+        return _travas[chave]
+
+
+def com_trava(funcao):
+    """Decorator: executa a função (um ciclo ler-alterar-gravar do diário ativo) sob trava_de()."""
+    @functools.wraps(funcao)
+    def envolvida(*args, **kwargs):
+        with trava_de(ARQUIVO):
+            return funcao(*args, **kwargs)
+    return envolvida
+
+
+class EscritorDiario:
+    """Substituto de CsvWriter para o diário: grava pelo esquema em modo append."""
+    def __init__(self, caminho=ARQUIVO):
+        self.filename = caminho
+        self.columns = COLUNAS
+        garantir_diario(caminho)
+
+    def write_row(self, data):
+        try:
+            anexar([data], self.filename)
+            logger.debug("Linha escrita no diário %s: %s", self.filename, data.get('signal_id'))
+        except Exception as e:
+            logger.error(f"Erro ao escrever no diário {self.filename}: {e}")
@@ -0,0 +1,179 @@
+import glob
+import os
+import pandas as pd
+import clock
+import metrics
+import journal_schema
+from journal_schema import ler_diario, escrever_diario
+from utils import logger
+
+DIRETORIO = "diario_arquivo"
+
+# Padrões da seção "journal_archive" do CONFIG
+ARQUIVAMENTO_PADRAO = {
+    "enabled": True,
+    "retention_days": 7,        # fechados há menos que isso continuam na partição quente
+    "interval_seconds": 3600,   # intervalo entre compactações no loop principal
+}
+
+
+def _datas(serie):
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    return pd.to_datetime(serie, errors='coerce', format='mixed')
+
+
+class JournalStore:
+    """
+    Diário particionado em quente/frio.
+
+    A partição quente é o próprio sinais_detalhados.csv: ordens abertas e fechadas recentemente,
+    que é tudo o que os leitores do caminho crítico (check_active_trades, OrderExecutor,
+    close_invalid_open_orders, GrokPeriodicCheck) precisam. compactar() move os fechados há mais
+    de `retencao_dias` para partições frias mensais comprimidas (sinais_AAAA-MM.csv.gz, pelo mês
+    de entrada), de modo que o tamanho da partição quente não cresce com o histórico.
+    consultar() lê as duas camadas como um único DataFrame, para análises e relatórios.
+    """
+    def __init__(self, caminho=journal_schema.ARQUIVO, diretorio=None, retencao_dias=None):
+        """
+        Args:
+            caminho (str): Partição quente (diário ativo).
+            diretorio (str): Diretório das partições frias (padrão: DIRETORIO ao lado do diário).
+            retencao_dias (float): Dias que um trade fechado permanece na partição quente.
+        """
+        self.caminho = caminho
+        self.diretorio = diretorio or os.path.join(os.path.dirname(caminho), DIRETORIO)
+        self.retencao_dias = ARQUIVAMENTO_PADRAO["retention_days"] if retencao_dias is None else retencao_dias
+        self.ultima_compactacao = None
+
+    def caminho_particao(self, mes):
+        return os.path.join(self.diretorio, f"sinais_{mes}.csv.gz")
+
+    def particoes(self, desde=None, ate=None):
+        """
+        Partições frias existentes, em ordem cronológica, podadas pelo intervalo pedido.
+
+        Returns:
+            list: Caminhos dos arquivos .csv.gz.
+        """
+        caminhos = sorted(glob.glob(os.path.join(self.diretorio, "sinais_*.csv.gz")))
+        primeiro = pd.Timestamp(desde).strftime("%Y-%m") if desde is not None else None
+        ultimo = pd.Timestamp(ate).strftime("%Y-%m") if ate is not None else None
+        selecionadas = []
+        for caminho in caminhos:
+            mes = os.path.basename(caminho)[len("sinais_"):-len(".csv.gz")]
+            if (primeiro and mes < primeiro) or (ultimo and mes > ultimo):
+                continue
+            selecionadas.append(caminho)
+        return selecionadas
+
+    def consultar(self, colunas=None, compacto=True, desde=None, ate=None, estado=None, incluir_frio=True):
+        """
+        Lê o diário abrangendo a partição quente e as frias.
+
+        Args:
+            colunas (list): Colunas a carregar (None = todas). Filtros usam colunas extras
+                internamente, sem alterar o resultado.
+            compacto (bool): Ver journal_schema.tipos().
+            desde (str|datetime): Entrada (timestamp) a partir de, inclusive.
+            ate (str|datetime): Entrada (timestamp) até, inclusive.
+            estado (str): Filtra por estado ('aberto', 'fechado').
+            incluir_frio (bool): False restringe a consulta à partição quente.
+
+        Returns:
+            pd.DataFrame: Uma linha por signal_id, na sua versão mais recente: a partição quente
+            guarda a linha 'aberto' e depois a 'fechado' de cada trade simulado, e uma cópia
+            quente prevalece sobre a fria. Linhas sem signal_id são mantidas. Partições frias
+            (mais antigas) vêm antes das quentes.
+        """
+        pedidas = list(colunas) if colunas else None
+        leitura = pedidas
+        if pedidas is not None:
+            auxiliares = ['signal_id'] + (['timestamp'] if desde is not None or ate is not None else [])
+            auxiliares += ['estado'] if estado is not None else []
+            leitura = pedidas + [c for c in auxiliares if c not in pedidas]
+        caminhos = (self.particoes(desde, ate) if incluir_frio else []) + [self.caminho]
+        with metrics.span("journal_query"):
+            partes = [ler_diario(c, leitura, compacto) for c in caminhos if os.path.exists(c)]
+            if not partes:
+                return journal_schema.vazio(pedidas or journal_schema.COLUNAS, compacto)
+            df = pd.concat(partes, ignore_index=True) if len(partes) > 1 else partes[0]
+            if len(partes) > 1 and compacto:
+                # Categorias diferentes entre partições viram object no concat
+                df = journal_schema.aplicar_tipos(df, compacto)
+            if 'signal_id' in df.columns:
+                repetidos = df['signal_id'].notna() & df.duplicated('signal_id', keep='last')
+                df = df[~repetidos]
+            if desde is not None or ate is not None:
+                entrada = _datas(df['timestamp'])
+                mascara = pd.Series(True, index=df.index)
+                if desde is not None:
+                    mascara &= entrada >= pd.Timestamp(desde)
+                if ate is not None:
+                    mascara &= entrada <= pd.Timestamp(ate)
+                df = df[mascara]
+            if estado is not None:
+                df = df[df['estado'] == estado]
+        df = df.reset_index(drop=True)
+        return df[pedidas] if pedidas is not None else df
+
+    def compactar(self, agora=None):
+        """
+        Move para as partições frias os trades fechados há mais de retencao_dias.
+
+        Todo o ciclo (ler a quente, gravar as frias, regravar a quente) roda sob
+        journal_schema.trava_de(caminho), a mesma trava, entre threads e entre processos, de
+        anexar(), escrever_diario() e dos fechamentos (com_trava, inclusive os do dashboard),
+        então nenhuma linha gravada durante a compactação se perde.
+        As partições frias são gravadas antes de a quente ser regravada; numa interrupção entre
+        as duas etapas o trade fica duplicado, e consultar() mantém só a cópia quente.
+
+        Args:
+            agora (datetime): Referência para a retenção (padrão: clock.now()).
+
+        Returns:
+            int: Número de linhas arquivadas.
+        """
+        with journal_schema.trava_de(self.caminho), metrics.span("journal_compact"):
+            if not os.path.exists(self.caminho) or not journal_schema.cabecalho(self.caminho):
+                return 0
+            df = ler_diario(self.caminho, compacto=False)
+            corte = pd.Timestamp(agora if agora is not None else clock.now()) - pd.Timedelta(days=self.retencao_dias)
+            entrada = _datas(df['timestamp'])
+            saida = _datas(df['timestamp_saida'])
+            # Linhas sem signal_id ou sem datas legíveis ficam na partição quente (nunca são perdidas)
+            mover = ((df['estado'] == 'fechado') & df['signal_id'].notna() & entrada.notna() & saida.notna()
+                     & (saida < corte)).to_numpy()
+            if not mover.any():
+                return 0
+            os.makedirs(self.diretorio, exist_ok=True)
+            arquivados = df[mover]
+            for mes, grupo in arquivados.groupby(entrada[mover].dt.strftime("%Y-%m")):
+                destino = self.caminho_particao(mes)
+                if os.path.exists(destino):
+                    existente = ler_diario(destino, compacto=False)
+                    grupo = pd.concat([existente, grupo], ignore_index=True)
+                    repetidos = grupo['signal_id'].notna() & grupo.duplicated('signal_id', keep='last')
+                    grupo = grupo[~repetidos]
+                escrever_diario(grupo, destino)
+            quente = df[~df['signal_id'].isin(set(arquivados['signal_id']))]
+            escrever_diario(quente, self.caminho)
+        logger.info(f"[DIARIO] {int(mover.sum())} trades fechados arquivados em {self.diretorio}; "
+                    f"{len(quente)} linhas na partição quente.")
+        return int(mover.sum())
+
+    def compactar_se_necessario(self, intervalo):
+        """Compacta se `intervalo` segundos passaram desde a última compactação."""
+        if self.ultima_compactacao is not None and clock.time() - self.ultima_compactacao < intervalo:
+            return 0
+        self.ultima_compactacao = clock.time()
+        try:
+            return self.compactar()
+        except Exception as e:
+            logger.error(f"[DIARIO] Falha ao compactar o diário: {e}")
+            return 0
+
+
+def consultar(caminho=journal_schema.ARQUIVO, **kwargs):
+    """Atalho para JournalStore(caminho).consultar(**kwargs)."""
+    return JournalStore(caminho).consultar(**kwargs)
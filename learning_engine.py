@@ -5,6 +5,7 @@ import os
 import json
 from sklearn.linear_model import LogisticRegression
 from utils import logger
+import journal_store
 from strategy_manager import load_strategies, save_strategies
 from sklearn.metrics import confusion_matrix, classification_report
 
@@ -40,7 +41,7 @@ class LearningEngine:
                 logger.warning("Arquivo sinais_detalhados.csv não existe. Não é possível treinar o modelo.")
                 return
 
-            df = pd.read_csv("sinais_detalhados.csv")
+            df = journal_store.consultar("sinais_detalhados.csv", compacto=False)
             if df.empty:
                 logger.warning("Arquivo sinais_detalhados.csv está vazio. Não é possível treinar o modelo.")
                 return
@@ -3,6 +3,7 @@ import pandas as pd
 import numpy as np
 import os
 import streamlit as st
+from data_manager import klines_para_dataframe
 
 api_key = st.secrets["binance"]["api_key"]
 api_secret = st.secrets["binance"]["api_secret"]
@@ -11,13 +12,7 @@ client = Client(api_key, api_secret)
 def detectar_zonas_de_liquidez(par, timeframe='5m', n_faixas=20):
     try:
         klines = client.get_klines(symbol=par.replace("/", ""), interval=timeframe, limit=500)
-        df = pd.DataFrame(klines, columns=[
-            'timestamp', 'open', 'high', 'low', 'close', 'volume',
-            'close_time', 'quote_asset_volume', 'num_trades',
-            'taker_buy_base', 'taker_buy_quote', 'ignore'
-        ])
-        df['close'] = pd.to_numeric(df['close'])
-        df['volume'] = pd.to_numeric(df['volume'])
+        df = klines_para_dataframe(klines, colunas=['close', 'volume'])
 
         # Define a faixa de preço
         min_price = df['close'].min()
@@ -0,0 +1,127 @@
+import os
+import re
+import threading
+from collections import deque
+
+LOG_FILE = "bot.log"
+NIVEIS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+NIVEIS_ALERTA = ("WARNING", "ERROR", "CRITICAL")
+BLOCO = 64 * 1024
+# Limite de bytes lidos de trás para frente na primeira leitura (ou após uma rotação)
+LIMITE_CARGA = 8 * 1024 * 1024
+_RE_NIVEL = re.compile(r" - (DEBUG|INFO|WARNING|ERROR|CRITICAL) - ")
+
+
+class LogTail:
+    """
+    Anéis em memória com as últimas linhas do log e as últimas linhas de cada nível.
+
+    Na primeira consulta (e após rotação ou truncamento) o arquivo é lido de trás para frente
+    até encher os anéis ou atingir `limite_carga` bytes; depois, cada consulta lê apenas os bytes
+    novos desde a anterior. "Últimos 5 erros" e "últimas 10 linhas" não dependem do tamanho do log.
+    """
+    def __init__(self, caminho=LOG_FILE, capacidade=100, limite_carga=LIMITE_CARGA):
+        self.caminho = caminho
+        self.capacidade = capacidade
+        self.limite_carga = limite_carga
+        self._lock = threading.Lock()
+        self._resetar(None)
+
+    def _resetar(self, identidade):
+        self._identidade = identidade
+        self._offset = 0
+        self._pendente = b""
+        self._seq = 0
+        self.linhas = deque(maxlen=self.capacidade)
+        self.por_nivel = {nivel: deque(maxlen=self.capacidade) for nivel in NIVEIS}
+
+    def _adicionar(self, linha):
+        self._seq += 1
+        self.linhas.append(linha)
+        m = _RE_NIVEL.search(linha)
+        if m:
+            self.por_nivel[m.group(1)].append((self._seq, linha))
+
+    def _carregar_do_fim(self, f, tamanho):
+        """Carga inicial: blocos do fim até reunir `capacidade` linhas e `capacidade` alertas (somando os níveis)."""
+        posicao = tamanho
+        blocos = []
+        linhas = 0
+        alertas = 0
+        while posicao > 0 and tamanho - posicao < self.limite_carga:
+            lido = min(BLOCO, posicao)
+            posicao -= lido
+            f.seek(posicao)
+            bloco = f.read(lido)
+            blocos.append(bloco)
+            linhas += bloco.count(b"\n")
+            alertas += sum(bloco.count(f" - {nivel} - ".encode()) for nivel in NIVEIS_ALERTA)
+            # Um nível ausente (ex.: nenhum CRITICAL) não pode forçar a leitura até limite_carga
+            if linhas > self.capacidade and alertas >= self.capacidade:
+                break
+        dados = b"".join(reversed(blocos))
+        if posicao > 0:
+            # Descarta a primeira linha, provavelmente incompleta
+            dados = dados.split(b"\n", 1)[1] if b"\n" in dados else b""
+        return dados
+
+    def atualizar(self):
+        """Incorpora ao anel o que foi escrito desde a última consulta."""
+        try:
+            st = os.stat(self.caminho)
+        except FileNotFoundError:
+            self._resetar(None)
+            return
+        identidade = (st.st_dev, st.st_ino)
+        # Rotação, truncamento ou atraso grande demais: recomeça lendo do fim
+        if identidade != self._identidade or not 0 <= st.st_size - self._offset <= self.limite_carga:
+            self._resetar(identidade)
+        if st.st_size == self._offset:
+            return
+        with open(self.caminho, "rb") as f:
+            if self._offset == 0 and st.st_size > BLOCO:
+                dados = self._carregar_do_fim(f, st.st_size)
+            else:
+                f.seek(self._offset)
+                dados = f.read(st.st_size - self._offset)
+            self._offset = st.st_size
+        dados = self._pendente + dados
+        completas, _, self._pendente = dados.rpartition(b"\n")
+        if completas:
+            for linha in completas.decode("utf-8", errors="ignore").split("\n"):
+                if linha.strip():
+                    self._adicionar(linha.rstrip("\r"))
+
+    def ultimas(self, n=10):
+        """Últimas n linhas do log."""
+        with self._lock:
+            self.atualizar()
+            return list(self.linhas)[-n:] if n else []
+
+    def ultimas_por_nivel(self, niveis=NIVEIS_ALERTA, n=5):
+        """Últimas n linhas dos níveis informados, em ordem cronológica."""
+        with self._lock:
+            self.atualizar()
+            candidatas = [item for nivel in niveis for item in list(self.por_nivel[nivel])[-n:]]
+        return [linha.strip() for _, linha in sorted(candidatas)[-n:]] if n else []
+
+
+_tails = {}
+_tails_lock = threading.Lock()
+
+
+def get_log_tail(caminho=LOG_FILE):
+    """LogTail compartilhado por caminho (os anéis sobrevivem entre as consultas periódicas)."""
+    chave = os.path.abspath(caminho)
+    with _tails_lock:
+        if chave not in _tails:
+            _tails[chave] = LogTail(caminho)
+        return _tails[chave]
+
+
+def ultimas_linhas(n=10, caminho=LOG_FILE):
+    return get_log_tail(caminho).ultimas(n)
+
+
+def ultimos_alertas(n=5, caminho=LOG_FILE, niveis=NIVEIS_ALERTA):
+    return get_log_tail(caminho).ultimas_por_nivel(niveis, n)
@@ -1,6 +1,4 @@
-import csv
-import os
-from datetime import datetime
+import journal_schema
 
 def logar_sinal_detalhado(sinal, arquivo='sinais_detalhados.csv'):
     cabecalho = [
@@ -12,9 +10,5 @@ def logar_sinal_detalhado(sinal, arquivo='sinais_detalhados.csv'):
         'vwap', 'fibonacci_23.6', 'fibonacci_38.2', 'fibonacci_50', 'fibonacci_61.8',
         'iceberg_detected', 'timeframes_analisados'
     ]
-    existe = os.path.exists(arquivo)
-    with open(arquivo, 'a', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=cabecalho)
-        if not existe:
-            writer.writeheader()
-        writer.writerow({k: sinal.get(k, None) for k in cabecalho})
\ No newline at end of file
+    # O diário segue journal_schema: campos fora do esquema (leituras de indicadores) não são gravados
+    journal_schema.anexar([{k: sinal.get(k, None) for k in cabecalho}], arquivo)
@@ -12,17 +12,32 @@ import numpy as np
 from queue import PriorityQueue
 from dotenv import load_dotenv
 from config import SYMBOLS, DRY_RUN, REAL_API_KEY, REAL_API_SECRET, TIMEFRAMES, CONFIG
-from utils import logger, CsvWriter, initialize_csv_files
+from utils import logger, initialize_csv_files, aplicar_niveis_log
+import journal_schema
+from journal_schema import ler_diario
+from journal_store import ARQUIVAMENTO_PADRAO, JournalStore
+import journal_store
 from initialization import inicializar_client, is_port_in_use, kill_process_on_port, check_dashboard_availability, check_api_status, load_config
 from binance_utils import BinanceUtils
 from learning_engine import LearningEngine
 from order_executor import OrderExecutor, close_order
-from data_manager import get_historical_data, get_funding_rate, get_current_price, get_quantity, is_candle_closed
+from user_data_stream import UserDataStream
+from trigger_book import TriggerBook
+from market_scanner import MarketScanner
+import clock
+import metrics
+from log_tail import ultimas_linhas, ultimos_alertas
+from collections import deque
+from functools import partial
+from data_manager import get_historical_data, get_funding_rate, get_current_price, get_quantity, is_candle_closed, usar_resampler, klines_para_dataframe
+from resampler import Resampler
+from records import Signal, Position
 from indicators import calculate_indicators
 from signal_generator import generate_signal, generate_multi_timeframe_signal, calculate_signal_quality
 from trade_manager import check_active_trades, generate_combination_key, save_signal, save_signal_log
 from trade_simulator import simulate_trade, simulate_trade_backtest
-from backtest import run_backtest
+from signal_shards import EstadoPares, ShardCoordinator, ShardIndisponivel, gerar_candidatos
+from backtest import run_backtest, run_backtest_intrabar
 from strategy_manager import sync_strategies_and_status
 import requests
 import asyncio
@@ -96,17 +111,11 @@ class UltraBot:
 
     def fetch_market_data(self, pair, timeframe):
         klines = self.client.get_klines(symbol=pair, interval=timeframe, limit=100)
-        df = pd.DataFrame(klines, columns=[
-            "timestamp", "open", "high", "low", "close", "volume",
-            "close_time", "quote_volume", "trades", "taker_buy_base",
-            "taker_buy_quote", "ignore"
-        ])
-        df["close"] = df["close"].astype(float)
-        return df
+        return klines_para_dataframe(klines, horario_local=False)
 
     def read_orders(self):
         try:
-            df = pd.read_csv("sinais_detalhados.csv")
+            df = ler_diario("sinais_detalhados.csv", compacto=False)
             # Garante que as colunas essenciais existem
             for col in ["pair", "type", "price", "quantity", "timestamp"]:
                 if col not in df.columns:
@@ -123,11 +132,7 @@ class UltraBot:
             return pd.DataFrame(columns=["pair", "price", "timestamp"])
 
     def read_log(self):
-        try:
-            with open("bot.log", "r") as f:
-                return f.readlines()[-10:]
-        except FileNotFoundError:
-            return []
+        return [linha + "\n" for linha in ultimas_linhas(10)]
 
     def calculate_indicators(self, data):
         data['rsi'] = self.compute_rsi(data['close'], period=14)
@@ -266,13 +271,12 @@ class UltraBot:
                     self.learning_engine.save_training_data = getattr(self.learning_engine, 'save_training_data', lambda *a, **kw: None)
                     self.learning_engine.save_training_data(pair, signal, insights, None)
                 # Salvar insights
-                pd.DataFrame({
-                    "pair": [", ".join(active_pairs)],
-                    "timeframe": [TIMEFRAMES[0]],
-                    "insights": [insights],
-                    "timestamp": [datetime.now()]
-                }).to_csv("sinais_detalhados.csv", mode="a", index=False, 
-                          header=not os.path.exists("sinais_detalhados.csv"))
+                journal_schema.anexar([{
+                    "pair": ", ".join(active_pairs),
+                    "timeframe": TIMEFRAMES[0],
+                    "insights": insights,
+                    "timestamp": datetime.now().strftime(journal_schema.FORMATO_DATA)
+                }], "sinais_detalhados.csv")
                 # Treinamento periódico
                 if hasattr(self.learning_engine, 'train'):
                     self.learning_engine.train()
@@ -299,18 +303,10 @@ if __name__ == "__main__":
         dashboard_proc.wait()
 
 try:
-    # Inicializar o CsvWriter com filename e columns
-    logger.info("Inicializando o CsvWriter para sinais_detalhados.csv...")
-    csv_writer = CsvWriter(
-        filename="sinais_detalhados.csv",
-        columns=[
-            'signal_id', 'par', 'direcao', 'preco_entrada', 'preco_saida', 'quantity',
-            'lucro_percentual', 'pnl_realizado', 'resultado', 'timestamp', 'timestamp_saida',
-            'estado', 'strategy_name', 'contributing_indicators', 'localizadores',
-            'motivos', 'timeframe', 'aceito', 'parametros', 'quality_score'
-        ]
-    )
-    logger.info("CsvWriter inicializado com sucesso.")
+    # Escritor do diário (colunas e dtypes definidos em journal_schema)
+    logger.info("Inicializando o escritor de sinais_detalhados.csv...")
+    csv_writer = journal_schema.EscritorDiario("sinais_detalhados.csv")
+    logger.info("Escritor do diário inicializado com sucesso.")
 
     logger.info("Carregando variáveis de ambiente com load_dotenv()...")
     # load_dotenv()  # Removido para evitar dependência local
@@ -357,43 +353,24 @@ try:
             next_close += delta
         return next_close
 
-    def generate_realtime_signal(client, pair, tf, strategy_config, config, learning_engine, binance_utils):
-        """Gera sinais em tempo real para timeframes."""
-        # Remove restrição de timeframe e deixa apenas verificação de sinais em tempo real
-        if not config.get("realtime_signals_enabled", True):
-            return None, None, None, None, None
-
-        current_price = get_current_price(client, pair, config)
-        if current_price is None:
-            return None, None, None, None, None
-
-        # Ajusta o número de candles baseado no timeframe
-        limit = 200 if tf in ["1h", "4h", "1d"] else 100
-        historical_data = get_historical_data(client, pair, tf, limit=limit)
-        if historical_data.empty:
-            return None, None, None, None, None
-
-        # Atualiza o último preço apenas para timeframes menores
-        if tf in ["1m", "5m", "15m"]:
-            historical_data.loc[historical_data.index[-1] + 1] = historical_data.iloc[-1]
-            historical_data.iloc[-1, historical_data.columns.get_loc('close')] = current_price
-
-        historical_data = calculate_indicators(historical_data, binance_utils)
-        direction, score, details, contributing_indicators, strategy_name = generate_signal(
-            historical_data, tf, strategy_config, config, learning_engine, binance_utils
-        )
-        if direction:
-            return direction, score, details, contributing_indicators, strategy_name
-        return None, None, None, None, None
+    def pares_com_ordens_reais():
+        """Pares com ordem real aberta na Binance (linhas 'aberto' do diário com binance_order_id)."""
+        try:
+            df = ler_diario(SINALS_FILE, colunas=['par', 'estado', 'binance_order_id'])
+        except Exception as e:
+            logger.error(f"Erro ao ler ordens reais abertas do diário: {e}")
+            return set()
+        abertas = df[(df['estado'] == 'aberto') & df['binance_order_id'].notna()]
+        return set(abertas['par'].astype(str))
 
     def calculate_strategy_performance():
         """Calcula o desempenho por estratégia com base no sinais_detalhados.csv."""
         try:
-            df = pd.read_csv(SINALS_FILE)
+            df = journal_store.consultar(SINALS_FILE, colunas=['strategy_name', 'estado', 'resultado', 'pnl_realizado'])
             if df.empty:
                 return {}
 
-            strategies = df.groupby('strategy_name')
+            strategies = df.groupby('strategy_name', observed=True)
             performance = {}
             for strategy_name, group in strategies:
                 total_orders = len(group)
@@ -454,7 +431,7 @@ try:
 
                 # Verificar se o arquivo de sinais existe e está acessível
                 try:
-                    df = pd.read_csv(SINALS_FILE)
+                    df = ler_diario(SINALS_FILE, colunas=['estado'])
                     orders_closed = len(df[df['estado'] == 'fechado'])
                     bot_status["orders_closed"] = orders_closed
                 except FileNotFoundError:
@@ -494,18 +471,21 @@ try:
                 else:
                     for error in system_errors[-5:]:
                         print(f"- {error['description']} / {error['timestamp']} / {error['reason']}")
+                print("│ Latência por Etapa (desde o último resumo):")
+                for linha in metrics.formatar_resumo(metrics.registro.resumo()) or ["Sem medições."]:
+                    print(f"- {linha}")
                 print("└───────────────────────────────┘")
 
                 log_status_extra()
-                time.sleep(30)
+                clock.sleep(30)
             except Exception as e:
                 logger.error(f"Erro ao gerar resumo periódico: {e}")
-                time.sleep(30)
+                clock.sleep(30)
 
     def update_orders_status():
         """Atualiza o status de ordens abertas e fechadas diretamente do arquivo de sinais."""
         try:
-            df = pd.read_csv(SINALS_FILE)
+            df = ler_diario(SINALS_FILE, colunas=['estado'])
             open_orders = len(df[df['estado'] == 'aberto'])
             closed_orders = len(df[df['estado'] == 'fechado'])
             total_signals = len(df)
@@ -518,46 +498,34 @@ try:
         except Exception as e:
             logger.error(f"Erro ao atualizar status de ordens: {e}")
 
-    def close_invalid_open_orders(client):
-        """Verifica e fecha ordens abertas que já atingiram TP ou SL."""
+    trigger_book = TriggerBook()
+
+    def close_invalid_open_orders(client, ignorar_reais=False):
+        """
+        Verifica e fecha ordens abertas que já atingiram TP ou SL.
+        Com ignorar_reais=True, ordens vinculadas à Binance ficam a cargo do user data stream.
+        Os níveis ficam no trigger_book; o preço é consultado uma vez por símbolo.
+        """
         try:
-            df = pd.read_csv(SINALS_FILE)
-            # Corrige tipos das colunas para evitar FutureWarning
-            if 'resultado' in df.columns:
-                df['resultado'] = df['resultado'].astype('object')
-            if 'timestamp_saida' in df.columns:
-                df['timestamp_saida'] = df['timestamp_saida'].astype('object')
+            df = ler_diario(SINALS_FILE, colunas=['signal_id', 'par', 'direcao', 'preco_entrada', 'parametros', 'estado', 'binance_order_id'], compacto=False)
             open_orders = df[df['estado'] == 'aberto']
+            if ignorar_reais and 'binance_order_id' in open_orders.columns:
+                open_orders = open_orders[open_orders['binance_order_id'].isna()]
+            trigger_book.sincronizar(open_orders)
 
-            for index, order in open_orders.iterrows():
-                mark_price = get_current_price(client, order['par'], CONFIG)
+            for par in trigger_book.pares():
+                mark_price = get_current_price(client, par, CONFIG)
                 if mark_price is None:
                     continue
-
-                entry_price = float(order['preco_entrada'])
-                direction = order['direcao']
-                params = json.loads(order['parametros'])
-                tp_percent = params.get('tp_percent', 2.0)
-                sl_percent = params.get('sl_percent', 1.0)
-
-                if direction == "LONG":
-                    tp_price = entry_price * (1 + tp_percent / 100)
-                    sl_price = entry_price * (1 - tp_percent / 100)
-                else:
-                    tp_price = entry_price * (1 - tp_percent / 100)
-                    sl_price = entry_price * (1 + tp_percent / 100)
-
-                if (direction == "LONG" and mark_price >= tp_price) or (direction == "SHORT" and mark_price <= tp_price):
-                    close_order(order['signal_id'], mark_price, "TP")
-                elif (direction == "LONG" and mark_price <= sl_price) or (direction == "SHORT" and mark_price >= sl_price):
-                    close_order(order['signal_id'], mark_price, "SL")
+                for signal_id, resultado, _ in trigger_book.disparados(par, mark_price):
+                    close_order(signal_id, mark_price, resultado)
         except Exception as e:
             logger.error(f"Erro ao verificar e fechar ordens inválidas: {e}")
 
     def update_bot_summary():
         """Atualiza o resumo do bot com base no arquivo de sinais detalhados."""
         try:
-            df = pd.read_csv(SINALS_FILE)
+            df = ler_diario(SINALS_FILE, colunas=['estado'])
             total_signals = len(df)
             open_orders = len(df[df['estado'] == 'aberto'])
             closed_orders = len(df[df['estado'] == 'fechado'])
@@ -637,11 +605,27 @@ try:
                     with open(self.config_path, 'r', encoding='utf-8') as f:
                         self.config.clear()
                         self.config.update(json.load(f))
-                    self.logger.info('Configuração recarregada instantaneamente via file watcher: %s', self.config)
+                    aplicar_niveis_log(self.config.get("logging"))
+                    self.logger.info('Configuração recarregada instantaneamente via file watcher (%d chaves).', len(self.config))
                 except Exception as e:
                     self.logger.error(f'Erro ao recarregar config.json via file watcher: {e}')
 
-    def main():
+    # Duração (wall clock) das últimas iterações do loop principal, usada pelo replay
+    iteration_durations = deque(maxlen=10000)
+
+    def main(client=None, max_iterations=None, periodic_summary=True):
+        """
+        Loop principal do bot.
+
+        Args:
+            client: Cliente Binance já inicializado (ex.: MockBinanceClient no replay). Quando
+                informado, o dashboard e a verificação das chaves API são pulados.
+            max_iterations (int): Encerra após este número de iterações (None = indefinidamente).
+            periodic_summary (bool): Inicia a thread de resumo periódico.
+
+        Returns:
+            int: Número de iterações executadas.
+        """
         logger.info("Inicializando arquivos CSV...")
         initialize_csv_files()
         logger.info("Arquivos CSV inicializados com sucesso.")
@@ -656,7 +640,7 @@ try:
 
         logger.info(f"Verificando integridade do arquivo '{SINALS_FILE}'...")
         try:
-            df = pd.read_csv(SINALS_FILE)
+            df = ler_diario(SINALS_FILE, colunas=['parametros'], compacto=False)
             logger.info(f"Arquivo '{SINALS_FILE}' lido com sucesso. Número de linhas: {len(df)}")
             for idx, params in enumerate(df['parametros']):
                 if pd.notna(params):
@@ -670,8 +654,11 @@ try:
             initialize_csv_files()
             logger.info(f"Arquivo '{SINALS_FILE}' recriado com sucesso.")
 
+        replay = client is not None
         logger.info("Verificando se a porta 8580 está em uso...")
-        if is_port_in_use(8580):
+        if replay:
+            logger.info("Cliente informado (replay). Dashboard e verificação das chaves API ignorados.")
+        elif is_port_in_use(8580):
             logger.warning("Porta 8580 está em uso. Tentando liberar...")
             kill_process_on_port(8575)
             logger.info("Porta 8580 liberada. Aguardando 1 segundo...")
@@ -679,25 +666,26 @@ try:
         else:
             logger.info("Porta 8580 está livre.")
 
-        dashboard_path = os.path.join(os.path.dirname(__file__), "dashboard.py")
-        logger.info(f"Iniciando o dashboard Streamlit em {dashboard_path} na porta 8580...")
-        process = subprocess.Popen(
-            [sys.executable, "-m", "streamlit", "run", dashboard_path, "--server.port", "8580"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        logger.info("Comando para iniciar o dashboard enviado.")
+        if not replay:
+            dashboard_path = os.path.join(os.path.dirname(__file__), "dashboard.py")
+            logger.info(f"Iniciando o dashboard Streamlit em {dashboard_path} na porta 8580...")
+            process = subprocess.Popen(
+                [sys.executable, "-m", "streamlit", "run", dashboard_path, "--server.port", "8580"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True
+            )
+            logger.info("Comando para iniciar o dashboard enviado.")
 
-        logger.info("Aguardando o dashboard ficar disponível em http://localhost:8580...")
-        if check_dashboard_availability("http://localhost:8580"):
-            logger.info("Dashboard iniciado com sucesso em http://localhost:8580")
-        else:
-            logger.error("Dashboard não está acessível em http://localhost:8580 após 30 segundos.")
-            stdout, stderr = process.communicate(timeout=5)
-            logger.error(f"Saída do Streamlit: {stdout}")
-            logger.error(f"Erros do Streamlit: {stderr}")
-            raise RuntimeError("Falha ao iniciar o dashboard. Verifique os logs para mais detalhes.")
+            logger.info("Aguardando o dashboard ficar disponível em http://localhost:8580...")
+            if check_dashboard_availability("http://localhost:8580"):
+                logger.info("Dashboard iniciado com sucesso em http://localhost:8580")
+            else:
+                logger.error("Dashboard não está acessível em http://localhost:8580 após 30 segundos.")
+                stdout, stderr = process.communicate(timeout=5)
+                logger.error(f"Saída do Streamlit: {stdout}")
+                logger.error(f"Erros do Streamlit: {stderr}")
+                raise RuntimeError("Falha ao iniciar o dashboard. Verifique os logs para mais detalhes.")
 
         logger.info("Carregando configurações...")
         config = CONFIG  # Usar diretamente o CONFIG do config.py
@@ -717,30 +705,39 @@ try:
         print(f"│ Modos Ativos: {config['modes']}")
         print("└───────────────────────────────┘")
 
-        logger.info("Verificando status da API da Binance com check_api_status()...")
-        real_status = check_api_status(REAL_API_KEY, REAL_API_SECRET)
-        logger.info(f"Resultado do status da API: {real_status}")
-        print("┌────────────────── Status das Chaves API ──────────────────┐")
-        print(f"│ Chave Real: {'Válida' if real_status['connected'] else 'Erro'} - Permissões: Leitura: {real_status['permissions'].get('read', False)}, Spot Trading: {real_status['permissions'].get('spot', False)}, Futures: {real_status['permissions'].get('futures', False)} │")
-        print("└──────────────────────────────────────────────────────────┘")
-        if not real_status['connected'] or not any(real_status['permissions'].values()):
-            print("\033[91m[ALERTA] Sua chave da Binance está conectando, mas não possui todas as permissões necessárias.")
-            print("Possíveis causas:")
-            print("- Permissões insuficientes na chave API (habilite leitura, spot e futures no painel da Binance)")
-            print("- Restrição de IP na chave (adicione o IP do seu computador ou remova a restrição para teste)")
-            print("- Delay de propagação após alteração de permissões (aguarde alguns minutos)")
-            print("- Endpoint de permissão da Binance pode estar temporariamente indisponível, mas a chave pode funcionar para preços.")
-            print("Se você está recebendo preços normalmente, o bot pode operar parcialmente, mas funções de trading podem falhar!")
-            print("\033[0m")
-
-        client = real_status.get("client")
-        if not client:
-            logger.error("Cliente da Binance não foi inicializado. Encerrando o bot.")
-            sys.exit(1)
-        logger.info("Usando cliente real para preços e simulações.")
+        if not replay:
+            logger.info("Verificando status da API da Binance com check_api_status()...")
+            real_status = check_api_status(REAL_API_KEY, REAL_API_SECRET)
+            logger.info(f"Resultado do status da API: {real_status}")
+            print("┌────────────────── Status das Chaves API ──────────────────┐")
+            print(f"│ Chave Real: {'Válida' if real_status['connected'] else 'Erro'} - Permissões: Leitura: {real_status['permissions'].get('read', False)}, Spot Trading: {real_status['permissions'].get('spot', False)}, Futures: {real_status['permissions'].get('futures', False)} │")
+            print("└──────────────────────────────────────────────────────────┘")
+            if not real_status['connected'] or not any(real_status['permissions'].values()):
+                print("\033[91m[ALERTA] Sua chave da Binance está conectando, mas não possui todas as permissões necessárias.")
+                print("Possíveis causas:")
+                print("- Permissões insuficientes na chave API (habilite leitura, spot e futures no painel da Binance)")
+                print("- Restrição de IP na chave (adicione o IP do seu computador ou remova a restrição para teste)")
+                print("- Delay de propagação após alteração de permissões (aguarde alguns minutos)")
+                print("- Endpoint de permissão da Binance pode estar temporariamente indisponível, mas a chave pode funcionar para preços.")
+                print("Se você está recebendo preços normalmente, o bot pode operar parcialmente, mas funções de trading podem falhar!")
+                print("\033[0m")
+
+            client = real_status.get("client")
+            if not client:
+                logger.error("Cliente da Binance não foi inicializado. Encerrando o bot.")
+                sys.exit(1)
+            logger.info("Usando cliente real para preços e simulações.")
 
         logger.info(f"Verificando o estado do CONFIG: {config}")
 
+        if config.get("metrics_enabled", True) and not replay:
+            try:
+                metrics_port = config.get("metrics_port", metrics.PORTA_PADRAO)
+                metrics.iniciar_servidor(metrics_port)
+                logger.info(f"Métricas de latência expostas em http://127.0.0.1:{metrics_port}/metrics")
+            except OSError as e:
+                logger.warning(f"Não foi possível iniciar o servidor de métricas: {e}")
+
         logger.info("Inicializando módulos do sistema...")
         try:
             logger.info("Inicializando BinanceUtils...")
@@ -799,6 +796,17 @@ try:
             logger.error(f"Erro ao inicializar OrderExecutor: {e}")
             raise
 
+        # Em modo real, execuções de TP/SL chegam pelo user data stream em vez de polling
+        user_stream = None
+        if config["modes"].get("real", False):
+            try:
+                logger.info("Inicializando user data stream...")
+                user_stream = UserDataStream(client)
+                user_stream.iniciar()
+            except Exception as e:
+                logger.error(f"Erro ao inicializar user data stream. Usando polling para ordens reais: {e}")
+                user_stream = None
+
         if config.get('learning_enabled', False):
             logger.info("Learning está habilitado. Tentando treinar o modelo de aprendizado na inicialização...")
             try:
@@ -813,16 +821,26 @@ try:
         logger.info("Inicializando estruturas de dados...")
         active_trades_dry_run = []
         active_combinations = {}
-        last_learning_update = time.time()
+        last_learning_update = clock.time()
         bot_status["last_learning_update"] = last_learning_update
-        last_candle_close = {pair: {tf: None for tf in TIMEFRAMES} for pair in PAIRS}
-        logger.info(f"Estruturas de dados inicializadas: PAIRS={PAIRS}, TIMEFRAMES={TIMEFRAMES}")
+        if config.get("resample_from_1m", False):
+            usar_resampler(Resampler())
+            logger.info("Timeframes derivados do fluxo de 1m (resampler).")
+
+        # Universo de pares: fixo (SYMBOLS) ou escolhido pelo scanner de mercado
+        market_scanner = None
+        universe = list(PAIRS)
+        if config.get("market_scanner", {}).get("enabled", False):
+            market_scanner = MarketScanner(client, config["market_scanner"])
+            universe = market_scanner.atualizar_se_necessario()
+
+        # Diário quente/frio: fechados antigos saem de sinais_detalhados.csv para partições mensais
+        arquivamento = {**ARQUIVAMENTO_PADRAO, **config.get("journal_archive", {})}
+        journal = JournalStore(SINALS_FILE, retencao_dias=arquivamento["retention_days"])
+        logger.info(f"Estruturas de dados inicializadas: PAIRS={universe}, TIMEFRAMES={TIMEFRAMES}")
 
         # Agendamento de fechamento de velas
-        candle_schedule = {
-            pair: {tf: get_next_candle_close_time(tf, datetime.now()) for tf in TIMEFRAMES}
-            for pair in PAIRS
-        }
+        estado_pares = EstadoPares(universe)
 
         # Carregar estratégias ativas
         from strategy_manager import load_strategies, load_robot_status, save_robot_status
@@ -834,13 +852,30 @@ try:
         }
         logger.info(f"Estratégias ativas carregadas: {list(active_strategies.keys())}")
 
-        logger.info("Iniciando thread de resumo periódico (a cada 30 segundos)...")
-        summary_thread = threading.Thread(
-            target=log_summary_periodically,
-            args=(config, active_trades_dry_run, learning_engine, last_learning_update, client),
-            daemon=True
-        )
-        summary_thread.start()
+        # Modo shardado: processos avaliam subconjuntos dos pares e o loop só coordena
+        shard_coordinator = None
+        sharding = config.get("sharding", {})
+        if sharding.get("enabled", False) and replay:
+            logger.warning("[SHARDS] Modo shardado ignorado no replay: o cliente simulado e o relógio virtual "
+                           "não atravessam processos.")
+        elif sharding.get("enabled", False):
+            shard_coordinator = ShardCoordinator(
+                universe, active_strategies, config, n_workers=sharding.get("workers"),
+                fabrica_cliente=partial(inicializar_client, REAL_API_KEY, REAL_API_SECRET), limiar=MIN_SCORE_THRESHOLD
+            )
+            shard_coordinator.iniciar()
+            if market_scanner:
+                # Pares que entram ou saem do universo são redistribuídos entre os shards
+                market_scanner.ao_mudar(lambda novo, adicionados, removidos: shard_coordinator.publicar_universo(novo))
+
+        if periodic_summary:
+            logger.info("Iniciando thread de resumo periódico (a cada 30 segundos)...")
+            summary_thread = threading.Thread(
+                target=log_summary_periodically,
+                args=(config, active_trades_dry_run, learning_engine, last_learning_update, client),
+                daemon=True
+            )
+            summary_thread.start()
 
         if config["modes"]["backtest"]:
             logger.info("Modo backtest ativado. Iniciando backtest...")
@@ -848,10 +883,9 @@ try:
             end_date = config.get("backtest_end_date", "2025-04-01")
             logger.info(f"Período do backtest: {start_date} a {end_date}")
             try:
-                df_sinais = run_backtest(
-                    client, config, binance_utils, learning_engine, start_date, end_date, PAIRS, TIMEFRAMES,
-                    config["backtest_config"]["signal_strategies"], get_historical_data, get_quantity, get_funding_rate,
-                    generate_signal, simulate_trade_backtest
+                # Resolução intrabar em 1m sobre as velas locais (simulate_trade_backtest usa o preço ao vivo)
+                df_sinais = run_backtest_intrabar(
+                    config, config["backtest_config"]["signal_strategies"], PAIRS, TIMEFRAMES, start_date, end_date
                 )
                 logger.info("Backtest concluído com sucesso.")
                 logger.info(f"Resultados do backtest: {df_sinais.shape[0]} sinais gerados.")
@@ -880,7 +914,8 @@ try:
         # --- FIM: Watchdog ---
 
         try:
-            while True:
+            while max_iterations is None or iteration_count < max_iterations:
+                iteration_start = time.perf_counter()
                 # --- INÍCIO: Reload automático do config.json ---
                 try:
                     current_mtime = os.path.getmtime(config_path) if os.path.exists(config_path) else None
@@ -890,7 +925,8 @@ try:
                             config.clear()
                             config.update(json.load(f))
                         last_config_mtime = current_mtime
-                        logger.info(f"Configuração recarregada: {config}")
+                        aplicar_niveis_log(config.get("logging"))
+                        logger.info(f"Configuração recarregada ({len(config)} chaves).")
                 except Exception as e:
                     logger.error(f"Erro ao tentar recarregar config.json: {e}")
                 # --- FIM: Reload automático do config.json ---
@@ -904,10 +940,13 @@ try:
                     }
                     logger.info(f"Estratégias ativas atualizadas: {list(active_strategies.keys())}")
 
-                    if config.get('learning_enabled', False) and time.time() - last_learning_update > config.get('learning_update_interval', 3600):
+                    if arquivamento["enabled"]:
+                        journal.compactar_se_necessario(arquivamento["interval_seconds"])
+
+                    if config.get('learning_enabled', False) and clock.time() - last_learning_update > config.get('learning_update_interval', 3600):
                         logger.info("Atualizando modelo de aprendizado...")
                         learning_engine.train()
-                        last_learning_update = time.time()
+                        last_learning_update = clock.time()
                         bot_status["last_learning_update"] = last_learning_update
                         bot_status["model_accuracy"] = learning_engine.accuracy
                         strategy_performance = calculate_strategy_performance()
@@ -917,205 +956,65 @@ try:
                     else:
                         logger.debug("Atualização do modelo de aprendizado não necessária nesta iteração.")
 
-                    current_time = datetime.now()
                     signals_in_iteration = 0
-                    # Priorizar pares de forma balanceada
-                    for pair in PAIRS:
-                        logger.info(f"Processando par: {pair}")
-                        # Salva o preço atual no precos_log.csv, mesmo em modo simulado
-                        try:
-                            price = get_current_price(client, pair, config)
-                            logger.info(f"[DEBUG] Preço salvo em precos_log.csv para {pair}: {price}")
-                        except Exception as e:
-                            logger.error(f"[ERRO] Falha ao salvar preço em precos_log.csv para {pair}: {e}")
-                        signals_by_tf = {}
-
-                        # Carregar insights recentes do Grok para o par
-                        grok_insights = {}
-                        try:
-                            insights_df = pd.read_csv("grok_insights.csv")
-                            recent_insights = insights_df[insights_df["pair"] == pair].tail(1)
-                            if not recent_insights.empty:
-                                grok_insights = json.loads(recent_insights.iloc[0]["insights"])
-                        except Exception as e:
-                            logger.warning(f"Erro ao carregar insights do Grok para {pair}: {e}")
-
-                        # Gerar sinais em tempo real (se habilitado)
-                        for strategy_name, strategy_config in active_strategies.items():
-                            for tf in strategy_config.get("timeframes", TIMEFRAMES):
-                                direction, score, details, contributing_indicators, strategy_name = generate_realtime_signal(
-                                    client, pair, tf, strategy_config, config, learning_engine, binance_utils
-                                )
-                                # Ajustar score com base no Grok se houver insight
-                                if grok_insights:
-                                    score = score * 0.7 + grok_insights.get("confidence", 0.0) * 0.3
-                                    if "reasons" in details:
-                                        details["reasons"].append(f"Grok: {grok_insights.get('reason', 'Sem motivo')}")
-                                if direction and score >= MIN_SCORE_THRESHOLD:
-                                    signals_by_tf[tf] = {
-                                        "direction": direction,
-                                        "score": score,
-                                        "details": details,
-                                        "contributing_indicators": contributing_indicators,
-                                        "strategy_name": strategy_name
-                                    }
-                                    signals_in_iteration += 1
-                                    bot_status["signals_generated"] += 1
-                                    logger.info(f"Sinal em tempo real gerado para {pair} ({tf}): {direction} (score={score})")
-                                elif direction:
-                                    logger.info(f"Sinal rejeitado para {pair} ({tf}): score {score} abaixo do limite {MIN_SCORE_THRESHOLD}")
-
-                        # Salvar insights do Grok para o par
-                        if grok_insights:
-                            pd.DataFrame({
-                                "pair": [pair],
-                                "timeframe": [tf],
-                                "insights": [json.dumps(grok_insights)],
-                                "timestamp": [datetime.now().isoformat()]
-                            }).to_csv("grok_insights.csv", mode="a", index=False, header=False)
-
-                        # Gerar sinais baseados em velas fechadas
-                        for tf in TIMEFRAMES:
-                            if current_time < candle_schedule[pair][tf]:
-                                logger.debug(f"Vela para {pair} ({tf}) ainda não fechou. Próxima verificação em {candle_schedule[pair][tf]}.")
-                                continue
-
-                            candle_schedule[pair][tf] = get_next_candle_close_time(tf, current_time)
-                            is_closed, close_time = is_candle_closed(client, pair, tf)
-                            if not is_closed:
-                                logger.debug(f"Candle para {pair} ({tf}) ainda não fechou. Pulando...")
-                                continue
-
-                            if last_candle_close[pair][tf] == close_time:
-                                logger.debug(f"Candle para {pair} ({tf}) já processado. Pulando...")
-                                continue
-                            last_candle_close[pair][tf] = close_time
-
-                            logger.info(f"Candle para {pair} ({tf}) fechada em {close_time}. Processando...")
-                            # Aumentar o número de candles para timeframes maiores
-                            limit = 200 if tf in ["1h", "4h", "1d"] else 100
-                            historical_data = get_historical_data(client, pair, tf, limit=limit)
-                            if historical_data.empty:
-                                logger.warning(f"Sem dados históricos para {pair} ({tf}). Pulando...")
-                                continue
-                            logger.info(f"Dados históricos obtidos: {len(historical_data)} candles.")
-
-                            historical_data = calculate_indicators(historical_data, binance_utils)
-                            for strategy_name, strategy_config in active_strategies.items():
-                                if tf not in strategy_config.get("timeframes", TIMEFRAMES):
-                                    continue
-                                logger.info(f"Gerando sinais para {pair} ({tf}) com estratégia {strategy_name}...")
-                                direction, score, details, contributing_indicators, _ = generate_signal(
-                                    historical_data, tf, strategy_config, config, learning_engine, binance_utils
-                                )
-                                if not direction:
-                                    logger.debug(f"Nenhum sinal gerado para {pair} ({tf}) com estratégia {strategy_name}.")
-                                    continue
-                                if score < MIN_SCORE_THRESHOLD:
-                                    logger.info(f"Sinal rejeitado para {pair} ({tf}) com estratégia {strategy_name}: score {score} abaixo do limite {MIN_SCORE_THRESHOLD}")
-                                    continue
-
-                                signals_by_tf[tf] = {
-                                    "direction": direction,
-                                    "score": score,
-                                    "details": details,
-                                    "contributing_indicators": contributing_indicators,
-                                    "strategy_name": strategy_name
-                                }
-                                signals_in_iteration += 1
-                                bot_status["signals_generated"] += 1
-                                logger.info(f"Sinal gerado para {pair} ({tf}) com estratégia {strategy_name}: {direction} (score={score})")
-
-                        if not signals_by_tf:
-                            continue
-
-                        final_direction, final_score, multi_tf_details = generate_multi_timeframe_signal(
-                            signals_by_tf, learning_engine, signals_by_tf[list(signals_by_tf.keys())[0]]['contributing_indicators']
+                    if market_scanner:
+                        # Pares com trade aberto (simulado ou real) permanecem no universo até o fechamento
+                        universe = market_scanner.atualizar_se_necessario(
+                            fixos=lambda: {t['par'] for t in active_trades_dry_run} | pares_com_ordens_reais()
                         )
-                        if not final_direction:
-                            logger.debug(f"Nenhum sinal multi-timeframe gerado para {pair}.")
-                            continue
-                        logger.info(f"Sinal multi-timeframe gerado para {pair}: {final_direction} (score={final_score})")
-
-                        signal_id = str(uuid.uuid4())
-                        current_price = get_current_price(client, pair, config)
-                        if current_price is None:
-                            logger.warning(f"Não foi possível obter preço para {pair}. Pulando sinal...")
-                            continue
-                        quantity = get_quantity(config, pair, current_price)
-                        if quantity is None:
-                            logger.error(f"Não foi possível calcular quantidade para {pair}. Pulando sinal...")
-                            continue
-                        funding_rate = get_funding_rate(client, pair, config, mode="dry_run")
-                        strategy_name = signals_by_tf[list(signals_by_tf.keys())[0]]['strategy_name']
-                        strategy_config = active_strategies[strategy_name]
-                        combo_key = generate_combination_key(pair, final_direction, strategy_name, signals_by_tf[list(signals_by_tf.keys())[0]]['contributing_indicators'], tf)
-                        signal_data = {
-                            "signal_id": signal_id,
-                            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                            "par": pair,
-                            "timeframe": tf,
-                            "direcao": final_direction,
-                            "preco_entrada": current_price,
-                            "quantity": quantity,
-                            "score_tecnico": final_score,
-                            "motivos": json.dumps(details["reasons"] + [f"Multi-TF: {multi_tf_details.get('multi_tf_confidence', 0.0):.2f}"]),
-                            "funding_rate": funding_rate,
-                            "localizadores": json.dumps(details["locators"]),
-                            "parametros": json.dumps({
-                                "tp_percent": strategy_config.get("tp_percent", config["stop_padrao"]["tp_percent"]),
-                                "sl_percent": strategy_config.get("sl_percent", config["stop_padrao"]["sl_percent"]),
-                                "leverage": strategy_config.get("leverage", config["leverage"])
-                            }),
-                            "timeframes_analisados": json.dumps(list(signals_by_tf.keys())),
-                            "contributing_indicators": signals_by_tf[list(signals_by_tf.keys())[0]]['contributing_indicators'],
-                            "strategy_name": strategy_name,
-                            "combination_key": combo_key,
-                            "historical_win_rate": details.get("historical_win_rate", 0.0),
-                            "avg_pnl": details.get("avg_pnl", 0.0),
-                            "estado": "aberto",
-                            "side_performance": json.dumps({"LONG": 0.0, "SHORT": 0.0}),
-                            "timeframe_weight": 1.0 / (TIMEFRAMES.index(tf) + 1)
-                        }
-                        signal_data['quality_score'] = calculate_signal_quality(historical_data, signal_data, binance_utils)
-                        signal_queue.put((-signal_data['quality_score'], signal_data))
-                        signals_in_iteration += 1
-                        bot_status["signals_generated"] += 1
+                        for pair in universe:
+                            estado_pares.adicionar(pair)
+                    if shard_coordinator:
+                        shard_coordinator.publicar_estrategias(active_strategies)
+                        shard_coordinator.publicar_config(config)
+                        for signal_data in shard_coordinator.coletar():
+                            signal_queue.put((-signal_data['quality_score'], signal_data))
+                            signals_in_iteration += 1
+                            bot_status["signals_generated"] += 1
+                    # Priorizar pares de forma balanceada (no modo shardado os pares ficam com os processos)
+                    for pair in ([] if shard_coordinator else universe):
+                        for signal_data in gerar_candidatos(client, pair, estado_pares, active_strategies, config,
+                                                            learning_engine, binance_utils, MIN_SCORE_THRESHOLD):
+                            signal_queue.put((-signal_data['quality_score'], signal_data))
+                            signals_in_iteration += 1
+                            bot_status["signals_generated"] += 1
 
                     from trade_manager import check_global_and_robot_limit
                     # Remover limitação global: processar todos os sinais da fila
                     while not signal_queue.empty():
                         _, signal_data = signal_queue.get()
-                        strategy_name = signal_data['strategy_name']
-                        strategy_config = active_strategies[strategy_name]
-                        strategy_active_trades = [trade for trade in active_trades_dry_run if trade['strategy_name'] == strategy_name]
-                        combo_key = signal_data['combination_key']
-                        # Checagem de limite global e por robô
-                        if not check_global_and_robot_limit(strategy_name, active_trades_dry_run):
-                            logger.warning(f"Limite global (540) ou por robô (36) atingido para {strategy_name}. Sinal {signal_data['signal_id']} rejeitado.")
-                            save_signal(signal_data, accepted=False, mode="dry_run")
-                            save_signal_log(signal_data, accepted=False, mode="dry_run")
-                            rejected_signals.put((-signal_data['quality_score'], signal_data))
-                            continue
-                        strategy_max_trades = strategy_config.get("max_trades_simultaneos", 1)
-                        if len(strategy_active_trades) >= strategy_max_trades:
-                            logger.warning(f"Limite de trades simultâneos atingido para {strategy_name} ({len(strategy_active_trades)}/{strategy_max_trades}). Sinal {signal_data['signal_id']} rejeitado.")
-                            save_signal(signal_data, accepted=False, mode="dry_run")
-                            save_signal_log(signal_data, accepted=False, mode="dry_run")
-                            rejected_signals.put((-signal_data['quality_score'], signal_data))
-                            continue
+                        with metrics.span("admission", signal_data['par'], signal_data['timeframe']):
+                            strategy_name = signal_data['strategy_name']
+                            strategy_config = active_strategies[strategy_name]
+                            strategy_active_trades = [trade for trade in active_trades_dry_run if trade['strategy_name'] == strategy_name]
+                            combo_key = signal_data['combination_key']
+                            # Checagem de limite global e por robô
+                            if not check_global_and_robot_limit(strategy_name, active_trades_dry_run):
+                                logger.warning(f"Limite global (540) ou por robô (36) atingido para {strategy_name}. Sinal {signal_data['signal_id']} rejeitado.")
+                                save_signal(signal_data, accepted=False, mode="dry_run")
+                                save_signal_log(signal_data, accepted=False, mode="dry_run")
+                                rejected_signals.put((-signal_data['quality_score'], signal_data))
+                                continue
+                            strategy_max_trades = strategy_config.get("max_trades_simultaneos", 1)
+                            if len(strategy_active_trades) >= strategy_max_trades:
+                                logger.warning(f"Limite de trades simultâneos atingido para {strategy_name} ({len(strategy_active_trades)}/{strategy_max_trades}). Sinal {signal_data['signal_id']} rejeitado.")
+                                save_signal(signal_data, accepted=False, mode="dry_run")
+                                save_signal_log(signal_data, accepted=False, mode="dry_run")
+                                rejected_signals.put((-signal_data['quality_score'], signal_data))
+                                continue
 
-                        if combo_key in active_combinations and config["modes"]["dry_run"]:
-                            logger.info(f"Combinação já ativa: {combo_key}")
-                            continue
+                            if combo_key in active_combinations and config["modes"]["dry_run"]:
+                                logger.info(f"Combinação já ativa: {combo_key}")
+                                continue
 
-                        logger.info(f"Novo sinal aceito: {signal_data['par']} - {signal_data['direcao']} (ID: {signal_data['signal_id']}, Score: {signal_data['quality_score']:.2f})")
-                        # Sempre salva o sinal no CSV (dry_run)
-                        save_signal(signal_data, accepted=True, mode="dry_run")
-                        save_signal_log(signal_data, accepted=True, mode="dry_run")
+                            logger.info(f"Novo sinal aceito: {signal_data['par']} - {signal_data['direcao']} (ID: {signal_data['signal_id']}, Score: {signal_data['quality_score']:.2f})")
+                            # Sempre salva o sinal no CSV (dry_run)
+                            save_signal(signal_data, accepted=True, mode="dry_run")
+                            save_signal_log(signal_data, accepted=True, mode="dry_run")
 
                         # Executa dry_run se ativo
                         if config["modes"].get("dry_run", False):
+                            signal_data = Position(signal_data)
                             active_combinations[combo_key] = signal_data['signal_id']
                             active_trades_dry_run.append(signal_data)
                             bot_status["orders_opened"] += 1
@@ -1127,31 +1026,29 @@ try:
                                 }
                             else:
                                 robots_status[robot_name]["last_order"] = signal_data
-                            threading.Thread(
-                                target=simulate_trade,
-                                args=(client, signal_data, config, active_trades_dry_run, binance_utils, order_executor, active_combinations, get_current_price, get_funding_rate),
-                                daemon=True
-                            ).start()
-                            logger.info(f"Thread de simulação iniciada para sinal {signal_id}.")
+                            simulate_trade(client, signal_data, config, active_trades_dry_run, binance_utils, order_executor,
+                                           active_combinations, get_current_price, get_funding_rate)
+                            logger.info(f"Simulação registrada no monitor para sinal {signal_data['signal_id']}.")
 
                         # Executa ordem real se ativo (independente do dry_run)
                         if config["modes"].get("real", False):
-                            logger.info(f"[DEBUG-REAL] combo_key={combo_key}, active_combinations={active_combinations}")
-                            logger.info(f"[DEBUG-REAL] Sinal: {signal_data}")
-                            logger.info(f"[DEBUG-REAL] Limites: pausar_sinais={config.get('pausar_sinais')}, pausar_ordens={config.get('pausar_ordens')}")
-                            logger.info(f"[DEBUG] config['modes']: {config.get('modes')}")
+                            logger.debug("[DEBUG-REAL] combo_key=%s, combinações ativas=%d", combo_key, len(active_combinations))
+                            logger.debug("[DEBUG-REAL] Sinal: %s", signal_data)
+                            logger.debug("[DEBUG-REAL] Limites: pausar_sinais=%s, pausar_ordens=%s, modes=%s",
+                                         config.get('pausar_sinais'), config.get('pausar_ordens'), config.get('modes'))
                             logger.info(f"[REAL-ORDER-TRY] Tentando enviar ordem REAL para Binance: {signal_data['par']} {signal_data['direcao']} (ID: {signal_data['signal_id']})")
                             try:
-                                result = order_executor.executar_ordem(
-                                    par=signal_data['par'],
-                                    direcao=signal_data['direcao'],
-                                    capital=signal_data['quantity'] * signal_data['preco_entrada'],
-                                    stop_loss=json.loads(signal_data['parametros']).get('sl_percent', 1.0),
-                                    take_profit=json.loads(signal_data['parametros']).get('tp_percent', 2.0),
-                                    mercado='futures',
-                                    dry_run=False,
-                                    dry_run_id=signal_data['signal_id']
-                                )
+                                with metrics.span("order", signal_data['par'], signal_data['timeframe']):
+                                    result = order_executor.executar_ordem(
+                                        par=signal_data['par'],
+                                        direcao=signal_data['direcao'],
+                                        capital=signal_data['quantity'] * signal_data['preco_entrada'],
+                                        stop_loss=signal_data.sl_percent,
+                                        take_profit=signal_data.tp_percent,
+                                        mercado='futures',
+                                        dry_run=False,
+                                        dry_run_id=signal_data['signal_id']
+                                    )
                                 logger.info(f"[REAL-ORDER-SUCCESS] Ordem REAL enviada para Binance: {signal_data['par']} {signal_data['direcao']} (ID: {signal_data['signal_id']}) | Resultado: {result}")
                             except Exception as e:
                                 logger.error(f"[REAL-ORDER-ERROR] Erro ao enviar ordem real para Binance: {e}", exc_info=True)
@@ -1176,6 +1073,7 @@ try:
                         logger.info(f"Reavaliando sinal rejeitado: {signal_data['par']} - {signal_data['direcao']} (ID: {signal_data['signal_id']})")
                         save_signal(signal_data, accepted=True, mode="dry_run")
                         save_signal_log(signal_data, accepted=True, mode="dry_run")
+                        signal_data = Position(signal_data)
                         active_combinations[combo_key] = signal_data['signal_id']
                         active_trades_dry_run.append(signal_data)
                         bot_status["orders_opened"] += 1
@@ -1189,11 +1087,8 @@ try:
                         else:
                             robots_status[robot_name]["last_order"] = signal_data
 
-                        threading.Thread(
-                            target=simulate_trade,
-                            args=(client, signal_data, config, active_trades_dry_run, binance_utils, order_executor, active_combinations, get_current_price, get_funding_rate),
-                            daemon=True
-                        ).start()
+                        simulate_trade(client, signal_data, config, active_trades_dry_run, binance_utils, order_executor,
+                                       active_combinations, get_current_price, get_funding_rate)
 
                     # Adicionar lógica para reiniciar partes do sistema afetadas por erros
                     if system_errors:
@@ -1217,7 +1112,7 @@ try:
                     def validate_bot_status():
                         """Valida a consistência entre sinais gerados, ordens abertas e fechadas."""
                         try:
-                            df = pd.read_csv(SINALS_FILE)
+                            df = ler_diario(SINALS_FILE, colunas=['estado'])
                             total_signals = len(df)
                             closed_orders = len(df[df['estado'] == 'fechado'])
                             open_orders = len(df[df['estado'] == 'aberto'])
@@ -1236,27 +1131,37 @@ try:
 
                     # Chamar a função de atualização no final de cada iteração do loop principal
                     update_orders_status()
-                    close_invalid_open_orders(client)
+                    close_invalid_open_orders(client, ignorar_reais=user_stream is not None)
                     update_bot_summary()
 
                     logger.info(f"--- Fim da iteração {iteration_count} do loop principal ---")
-                    time.sleep(1)  # Reduzido para 1 segundo, já que o agendamento cuida da frequência
+                    iteration_durations.append(time.perf_counter() - iteration_start)
+                    metrics.registro.observar("iteration", iteration_durations[-1])
+                    clock.sleep(config.get("loop_interval", 1))  # 1 segundo por padrão, já que o agendamento cuida da frequência
 
                 except KeyboardInterrupt:
                     logger.info("Interrupção manual detectada. Encerrando o bot...")
                     break
+                except ShardIndisponivel as e:
+                    logger.critical(f"[SHARDS] {e} Encerrando o loop principal.")
+                    raise
                 except Exception as e:
                     error_entry = {
-                        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                        "timestamp": clock.now().strftime("%Y-%m-%d %H:%M:%S"),
                         "description": "Erro no loop principal",
                         "reason": str(e)
                     }
                     system_errors.append(error_entry)
                     logger.error(f"Erro no loop principal: {e}")
-                    time.sleep(5)
+                    clock.sleep(5)
         finally:
             observer.stop()
             observer.join()
+            if shard_coordinator:
+                shard_coordinator.parar()
+            if user_stream:
+                user_stream.parar()
+        return iteration_count
 
     def log_status_extra():
         import os, json
@@ -1280,7 +1185,7 @@ try:
             grok_status = f'Erro: {e}'
         # Ordens/trades
         try:
-            df = pd.read_csv('sinais_detalhados.csv')
+            df = ler_diario('sinais_detalhados.csv', colunas=['estado'])
             open_orders = len(df[df['estado'] == 'aberto']),
             closed_orders = len(df[df['estado'] == 'fechado'])
         except Exception:
@@ -1315,13 +1220,7 @@ try:
             hist_status = 'erro'
         # Últimos erros/warnings
         try:
-            if os.path.exists('bot.log'):
-                with open('bot.log', encoding='utf-8', errors='ignore') as f:
-                    lines = f.readlines()
-                errors = [l.strip() for l in lines if 'ERROR' in l or 'CRITICAL' in l or 'WARNING' in l]
-                last_errors = errors[-5:]
-            else:
-                last_errors = []
+            last_errors = ultimos_alertas(5)
         except Exception:
             last_errors = []
         # Notificações
@@ -0,0 +1,231 @@
+import math
+import threading
+import numpy as np
+import clock
+from utils import logger, api_call_with_retry
+from config import SYMBOLS
+
+# Padrões da seção "market_scanner" do CONFIG
+SCANNER_PADRAO = {
+    "enabled": False,
+    "quote_asset": "USDT",
+    "min_quote_volume": 20_000_000,   # volume 24h em USDT
+    "max_spread_bps": 5.0,            # spread do book em pontos-base
+    "max_abs_funding": 0.001,         # |funding| máximo por período (0.1%)
+    "min_volatility": 0.02,           # (máxima - mínima) / último, 24h
+    "max_volatility": 0.30,
+    "min_pairs": 3,
+    "max_pairs": 50,
+    "refresh_seconds": 900,
+    "exit_rank_factor": 1.5,          # membro só sai se cair abaixo da posição max_pairs * fator
+    "min_hold_seconds": 3600,         # permanência mínima antes de sair por ranking
+    "weights": {"volume": 0.5, "volatility": 0.3, "spread": 0.15, "funding": 0.05},
+    "exclude": [],
+}
+
+_universo = list(SYMBOLS)
+_universo_lock = threading.Lock()
+
+
+def universo_atual():
+    """Último universo publicado pelo scanner (SYMBOLS até a primeira varredura)."""
+    with _universo_lock:
+        return list(_universo)
+
+
+def _publicar(pares):
+    global _universo
+    with _universo_lock:
+        _universo = list(pares)
+
+
+def _ranque(valores):
+    """Posição relativa de cada valor em [0, 1] (0 = menor)."""
+    if len(valores) < 2:
+        return np.ones(len(valores))
+    return np.argsort(np.argsort(valores, kind="stable"), kind="stable") / (len(valores) - 1)
+
+
+def _numeros(itens, chave):
+    return np.array([float(item.get(chave) or "nan") for item in itens], dtype=np.float64)
+
+
+def tabela_mercado(tickers, livros=None, marks=None):
+    """
+    Monta arrays alinhados por símbolo a partir das respostas em lote da Binance.
+
+    Args:
+        tickers (list): futures_ticker() sem símbolo (24h de todos os contratos).
+        livros (list): futures_orderbook_ticker() sem símbolo (melhor bid/ask).
+        marks (list): futures_mark_price() sem símbolo (lastFundingRate).
+
+    Returns:
+        dict: symbol, quote_volume, volatility, spread_bps, funding (np.ndarray).
+    """
+    simbolos = np.array([t["symbol"] for t in tickers])
+    ultimo = _numeros(tickers, "lastPrice")
+    tabela = {
+        "symbol": simbolos,
+        "quote_volume": _numeros(tickers, "quoteVolume"),
+        "volatility": (_numeros(tickers, "highPrice") - _numeros(tickers, "lowPrice")) / ultimo,
+        "spread_bps": np.zeros(len(simbolos)),
+        "funding": np.zeros(len(simbolos)),
+    }
+    posicao = {s: i for i, s in enumerate(simbolos)}
+    if livros:
+        idx = np.array([posicao.get(l["symbol"], -1) for l in livros])
+        ok = idx >= 0
+        bid, ask = _numeros(livros, "bidPrice")[ok], _numeros(livros, "askPrice")[ok]
+        tabela["spread_bps"][idx[ok]] = (ask - bid) / ((ask + bid) / 2) * 1e4
+    if marks:
+        idx = np.array([posicao.get(m["symbol"], -1) for m in marks])
+        ok = idx >= 0
+        tabela["funding"][idx[ok]] = _numeros(marks, "lastFundingRate")[ok]
+    return tabela
+
+
+def ranquear(tabela, opcoes):
+    """
+    Aplica os filtros e ordena os elegíveis por score (ranks ponderados de volume, volatilidade,
+    spread e funding), tudo vetorizado.
+
+    Returns:
+        tuple: (símbolos elegíveis do melhor para o pior, scores correspondentes)
+    """
+    s = tabela["symbol"]
+    with np.errstate(invalid="ignore"):
+        elegivel = (
+            np.char.endswith(s.astype(str), opcoes["quote_asset"])
+            & ~np.isin(s, list(opcoes.get("exclude", [])))
+            & (tabela["quote_volume"] >= opcoes["min_quote_volume"])
+            & (tabela["spread_bps"] <= opcoes["max_spread_bps"])
+            & (np.abs(tabela["funding"]) <= opcoes["max_abs_funding"])
+            & (tabela["volatility"] >= opcoes["min_volatility"])
+            & (tabela["volatility"] <= opcoes["max_volatility"])
+        )
+    if not elegivel.any():
+        return [], np.array([])
+    pesos = opcoes["weights"]
+    score = (
+        pesos["volume"] * _ranque(tabela["quote_volume"][elegivel])
+        + pesos["volatility"] * _ranque(tabela["volatility"][elegivel])
+        + pesos["spread"] * (1 - _ranque(tabela["spread_bps"][elegivel]))
+        + pesos["funding"] * (1 - _ranque(np.abs(tabela["funding"][elegivel])))
+    )
+    ordem = np.argsort(-score, kind="stable")
+    return list(s[elegivel][ordem]), score[ordem]
+
+
+def aplicar_histerese(ranking, atual, entrada, opcoes, agora, fixos=()):
+    """
+    Escolhe o novo universo a partir do ranking sem trocar pares por pequenas variações.
+
+    Membros atuais permanecem enquanto elegíveis e dentro de max_pairs * exit_rank_factor
+    (ou antes de completar min_hold_seconds); vagas são preenchidas pelos melhores do ranking.
+    Pares em `fixos` (ex.: com posição aberta) nunca saem.
+
+    Args:
+        ranking (list): Símbolos elegíveis do melhor para o pior.
+        atual (list): Universo atual.
+        entrada (dict): Instante de entrada de cada membro atual.
+        opcoes (dict): Opções do scanner.
+        agora (float): Instante atual (epoch s).
+        fixos (iterable): Pares que devem permanecer.
+
+    Returns:
+        list: Novo universo (ordem do ranking; fixos fora do ranking no fim).
+    """
+    posicao = {s: i for i, s in enumerate(ranking)}
+    limite_saida = math.ceil(opcoes["max_pairs"] * opcoes["exit_rank_factor"])
+    fixos = set(fixos)
+    mantidos = [
+        s for s in atual
+        if s in fixos or (s in posicao and (posicao[s] < limite_saida or agora - entrada.get(s, agora) < opcoes["min_hold_seconds"]))
+    ]
+    alvo = max(opcoes["min_pairs"], min(opcoes["max_pairs"], len(ranking)))
+    if len(mantidos) > alvo:
+        # Universo encolheu: saem primeiro os membros pior ranqueados (fixos sempre ficam)
+        mantidos.sort(key=lambda s: (s not in fixos, posicao.get(s, -1)))
+        mantidos = mantidos[:max(alvo, len(fixos & set(mantidos)))]
+    novos = []
+    for s in ranking[:opcoes["max_pairs"]]:
+        if len(mantidos) + len(novos) >= alvo:
+            break
+        if s not in mantidos:
+            novos.append(s)
+    escolhidos = set(mantidos) | set(novos)
+    return [s for s in ranking if s in escolhidos] + [s for s in mantidos if s not in posicao]
+
+
+class MarketScanner:
+    """
+    Seleciona o universo operável com uma chamada em lote de tickers 24h (mais book ticker e
+    mark price em lote, também uma chamada cada) e publica o resultado para o loop principal
+    e o GrokPeriodicCheck via universo_atual().
+    """
+    def __init__(self, client, opcoes=None):
+        self.client = client
+        self.opcoes = {**SCANNER_PADRAO, **(opcoes or {})}
+        self.opcoes["weights"] = {**SCANNER_PADRAO["weights"], **self.opcoes.get("weights", {})}
+        self.universo = universo_atual()
+        self.entrada = {}
+        self.ultima_varredura = None
+        self._ouvintes = []
+
+    def ao_mudar(self, callback):
+        """Registra callback(novo_universo, adicionados, removidos)."""
+        self._ouvintes.append(callback)
+
+    def varrer(self, fixos=()):
+        """Consulta a exchange, ranqueia e atualiza o universo. Retorna o universo publicado."""
+        agora = clock.time()
+        tickers = api_call_with_retry(self.client.futures_ticker)
+        livros = marks = None
+        try:
+            livros = api_call_with_retry(self.client.futures_orderbook_ticker)
+        except Exception as e:
+            logger.warning(f"[SCANNER] Book ticker indisponível, spread ignorado: {e}")
+        try:
+            marks = api_call_with_retry(self.client.futures_mark_price)
+        except Exception as e:
+            logger.warning(f"[SCANNER] Mark price indisponível, funding ignorado: {e}")
+        if not tickers:
+            logger.warning("[SCANNER] Nenhum ticker recebido. Universo mantido.")
+            return self.universo
+        ranking, _ = ranquear(tabela_mercado(tickers, livros, marks), self.opcoes)
+        if not ranking:
+            logger.warning(f"[SCANNER] Nenhum dos {len(tickers)} contratos passou nos filtros. Universo mantido.")
+            self.ultima_varredura = agora
+            return self.universo
+        novo = aplicar_histerese(ranking, self.universo, self.entrada, self.opcoes, agora, fixos)
+        adicionados = [s for s in novo if s not in self.universo]
+        removidos = [s for s in self.universo if s not in novo]
+        self.entrada = {s: self.entrada.get(s, agora) for s in novo}
+        self.ultima_varredura = agora
+        if adicionados or removidos:
+            self.universo = novo
+            _publicar(novo)
+            logger.info(f"[SCANNER] Universo com {len(novo)} pares ({len(ranking)} elegíveis de {len(tickers)}). "
+                        f"Entraram: {adicionados}. Saíram: {removidos}.")
+            for callback in self._ouvintes:
+                try:
+                    callback(list(novo), adicionados, removidos)
+                except Exception as e:
+                    logger.error(f"[SCANNER] Erro em ouvinte do universo: {e}")
+        return self.universo
+
+    def atualizar_se_necessario(self, fixos=()):
+        """
+        Varre se o intervalo de atualização passou; caso contrário devolve o universo atual.
+
+        Args:
+            fixos (iterable | callable): Pares que devem permanecer. Um callable só é chamado
+                quando a varredura acontece (evita consultar o diário a cada iteração).
+        """
+        if self.ultima_varredura is None or clock.time() - self.ultima_varredura >= self.opcoes["refresh_seconds"]:
+            try:
+                return self.varrer(fixos() if callable(fixos) else fixos)
+            except Exception as e:
+                logger.error(f"[SCANNER] Falha na varredura: {e}")
+                self.ultima_varredura = clock.time()
+        return self.universo
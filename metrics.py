@@ -0,0 +1,260 @@
+import bisect
+import functools
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Limites dos buckets em segundos: progressão geométrica (x1.25) de 50µs a ~70s
+LIMITES = tuple(round(5e-5 * 1.25 ** i, 9) for i in range(64))
+PORTA_PADRAO = 9108
+NOME_METRICA = "ultrabot_stage_seconds"
+
+
+class _Histograma:
+    """Contagens por bucket de uma série; escrito apenas pela thread dona."""
+    __slots__ = ("contagens", "soma", "total")
+
+    def __init__(self):
+        self.contagens = [0] * (len(LIMITES) + 1)
+        self.soma = 0.0
+        self.total = 0
+
+
+class Registro:
+    """
+    Histogramas de latência por (etapa, par, timeframe).
+
+    Cada thread escreve apenas nos seus próprios histogramas (threading.local), então registrar
+    uma observação não usa lock; a leitura soma as séries de todas as threads. O lock só é
+    usado na primeira observação de cada thread, para registrá-la na lista de leitores. As séries
+    de threads que já terminaram são somadas em um acumulado único e descartadas (na leitura e no
+    registro de uma thread nova), de modo que a memória acompanha as threads vivas, não o total
+    de threads que já existiram. incorporar() soma ao mesmo acumulado as séries de outros processos.
+    """
+    def __init__(self):
+        self._local = threading.local()
+        self._por_thread = []
+        self._encerradas = {}
+        self._lock = threading.Lock()
+        self._ultimo_resumo = {}
+
+    def _series(self):
+        series = getattr(self._local, "series", None)
+        if series is None:
+            series = self._local.series = {}
+            with self._lock:
+                self._recolher()
+                self._por_thread.append((threading.current_thread(), series))
+        return series
+
+    def _recolher(self):
+        # Chamado com o lock: uma thread encerrada não escreve mais, então somar as suas séries é seguro
+        vivas = []
+        for thread, series in self._por_thread:
+            if thread.is_alive():
+                vivas.append((thread, series))
+                continue
+            for chave, hist in series.items():
+                acumulado = self._encerradas.get(chave)
+                if acumulado is None:
+                    acumulado = self._encerradas[chave] = _Histograma()
+                acumulado.contagens = [a + b for a, b in zip(acumulado.contagens, hist.contagens)]
+                acumulado.soma += hist.soma
+                acumulado.total += hist.total
+        self._por_thread = vivas
+
+    def observar(self, etapa, segundos, par="", timeframe=""):
+        """Registra a duração de uma etapa."""
+        series = self._series()
+        chave = (etapa, par or "", timeframe or "")
+        hist = series.get(chave)
+        if hist is None:
+            hist = series[chave] = _Histograma()
+        hist.contagens[bisect.bisect_left(LIMITES, segundos)] += 1
+        hist.soma += segundos
+        hist.total += 1
+
+    def span(self, etapa, par="", timeframe=""):
+        """Context manager que mede o bloco como uma observação da etapa."""
+        return _Span(self, etapa, par, timeframe)
+
+    def cronometrar(self, etapa):
+        """Decorator que mede cada chamada da função como uma observação da etapa."""
+        def decorar(funcao):
+            @functools.wraps(funcao)
+            def envolvida(*args, **kwargs):
+                with _Span(self, etapa, "", ""):
+                    return funcao(*args, **kwargs)
+            return envolvida
+        return decorar
+
+    def snapshot(self):
+        """
+        Soma as séries de todas as threads.
+
+        Returns:
+            dict: {(etapa, par, timeframe): (contagens, soma, total)}
+        """
+        with self._lock:
+            self._recolher()
+            threads = [series for _, series in self._por_thread]
+            total = {chave: (list(hist.contagens), hist.soma, hist.total) for chave, hist in self._encerradas.items()}
+        for series in threads:
+            for chave, hist in list(series.items()):
+                contagens, soma, n = total.get(chave, ([0] * (len(LIMITES) + 1), 0.0, 0))
+                total[chave] = ([a + b for a, b in zip(contagens, hist.contagens)], soma + hist.soma, n + hist.total)
+        return total
+
+    def incorporar(self, series):
+        """
+        Soma ao registro séries observadas em outro processo (ex.: incrementos enviados pelos shards).
+
+        Args:
+            series (dict): {(etapa, par, timeframe): (contagens, soma, total)}, como em snapshot().
+        """
+        with self._lock:
+            for chave, (contagens, soma, total) in series.items():
+                acumulado = self._encerradas.get(chave)
+                if acumulado is None:
+                    acumulado = self._encerradas[chave] = _Histograma()
+                acumulado.contagens = [a + b for a, b in zip(acumulado.contagens, contagens)]
+                acumulado.soma += soma
+                acumulado.total += total
+
+    def exposicao_prometheus(self):
+        """Texto no formato de exposição do Prometheus (histograma cumulativo por série)."""
+        linhas = [
+            f"# HELP {NOME_METRICA} Duração das etapas do loop principal em segundos.",
+            f"# TYPE {NOME_METRICA} histogram",
+        ]
+        for (etapa, par, tf), (contagens, soma, n) in sorted(self.snapshot().items()):
+            rotulos = f'stage="{etapa}",pair="{par}",timeframe="{tf}"'
+            acumulado = 0
+            for limite, contagem in zip(LIMITES, contagens):
+                acumulado += contagem
+                linhas.append(f'{NOME_METRICA}_bucket{{{rotulos},le="{limite:g}"}} {acumulado}')
+            linhas.append(f'{NOME_METRICA}_bucket{{{rotulos},le="+Inf"}} {n}')
+            linhas.append(f"{NOME_METRICA}_sum{{{rotulos}}} {soma:.9f}")
+            linhas.append(f"{NOME_METRICA}_count{{{rotulos}}} {n}")
+        return "\n".join(linhas) + "\n"
+
+    def resumo(self, agrupar_por_etapa=True):
+        """
+        Percentis p50/p95/p99 das observações feitas desde o resumo anterior (janela móvel).
+
+        Args:
+            agrupar_por_etapa (bool): Soma pares/timeframes de cada etapa.
+
+        Returns:
+            dict: {etapa ou (etapa, par, tf): {"n", "p50_ms", "p95_ms", "p99_ms"}}
+        """
+        atual = {}
+        for (etapa, par, tf), (contagens, _, n) in self.snapshot().items():
+            chave = etapa if agrupar_por_etapa else (etapa, par, tf)
+            anterior = atual.get(chave, [0] * len(contagens))
+            atual[chave] = [a + b for a, b in zip(anterior, contagens)]
+        resultado = {}
+        for chave, contagens in atual.items():
+            anterior = self._ultimo_resumo.get((agrupar_por_etapa, chave), [0] * len(contagens))
+            janela = [a - b for a, b in zip(contagens, anterior)]
+            self._ultimo_resumo[(agrupar_por_etapa, chave)] = contagens
+            n = sum(janela)
+            if n:
+                resultado[chave] = {"n": n, **{f"p{q}_ms": percentil(janela, q / 100) * 1000 for q in (50, 95, 99)}}
+        return resultado
+
+
+def diferenca(atual, anterior):
+    """
+    Incremento entre dois snapshot(): só as séries com observações novas.
+
+    Returns:
+        dict: {(etapa, par, timeframe): (contagens, soma, total)}
+    """
+    incremento = {}
+    for chave, (contagens, soma, total) in atual.items():
+        antes = anterior.get(chave)
+        if antes is None:
+            incremento[chave] = (contagens, soma, total)
+        elif total > antes[2]:
+            incremento[chave] = ([a - b for a, b in zip(contagens, antes[0])], soma - antes[1], total - antes[2])
+    return incremento
+
+
+def percentil(contagens, q):
+    """Percentil estimado de um histograma por interpolação geométrica dentro do bucket."""
+    n = sum(contagens)
+    alvo = q * n
+    acumulado = 0
+    for i, contagem in enumerate(contagens):
+        if contagem and acumulado + contagem >= alvo:
+            inferior = LIMITES[i - 1] if i > 0 else LIMITES[0] / 1.25
+            superior = LIMITES[i] if i < len(LIMITES) else LIMITES[-1] * 1.25
+            fracao = (alvo - acumulado) / contagem
+            return inferior * (superior / inferior) ** fracao
+        acumulado += contagem
+    return LIMITES[-1]
+
+
+class _Span:
+    __slots__ = ("registro", "etapa", "par", "timeframe", "inicio")
+
+    def __init__(self, registro, etapa, par, timeframe):
+        self.registro = registro
+        self.etapa = etapa
+        self.par = par
+        self.timeframe = timeframe
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registro.observar(self.etapa, time.perf_counter() - self.inicio, self.par, self.timeframe)
+        return False
+
+
+registro = Registro()
+
+
+def span(etapa, par="", timeframe=""):
+    """Mede um bloco no registro global: `with metrics.span("fetch", pair, tf): ...`"""
+    return registro.span(etapa, par, timeframe)
+
+
+def cronometrar(etapa):
+    return registro.cronometrar(etapa)
+
+
+def formatar_resumo(resumo):
+    """Linhas de texto para o resumo periódico do terminal."""
+    return [f"{etapa:<14} p50 {r['p50_ms']:8.2f}ms | p95 {r['p95_ms']:8.2f}ms | p99 {r['p99_ms']:8.2f}ms | n={r['n']}"
+            for etapa, r in sorted(resumo.items())]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        corpo = registro.exposicao_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+def iniciar_servidor(porta=PORTA_PADRAO, host="127.0.0.1"):
+    """
+    Expõe /metrics (formato Prometheus) em uma thread daemon.
+
+    Returns:
+        ThreadingHTTPServer: Servidor iniciado (use shutdown() para parar).
+    """
+    servidor = ThreadingHTTPServer((host, porta), _Handler)
+    threading.Thread(target=servidor.serve_forever, daemon=True, name="MetricsHTTP").start()
+    return servidor
@@ -0,0 +1,580 @@
+import itertools
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+from binance.exceptions import BinanceAPIException
+from utils import logger
+
+MINUTO_MS = 60_000
+TF_MS = {
+    "1m": MINUTO_MS, "5m": 5 * MINUTO_MS, "15m": 15 * MINUTO_MS,
+    "1h": 60 * MINUTO_MS, "4h": 240 * MINUTO_MS, "1d": 1440 * MINUTO_MS
+}
+
+# Filtros aproximados dos contratos USDT-M (suficientes para arredondamento/validação local)
+FILTROS_PADRAO = {
+    "XRPUSDT": {"stepSize": "0.1", "tickSize": "0.0001", "notional": "5"},
+    "DOGEUSDT": {"stepSize": "1", "tickSize": "0.00001", "notional": "5"},
+    "TRXUSDT": {"stepSize": "1", "tickSize": "0.00001", "notional": "5"},
+}
+
+# Peso aproximado de cada endpoint no limite por minuto da Binance
+PESOS = {
+    "get_klines": 2, "futures_klines": 2, "futures_exchange_info": 1, "futures_account": 5,
+    "futures_place_batch_order": 5, "futures_ticker": 40, "futures_orderbook_ticker": 2,
+    "futures_position_information": 5, "get_order_book": 2,
+}
+
+
+def _erro_api(status, code, msg):
+    texto = json.dumps({"code": code, "msg": msg})
+    return BinanceAPIException(SimpleNamespace(text=texto, request=None), status, texto)
+
+
+class MockBinanceClient:
+    """
+    Exchange de futuros local para testes determinísticos de throughput e latência.
+
+    Implementa, com a mesma assinatura do python-binance, os endpoints REST usados pelo bot
+    (klines, ticker, mark price, ordens, conta), servidos a partir dos arquivos
+    historical_data_{PAR}_{TF}.csv. O tempo é virtual: avança apenas por avancar()/definir_tempo()
+    ou pelo relógio injetado, e a cada avanço o motor de matching executa ordens LIMIT,
+    STOP_MARKET e TAKE_PROFIT_MARKET contra o caminho de preço das velas de 1m.
+    """
+    def __init__(self, symbols=("XRPUSDT", "DOGEUSDT", "TRXUSDT"), data_dir=".", inicio=None,
+                 latencia_ms=0.0, limite_peso_minuto=None, taxa_erro=0.0, erros_por_endpoint=None,
+                 saldo_inicial=1000.0, taxa_taker=0.0004, seed=42, relogio=None):
+        """
+        Args:
+            symbols (tuple): Pares servidos pela exchange local.
+            data_dir (str): Diretório dos arquivos historical_data_*.csv.
+            inicio (str|int): Instante inicial (texto de data ou epoch ms). Padrão: 12 dias após a
+                primeira vela de 1m (ou o meio da série, se for mais curta), para haver histórico.
+            latencia_ms (float|tuple): Latência fixa ou intervalo (min, max) por chamada.
+            limite_peso_minuto (int): Peso máximo por minuto real; excedido gera erro -1003 (HTTP 429).
+            taxa_erro (float): Probabilidade de erro -1001 em qualquer chamada.
+            erros_por_endpoint (dict): Probabilidade de erro por nome de método.
+            saldo_inicial (float): Saldo USDT da conta simulada.
+            taxa_taker (float): Taxa cobrada por execução.
+            seed (int): Semente para latência/erros reproduzíveis.
+            relogio (callable): Função que retorna o epoch ms atual (substitui o relógio interno).
+        """
+        self.symbols = list(symbols)
+        self.data_dir = data_dir
+        self.latencia_ms = latencia_ms
+        self.limite_peso_minuto = limite_peso_minuto
+        self.taxa_erro = taxa_erro
+        self.erros_por_endpoint = erros_por_endpoint or {}
+        self.taxa_taker = taxa_taker
+        self.rng = random.Random(seed)
+        self.relogio = relogio
+        self.saldo = saldo_inicial
+        self.alavancagens = {s: 20 for s in self.symbols}
+        self.margin_types = {s: "CROSSED" for s in self.symbols}
+        self.posicoes = {s: {"qtd": 0.0, "preco_entrada": 0.0} for s in self.symbols}
+        self.ordens = {}
+        self.trades = []
+        self.chamadas = []
+        self.ouvintes = []
+        self._ids = itertools.count(1)
+        self._pesos = []
+        self._dados = {}
+        self._lock = threading.RLock()
+        primeira = self._velas(self.symbols[0], "1m")["open_time"]
+        if inicio is None:
+            self._agora = int(primeira[min(12 * 1440, len(primeira) // 2)])
+        elif isinstance(inicio, str):
+            self._agora = int(pd.Timestamp(inicio, tz="UTC").value // 1_000_000)
+        else:
+            self._agora = int(inicio)
+
+    # --- Dados e relógio ---
+
+    def _velas(self, symbol, tf):
+        chave = (symbol, tf)
+        if chave not in self._dados:
+            caminho = os.path.join(self.data_dir, f"historical_data_{symbol}_{tf}.csv")
+            if os.path.exists(caminho):
+                df = pd.read_csv(caminho)
+                abertura = pd.to_datetime(df["timestamp"], utc=True).dt.as_unit("ms").astype("int64")
+                self._dados[chave] = {
+                    "open_time": abertura.to_numpy(dtype=np.int64),
+                    **{c: df[c].to_numpy(dtype=np.float64) for c in ("open", "high", "low", "close", "volume")},
+                }
+            elif tf != "1m":
+                self._dados[chave] = self._agregar(self._velas(symbol, "1m"), TF_MS[tf])
+            else:
+                raise FileNotFoundError(caminho)
+        return self._dados[chave]
+
+    @staticmethod
+    def _agregar(base, intervalo_ms):
+        grupos = base["open_time"] // intervalo_ms
+        inicio = np.flatnonzero(np.r_[True, grupos[1:] != grupos[:-1]])
+        fim = np.r_[inicio[1:], len(grupos)] - 1
+        return {
+            "open_time": grupos[inicio] * intervalo_ms,
+            "open": base["open"][inicio],
+            "high": np.maximum.reduceat(base["high"], inicio),
+            "low": np.minimum.reduceat(base["low"], inicio),
+            "close": base["close"][fim],
+            "volume": np.add.reduceat(base["volume"], inicio),
+        }
+
+    def agora_ms(self):
+        """Retorna o instante virtual atual em epoch ms."""
+        return int(self.relogio()) if self.relogio else self._agora
+
+    def avancar(self, segundos):
+        """Avança o relógio virtual e executa o matching das ordens pendentes no intervalo."""
+        self.definir_tempo(self.agora_ms() + int(segundos * 1000))
+
+    def definir_tempo(self, epoch_ms):
+        """Move o relógio virtual para epoch_ms (apenas para frente) processando o matching."""
+        with self._lock:
+            anterior = self._agora
+            self._agora = max(int(epoch_ms), anterior)
+            self._processar_intervalo(anterior, self._agora)
+
+    def sincronizar(self):
+        """Processa o matching até o instante do relógio injetado (usado com relogio=...)."""
+        if self.relogio:
+            with self._lock:
+                alvo = int(self.relogio())
+                if alvo > self._agora:
+                    anterior, self._agora = self._agora, alvo
+                    self._processar_intervalo(anterior, alvo)
+
+    def _indice_1m(self, symbol, t_ms):
+        velas = self._velas(symbol, "1m")
+        return max(int(np.searchsorted(velas["open_time"], t_ms, side="right")) - 1, 0)
+
+    @staticmethod
+    def _caminho(velas, i):
+        # Caminho determinístico dentro da vela: abertura -> extremo 1 -> extremo 2 -> fechamento
+        o, h, l, c = velas["open"][i], velas["high"][i], velas["low"][i], velas["close"][i]
+        return (o, l, h, c) if c >= o else (o, h, l, c)
+
+    def _preco_em(self, symbol, t_ms):
+        velas = self._velas(symbol, "1m")
+        i = self._indice_1m(symbol, t_ms)
+        fracao = min(max((t_ms - velas["open_time"][i]) / MINUTO_MS, 0.0), 1.0)
+        return float(np.interp(fracao, (0.0, 1 / 3, 2 / 3, 1.0), self._caminho(velas, i)))
+
+    def preco_atual(self, symbol):
+        """Último preço virtual do símbolo."""
+        return self._preco_em(symbol, self.agora_ms())
+
+    # --- Infraestrutura de chamadas ---
+
+    def _chamada(self, nome, peso=None):
+        self.chamadas.append((nome, time.perf_counter()))
+        if self.limite_peso_minuto:
+            agora = time.monotonic()
+            self._pesos = [(t, p) for t, p in self._pesos if agora - t < 60]
+            peso = peso or PESOS.get(nome, 1)
+            if sum(p for _, p in self._pesos) + peso > self.limite_peso_minuto:
+                raise _erro_api(429, -1003, "Too many requests; current limit of IP is exceeded.")
+            self._pesos.append((agora, peso))
+        if self.latencia_ms:
+            latencia = self.latencia_ms
+            if isinstance(latencia, (tuple, list)):
+                latencia = self.rng.uniform(*latencia)
+            time.sleep(latencia / 1000)
+        prob = self.erros_por_endpoint.get(nome, self.taxa_erro)
+        if prob and self.rng.random() < prob:
+            raise _erro_api(500, -1001, "Internal error; unable to process your request. Please try again.")
+        self.sincronizar()
+
+    def _emitir(self, evento):
+        for ouvinte in list(self.ouvintes):
+            try:
+                ouvinte(evento)
+            except Exception as e:
+                logger.error(f"[MOCK] Erro no ouvinte de eventos: {e}")
+
+    # --- Mercado ---
+
+    def ping(self):
+        self._chamada("ping")
+        return {}
+
+    def get_server_time(self):
+        self._chamada("get_server_time")
+        return {"serverTime": self.agora_ms()}
+
+    futures_time = get_server_time
+
+    def get_klines(self, symbol, interval, limit=500, startTime=None, endTime=None, **kwargs):
+        self._chamada("get_klines")
+        return self._klines(symbol, interval, limit, startTime, endTime)
+
+    def futures_klines(self, symbol, interval, limit=500, startTime=None, endTime=None, **kwargs):
+        self._chamada("futures_klines")
+        return self._klines(symbol, interval, limit, startTime, endTime)
+
+    def _klines(self, symbol, interval, limit, start_time, end_time):
+        velas = self._velas(symbol, interval)
+        agora = self.agora_ms()
+        intervalo = TF_MS[interval]
+        fim = int(np.searchsorted(velas["open_time"], min(agora, end_time or agora), side="right"))
+        ini = int(np.searchsorted(velas["open_time"], start_time)) if start_time else max(fim - limit, 0)
+        ini, fim = ini, min(fim, ini + limit)
+        resultado = []
+        for i in range(ini, fim):
+            abertura = int(velas["open_time"][i])
+            o, h, l, c, v = (velas[k][i] for k in ("open", "high", "low", "close", "volume"))
+            if abertura + intervalo > agora:
+                # Vela em formação: só o trecho já "negociado" do caminho de 1m
+                c = self._preco_em(symbol, agora)
+                base = self._velas(symbol, "1m")
+                a, b = int(np.searchsorted(base["open_time"], abertura)), self._indice_1m(symbol, agora)
+                if b > a:
+                    h, l = max(base["high"][a:b].max(), c), min(base["low"][a:b].min(), c)
+                else:
+                    h, l = max(o, c), min(o, c)
+                v = float(base["volume"][a:b + 1].sum())
+            resultado.append([
+                abertura, f"{o:.8f}", f"{h:.8f}", f"{l:.8f}", f"{c:.8f}", f"{v:.8f}",
+                abertura + intervalo - 1, f"{v * c:.8f}", 0, "0", "0", "0"
+            ])
+        return resultado
+
+    def get_symbol_ticker(self, symbol=None, **kwargs):
+        self._chamada("get_symbol_ticker")
+        return self._ticker(symbol)
+
+    def futures_symbol_ticker(self, symbol=None, **kwargs):
+        self._chamada("futures_symbol_ticker")
+        return self._ticker(symbol)
+
+    def _ticker(self, symbol):
+        if symbol is None:
+            return [{"symbol": s, "price": f"{self.preco_atual(s):.8f}"} for s in self.symbols]
+        self._validar_symbol(symbol)
+        return {"symbol": symbol, "price": f"{self.preco_atual(symbol):.8f}"}
+
+    def futures_mark_price(self, symbol=None, **kwargs):
+        self._chamada("futures_mark_price")
+        def mark(s):
+            return {"symbol": s, "markPrice": f"{self.preco_atual(s):.8f}", "indexPrice": f"{self.preco_atual(s):.8f}",
+                    "lastFundingRate": "0.00010000", "nextFundingTime": (self.agora_ms() // (8 * 3600_000) + 1) * 8 * 3600_000,
+                    "time": self.agora_ms()}
+        return mark(symbol) if symbol else [mark(s) for s in self.symbols]
+
+    def futures_funding_rate(self, symbol=None, limit=1, **kwargs):
+        self._chamada("futures_funding_rate")
+        return [{"symbol": symbol, "fundingRate": "0.00010000", "fundingTime": self.agora_ms()}][:limit]
+
+    def futures_ticker(self, symbol=None, **kwargs):
+        self._chamada("futures_ticker")
+        def ticker(s):
+            velas = self._velas(s, "1m")
+            b = self._indice_1m(s, self.agora_ms())
+            a = max(b - 1439, 0)
+            ultimo = self.preco_atual(s)
+            aberto = velas["open"][a]
+            volume = float(velas["volume"][a:b + 1].sum())
+            return {"symbol": s, "lastPrice": f"{ultimo:.8f}", "openPrice": f"{aberto:.8f}",
+                    "highPrice": f"{velas['high'][a:b + 1].max():.8f}", "lowPrice": f"{velas['low'][a:b + 1].min():.8f}",
+                    "priceChangePercent": f"{(ultimo / aberto - 1) * 100:.3f}", "volume": f"{volume:.8f}",
+                    "quoteVolume": f"{volume * ultimo:.8f}", "count": b - a + 1}
+        return ticker(symbol) if symbol else [ticker(s) for s in self.symbols]
+
+    def futures_orderbook_ticker(self, symbol=None, **kwargs):
+        self._chamada("futures_orderbook_ticker")
+        def livro(s):
+            preco = self.preco_atual(s)
+            tick = float(FILTROS_PADRAO.get(s, {}).get("tickSize", "0.0001"))
+            return {"symbol": s, "bidPrice": f"{preco - tick:.8f}", "bidQty": "1000", "askPrice": f"{preco + tick:.8f}", "askQty": "1000"}
+        return livro(symbol) if symbol else [livro(s) for s in self.symbols]
+
+    def get_order_book(self, symbol, limit=10, **kwargs):
+        self._chamada("get_order_book")
+        preco = self.preco_atual(symbol)
+        tick = float(FILTROS_PADRAO.get(symbol, {}).get("tickSize", "0.0001"))
+        return {
+            "lastUpdateId": self.agora_ms(),
+            "bids": [[f"{preco - tick * (i + 1):.8f}", "1000"] for i in range(limit)],
+            "asks": [[f"{preco + tick * (i + 1):.8f}", "1000"] for i in range(limit)],
+        }
+
+    futures_order_book = get_order_book
+
+    def futures_exchange_info(self):
+        self._chamada("futures_exchange_info")
+        simbolos = []
+        for s in self.symbols:
+            f = FILTROS_PADRAO.get(s, {"stepSize": "0.001", "tickSize": "0.0001", "notional": "5"})
+            simbolos.append({"symbol": s, "status": "TRADING", "quoteAsset": "USDT", "filters": [
+                {"filterType": "PRICE_FILTER", "tickSize": f["tickSize"]},
+                {"filterType": "LOT_SIZE", "stepSize": f["stepSize"], "minQty": f["stepSize"]},
+                {"filterType": "MARKET_LOT_SIZE", "stepSize": f["stepSize"], "minQty": f["stepSize"]},
+                {"filterType": "MIN_NOTIONAL", "notional": f["notional"]},
+            ]})
+        return {"serverTime": self.agora_ms(), "symbols": simbolos}
+
+    def _validar_symbol(self, symbol):
+        if symbol not in self.symbols:
+            raise _erro_api(400, -1121, "Invalid symbol.")
+
+    # --- Conta ---
+
+    def futures_symbol_config(self, symbol=None, **kwargs):
+        self._chamada("futures_symbol_config")
+        return [{"symbol": s, "leverage": self.alavancagens[s], "marginType": self.margin_types[s]}
+                for s in self.symbols if symbol in (None, s)]
+
+    def futures_change_leverage(self, symbol, leverage, **kwargs):
+        self._chamada("futures_change_leverage")
+        self._validar_symbol(symbol)
+        self.alavancagens[symbol] = int(leverage)
+        return {"symbol": symbol, "leverage": int(leverage)}
+
+    def futures_change_margin_type(self, symbol, marginType, **kwargs):
+        self._chamada("futures_change_margin_type")
+        self._validar_symbol(symbol)
+        if self.margin_types[symbol] == marginType.upper():
+            raise _erro_api(400, -4046, "No need to change margin type.")
+        self.margin_types[symbol] = marginType.upper()
+        return {"code": 200, "msg": "success"}
+
+    def _posicao(self, s):
+        pos = self.posicoes[s]
+        preco = self.preco_atual(s)
+        return {"symbol": s, "positionAmt": f"{pos['qtd']}", "entryPrice": f"{pos['preco_entrada']}",
+                "markPrice": f"{preco:.8f}", "unrealizedProfit": f"{pos['qtd'] * (preco - pos['preco_entrada']):.8f}",
+                "leverage": str(self.alavancagens[s]), "marginType": self.margin_types[s].lower()}
+
+    def futures_account(self, **kwargs):
+        self._chamada("futures_account")
+        posicoes = [self._posicao(s) for s in self.symbols]
+        nao_realizado = sum(float(p["unrealizedProfit"]) for p in posicoes)
+        return {"totalWalletBalance": f"{self.saldo:.8f}", "totalUnrealizedProfit": f"{nao_realizado:.8f}",
+                "assets": [{"asset": "USDT", "walletBalance": f"{self.saldo:.8f}"}], "positions": posicoes}
+
+    def futures_account_balance(self, **kwargs):
+        self._chamada("futures_account_balance")
+        return [{"asset": "USDT", "balance": f"{self.saldo:.8f}", "availableBalance": f"{self.saldo:.8f}"}]
+
+    def futures_position_information(self, symbol=None, **kwargs):
+        self._chamada("futures_position_information")
+        return [self._posicao(s) for s in self.symbols if symbol in (None, s)]
+
+    def futures_account_trades(self, symbol=None, **kwargs):
+        self._chamada("futures_account_trades")
+        return [t for t in self.trades if symbol in (None, t["symbol"])]
+
+    def futures_stream_get_listen_key(self):
+        self._chamada("futures_stream_get_listen_key")
+        return uuid.uuid4().hex
+
+    def futures_stream_keepalive(self, listenKey):
+        self._chamada("futures_stream_keepalive")
+        return {}
+
+    # --- Ordens e matching ---
+
+    def futures_create_order(self, **params):
+        self._chamada("futures_create_order")
+        with self._lock:
+            return self._nova_ordem(params)
+
+    def futures_place_batch_order(self, batchOrders, **kwargs):
+        self._chamada("futures_place_batch_order")
+        if len(batchOrders) > 5:
+            raise _erro_api(400, -1130, "Data sent for parameter 'batchOrders' is not valid.")
+        respostas = []
+        with self._lock:
+            for params in batchOrders:
+                try:
+                    respostas.append(self._nova_ordem(dict(params)))
+                except BinanceAPIException as e:
+                    respostas.append({"code": e.code, "msg": e.message})
+        return respostas
+
+    def futures_cancel_order(self, symbol, orderId=None, origClientOrderId=None, **kwargs):
+        self._chamada("futures_cancel_order")
+        with self._lock:
+            ordem = self._buscar(symbol, orderId, origClientOrderId)
+            if ordem is None or ordem["status"] != "NEW":
+                raise _erro_api(400, -2011, "Unknown order sent.")
+            ordem["status"] = "CANCELED"
+            self._evento_ordem(ordem)
+            return dict(ordem)
+
+    def futures_get_order(self, symbol, orderId=None, origClientOrderId=None, **kwargs):
+        self._chamada("futures_get_order")
+        ordem = self._buscar(symbol, orderId, origClientOrderId)
+        if ordem is None:
+            raise _erro_api(400, -2013, "Order does not exist.")
+        return dict(ordem)
+
+    def futures_get_open_orders(self, symbol=None, **kwargs):
+        self._chamada("futures_get_open_orders")
+        return [dict(o) for o in self.ordens.values() if o["status"] == "NEW" and symbol in (None, o["symbol"])]
+
+    def _buscar(self, symbol, order_id, client_order_id):
+        if order_id is not None:
+            ordem = self.ordens.get(int(order_id))
+            return ordem if ordem and ordem["symbol"] == symbol else None
+        return next((o for o in self.ordens.values() if o["symbol"] == symbol and o["clientOrderId"] == client_order_id), None)
+
+    def _nova_ordem(self, params):
+        symbol = params["symbol"]
+        self._validar_symbol(symbol)
+        tipo = params["type"]
+        lado = params["side"]
+        reduce_only = str(params.get("reduceOnly", "false")).lower() == "true"
+        close_position = str(params.get("closePosition", "false")).lower() == "true"
+        quantidade = float(params.get("quantity", 0) or 0)
+        if (reduce_only or close_position) and not self._reduz(symbol, lado):
+            raise _erro_api(400, -2022, "ReduceOnly Order is rejected.")
+        if quantidade <= 0 and not close_position:
+            raise _erro_api(400, -4003, "Quantity less than or equal to zero.")
+        ordem = {
+            "orderId": next(self._ids), "symbol": symbol, "side": lado, "type": tipo, "status": "NEW",
+            "clientOrderId": params.get("newClientOrderId") or f"mock_{uuid.uuid4().hex[:20]}",
+            "origQty": quantidade, "executedQty": 0.0, "avgPrice": 0.0,
+            "price": float(params.get("price", 0) or 0), "stopPrice": float(params.get("stopPrice", 0) or 0),
+            "reduceOnly": reduce_only, "closePosition": close_position, "updateTime": self.agora_ms(),
+        }
+        self.ordens[ordem["orderId"]] = ordem
+        self._evento_ordem(ordem)
+        preco = self.preco_atual(symbol)
+        if tipo == "MARKET":
+            self._executar(ordem, preco)
+        elif tipo == "LIMIT" and self._limite_atingido(ordem, preco, preco):
+            self._executar(ordem, preco)
+        elif tipo in ("STOP", "STOP_MARKET", "TAKE_PROFIT", "TAKE_PROFIT_MARKET") and self._gatilho(ordem, preco, preco):
+            raise _erro_api(400, -2021, "Order would immediately trigger.")
+        return dict(ordem)
+
+    def _reduz(self, symbol, lado):
+        qtd = self.posicoes[symbol]["qtd"]
+        return (qtd > 0 and lado == "SELL") or (qtd < 0 and lado == "BUY")
+
+    @staticmethod
+    def _limite_atingido(ordem, minimo, maximo):
+        return minimo <= ordem["price"] if ordem["side"] == "BUY" else maximo >= ordem["price"]
+
+    @staticmethod
+    def _gatilho(ordem, minimo, maximo):
+        # STOP compra dispara na alta e vende na baixa; TAKE_PROFIT é o oposto
+        sobe = (ordem["side"] == "BUY") == ordem["type"].startswith("STOP")
+        return maximo >= ordem["stopPrice"] if sobe else minimo <= ordem["stopPrice"]
+
+    def _processar_intervalo(self, t0, t1):
+        pendentes = [o for o in self.ordens.values() if o["status"] == "NEW"]
+        if not pendentes or t1 <= t0:
+            return
+        for symbol in {o["symbol"] for o in pendentes}:
+            velas = self._velas(symbol, "1m")
+            a, b = self._indice_1m(symbol, t0), self._indice_1m(symbol, t1)
+            for i in range(a, b + 1):
+                abertura = velas["open_time"][i]
+                ini, fim = max(t0, abertura), min(t1, abertura + MINUTO_MS)
+                pontos = [self._preco_em(symbol, ini), self._preco_em(symbol, fim)]
+                caminho = self._caminho(velas, i)
+                for k, fracao in enumerate((1 / 3, 2 / 3)):
+                    if ini < abertura + fracao * MINUTO_MS < fim:
+                        pontos.append(caminho[k + 1])
+                minimo, maximo = min(pontos), max(pontos)
+                ordens = sorted((o for o in pendentes if o["symbol"] == symbol and o["status"] == "NEW"),
+                                key=lambda o: abs((o["stopPrice"] or o["price"]) - pontos[0]))
+                for ordem in ordens:
+                    if ordem["type"] == "LIMIT" and self._limite_atingido(ordem, minimo, maximo):
+                        self._executar(ordem, ordem["price"])
+                    elif ordem["type"] != "LIMIT" and self._gatilho(ordem, minimo, maximo):
+                        self._executar(ordem, ordem["stopPrice"])
+
+    def _executar(self, ordem, preco):
+        symbol = ordem["symbol"]
+        pos = self.posicoes[symbol]
+        sinal = 1 if ordem["side"] == "BUY" else -1
+        quantidade = abs(pos["qtd"]) if ordem["closePosition"] else ordem["origQty"]
+        if ordem["reduceOnly"] or ordem["closePosition"]:
+            if not self._reduz(symbol, ordem["side"]):
+                ordem["status"] = "EXPIRED"
+                self._evento_ordem(ordem)
+                return
+            quantidade = min(quantidade, abs(pos["qtd"]))
+        realizado = 0.0
+        if pos["qtd"] * sinal < 0:
+            fechada = min(quantidade, abs(pos["qtd"]))
+            realizado = fechada * (preco - pos["preco_entrada"]) * (1 if pos["qtd"] > 0 else -1)
+        nova = pos["qtd"] + sinal * quantidade
+        if abs(nova) < 1e-12:
+            pos.update(qtd=0.0, preco_entrada=0.0)
+        elif pos["qtd"] * sinal >= 0:
+            pos["preco_entrada"] = (abs(pos["qtd"]) * pos["preco_entrada"] + quantidade * preco) / abs(nova)
+            pos["qtd"] = nova
+        else:
+            if nova * pos["qtd"] < 0:
+                pos["preco_entrada"] = preco
+            pos["qtd"] = nova
+        taxa = quantidade * preco * self.taxa_taker
+        self.saldo += realizado - taxa
+        ordem.update(status="FILLED", executedQty=quantidade, avgPrice=preco, updateTime=self.agora_ms())
+        self.trades.append({"symbol": symbol, "orderId": ordem["orderId"], "side": ordem["side"], "qty": f"{quantidade}",
+                            "price": f"{preco}", "commission": f"{taxa}", "realizedPnl": f"{realizado}", "time": self.agora_ms()})
+        self._evento_ordem(ordem, realizado)
+        self._emitir({"e": "ACCOUNT_UPDATE", "E": self.agora_ms(), "a": {
+            "m": "ORDER", "B": [{"a": "USDT", "wb": f"{self.saldo:.8f}", "cw": f"{self.saldo:.8f}"}],
+            "P": [{"s": symbol, "pa": f"{pos['qtd']}", "ep": f"{pos['preco_entrada']}", "up": "0", "mt": self.margin_types[symbol].lower(), "ps": "BOTH"}],
+        }})
+
+    def _evento_ordem(self, ordem, realizado=0.0):
+        self._emitir({"e": "ORDER_TRADE_UPDATE", "E": self.agora_ms(), "o": {
+            "s": ordem["symbol"], "c": ordem["clientOrderId"], "S": ordem["side"], "o": ordem["type"],
+            "q": f"{ordem['origQty']}", "p": f"{ordem['price']}", "sp": f"{ordem['stopPrice']}", "ap": f"{ordem['avgPrice']}",
+            "X": ordem["status"], "x": "TRADE" if ordem["status"] == "FILLED" else ordem["status"],
+            "i": ordem["orderId"], "z": f"{ordem['executedQty']}", "rp": f"{realizado}", "T": self.agora_ms(),
+        }})
+
+
+def benchmark_ordens(n_ordens=200, latencia_ms=0.0, modo="batch", symbol="XRPUSDT"):
+    """
+    Mede o throughput de OrderExecutor.executar_ordem contra a exchange local.
+
+    Args:
+        n_ordens (int): Número de ordens (entrada + TP + SL) a enviar.
+        latencia_ms (float): Latência simulada por chamada.
+        modo (str): "sequential" ou "batch".
+        symbol (str): Par negociado.
+
+    Returns:
+        dict: Ordens por segundo, tempo médio e número de chamadas à API.
+    """
+    import tempfile
+    from order_executor import OrderExecutor
+    data_dir = os.path.abspath(os.path.dirname(__file__))
+    cliente = MockBinanceClient(symbols=(symbol,), data_dir=data_dir, latencia_ms=latencia_ms)
+    diretorio = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            pd.DataFrame(columns=["signal_id", "par", "direcao", "estado", "strategy_name", "timeframe"]).to_csv("sinais_detalhados.csv", index=False)
+            config = {"strategy_name": "benchmark", "timeframe": "1m", "leverage": 10, "order_placement_mode": modo,
+                      "limits_by_timeframe": {"1m": {"LONG": n_ordens, "SHORT": n_ordens}}}
+            executor = OrderExecutor(cliente, config)
+            inicio = time.perf_counter()
+            for i in range(n_ordens):
+                executor.executar_ordem(symbol, "LONG" if i % 2 == 0 else "SHORT", 10.0, 1.0, 2.0, dry_run_id=str(uuid.uuid4()))
+                cliente.avancar(60)
+            duracao = time.perf_counter() - inicio
+        finally:
+            os.chdir(diretorio)
+    return {"modo": modo, "ordens_por_segundo": n_ordens / duracao, "ms_por_ordem": duracao / n_ordens * 1000,
+            "chamadas_api": len(cliente.chamadas)}
+
+
+if __name__ == "__main__":
+    for modo in ("sequential", "batch"):
+        print(benchmark_ordens(latencia_ms=5.0, modo=modo))
@@ -6,6 +6,7 @@ from datetime import datetime
 from binance.client import Client
 from learning_engine import LearningEngine
 from notification_manager import get_last_notifications
+from log_tail import ultimos_alertas
 
 # Configuração do logging para o terminal
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -43,7 +44,8 @@ def check_grok_api():
 def count_open_orders():
     try:
         import pandas as pd
-        df = pd.read_csv("sinais_detalhados.csv")
+        from journal_schema import ler_diario
+        df = ler_diario("sinais_detalhados.csv", colunas=['estado'])
         return len(df[df['estado'] == 'aberto'])
     except Exception:
         return "erro"
@@ -85,12 +87,7 @@ def check_historical_sync():
 
 def get_last_log_errors(n=5):
     try:
-        if not os.path.exists("bot.log"):
-            return []
-        with open("bot.log", encoding="utf-8", errors="ignore") as f:
-            lines = f.readlines()
-        errors = [l.strip() for l in lines if "ERROR" in l or "CRITICAL" in l or "WARNING" in l]
-        return errors[-n:]
+        return ultimos_alertas(n)
     except Exception:
         return []
 
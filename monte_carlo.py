@@ -0,0 +1,169 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from utils import logger
+
+CACHE_FILE = "monte_carlo_cache.json"
+QUANTIS = (0.5, 0.9, 0.95, 0.99)
+CELULAS_POR_LOTE = 2_500_000  # limita a memória: caminhos x trades por lote (~30 bytes por célula)
+
+
+def indices_reamostrados(n, n_caminhos, n_trades=None, bloco=1, rng=None):
+    """
+    Gera os índices das sequências reamostradas como uma matriz (n_caminhos, n_trades).
+
+    Args:
+        n (int): Número de trades observados.
+        n_caminhos (int): Número de caminhos simulados.
+        n_trades (int): Comprimento de cada caminho (padrão: n).
+        bloco (int): 1 para bootstrap simples; >1 para bootstrap por blocos circulares,
+            que preserva sequências de ganhos/perdas consecutivos.
+        rng (np.random.Generator): Gerador aleatório.
+
+    Returns:
+        np.ndarray: Índices int32 no intervalo [0, n).
+    """
+    rng = rng or np.random.default_rng()
+    n_trades = n_trades or n
+    if bloco <= 1:
+        return rng.integers(0, n, size=(n_caminhos, n_trades), dtype=np.int32)
+    n_blocos = -(-n_trades // bloco)
+    inicios = rng.integers(0, n, size=(n_caminhos, n_blocos, 1), dtype=np.int32)
+    return ((inicios + np.arange(bloco, dtype=np.int32)) % n).reshape(n_caminhos, -1)[:, :n_trades]
+
+
+def metricas_caminhos(retornos, indices, fracao_capital=0.1, perda_ruina=0.5):
+    """
+    Calcula drawdown máximo, maior período abaixo do topo e ruína para cada caminho.
+
+    Args:
+        retornos (np.ndarray): Retorno fracionário por trade (ex.: 0.02 para +2%).
+        indices (np.ndarray): Matriz de índices de indices_reamostrados.
+        fracao_capital (float): Fração do capital alocada por trade.
+        perda_ruina (float): Perda a partir do capital inicial considerada ruína (0.5 = -50%).
+
+    Returns:
+        dict: Arrays por caminho: max_drawdown, tempo_recuperacao (em trades), ruina, equity_final.
+    """
+    fatores = np.maximum(1 + np.float32(fracao_capital) * retornos[indices], 0.0)
+    equity = np.cumprod(fatores, axis=1)
+    topo = np.maximum(np.maximum.accumulate(equity, axis=1), 1.0)
+    drawdown = 1 - equity / topo
+    posicoes = np.arange(equity.shape[1], dtype=np.int32)
+    # Índice do último topo em cada ponto; a distância até ele é o tempo abaixo d'água
+    ultimo_topo = np.maximum.accumulate(np.where(equity >= topo, posicoes, np.int32(-1)), axis=1)
+    return {
+        "max_drawdown": drawdown.max(axis=1),
+        "tempo_recuperacao": (posicoes - ultimo_topo).max(axis=1),
+        "ruina": equity.min(axis=1) <= 1 - perda_ruina,
+        "equity_final": equity[:, -1],
+    }
+
+
+def simular(retornos, n_caminhos=10000, bloco=1, fracao_capital=0.1, perda_ruina=0.5, seed=42):
+    """
+    Simula n_caminhos sequências reamostradas de uma série de retornos por trade.
+
+    Returns:
+        dict: Quantis de drawdown, tempo de recuperação e equity final, e o risco de ruína.
+    """
+    # float32 basta para as métricas e reduz pela metade a memória e o tempo das matrizes
+    retornos = np.asarray(retornos, dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    linhas_por_lote = max(1, CELULAS_POR_LOTE // max(len(retornos), 1))
+    partes = []
+    for inicio in range(0, n_caminhos, linhas_por_lote):
+        indices = indices_reamostrados(len(retornos), min(linhas_por_lote, n_caminhos - inicio), bloco=bloco, rng=rng)
+        partes.append(metricas_caminhos(retornos, indices, fracao_capital, perda_ruina))
+    caminhos = {k: np.concatenate([p[k] for p in partes]) for k in partes[0]}
+    resultado = {"trades": int(len(retornos)), "caminhos": int(n_caminhos), "risco_ruina": float(caminhos["ruina"].mean())}
+    for q in QUANTIS:
+        p = int(q * 100)
+        resultado[f"drawdown_p{p}"] = float(np.quantile(caminhos["max_drawdown"], q) * 100)
+        resultado[f"recuperacao_p{p}"] = float(np.quantile(caminhos["tempo_recuperacao"], q))
+    resultado["equity_final_p5"] = float(np.quantile(caminhos["equity_final"], 0.05))
+    resultado["equity_final_p50"] = float(np.quantile(caminhos["equity_final"], 0.5))
+    return resultado
+
+
+def _alavancagem_registrada(parametros):
+    try:
+        return float(json.loads(parametros).get("leverage", 1)) or 1.0
+    except (TypeError, ValueError, AttributeError):
+        return 1.0
+
+
+_cache = {}
+
+
+def _carregar_cache(cache_file):
+    if not _cache and cache_file and os.path.exists(cache_file):
+        try:
+            with open(cache_file) as f:
+                # Entradas fora do formato atual ({estrategia: {"assinatura", "resultado"}}) são descartadas
+                _cache.update({k: v for k, v in json.load(f).items() if isinstance(v, dict) and "assinatura" in v})
+        except Exception as e:
+            logger.warning(f"[MONTE CARLO] Cache inválido em {cache_file}: {e}")
+    return _cache
+
+
+def monte_carlo_por_estrategia(df, alavancagens=None, n_caminhos=10000, bloco=1, fracao_capital=0.1,
+                               perda_ruina=0.5, seed=42, cache_file=CACHE_FILE):
+    """
+    Distribuições de risco por estratégia e alavancagem a partir das ordens fechadas do diário.
+
+    O cache guarda um resultado por estratégia, válido enquanto não houver novas ordens fechadas
+    nem mudança nos parâmetros da simulação (assinatura: número de ordens fechadas, última saída
+    e parâmetros); uma assinatura nova substitui a anterior, então o cache não cresce com o tempo.
+
+    Args:
+        df (pd.DataFrame): Diário (sinais_detalhados.csv) ou apenas as ordens fechadas.
+        alavancagens (list): Alavancagens a avaliar; None usa a alavancagem registrada em cada trade.
+            O lucro_percentual (retorno sobre a margem, já com a alavancagem registrada no trade)
+            é reescalado para a alavancagem avaliada.
+        n_caminhos (int): Caminhos simulados por estratégia/alavancagem.
+        bloco (int): Tamanho do bloco (1 = bootstrap simples).
+        fracao_capital (float): Fração do capital alocada por trade.
+        perda_ruina (float): Perda considerada ruína.
+        seed (int): Semente (resultados reproduzíveis).
+        cache_file (str): Arquivo JSON de cache (None desativa a persistência).
+
+    Returns:
+        dict: {estrategia: {alavancagem: métricas}}.
+    """
+    resultados = {}
+    if df.empty or 'strategy_name' not in df.columns:
+        return resultados
+    fechadas = df[df['estado'] == 'fechado'] if 'estado' in df.columns else df
+    cache = _carregar_cache(cache_file)
+    alterado = False
+    for estrategia, grupo in fechadas.groupby('strategy_name'):
+        lucros = pd.to_numeric(grupo['lucro_percentual'], errors='coerce')
+        grupo = grupo[lucros.notna()]
+        if len(grupo) < 2:
+            continue
+        ultima_saida = str(grupo['timestamp_saida'].max()) if 'timestamp_saida' in grupo.columns else ""
+        assinatura = json.dumps([len(grupo), ultima_saida, alavancagens, n_caminhos, bloco,
+                                 fracao_capital, perda_ruina, seed])
+        entrada = cache.get(estrategia)
+        if entrada is None or entrada["assinatura"] != assinatura:
+            retornos = lucros[lucros.notna()].to_numpy() / 100
+            if alavancagens is None:
+                resultado = {"registrada": simular(retornos, n_caminhos, bloco, fracao_capital, perda_ruina, seed)}
+            else:
+                registrada = grupo['parametros'].map(_alavancagem_registrada).to_numpy() if 'parametros' in grupo.columns else 1.0
+                resultado = {
+                    str(alavancagem): simular(retornos / registrada * alavancagem, n_caminhos, bloco, fracao_capital, perda_ruina, seed)
+                    for alavancagem in alavancagens
+                }
+            entrada = cache[estrategia] = {"assinatura": assinatura, "resultado": resultado}
+            alterado = True
+        resultados[estrategia] = entrada["resultado"]
+    if alterado and cache_file:
+        try:
+            with open(cache_file, "w") as f:
+                json.dump(cache, f)
+        except Exception as e:
+            logger.error(f"[MONTE CARLO] Erro ao gravar cache {cache_file}: {e}")
+    return resultados
@@ -4,6 +4,7 @@ import numpy as np
 import os
 import ta
 import streamlit as st
+from data_manager import klines_para_dataframe
 
 # Substituir credenciais hardcoded por variáveis seguras do Streamlit
 api_key = st.secrets["binance"]["api_key"]
@@ -13,13 +14,7 @@ client = Client(api_key, api_secret)
 def validar_timeframe_superior(par, timeframe_secundario='1h'):
     try:
         klines = client.get_klines(symbol=par.replace("/", ""), interval=timeframe_secundario, limit=100)
-        df = pd.DataFrame(klines, columns=[
-            'timestamp', 'open', 'high', 'low', 'close', 'volume',
-            'close_time', 'quote_asset_volume', 'num_trades',
-            'taker_buy_base', 'taker_buy_quote', 'ignore'
-        ])
-        df['close'] = pd.to_numeric(df['close'])
-        df['volume'] = pd.to_numeric(df['volume'])
+        df = klines_para_dataframe(klines)
 
         # Indicadores no timeframe superior
         df['ema21'] = ta.trend.ema_indicator(df['close'], window=21)
@@ -1,13 +1,97 @@
-from binance.enums import SIDE_BUY, SIDE_SELL, ORDER_TYPE_MARKET, ORDER_TYPE_LIMIT
+from binance.enums import SIDE_BUY, SIDE_SELL, ORDER_TYPE_MARKET, ORDER_TYPE_LIMIT, FUTURE_ORDER_TYPE_STOP_MARKET, FUTURE_ORDER_TYPE_TAKE_PROFIT_MARKET
 from utils import logger
 from binance.exceptions import BinanceAPIException
-import pandas as pd
 import json
+import re
+import time
+import uuid
 from datetime import datetime
-from trade_manager import check_timeframe_direction_limit, check_active_trades, check_global_and_robot_limit
+import clock
+import audit_outbox
+from trade_manager import check_timeframe_direction_limit, check_active_trades, check_global_and_robot_limit, get_local_timestamp
+import journal_schema
+from journal_schema import com_trava, ler_diario, escrever_diario
+from exchange_filters import get_symbol_filters
 
 SINALS_FILE = "sinais_detalhados.csv"
 
+def _cronometrar(func, *args, **kwargs):
+    """Executa a chamada e retorna (resultado, latência em ms)."""
+    inicio = time.perf_counter()
+    resultado = func(*args, **kwargs)
+    return resultado, (time.perf_counter() - inicio) * 1000
+
+def gerar_client_order_id(signal_id, perna):
+    """
+    Gera o clientOrderId de uma perna a partir do signal_id local.
+    O formato "<signal_id sem hífens>-<perna>" respeita o limite de 36 caracteres da Binance
+    e permite recuperar o sinal a partir dos eventos de execução.
+
+    Args:
+        signal_id (str): ID local do sinal (uuid).
+        perna (str): "en" (entrada), "tp" ou "sl".
+
+    Returns:
+        str: clientOrderId (ex.: "3f2a...9c-tp").
+    """
+    base = re.sub(r'[^A-Za-z0-9]', '', str(signal_id))[:32]
+    return f"{base}-{perna}"
+
+def signal_id_de_client_order_id(client_order_id):
+    """
+    Recupera (signal_id, perna) de um clientOrderId gerado por gerar_client_order_id.
+
+    Args:
+        client_order_id (str): clientOrderId recebido da Binance.
+
+    Returns:
+        tuple: (signal_id, perna) ou (None, None) se o ID não foi gerado pelo bot.
+    """
+    base, _, perna = str(client_order_id).rpartition('-')
+    if perna not in ("en", "tp", "sl") or len(base) != 32:
+        return None, None
+    try:
+        return str(uuid.UUID(hex=base)), perna
+    except ValueError:
+        return None, None
+
+def enviar_protecoes_em_lote(client, par, lado_saida, quantidade, tp_preco, sl_preco, signal_id=None):
+    """
+    Envia as pernas de TP e SL numa única chamada ao endpoint de ordens em lote (batchOrders).
+    As pernas usam TAKE_PROFIT_MARKET/STOP_MARKET com reduceOnly; uma perna rejeitada no lote
+    é reenviada individualmente.
+
+    Args:
+        client: Cliente Binance.
+        par (str): Par de negociação.
+        lado_saida (str): Lado das ordens de saída (SIDE_SELL para LONG, SIDE_BUY para SHORT).
+        quantidade (str): Quantidade já arredondada.
+        tp_preco (str): Preço de disparo do TP já arredondado.
+        sl_preco (str): Preço de disparo do SL já arredondado.
+        signal_id (str): ID local do sinal para derivar os clientOrderIds.
+
+    Returns:
+        tuple: (ordem_tp, ordem_sl, latência em ms).
+    """
+    pernas = [
+        {"symbol": par, "side": lado_saida, "type": FUTURE_ORDER_TYPE_TAKE_PROFIT_MARKET,
+         "quantity": quantidade, "stopPrice": tp_preco, "reduceOnly": "true"},
+        {"symbol": par, "side": lado_saida, "type": FUTURE_ORDER_TYPE_STOP_MARKET,
+         "quantity": quantidade, "stopPrice": sl_preco, "reduceOnly": "true"},
+    ]
+    if signal_id:
+        pernas[0]["newClientOrderId"] = gerar_client_order_id(signal_id, "tp")
+        pernas[1]["newClientOrderId"] = gerar_client_order_id(signal_id, "sl")
+    respostas, latencia = _cronometrar(client.futures_place_batch_order, batchOrders=[dict(p) for p in pernas])
+    ordens = []
+    for perna, resposta in zip(pernas, respostas):
+        if 'orderId' not in resposta:
+            logger.error(f"[REAL ORDER] Perna {perna['type']} rejeitada no lote para {par}: {resposta}. Reenviando individualmente.")
+            resposta, extra = _cronometrar(client.futures_create_order, **perna)
+            latencia += extra
+        ordens.append(resposta)
+    return ordens[0], ordens[1], latencia
+
 class OrderExecutor:
     """
     Módulo para execução de ordens reais na Binance.
@@ -22,24 +106,36 @@ class OrderExecutor:
         """
         self.client = client
         self.config = config
+        self.filtros = get_symbol_filters(client, ttl=config.get('exchange_info_ttl', 3600))
 
     def configurar_alavancagem(self, par, leverage):
         """
         Configura a alavancagem para o par especificado.
+        A chamada à API só é feita quando a alavancagem em cache é diferente.
 
         Args:
             par (str): Par de negociação (ex.: "DOGEUSDT").
             leverage (int): Nível de alavancagem (ex.: 20).
         """
         try:
-            self.client.futures_change_leverage(symbol=par, leverage=leverage)
-            logger.info(f"Alavancagem configurada para {par}: {leverage}x")
+            if self.filtros.garantir_alavancagem(par, leverage):
+                logger.info(f"Alavancagem configurada para {par}: {leverage}x")
         except BinanceAPIException as e:
             logger.error(f"Erro ao configurar alavancagem para {par}: {e}")
             raise
 
+    def _registrar_oportunidade_perdida(self, par, direcao, motivo):
+        """Registra a ordem bloqueada em oportunidades_perdidas.csv (mesmas colunas de save_signal_log)."""
+        audit_outbox.enviar(audit_outbox.OPORTUNIDADES, {
+            'timestamp': get_local_timestamp(),
+            'robot_name': self.config['strategy_name'],
+            'par': par,
+            'timeframe': self.config['timeframe'],
+            'direcao': direcao,
+            'reason': motivo,
+        })
+
     def executar_ordem(self, par, direcao, capital, stop_loss, take_profit, mercado='futures', dry_run=False, dry_run_id=None):
-        logger.info(f"[DEBUG-ORDER_EXECUTOR] Parâmetros: par={par}, direcao={direcao}, capital={capital}, stop_loss={stop_loss}, take_profit={take_profit}, dry_run={dry_run}, config={self.config}")
         """
         Executa uma ordem de mercado ou simula em dry run.
         Agora faz log detalhado e vincula o signal_id local ao id da Binance e ao id da ordem dry run.
@@ -57,14 +153,15 @@ class OrderExecutor:
         Returns:
             dict: Detalhes da ordem executada ou simulada.
         """
+        logger.debug("[DEBUG-ORDER_EXECUTOR] Parâmetros: par=%s, direcao=%s, capital=%s, stop_loss=%s, take_profit=%s, dry_run=%s",
+                     par, direcao, capital, stop_loss, take_profit, dry_run)
         # Checagem centralizada de limite de ordens por direção/par/timeframe/robô
         active_trades = check_active_trades()
         # Checagem de limite global e por robô
         if not check_global_and_robot_limit(self.config['strategy_name'], active_trades):
             logger.info(f"[DEBUG-ORDER_EXECUTOR] Motivo do bloqueio: Limite global (540) ou por robô (36) atingido para {self.config['strategy_name']}")
             logger.warning(f"Limite global (540) ou por robô (36) atingido para {self.config['strategy_name']}. Ordem não será criada.")
-            with open("oportunidades_perdidas.csv", "a") as f:
-                f.write(f"{pd.Timestamp.now()},{self.config['strategy_name']},{par},{self.config['timeframe']},{direcao},N/A,N/A,Limite global ou por robô atingido\n")
+            self._registrar_oportunidade_perdida(par, direcao, "Limite global ou por robô atingido")
             return {"status": "ignored", "reason": "limite global ou por robô atingido"}
         can_open = check_timeframe_direction_limit(
             par,
@@ -77,12 +174,11 @@ class OrderExecutor:
         if not can_open:
             logger.info(f"[DEBUG-ORDER_EXECUTOR] Motivo do bloqueio: Limite de trades simultâneos atingido para {self.config['strategy_name']} em {par}/{self.config['timeframe']}/{direcao}")
             logger.warning(f"Limite de trades simultâneos atingido para {self.config['strategy_name']} em {par}/{self.config['timeframe']}/{direcao}. Ordem não será criada.")
-            with open("oportunidades_perdidas.csv", "a") as f:
-                f.write(f"{pd.Timestamp.now()},{self.config['strategy_name']},{par},{self.config['timeframe']},{direcao},N/A,N/A,Limite de trades simultâneos atingido\n")
+            self._registrar_oportunidade_perdida(par, direcao, "Limite de trades simultâneos atingido")
             return {"status": "ignored", "reason": "limite de trades simultâneos atingido"}
 
         # Verificar se já existe uma ordem aberta para o robô na mesma direção e timeframe
-        df = pd.read_csv("sinais_detalhados.csv")
+        df = ler_diario("sinais_detalhados.csv", colunas=['estado', 'strategy_name', 'direcao', 'timeframe'])
         ordens_abertas = df[(df['estado'] == 'aberto') &
                             (df['strategy_name'] == self.config['strategy_name']) &
                             (df['direcao'] == direcao) &
@@ -91,8 +187,7 @@ class OrderExecutor:
             logger.info(f"[DEBUG-ORDER_EXECUTOR] Motivo do bloqueio: Já existe uma ordem aberta para a estratégia {self.config['strategy_name']} na direção {direcao} e timeframe {self.config['timeframe']}")
             logger.warning(f"Já existe uma ordem aberta para a estratégia {self.config['strategy_name']} na direção {direcao} e timeframe {self.config['timeframe']}. Ordem não será criada.")
             # Registrar no log de oportunidades perdidas
-            with open("oportunidades_perdidas.csv", "a") as f:
-                f.write(f"{pd.Timestamp.now()},{self.config['strategy_name']},{par},{self.config['timeframe']},{direcao},N/A,N/A,Limite de trades simultâneos atingido\n")
+            self._registrar_oportunidade_perdida(par, direcao, "Limite de trades simultâneos atingido")
             return {"status": "ignored", "reason": "existing open order for direction and timeframe"}
 
         if dry_run:
@@ -100,63 +195,86 @@ class OrderExecutor:
             return {"status": "simulated", "order_id": dry_run_id}
 
         lado = SIDE_BUY if direcao == "LONG" else SIDE_SELL
+        lado_saida = SIDE_SELL if direcao == "LONG" else SIDE_BUY
+        modo = self.config.get('order_placement_mode', 'sequential')
+        latencias = {}
         try:
-            preco = float(self.client.futures_symbol_ticker(symbol=par)['price'])
             leverage = self.config.get('leverage', 20)
-            quantidade = (capital * leverage) / preco
+            ticker, latencias['ticker'] = _cronometrar(self.client.futures_symbol_ticker, symbol=par)
+            preco = float(ticker['price'])
+            # Arredonda localmente pelos filtros da exchange (evita rejeições LOT_SIZE/PRICE_FILTER)
+            quantidade = self.filtros.arredondar_quantidade(par, (capital * leverage) / preco)
+            if not self.filtros.validar_notional(par, quantidade, preco):
+                logger.warning(f"Quantidade {quantidade} para {par} abaixo do mínimo da exchange (minQty/minNotional). Ordem não será criada.")
+                return {"status": "ignored", "reason": "quantidade abaixo do minimo da exchange"}
 
-            # Configurar alavancagem
-            self.configurar_alavancagem(par, leverage)
+            # Configurar alavancagem só depois da validação: ordem recusada não altera a conta
+            # (com o cache de filtros, a chamada só acontece quando a alavancagem muda)
+            _, latencias['alavancagem'] = _cronometrar(self.configurar_alavancagem, par, leverage)
 
             # Criar ordem de mercado
-            ordem = self.client.futures_create_order(
-                symbol=par,
-                side=lado,
-                type=ORDER_TYPE_MARKET,
-                quantity=quantidade
-            )
+            params_entrada = {"symbol": par, "side": lado, "type": ORDER_TYPE_MARKET, "quantity": quantidade}
+            if dry_run_id:
+                params_entrada["newClientOrderId"] = gerar_client_order_id(dry_run_id, "en")
+            ordem, latencias['entrada'] = _cronometrar(self.client.futures_create_order, **params_entrada)
             binance_order_id = ordem.get('orderId')
             logger.info(f"[REAL ORDER] Ordem REAL executada: par={par}, direcao={direcao}, capital={capital}, quantidade={quantidade}, preco_entrada={preco}, binance_order_id={binance_order_id}, strategy={self.config.get('strategy_name')}, timeframe={self.config.get('timeframe')}")
 
             # Calcular preços de TP e SL
             sl_preco = preco * (1 - stop_loss / 100) if direcao == "LONG" else preco * (1 + stop_loss / 100)
             tp_preco = preco * (1 + take_profit / 100) if direcao == "LONG" else preco * (1 - take_profit / 100)
+            sl_preco = self.filtros.arredondar_preco(par, sl_preco)
+            tp_preco = self.filtros.arredondar_preco(par, tp_preco)
 
             # Criar ordens de TP e SL
-            tp_order = self.client.futures_create_order(
-                symbol=par,
-                side=SIDE_SELL if direcao == "LONG" else SIDE_BUY,
-                type=ORDER_TYPE_LIMIT,
-                quantity=quantidade,
-                price=tp_preco,
-                stopPrice=tp_preco,
-                timeInForce='GTC'
-            )
-            sl_order = self.client.futures_create_order(
-                symbol=par,
-                side=SIDE_SELL if direcao == "LONG" else SIDE_BUY,
-                type=ORDER_TYPE_LIMIT,
-                quantity=quantidade,
-                price=sl_preco,
-                stopPrice=sl_preco,
-                timeInForce='GTC'
-            )
+            if modo == 'batch':
+                tp_order, sl_order, latencias['protecao'] = enviar_protecoes_em_lote(
+                    self.client, par, lado_saida, quantidade, tp_preco, sl_preco, signal_id=dry_run_id
+                )
+            else:
+                ids_pernas = {"tp": {}, "sl": {}}
+                if dry_run_id:
+                    ids_pernas = {perna: {"newClientOrderId": gerar_client_order_id(dry_run_id, perna)} for perna in ids_pernas}
+                tp_order, latencias['tp'] = _cronometrar(
+                    self.client.futures_create_order,
+                    symbol=par,
+                    side=lado_saida,
+                    type=ORDER_TYPE_LIMIT,
+                    quantity=quantidade,
+                    price=tp_preco,
+                    stopPrice=tp_preco,
+                    timeInForce='GTC',
+                    **ids_pernas["tp"]
+                )
+                sl_order, latencias['sl'] = _cronometrar(
+                    self.client.futures_create_order,
+                    symbol=par,
+                    side=lado_saida,
+                    type=ORDER_TYPE_LIMIT,
+                    quantity=quantidade,
+                    price=sl_preco,
+                    stopPrice=sl_preco,
+                    timeInForce='GTC',
+                    **ids_pernas["sl"]
+                )
             logger.info(f"[REAL ORDER] TP/SL criados: tp_order_id={tp_order.get('orderId')}, sl_order_id={sl_order.get('orderId')}, binance_order_id={binance_order_id}, signal_id={ordem.get('clientOrderId')}")
+            logger.info(f"[REAL ORDER] Latência por perna ({modo}): " + ", ".join(f"{k}={v:.1f}ms" for k, v in latencias.items()))
 
-            # Vinculação de IDs: salva no CSV local
-            df = pd.read_csv(SINALS_FILE)
-            # Busca ordem aberta mais recente para este robô/par/timeframe/direcao
-            idx = df[(df['estado'] == 'aberto') & (df['strategy_name'] == self.config['strategy_name']) & (df['par'] == par) & (df['direcao'] == direcao) & (df['timeframe'] == self.config['timeframe'])].index
-            if len(idx) > 0:
-                df.at[idx[-1], 'binance_order_id'] = binance_order_id
-                df.at[idx[-1], 'tp_order_id'] = tp_order.get('orderId')
-                df.at[idx[-1], 'sl_order_id'] = sl_order.get('orderId')
-                if dry_run_id:
-                    df.at[idx[-1], 'dry_run_id'] = dry_run_id
-                df.to_csv(SINALS_FILE, index=False)
-                logger.info(f"[VINCULO] Ordem local vinculada: signal_id={df.at[idx[-1], 'signal_id']}, binance_order_id={binance_order_id}, dry_run_id={dry_run_id}")
-            else:
-                logger.warning(f"[VINCULO] Não foi possível vincular binance_order_id ao signal_id local (ordem não encontrada no CSV)")
+            # Vinculação de IDs: salva no CSV local (sob a trava do diário, como close_order)
+            with journal_schema.trava_de(SINALS_FILE):
+                df = ler_diario(SINALS_FILE, compacto=False)
+                # Busca ordem aberta mais recente para este robô/par/timeframe/direcao
+                idx = df[(df['estado'] == 'aberto') & (df['strategy_name'] == self.config['strategy_name']) & (df['par'] == par) & (df['direcao'] == direcao) & (df['timeframe'] == self.config['timeframe'])].index
+                if len(idx) > 0:
+                    df.at[idx[-1], 'binance_order_id'] = binance_order_id
+                    df.at[idx[-1], 'tp_order_id'] = tp_order.get('orderId')
+                    df.at[idx[-1], 'sl_order_id'] = sl_order.get('orderId')
+                    if dry_run_id:
+                        df.at[idx[-1], 'dry_run_id'] = dry_run_id
+                    escrever_diario(df, SINALS_FILE)
+                    logger.info(f"[VINCULO] Ordem local vinculada: signal_id={df.at[idx[-1], 'signal_id']}, binance_order_id={binance_order_id}, dry_run_id={dry_run_id}")
+                else:
+                    logger.warning(f"[VINCULO] Não foi possível vincular binance_order_id ao signal_id local (ordem não encontrada no CSV)")
 
             return {
                 "status": "executed",
@@ -164,7 +282,8 @@ class OrderExecutor:
                 "tp_order_id": tp_order.get('orderId'),
                 "sl_order_id": sl_order.get('orderId'),
                 "signal_id": ordem.get('clientOrderId'),
-                "dry_run_id": dry_run_id
+                "dry_run_id": dry_run_id,
+                "latencias_ms": latencias
             }
         except BinanceAPIException as e:
             logger.error(f"Erro ao executar ordem em {par}: {e}")
@@ -173,16 +292,28 @@ class OrderExecutor:
             logger.error(f"Erro inesperado ao executar ordem em {par}: {e}")
             raise
 
+@com_trava
 def close_order(signal_id, mark_price, reason):
-    """Fecha uma ordem com base no ID do sinal, preço de saída e motivo."""
+    """
+    Fecha uma ordem com base no ID do sinal, preço de saída e motivo.
+    Ordens já fechadas não são alteradas (o user data stream e a reconciliação podem
+    reportar a mesma execução).
+    """
     try:
-        df = pd.read_csv(SINALS_FILE)
+        df = ler_diario(SINALS_FILE, compacto=False)
+        # Colunas só com NaN são lidas como float; converte para aceitar texto
+        for col in ('resultado', 'timestamp_saida'):
+            if col in df.columns:
+                df[col] = df[col].astype('object')
         order_idx = df.index[df['signal_id'] == signal_id].tolist()
         if not order_idx:
             logger.error(f"Ordem {signal_id} não encontrada ao tentar fechar.")
             return
         order_idx = order_idx[0]
         order = df.iloc[order_idx]
+        if order['estado'] == 'fechado':
+            logger.debug(f"Ordem {signal_id} já está fechada; execução ignorada.")
+            return
         direction = order['direcao']
         entry_price = float(order['preco_entrada'])
 
@@ -195,9 +326,9 @@ def close_order(signal_id, mark_price, reason):
         df.at[order_idx, 'lucro_percentual'] = profit_percent
         df.at[order_idx, 'pnl_realizado'] = profit_percent
         df.at[order_idx, 'resultado'] = reason
-        df.at[order_idx, 'timestamp_saida'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        df.at[order_idx, 'timestamp_saida'] = clock.now().strftime("%Y-%m-%d %H:%M:%S")
         df.at[order_idx, 'estado'] = "fechado"
-        df.to_csv(SINALS_FILE, index=False)
+        escrever_diario(df, SINALS_FILE)
         logger.info(f"Ordem {signal_id} fechada automaticamente com motivo {reason} e PNL de {profit_percent:.2f}%.")
     except Exception as e:
         logger.error(f"Erro ao fechar ordem {signal_id}: {e}")
\ No newline at end of file
@@ -0,0 +1,293 @@
+import argparse
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from utils import logger
+from strategy_manager import load_strategies
+from candle_store import CandleStore
+from vectorized_signals import calcular_indicadores, pontuar_sinais, direcoes, indicadores_ativos
+from intrabar import ResolvedorIntrabar
+from backtest_cache import BacktestCache, CACHE_DIR
+
+ESPACO_PADRAO = {
+    "tp_percent": [0.5, 1.0, 1.5, 2.0, 3.0],
+    "sl_percent": [0.5, 1.0, 1.5, 2.0],
+    "leverage": [5, 10, 20],
+    "score_tecnico_min": [0.3, 0.5, 0.8, 1.0],
+}
+TAXA_TAKER = 0.0004
+RESULTS_FILE = "resultados_otimizacao.csv"
+PARES_PADRAO = ("XRPUSDT", "DOGEUSDT", "TRXUSDT")
+TIMEFRAMES_PADRAO = ("1m", "5m", "15m", "1h", "4h", "1d")
+
+
+def gerar_grade(espaco):
+    """Produto cartesiano do espaço de parâmetros ({nome: [valores]}) como lista de dicts."""
+    nomes = list(espaco)
+    return [dict(zip(nomes, valores)) for valores in itertools.product(*(espaco[n] for n in nomes))]
+
+
+def amostrar_aleatorio(espaco, n, seed=42):
+    """
+    Busca aleatória: listas são amostradas por escolha e tuplas (min, max) uniformemente.
+
+    Returns:
+        list: n combinações de parâmetros.
+    """
+    rng = random.Random(seed)
+    amostras = []
+    for _ in range(n):
+        amostras.append({
+            nome: round(rng.uniform(*valores), 2) if isinstance(valores, tuple) else rng.choice(valores)
+            for nome, valores in espaco.items()
+        })
+    return amostras
+
+
+def janelas_walk_forward(inicio_ms, fim_ms, n_janelas=4, frac_treino=0.7):
+    """
+    Divide [inicio_ms, fim_ms) em janelas rolantes de treino seguidas de teste.
+
+    Returns:
+        list: [(treino_ini, treino_fim, teste_ini, teste_fim)] em epoch ms.
+    """
+    teste = (fim_ms - inicio_ms) / (n_janelas + frac_treino / (1 - frac_treino))
+    treino = teste * frac_treino / (1 - frac_treino)
+    janelas = []
+    for k in range(n_janelas):
+        a = inicio_ms + k * teste
+        janelas.append((int(a), int(a + treino), int(a + treino), int(a + treino + teste)))
+    return janelas
+
+
+def resolver_mesmo_tf(velas, i, fim, tp_preco, sl_preco, direcao):
+    """
+    Encontra a primeira vela após i (até fim, exclusivo) que toca TP ou SL no próprio timeframe.
+    Se as duas pernas são tocadas na mesma vela, assume o SL (conservador).
+
+    Returns:
+        tuple: (indice_saida, preco_saida, resultado) com resultado "TP", "SL" ou "Timeout".
+    """
+    high, low = velas["high"], velas["low"]
+    bloco = 64
+    j = i + 1
+    while j < fim:
+        k = min(j + bloco, fim)
+        h, l = high[j:k], low[j:k]
+        bate_tp = h >= tp_preco if direcao == 1 else l <= tp_preco
+        bate_sl = l <= sl_preco if direcao == 1 else h >= sl_preco
+        toques = np.flatnonzero(bate_tp | bate_sl)
+        if len(toques):
+            p = toques[0]
+            return (j + p, sl_preco, "SL") if bate_sl[p] else (j + p, tp_preco, "TP")
+        j, bloco = k, bloco * 4
+    return fim - 1, float(velas["close"][fim - 1]), "Timeout"
+
+
+def simular_trades(velas, direcao_arr, params, inicio_ms, fim_ms, resolver=resolver_mesmo_tf):
+    """
+    Simula as entradas de uma janela: no máximo uma posição aberta por direção, entrada no
+    fechamento da vela do sinal e saída por TP/SL (ou Timeout no fim da janela).
+
+    Returns:
+        np.ndarray: Retorno % de cada trade já alavancado e descontadas as taxas.
+    """
+    ts = velas["timestamp"]
+    a = int(np.searchsorted(ts, inicio_ms))
+    fim = int(np.searchsorted(ts, fim_ms))
+    tp, sl, alavancagem = params["tp_percent"], params["sl_percent"], params["leverage"]
+    custo = 2 * TAXA_TAKER * 100
+    livre = {1: a, -1: a}
+    retornos = []
+    for i in np.flatnonzero(direcao_arr[a:fim - 1]) + a:
+        d = int(direcao_arr[i])
+        if i < livre[d]:
+            continue
+        entrada = float(velas["close"][i])
+        tp_preco = entrada * (1 + d * tp / 100)
+        sl_preco = entrada * (1 - d * sl / 100)
+        j, saida, _ = resolver(velas, i, fim, tp_preco, sl_preco, d)
+        livre[d] = j + 1
+        retornos.append((d * (saida / entrada - 1) * 100 - custo) * alavancagem)
+    return np.asarray(retornos, dtype=np.float64)
+
+
+def metricas(retornos):
+    """Métricas de desempenho de uma sequência de retornos % por trade."""
+    n = len(retornos)
+    if n == 0:
+        return {"trades": 0, "retorno": 0.0, "win_rate": 0.0, "profit_factor": 0.0, "max_drawdown": 0.0, "sharpe": 0.0}
+    ganhos, perdas = retornos[retornos > 0].sum(), -retornos[retornos < 0].sum()
+    acumulado = np.cumsum(retornos)
+    desvio = retornos.std()
+    return {
+        "trades": n,
+        "retorno": float(acumulado[-1]),
+        "win_rate": float((retornos > 0).mean() * 100),
+        "profit_factor": float(ganhos / perdas) if perdas > 0 else float("inf"),
+        "max_drawdown": float((np.maximum.accumulate(np.r_[0.0, acumulado]) - np.r_[0.0, acumulado]).max()),
+        "sharpe": float(retornos.mean() / desvio * np.sqrt(n)) if desvio > 0 else 0.0,
+    }
+
+
+_store = None
+_cache = None
+
+
+def _iniciar_worker(data_dir, usar_cache=True):
+    global _store, _cache
+    _store = CandleStore(data_dir)
+    _cache = BacktestCache(os.path.join(data_dir, CACHE_DIR)) if usar_cache else None
+
+
+def avaliar_tarefa(estrategia, ativos, par, tf, combinacoes, n_janelas, frac_treino, objetivo="retorno"):
+    """
+    Avalia todas as combinações de uma estratégia em um par/timeframe (executado no worker).
+    Indicadores e pontuações são calculados uma única vez; cada combinação só refaz o limiar
+    de score e a simulação de saídas (intrabar em 1m para timeframes maiores).
+
+    Returns:
+        list: Uma linha de resultado por combinação.
+    """
+    store = _store or CandleStore()
+    velas = store.get(par, tf)
+    # Sinais de timeframes maiores são resolvidos nas velas de 1m (ordem real de TP/SL dentro da vela)
+    resolver = resolver_mesmo_tf
+    arquivos = [store.caminho_csv(par, tf)]
+    if tf != "1m" and store.disponivel(par, "1m"):
+        resolver = ResolvedorIntrabar(store.get(par, "1m"), tf)
+        arquivos.append(store.caminho_csv(par, "1m"))
+    close = np.asarray(velas["close"])
+    pontuacao = None
+    janelas = janelas_walk_forward(int(velas["timestamp"][0]), int(velas["timestamp"][-1]) + 1, n_janelas, frac_treino)
+    por_limiar, simulados = {}, {}
+    treino_por_janela = np.zeros((len(combinacoes), len(janelas)))
+    linhas, testes = [], []
+    for c, params in enumerate(combinacoes):
+        limiar = params["score_tecnico_min"]
+        # A alavancagem só escala os retornos: simula sem alavancagem uma vez por (limiar, tp, sl)
+        chave = (limiar, params["tp_percent"], params["sl_percent"])
+        if chave not in simulados:
+            # Combinações já avaliadas em execuções anteriores vêm do cache em disco
+            chave_cache = _cache.chave({"ativos": sorted(ativos), "par": par, "tf": tf, "limiar": limiar,
+                                        "tp": chave[1], "sl": chave[2], "janelas": janelas,
+                                        "intrabar": resolver is not resolver_mesmo_tf, "taxa": TAXA_TAKER},
+                                       arquivos) if _cache else None
+            simulados[chave] = _cache.get(chave_cache) if _cache else None
+            if simulados[chave] is None:
+                if pontuacao is None:
+                    pontuacao = pontuar_sinais(calcular_indicadores(close), close, ativos)
+                if limiar not in por_limiar:
+                    por_limiar[limiar] = direcoes(*pontuacao, limiar)
+                base = dict(params, leverage=1)
+                simulados[chave] = [(simular_trades(velas, por_limiar[limiar], base, ti, tf_fim, resolver),
+                                     simular_trades(velas, por_limiar[limiar], base, si, sf, resolver))
+                                    for ti, tf_fim, si, sf in janelas]
+                if _cache:
+                    _cache.set(chave_cache, simulados[chave])
+        treino = [r * params["leverage"] for r, _ in simulados[chave]]
+        teste = [r * params["leverage"] for _, r in simulados[chave]]
+        for w, r in enumerate(treino):
+            treino_por_janela[c, w] = metricas(r)[objetivo]
+        m_treino, m_teste = metricas(np.concatenate(treino)), metricas(np.concatenate(teste))
+        testes.append(teste)
+        linhas.append({
+            "estrategia": estrategia, "par": par, "timeframe": tf, **params,
+            "treino_retorno": m_treino["retorno"], "treino_trades": m_treino["trades"],
+            **{f"teste_{k}": v for k, v in m_teste.items()},
+        })
+    # Walk-forward: em cada janela, a combinação escolhida é a melhor no treino
+    escolhidas = treino_por_janela.argmax(axis=0)
+    for c in range(len(combinacoes)):
+        linhas[c]["selecionado_wf"] = int((escolhidas == c).sum())
+    wf = metricas(np.concatenate([testes[c][w] for w, c in enumerate(escolhidas)]))
+    for linha in linhas:
+        linha["wf_retorno_oos"] = wf["retorno"]
+    return linhas
+
+
+def executar_sweep(estrategias=None, pares=None, timeframes=None, modo="grid", espaco=None, n_amostras=50,
+                   n_janelas=4, frac_treino=0.7, objetivo="retorno", max_workers=None, data_dir=".",
+                   saida=RESULTS_FILE, seed=42, usar_cache=True):
+    """
+    Executa a otimização de parâmetros por estratégia sobre as velas locais, distribuindo
+    as tarefas (estratégia, par, timeframe) entre os núcleos com ProcessPoolExecutor.
+
+    Args:
+        estrategias (list): Nomes em strategies.json (padrão: todas com indicadores suportados).
+        pares (list): Pares a testar (padrão: os que têm arquivos locais).
+        timeframes (list): Timeframes (padrão: os da estratégia).
+        modo (str): "grid" ou "random".
+        espaco (dict): Espaço de parâmetros (padrão: ESPACO_PADRAO).
+        n_amostras (int): Combinações na busca aleatória.
+        n_janelas (int): Número de janelas walk-forward.
+        frac_treino (float): Fração de cada janela usada para treino.
+        objetivo (str): Métrica usada para escolher e ordenar ("retorno", "sharpe", "profit_factor").
+        max_workers (int): Processos (padrão: todos os núcleos).
+        data_dir (str): Diretório dos historical_data_*.csv.
+        saida (str): CSV da tabela ranqueada.
+        seed (int): Semente da busca aleatória.
+        usar_cache (bool): Reaproveita simulações de execuções anteriores (backtest_cache).
+
+    Returns:
+        pd.DataFrame: Resultados ordenados pelo objetivo no período de teste.
+    """
+    inicio = time.perf_counter()
+    espaco = espaco or ESPACO_PADRAO
+    combinacoes = gerar_grade(espaco) if modo == "grid" else amostrar_aleatorio(espaco, n_amostras, seed)
+    todas = load_strategies()
+    store = CandleStore(data_dir)
+    tarefas = []
+    for nome in estrategias or list(todas):
+        ativos = indicadores_ativos(todas.get(nome, {}))
+        if not ativos:
+            logger.warning(f"[SWEEP] Estratégia {nome} sem indicadores suportados. Ignorando.")
+            continue
+        for par in pares or PARES_PADRAO:
+            for tf in timeframes or todas[nome].get("timeframes", TIMEFRAMES_PADRAO):
+                if store.disponivel(par, tf):
+                    store.get(par, tf)  # Cria o cache .npy antes de iniciar os workers
+                    tarefas.append((nome, ativos, par, tf))
+    logger.info(f"[SWEEP] {len(tarefas)} tarefas x {len(combinacoes)} combinações ({modo}), {n_janelas} janelas walk-forward.")
+
+    linhas = []
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(), initializer=_iniciar_worker, initargs=(data_dir, usar_cache)) as pool:
+        futuros = {pool.submit(avaliar_tarefa, *t, combinacoes, n_janelas, frac_treino, objetivo): t for t in tarefas}
+        for futuro in as_completed(futuros):
+            try:
+                linhas.extend(futuro.result())
+            except Exception as e:
+                logger.error(f"[SWEEP] Erro na tarefa {futuros[futuro]}: {e}")
+
+    resultados = pd.DataFrame(linhas)
+    if not resultados.empty:
+        resultados = resultados.sort_values(f"teste_{objetivo}", ascending=False, ignore_index=True)
+        resultados.insert(0, "rank", np.arange(1, len(resultados) + 1))
+        resultados.to_csv(saida, index=False)
+    logger.info(f"[SWEEP] {len(resultados)} resultados gravados em {saida} em {time.perf_counter() - inicio:.1f}s.")
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Otimização walk-forward de parâmetros das estratégias.")
+    parser.add_argument("--estrategias", nargs="*")
+    parser.add_argument("--pares", nargs="*")
+    parser.add_argument("--timeframes", nargs="*")
+    parser.add_argument("--modo", choices=["grid", "random"], default="grid")
+    parser.add_argument("--amostras", type=int, default=50)
+    parser.add_argument("--janelas", type=int, default=4)
+    parser.add_argument("--frac-treino", type=float, default=0.7)
+    parser.add_argument("--objetivo", default="retorno")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--saida", default=RESULTS_FILE)
+    parser.add_argument("--sem-cache", action="store_true")
+    args = parser.parse_args()
+    resultados = executar_sweep(args.estrategias, args.pares, args.timeframes, args.modo, n_amostras=args.amostras,
+                                n_janelas=args.janelas, frac_treino=args.frac_treino, objetivo=args.objetivo,
+                                max_workers=args.workers, saida=args.saida,
+                                usar_cache=not args.sem_cache)
+    print(resultados.head(20).to_string(index=False))
@@ -0,0 +1,246 @@
+import argparse
+import heapq
+import json
+import time
+from collections import Counter
+import numpy as np
+import pandas as pd
+from utils import logger
+from config import CONFIG
+from strategy_manager import load_strategies
+from trade_manager import MAX_GLOBAL_TRADES, MAX_TRADES_POR_ROBO
+from candle_store import CandleStore
+from vectorized_signals import calcular_indicadores, pontuar_sinais, direcoes, indicadores_ativos, nomes_contribuintes
+from intrabar import primeira_saida, TF_MS
+from parameter_sweep import TAXA_TAKER
+
+PARES_PADRAO = ("XRPUSDT", "DOGEUSDT", "TRXUSDT")
+TIMEFRAMES_PADRAO = ("1m", "5m", "15m", "1h", "4h", "1d")
+
+
+class PortfolioBacktest:
+    """
+    Backtest de portfólio: todos os pares e robôs em um único eixo de tempo, com as mesmas
+    regras de admissão do loop ao vivo.
+
+    Os sinais candidatos de cada (robô, par, timeframe) são gerados de forma vetorizada e
+    ordenados por (instante, -score), reproduzindo a fila de prioridade do main. As saídas das
+    posições admitidas ficam em um heap por instante de saída, liberado antes de cada nova
+    admissão. Regras, na ordem do main/OrderExecutor: limite global e por robô, max_trades_simultaneos
+    da estratégia, combination_key já ativa, limite por timeframe/direção e margem livre.
+    """
+    def __init__(self, strategies=None, pairs=PARES_PADRAO, timeframes=TIMEFRAMES_PADRAO, config=None,
+                 capital_inicial=1000.0, margem_por_trade=10.0, max_global=MAX_GLOBAL_TRADES,
+                 max_por_robo=MAX_TRADES_POR_ROBO, start_date=None, end_date=None, data_dir="."):
+        """
+        Args:
+            strategies (dict): {nome: configuração} como em strategies.json (padrão: load_strategies()).
+            pairs (tuple): Pares.
+            timeframes (tuple): Timeframes.
+            config (dict): Configuração global (limits_by_timeframe, tp/sl/leverage padrão).
+            capital_inicial (float): Saldo inicial em USDT.
+            margem_por_trade (float): Margem alocada por posição em USDT.
+            max_global (int): Limite global de posições simultâneas.
+            max_por_robo (int): Limite de posições simultâneas por robô.
+            start_date (str): Início do período (opcional).
+            end_date (str): Fim do período (opcional).
+            data_dir (str): Diretório das velas locais.
+        """
+        self.strategies = strategies if strategies is not None else load_strategies()
+        self.pairs = list(pairs)
+        self.timeframes = list(timeframes)
+        self.config = config or CONFIG
+        self.capital_inicial = capital_inicial
+        self.margem_por_trade = margem_por_trade
+        self.max_global = max_global
+        self.max_por_robo = max_por_robo
+        self.inicio_ms = int(pd.Timestamp(start_date).value // 1_000_000) if start_date else None
+        self.fim_ms = int(pd.Timestamp(end_date).value // 1_000_000) if end_date else None
+        self.store = CandleStore(data_dir)
+
+    def gerar_candidatos(self):
+        """
+        Gera os sinais candidatos de todos os robôs/pares/timeframes.
+
+        Returns:
+            dict: Arrays paralelos tempo, score, direcao, robo, par, tf, preco e mascara.
+        """
+        partes = []
+        nomes = list(self.strategies)
+        for p, par in enumerate(self.pairs):
+            for t, tf in enumerate(self.timeframes):
+                if not (self.store.disponivel(par, tf) and self.store.disponivel(par, "1m")):
+                    continue
+                velas = self.store.get(par, tf)
+                close = np.asarray(velas["close"])
+                tempo = np.asarray(velas["timestamp"]) + TF_MS[tf]  # sinal no fechamento da vela
+                indicadores = calcular_indicadores(close)
+                for r, nome in enumerate(nomes):
+                    estrategia = self.strategies[nome]
+                    if not estrategia.get("enabled", True) or tf not in estrategia.get("timeframes", self.timeframes):
+                        continue
+                    ativos = indicadores_ativos(estrategia)
+                    if not ativos:
+                        continue
+                    score, tem_long, tem_short, mascara = pontuar_sinais(indicadores, close, ativos, contribuicoes=True)
+                    limiar = estrategia.get("score_tecnico_min", self.config.get("score_tecnico_min", 0.05))
+                    d = direcoes(score, tem_long, tem_short, limiar)
+                    validos = d != 0
+                    if self.inicio_ms:
+                        validos &= tempo >= self.inicio_ms
+                    if self.fim_ms:
+                        validos &= tempo < self.fim_ms
+                    idx = np.flatnonzero(validos)
+                    partes.append({
+                        "tempo": tempo[idx], "score": score[idx], "direcao": d[idx], "preco": close[idx],
+                        "mascara": mascara[idx], "robo": np.full(len(idx), r, dtype=np.int16),
+                        "par": np.full(len(idx), p, dtype=np.int16), "tf": np.full(len(idx), t, dtype=np.int16),
+                    })
+        if not partes:
+            return {k: np.array([]) for k in ("tempo", "score", "direcao", "preco", "mascara", "robo", "par", "tf")}
+        return {k: np.concatenate([parte[k] for parte in partes]) for k in partes[0]}
+
+    def _limite_tf(self, estrategia, tf, direcao):
+        limites = estrategia.get("limits") or self.config.get("limits_by_timeframe", {})
+        return limites.get(tf, {"LONG": 1, "SHORT": 1}).get(direcao, 1)
+
+    def executar(self):
+        """
+        Executa o replay do portfólio.
+
+        Returns:
+            dict: {"resumo": dict, "trades": pd.DataFrame, "curva": pd.DataFrame}.
+        """
+        inicio = time.perf_counter()
+        c = self.gerar_candidatos()
+        nomes = list(self.strategies)
+        velas_1m = {par: self.store.get(par, "1m") for par in self.pairs if self.store.disponivel(par, "1m")}
+        ordem = np.lexsort((-c["score"], c["tempo"]))
+
+        saidas = []  # heap (saida_ms, seq, posicao)
+        abertas_robo = Counter()
+        abertas_tf = Counter()
+        combinacoes = set()
+        rejeicoes = Counter()
+        equity = self.capital_inicial
+        margem_usada = 0.0
+        pico = equity
+        max_drawdown = 0.0
+        max_abertas = 0
+        trades, curva = [], []
+
+        def fechar(posicao):
+            nonlocal equity, margem_usada, pico, max_drawdown
+            equity += posicao["pnl"]
+            margem_usada -= self.margem_por_trade
+            abertas_robo[posicao["robo"]] -= 1
+            abertas_tf[posicao["chave_tf"]] -= 1
+            combinacoes.discard(posicao["combinacao"])
+            pico = max(pico, equity)
+            max_drawdown = max(max_drawdown, pico - equity)
+            curva.append((posicao["saida_ms"], equity, margem_usada, len(saidas)))
+
+        for k in ordem:
+            t = int(c["tempo"][k])
+            while saidas and saidas[0][0] <= t:
+                fechar(heapq.heappop(saidas)[2])
+            r, d = int(c["robo"][k]), int(c["direcao"][k])
+            nome = nomes[r]
+            estrategia = self.strategies[nome]
+            par, tf = self.pairs[c["par"][k]], self.timeframes[c["tf"][k]]
+            direcao = "LONG" if d == 1 else "SHORT"
+
+            if len(saidas) >= self.max_global or abertas_robo[r] >= self.max_por_robo:
+                rejeicoes["limite_global_robo"] += 1
+                continue
+            if abertas_robo[r] >= estrategia.get("max_trades_simultaneos", 1):
+                rejeicoes["max_trades_simultaneos"] += 1
+                continue
+            combinacao = (par, d, r, tf, int(c["mascara"][k]))
+            if combinacao in combinacoes:
+                rejeicoes["combinacao_ativa"] += 1
+                continue
+            chave_tf = (r, par, tf, d)
+            if abertas_tf[chave_tf] >= self._limite_tf(estrategia, tf, direcao):
+                rejeicoes["limite_timeframe_direcao"] += 1
+                continue
+            if equity - margem_usada < self.margem_por_trade:
+                rejeicoes["margem_insuficiente"] += 1
+                continue
+
+            entrada = float(c["preco"][k])
+            tp = float(estrategia.get("tp_percent", self.config.get("tp_percent", 2.0)))
+            sl = float(estrategia.get("sl_percent", self.config.get("sl_percent", 1.0)))
+            leverage = float(estrategia.get("leverage", self.config.get("leverage", 1)))
+            saida_ms, saida, resultado = primeira_saida(
+                velas_1m[par], t, entrada * (1 + d * tp / 100), entrada * (1 - d * sl / 100), d, self.fim_ms
+            )
+            if saida is None:
+                rejeicoes["sem_dados"] += 1
+                continue
+            retorno = d * (saida / entrada - 1) - 2 * TAXA_TAKER
+            posicao = {
+                "robo": r, "chave_tf": chave_tf, "combinacao": combinacao, "saida_ms": saida_ms,
+                "pnl": self.margem_por_trade * leverage * retorno,
+            }
+            heapq.heappush(saidas, (saida_ms, len(trades), posicao))
+            abertas_robo[r] += 1
+            abertas_tf[chave_tf] += 1
+            combinacoes.add(combinacao)
+            margem_usada += self.margem_por_trade
+            max_abertas = max(max_abertas, len(saidas))
+            curva.append((t, equity, margem_usada, len(saidas)))
+            trades.append((nome, par, tf, direcao, t, entrada, saida_ms, saida, resultado,
+                           nomes_contribuintes(c["mascara"][k]), float(c["score"][k]), retorno * leverage * 100, posicao["pnl"]))
+
+        while saidas:
+            fechar(heapq.heappop(saidas)[2])
+
+        colunas = ["strategy_name", "par", "timeframe", "direcao", "timestamp", "preco_entrada", "timestamp_saida",
+                   "preco_saida", "resultado", "contributing_indicators", "score_tecnico", "lucro_percentual", "pnl_usdt"]
+        df_trades = pd.DataFrame(trades, columns=colunas)
+        for coluna in ("timestamp", "timestamp_saida"):
+            df_trades[coluna] = pd.to_datetime(df_trades[coluna], unit="ms")
+        df_curva = pd.DataFrame(curva, columns=["tempo_ms", "equity", "margem_usada", "posicoes_abertas"]).sort_values("tempo_ms", kind="stable")
+        df_curva.insert(0, "timestamp", pd.to_datetime(df_curva["tempo_ms"], unit="ms"))
+        resumo = {
+            "candidatos": int(len(ordem)),
+            "trades": int(len(df_trades)),
+            "rejeicoes": dict(rejeicoes),
+            "max_global": self.max_global,
+            "max_por_robo": self.max_por_robo,
+            "max_posicoes_simultaneas": int(max_abertas),
+            "max_margem_usada": float(df_curva["margem_usada"].max()) if not df_curva.empty else 0.0,
+            "equity_final": float(equity),
+            "retorno_percentual": float((equity / self.capital_inicial - 1) * 100),
+            "max_drawdown": float(max_drawdown),
+            "taxa_acerto": float((df_trades["pnl_usdt"] > 0).mean() * 100) if len(df_trades) else 0.0,
+            "duracao_s": time.perf_counter() - inicio,
+        }
+        logger.info(f"[PORTFOLIO] {resumo['trades']} trades de {resumo['candidatos']} candidatos em {resumo['duracao_s']:.1f}s. "
+                    f"Equity final: {resumo['equity_final']:.2f} USDT, rejeições: {resumo['rejeicoes']}")
+        return {"resumo": resumo, "trades": df_trades, "curva": df_curva}
+
+
+def salvar_resultados(resultados, prefixo="portfolio_backtest"):
+    """Grava trades, curva de equity e resumo do backtest de portfólio."""
+    resultados["trades"].to_csv(f"{prefixo}_trades.csv", index=False)
+    resultados["curva"].to_csv(f"{prefixo}_equity.csv", index=False)
+    with open(f"{prefixo}_resumo.json", "w") as f:
+        json.dump(resultados["resumo"], f, indent=4)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest de portfólio com limites de concorrência.")
+    parser.add_argument("--max-global", type=int, default=MAX_GLOBAL_TRADES)
+    parser.add_argument("--max-por-robo", type=int, default=MAX_TRADES_POR_ROBO)
+    parser.add_argument("--capital", type=float, default=1000.0)
+    parser.add_argument("--margem", type=float, default=10.0)
+    parser.add_argument("--inicio")
+    parser.add_argument("--fim")
+    parser.add_argument("--prefixo", default="portfolio_backtest")
+    args = parser.parse_args()
+    resultados = PortfolioBacktest(capital_inicial=args.capital, margem_por_trade=args.margem, max_global=args.max_global,
+                                   max_por_robo=args.max_por_robo, start_date=args.inicio, end_date=args.fim).executar()
+    salvar_resultados(resultados, args.prefixo)
+    print(json.dumps(resultados["resumo"], indent=4))
@@ -0,0 +1,198 @@
+import json
+from collections.abc import MutableMapping
+import numpy as np
+import pandas as pd
+
+# Campos guardados como JSON no diário; em memória ficam já decodificados (dict/list)
+CAMPOS_JSON = frozenset({"motivos", "localizadores", "parametros", "timeframes_analisados", "side_performance"})
+
+CAMPOS_SINAL = (
+    "signal_id", "timestamp", "par", "timeframe", "direcao", "preco_entrada", "quantity", "score_tecnico",
+    "motivos", "funding_rate", "localizadores", "parametros", "timeframes_analisados", "contributing_indicators",
+    "strategy_name", "combination_key", "historical_win_rate", "avg_pnl", "estado", "side_performance",
+    "timeframe_weight", "quality_score", "aceito", "mode", "modo_contrario", "visual_tag",
+)
+CAMPOS_SAIDA = (
+    "preco_saida", "lucro_percentual", "pnl_realizado", "resultado", "timestamp_saida", "binance_order_id",
+    "pnl_current",
+)
+
+
+def _decodificar(valor):
+    if isinstance(valor, str):
+        try:
+            return json.loads(valor)
+        except ValueError:
+            return valor
+    return valor
+
+
+def _codificar(valor):
+    return valor if isinstance(valor, str) or valor is None else json.dumps(valor)
+
+
+class _Registro(MutableMapping):
+    """
+    Registro compacto com __slots__ que também se comporta como dict.
+
+    Campos conhecidos ficam em slots (sem __dict__ por instância); chaves extras vão para um
+    dict criado sob demanda. Os campos de CAMPOS_JSON são decodificados uma única vez na
+    atribuição e só voltam a ser JSON em para_journal(). Igualdade e hash são por identidade
+    (um registro é uma entidade: `active_trades.remove(registro)` não compara campo a campo).
+    """
+    __slots__ = ("_extras",)
+    CAMPOS = ()
+    _CONJUNTO = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._CONJUNTO = frozenset(cls.CAMPOS)
+
+    def __init__(self, dados=None, **kwargs):
+        self._extras = None
+        if dados:
+            self.update(dados)
+        if kwargs:
+            self.update(kwargs)
+
+    def __getitem__(self, chave):
+        if chave in self._CONJUNTO:
+            try:
+                return getattr(self, chave)
+            except AttributeError:
+                raise KeyError(chave) from None
+        if self._extras is not None and chave in self._extras:
+            return self._extras[chave]
+        raise KeyError(chave)
+
+    def __setitem__(self, chave, valor):
+        if chave in CAMPOS_JSON:
+            valor = _decodificar(valor)
+        if chave in self._CONJUNTO:
+            setattr(self, chave, valor)
+        else:
+            if self._extras is None:
+                self._extras = {}
+            self._extras[chave] = valor
+
+    def __delitem__(self, chave):
+        if chave in self._CONJUNTO:
+            try:
+                delattr(self, chave)
+            except AttributeError:
+                raise KeyError(chave) from None
+        elif self._extras is not None and chave in self._extras:
+            del self._extras[chave]
+        else:
+            raise KeyError(chave)
+
+    def __contains__(self, chave):
+        if chave in self._CONJUNTO:
+            return hasattr(self, chave)
+        return self._extras is not None and chave in self._extras
+
+    def __iter__(self):
+        for campo in self.CAMPOS:
+            if hasattr(self, campo):
+                yield campo
+        if self._extras:
+            yield from list(self._extras)
+
+    def __len__(self):
+        return sum(1 for campo in self.CAMPOS if hasattr(self, campo)) + len(self._extras or ())
+
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
+
+    def __lt__(self, outro):
+        # Desempate estável em filas de prioridade com o mesmo score
+        return str(self.get("signal_id", "")) < str(outro.get("signal_id", ""))
+
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self.items())!r})"
+
+    def copy(self):
+        return type(self)(self)
+
+    def para_journal(self):
+        """Dict pronto para o diário: campos de CAMPOS_JSON reserializados como JSON."""
+        return {chave: _codificar(valor) if chave in CAMPOS_JSON else valor for chave, valor in self.items()}
+
+    @property
+    def tp_percent(self):
+        return float((self.get("parametros") or {}).get("tp_percent", 2.0))
+
+    @property
+    def sl_percent(self):
+        return float((self.get("parametros") or {}).get("sl_percent", 1.0))
+
+    @property
+    def leverage(self):
+        return float((self.get("parametros") or {}).get("leverage", 1))
+
+
+class Signal(_Registro):
+    """Sinal candidato (fila de sinais, rejeitados e diário)."""
+    CAMPOS = CAMPOS_SINAL
+    __slots__ = CAMPOS_SINAL
+
+
+class Position(Signal):
+    """Sinal aceito e acompanhado até a saída (active_trades_dry_run, robots_status)."""
+    CAMPOS = CAMPOS_SINAL + CAMPOS_SAIDA
+    __slots__ = CAMPOS_SAIDA
+
+
+class TabelaRegistros:
+    """
+    Conjunto de registros em colunas: números em arrays numpy, texto e campos JSON em arrays de
+    objetos. Usado para mover lotes (ex.: sinais de um ciclo de shard) com uma única serialização
+    e para gravar lotes no diário de uma vez.
+    """
+    def __init__(self, colunas, classe=Signal):
+        """
+        Args:
+            colunas (dict): {campo: np.ndarray} com o mesmo comprimento.
+            classe (type): Classe dos registros reconstruídos em registros().
+        """
+        self.colunas = colunas
+        self.classe = classe
+
+    @classmethod
+    def de_registros(cls, registros, classe=None):
+        registros = list(registros)
+        classe = classe or (type(registros[0]) if registros and isinstance(registros[0], _Registro) else Signal)
+        campos = list(dict.fromkeys(chave for registro in registros for chave in registro))
+        colunas = {}
+        for campo in campos:
+            valores = [registro.get(campo) for registro in registros]
+            if campo not in CAMPOS_JSON and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in valores):
+                colunas[campo] = np.array(valores, dtype=np.float64)
+            else:
+                coluna = np.empty(len(valores), dtype=object)
+                coluna[:] = valores
+                colunas[campo] = coluna
+        return cls(colunas, classe)
+
+    def __len__(self):
+        return len(next(iter(self.colunas.values()))) if self.colunas else 0
+
+    def registros(self):
+        """Reconstrói os registros (uma instância de `classe` por linha)."""
+        campos = list(self.colunas)
+        linhas = zip(*(self.colunas[c].tolist() for c in campos))
+        return [self.classe(dict(zip(campos, linha))) for linha in linhas]
+
+    def para_dataframe(self, colunas=None):
+        """DataFrame no formato do diário (campos JSON serializados uma vez por coluna)."""
+        colunas = colunas or list(self.colunas)
+        dados = {}
+        for campo in colunas:
+            valores = self.colunas.get(campo)
+            if valores is None:
+                dados[campo] = [None] * len(self)
+            elif campo in CAMPOS_JSON:
+                dados[campo] = [_codificar(v) for v in valores]
+            else:
+                dados[campo] = valores
+        return pd.DataFrame(dados, columns=colunas)
@@ -0,0 +1,134 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from collections import Counter
+import numpy as np
+from utils import logger
+import clock
+from clock import RelogioVirtual, RelogioReal
+from mock_exchange import MockBinanceClient
+from timer_wheel import get_timer_wheel
+
+REPLAY_DIR = "replay_run"
+BASELINE_FILE = "replay_baseline.json"
+# Arquivos de estado lidos do diretório de trabalho pelo loop principal
+ARQUIVOS_ESTADO = ("strategies.json", "robot_status.json")
+
+
+def executar_replay(iteracoes=100, inicio=None, velocidade=None, passo=1.0, symbols=None, data_dir=".",
+                    diretorio=REPLAY_DIR, latencia_ms=0.0):
+    """
+    Executa o loop principal real (main.main) contra as velas gravadas com relógio virtual.
+
+    O MockBinanceClient serve klines, preços e ordens a partir dos historical_data_*.csv; o
+    RelogioVirtual substitui datetime.now()/time.time()/time.sleep() em todo o caminho ao vivo
+    (sinais em tempo real, fusão multi-timeframe, fila de sinais e simuladores). Diários e logs
+    de sinais são gravados em `diretorio`, separados dos arquivos da operação real.
+
+    Args:
+        iteracoes (int): Iterações do loop principal.
+        inicio (str|int): Instante inicial (texto de data ou epoch ms; padrão do MockBinanceClient).
+        velocidade (float): Aceleração em relação ao tempo real (ex.: 1000); None = sem espera.
+        passo (float): Segundos virtuais entre iterações (loop_interval).
+        symbols (list): Pares (padrão: os de config.SYMBOLS com velas de 1m locais).
+        data_dir (str): Diretório dos historical_data_*.csv.
+        diretorio (str): Diretório de trabalho do replay.
+        latencia_ms (float|tuple): Latência simulada por chamada à exchange.
+
+    Returns:
+        dict: Throughput e latência por iteração, tempo virtual percorrido e chamadas por endpoint.
+    """
+    from config import SYMBOLS, CONFIG
+    data_dir = os.path.abspath(data_dir)
+    symbols = symbols or [s for s in SYMBOLS if os.path.exists(os.path.join(data_dir, f"historical_data_{s}_1m.csv"))]
+    cliente = MockBinanceClient(symbols, data_dir, inicio, latencia_ms=latencia_ms)
+    relogio = RelogioVirtual(cliente.agora_ms() / 1000, velocidade)
+    relogio.ao_avancar(lambda agora: cliente.definir_tempo(int(agora * 1000)))
+    relogio.ao_avancar(lambda agora: get_timer_wheel().avancar())
+
+    os.makedirs(diretorio, exist_ok=True)
+    for arquivo in ARQUIVOS_ESTADO:
+        if os.path.exists(arquivo):
+            shutil.copy(arquivo, os.path.join(diretorio, arquivo))
+    config_original = {k: CONFIG.get(k) for k in ("modes", "loop_interval")}
+    CONFIG["modes"] = dict(CONFIG.get("modes", {}), dry_run=True, real=False, backtest=False)
+    CONFIG["loop_interval"] = passo
+    origem = os.getcwd()
+    # main é importado depois do chdir; garante que continue localizável fora do diretório do projeto
+    modulos = os.path.dirname(os.path.abspath(__file__))
+    if modulos not in sys.path:
+        sys.path.insert(0, modulos)
+    clock.definir_relogio(relogio)
+    try:
+        os.chdir(diretorio)
+        import main as bot  # Importado aqui: os diários são criados no diretório de trabalho
+        inicio_virtual = relogio.time()
+        inicio_real = time.perf_counter()
+        executadas = bot.main(client=cliente, max_iterations=iteracoes, periodic_summary=False) or 0
+        duracao_real = time.perf_counter() - inicio_real
+    finally:
+        os.chdir(origem)
+        clock.definir_relogio(RelogioReal())
+        CONFIG.update(config_original)
+
+    duracoes = np.array(list(bot.iteration_durations)[-executadas:]) if executadas else np.array([0.0])
+    duracao_virtual = relogio.time() - inicio_virtual
+    resultado = {
+        "iteracoes": int(executadas),
+        "segundos_reais": duracao_real,
+        "segundos_virtuais": duracao_virtual,
+        "aceleracao": duracao_virtual / duracao_real if duracao_real > 0 else 0.0,
+        "iteracoes_por_segundo": executadas / duracao_real if duracao_real > 0 else 0.0,
+        "latencia_p50_ms": float(np.percentile(duracoes, 50) * 1000),
+        "latencia_p95_ms": float(np.percentile(duracoes, 95) * 1000),
+        "latencia_p99_ms": float(np.percentile(duracoes, 99) * 1000),
+        "latencia_max_ms": float(duracoes.max() * 1000),
+        "chamadas_api": dict(Counter(nome for nome, _ in cliente.chamadas)),
+    }
+    logger.info(f"[REPLAY] {executadas} iterações em {duracao_real:.1f}s ({resultado['aceleracao']:.0f}x), "
+                f"p95 {resultado['latencia_p95_ms']:.1f}ms.")
+    return resultado
+
+
+def comparar_baseline(resultado, baseline, tolerancia=0.2):
+    """
+    Compara as latências do replay com uma execução de referência.
+
+    Returns:
+        list: Métricas que pioraram mais que `tolerancia` (fração) em relação ao baseline.
+    """
+    regressoes = []
+    for metrica in ("latencia_p50_ms", "latencia_p95_ms", "latencia_p99_ms"):
+        if baseline.get(metrica) and resultado[metrica] > baseline[metrica] * (1 + tolerancia):
+            regressoes.append(f"{metrica}: {resultado[metrica]:.1f}ms > {baseline[metrica]:.1f}ms (+{tolerancia:.0%})")
+    return regressoes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay acelerado do loop principal sobre as velas locais.")
+    parser.add_argument("--iteracoes", type=int, default=100)
+    parser.add_argument("--inicio")
+    parser.add_argument("--velocidade", type=float, help="Aceleração (ex.: 1000); omitido = o mais rápido possível")
+    parser.add_argument("--passo", type=float, default=1.0, help="Segundos virtuais entre iterações")
+    parser.add_argument("--pares", nargs="*")
+    parser.add_argument("--latencia-ms", type=float, default=0.0)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--tolerancia", type=float, default=0.2)
+    parser.add_argument("--salvar-baseline", action="store_true")
+    args = parser.parse_args()
+    resultado = executar_replay(args.iteracoes, args.inicio, args.velocidade, args.passo, args.pares,
+                                latencia_ms=args.latencia_ms)
+    print(json.dumps(resultado, indent=2))
+    if args.salvar_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(resultado, f, indent=2)
+        logger.info(f"[REPLAY] Baseline gravado em {args.baseline}.")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressoes = comparar_baseline(resultado, json.load(f), args.tolerancia)
+        for regressao in regressoes:
+            print(f"REGRESSÃO: {regressao}")
+        sys.exit(1 if regressoes else 0)
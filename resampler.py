@@ -0,0 +1,209 @@
+import threading
+from collections import deque
+import numpy as np
+import pandas as pd
+import clock
+import data_manager
+from utils import logger, api_call_with_retry
+from config import TIMEFRAMES
+from intrabar import TF_MS, MINUTO_MS
+
+CAMPOS = ("timestamp", "open", "high", "low", "close", "volume")
+LIMITE_KLINES = 1500  # máximo por requisição de klines de futuros
+
+
+def decodificar_klines(klines):
+    """Converte a resposta de get_klines em arrays (timestamp em epoch ms, OHLCV em float64)."""
+    velas = data_manager.decodificar_klines(klines)
+    return {c: velas[c] for c in CAMPOS}
+
+
+class _EstadoPar:
+    def __init__(self, timeframes, capacidade):
+        self.fechadas = {tf: deque(maxlen=capacidade) for tf in timeframes}
+        self.acumulado = {tf: None for tf in timeframes}  # vela do tf em formação, só com 1m fechados
+        self.vela_1m_aberta = None
+        self.ultimo_1m = None  # timestamp da última vela de 1m fechada incorporada
+        self.semeado = False
+        self.ultima_busca = None
+
+
+class Resampler:
+    """
+    Mantém as velas de vários timeframes de cada par a partir de um único fluxo de 1m.
+
+    As velas de 1m fechadas são agregadas de forma incremental e vetorizada (reduceat) em buckets
+    alinhados ao início do intervalo, como na Binance. A vela em formação de cada timeframe combina
+    o acumulado das velas de 1m fechadas com a vela de 1m ainda aberta. O histórico anterior ao
+    fluxo de 1m vem de uma semeadura única com as klines de cada timeframe.
+    """
+    def __init__(self, timeframes=TIMEFRAMES, capacidade=1000, intervalo_busca=1.0):
+        """
+        Args:
+            timeframes (list): Timeframes mantidos (inclusive "1m").
+            capacidade (int): Velas fechadas guardadas por timeframe.
+            intervalo_busca (float): Segundos mínimos entre buscas de 1m do mesmo par (as consultas de
+                vários timeframes na mesma iteração compartilham uma busca).
+        """
+        self.timeframes = tuple(timeframes)
+        self.capacidade = capacidade
+        self.intervalo_busca = intervalo_busca
+        self._estados = {}
+        self._lock = threading.Lock()
+
+    def _estado(self, par):
+        if par not in self._estados:
+            self._estados[par] = _EstadoPar(self.timeframes, self.capacidade)
+        return self._estados[par]
+
+    def semear(self, par, tf, velas):
+        """Carrega o histórico de um timeframe (arrays de decodificar_klines); a última vela é descartada se estiver em formação."""
+        estado = self._estado(par)
+        n = len(velas["timestamp"])
+        agora_ms = int(clock.time() * 1000)
+        if n and velas["timestamp"][-1] + TF_MS[tf] > agora_ms:
+            n -= 1
+        estado.fechadas[tf].clear()
+        estado.fechadas[tf].extend(zip(*(velas[c][:n].tolist() for c in CAMPOS)))
+
+    def incorporar(self, par, velas_1m):
+        """
+        Incorpora velas de 1m (arrays de decodificar_klines, ordenadas). Velas já incorporadas são
+        ignoradas; a última é tratada como aberta se ainda não terminou.
+        """
+        estado = self._estado(par)
+        ts = velas_1m["timestamp"]
+        agora_ms = int(clock.time() * 1000)
+        aberta = len(ts) and ts[-1] + MINUTO_MS > agora_ms
+        fim = len(ts) - 1 if aberta else len(ts)
+        inicio = 0 if estado.ultimo_1m is None else int(np.searchsorted(ts[:fim], estado.ultimo_1m, side="right"))
+        estado.vela_1m_aberta = tuple(velas_1m[c][-1].item() for c in CAMPOS) if aberta else None
+        if fim > inicio:
+            fechadas = {c: velas_1m[c][inicio:fim] for c in CAMPOS}
+            for tf in self.timeframes:
+                self._agregar(estado, tf, fechadas)
+            estado.ultimo_1m = int(ts[fim - 1])
+        if estado.vela_1m_aberta:
+            # A vela de 1m aberta de um novo bucket encerra o bucket anterior
+            for tf in self.timeframes:
+                acumulado = estado.acumulado[tf]
+                if acumulado and estado.vela_1m_aberta[0] // TF_MS[tf] * TF_MS[tf] > acumulado[0]:
+                    self._fechar(estado, tf, [acumulado])
+                    estado.acumulado[tf] = None
+
+    def _fechar(self, estado, tf, velas):
+        fechadas = estado.fechadas[tf]
+        # Velas derivadas do 1m substituem as da semeadura no mesmo intervalo
+        while fechadas and fechadas[-1][0] >= velas[0][0]:
+            fechadas.pop()
+        fechadas.extend(velas)
+
+    def _agregar(self, estado, tf, velas):
+        tf_ms = TF_MS[tf]
+        grupo = velas["timestamp"] // tf_ms
+        cortes = np.flatnonzero(np.r_[True, grupo[1:] != grupo[:-1]])
+        fins = np.r_[cortes[1:], len(grupo)] - 1
+        novas = np.column_stack([
+            grupo[cortes] * tf_ms,
+            velas["open"][cortes],
+            np.maximum.reduceat(velas["high"], cortes),
+            np.minimum.reduceat(velas["low"], cortes),
+            velas["close"][fins],
+            np.add.reduceat(velas["volume"], cortes),
+        ]).tolist()
+        acumulado = estado.acumulado[tf]
+        if acumulado and novas[0][0] == acumulado[0]:
+            primeira = novas[0]
+            novas[0] = [acumulado[0], acumulado[1], max(acumulado[2], primeira[2]), min(acumulado[3], primeira[3]),
+                        primeira[4], acumulado[5] + primeira[5]]
+        elif acumulado:
+            self._fechar(estado, tf, [acumulado])
+        novas = [tuple([int(v[0])] + v[1:]) for v in novas]
+        if len(novas) > 1:
+            self._fechar(estado, tf, novas[:-1])
+        estado.acumulado[tf] = novas[-1]
+
+    def parcial(self, par, tf):
+        """Vela em formação do timeframe (acumulado + vela de 1m aberta), ou None."""
+        estado = self._estado(par)
+        acumulado, aberta = estado.acumulado[tf], estado.vela_1m_aberta
+        if aberta is None:
+            return acumulado
+        inicio = aberta[0] // TF_MS[tf] * TF_MS[tf]
+        if acumulado is None or acumulado[0] != inicio:
+            return (inicio,) + tuple(aberta[1:])
+        return (inicio, acumulado[1], max(acumulado[2], aberta[2]), min(acumulado[3], aberta[3]), aberta[4],
+                acumulado[5] + aberta[5])
+
+    def velas(self, par, tf, limite=None, incluir_parcial=True):
+        """
+        Velas do timeframe como arrays, da mais antiga para a mais recente.
+
+        Returns:
+            dict: {campo: np.ndarray} com os campos de CAMPOS (timestamp em epoch ms).
+        """
+        linhas = list(self._estado(par).fechadas[tf])
+        parcial = self.parcial(par, tf) if incluir_parcial else None
+        if parcial is not None:
+            linhas.append(parcial)
+        if limite:
+            linhas = linhas[-limite:]
+        if not linhas:
+            return decodificar_klines([])
+        colunas = list(zip(*linhas))
+        velas = {"timestamp": np.array(colunas[0], dtype=np.int64)}
+        velas.update({c: np.array(colunas[i], dtype=np.float64) for i, c in enumerate(CAMPOS[1:], start=1)})
+        return velas
+
+    def inicio_necessario(self, agora_ms=None):
+        """Início (epoch ms) do bucket atual do maior timeframe: o 1m precisa cobrir desde aqui."""
+        agora_ms = int(clock.time() * 1000) if agora_ms is None else agora_ms
+        maior = max(TF_MS[tf] for tf in self.timeframes)
+        return agora_ms // maior * maior
+
+    def historico(self, client, par, tf, limit=100):
+        """
+        Mesmo contrato de data_manager.get_historical_data, servido pelo resampler: a primeira
+        chamada de um par semeia todos os timeframes; as seguintes buscam só o 1m novo.
+
+        Returns:
+            pd.DataFrame: timestamp (horário local), open, high, low, close, volume.
+        """
+        with self._lock:
+            estado = self._estado(par)
+            if not estado.semeado:
+                for timeframe in self.timeframes:
+                    if timeframe != "1m":
+                        klines = api_call_with_retry(client.get_klines, symbol=par, interval=timeframe,
+                                                     limit=min(self.capacidade, LIMITE_KLINES))
+                        self.semear(par, timeframe, decodificar_klines(klines))
+                # Alinhado ao maior timeframe para que o primeiro bucket derivado de cada um seja completo
+                maior = max(TF_MS[t] for t in self.timeframes)
+                inicio = min(self.inicio_necessario(), int(clock.time() * 1000) - self.capacidade * MINUTO_MS)
+                self._buscar_1m(client, par, inicio // maior * maior)
+                estado.semeado = True
+                logger.info(f"[RESAMPLER] {par} semeado: {', '.join(self.timeframes)} derivados do 1m.")
+            elif clock.monotonic() - estado.ultima_busca >= self.intervalo_busca:
+                inicio = estado.ultimo_1m + MINUTO_MS if estado.ultimo_1m is not None else self.inicio_necessario()
+                self._buscar_1m(client, par, inicio)
+            velas = self.velas(par, tf, limite=limit)
+        return como_dataframe(velas)
+
+    def _buscar_1m(self, client, par, inicio_ms):
+        """Busca as velas de 1m desde inicio_ms (em páginas de LIMITE_KLINES) e incorpora."""
+        estado = self._estado(par)
+        while True:
+            klines = api_call_with_retry(client.get_klines, symbol=par, interval="1m", startTime=int(inicio_ms),
+                                         limit=LIMITE_KLINES)
+            self.incorporar(par, decodificar_klines(klines))
+            if not klines or len(klines) < LIMITE_KLINES:
+                break
+            inicio_ms = int(klines[-1][0]) + MINUTO_MS
+        estado.ultima_busca = clock.monotonic()
+
+
+def como_dataframe(velas):
+    """Arrays de velas no formato de get_historical_data (timestamp no fuso local)."""
+    df = pd.DataFrame({c: velas[c] for c in CAMPOS[1:]})
+    df.insert(0, "timestamp", data_manager.timestamps_locais(velas["timestamp"]))
+    return df
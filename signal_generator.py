@@ -1,6 +1,9 @@
+import logging
 import pandas as pd
 import numpy as np
 from utils import logger
+import metrics
+import journal_schema
 
 class SignalGenerator:
     def __init__(self):
@@ -74,21 +77,10 @@ class SignalGenerator:
         }
 
     def save_signal(self, pair, signal):
-        """Salva o sinal gerado em sinais_detalhados.csv com cabeçalho completo."""
+        """Salva o sinal gerado em sinais_detalhados.csv (colunas e ordem de journal_schema)."""
         if not signal or not signal.get('direcao'):
             return
-        # Cabeçalho completo esperado
-        full_header = [
-            'signal_id','par','direcao','preco_entrada','preco_saida','quantity','lucro_percentual','pnl_realizado','resultado','timestamp','timestamp_saida','estado','strategy_name','contributing_indicators','localizadores','motivos','timeframe','aceito','parametros','quality_score','modo_contrario','visual_tag','mode','binance_order_id'
-        ]
-        # Preencher campos ausentes com vazio ou valor padrão
-        for col in full_header:
-            if col not in signal:
-                signal[col] = ''
-        df = pd.DataFrame([{k: signal[k] for k in full_header}])
-        file = 'sinais_detalhados.csv'
-        header = not pd.io.common.file_exists(file)
-        df.to_csv(file, mode='a', index=False, header=header)
+        journal_schema.anexar([signal], 'sinais_detalhados.csv')
 
 def generate_signal(historical_data, timeframe, strategy_config, config, learning_engine, binance_utils):
     """
@@ -125,10 +117,11 @@ def generate_signal(historical_data, timeframe, strategy_config, config, learnin
         missing_columns = [col for col in required_columns if col not in historical_data.columns]
         if missing_columns:
             logger.error(f"Colunas ausentes para {strategy_name} ({timeframe}): {missing_columns}")
-            logger.debug(f"Colunas disponíveis: {historical_data.columns.tolist()}")
+            logger.debug("Colunas disponíveis: %s", historical_data.columns.tolist())
         
-        # Logar dados históricos
-        logger.debug(f"Dados para {strategy_name} ({timeframe}): {historical_data.tail(1)[available_columns].to_dict()}")
+        # Logar dados históricos (o to_dict só é montado com DEBUG ativo)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Dados para %s (%s): %s", strategy_name, timeframe, historical_data.tail(1)[available_columns].to_dict())
 
         # EMA
         if 'EMA' in indicators and 'EMA12' in historical_data.columns and 'EMA50' in historical_data.columns:
@@ -145,7 +138,7 @@ def generate_signal(historical_data, timeframe, strategy_config, config, learnin
                     reasons.append("EMA12 abaixo de EMA50")
                     locators['EMA12<EMA50'] = True
                     contributing_indicators.append('EMA')
-                logger.debug(f"EMA para {strategy_name}: EMA12={ema12:.4f}, EMA50={ema50:.4f}, Score={score_tecnico:.2f}")
+                logger.debug("EMA para %s: EMA12=%.4f, EMA50=%.4f, Score=%.2f", strategy_name, ema12, ema50, score_tecnico)
             else:
                 logger.warning(f"EMA inválido para {strategy_name}: EMA12={ema12}, EMA50={ema50}")
 
@@ -163,7 +156,7 @@ def generate_signal(historical_data, timeframe, strategy_config, config, learnin
                     reasons.append(f"RSI sobrecomprado: {rsi:.2f}")
                     locators['RSI_Sobrecomprado'] = True
                     contributing_indicators.append('RSI')
-                logger.debug(f"RSI para {strategy_name}: RSI={rsi:.2f}, Score={score_tecnico:.2f}")
+                logger.debug("RSI para %s: RSI=%.2f, Score=%.2f", strategy_name, rsi, score_tecnico)
             else:
                 logger.warning(f"RSI inválido para {strategy_name}: RSI={rsi}")
 
@@ -184,7 +177,7 @@ def generate_signal(historical_data, timeframe, strategy_config, config, learnin
                     reasons.append("MACD cruzou abaixo da linha de sinal")
                     locators['MACD_Cruzamento_Baixa'] = True
                     contributing_indicators.append('MACD')
-                logger.debug(f"MACD para {strategy_name}: MACD={macd:.4f}, Signal={macd_signal:.4f}, Score={score_tecnico:.2f}")
+                logger.debug("MACD para %s: MACD=%.4f, Signal=%.4f, Score=%.2f", strategy_name, macd, macd_signal, score_tecnico)
             else:
                 logger.warning(f"MACD inválido para {strategy_name}: MACD={macd}, Signal={macd_signal}")
 
@@ -203,7 +196,7 @@ def generate_signal(historical_data, timeframe, strategy_config, config, learnin
                     reasons.append("Preço abaixo da média de 20 períodos")
                     locators['Swing_Trade_Short'] = True
                     contributing_indicators.append('Swing Trade Composite')
-                logger.debug(f"Swing Trade para {strategy_name}: Close={close:.4f}, MA20={ma20:.4f}, Score={score_tecnico:.2f}")
+                logger.debug("Swing Trade para %s: Close=%.4f, MA20=%.4f, Score=%.2f", strategy_name, close, ma20, score_tecnico)
             else:
                 logger.warning(f"Swing Trade inválido para {strategy_name}: Close={close}, MA20={ma20}")
 
@@ -211,13 +204,14 @@ def generate_signal(historical_data, timeframe, strategy_config, config, learnin
         ml_confidence = 0.0
         if config.get('learning_enabled', False):
             try:
-                prediction = learning_engine.predict(historical_data)
+                with metrics.span("ml", timeframe=timeframe):
+                    prediction = learning_engine.predict(historical_data)
                 ml_confidence = prediction.get('confidence', 0.0)
                 if ml_confidence >= ml_confidence_min:
                     score_tecnico += ml_confidence * 0.3
                     reasons.append(f"Modelo ML confiante: {ml_confidence:.2f}")
                     locators['ML_Confidence'] = ml_confidence
-                logger.debug(f"ML para {strategy_name}: Confidence={ml_confidence:.2f}, Score={score_tecnico:.2f}")
+                logger.debug("ML para %s: Confidence=%.2f, Score=%.2f", strategy_name, ml_confidence, score_tecnico)
             except Exception as e:
                 logger.warning(f"Erro ao obter previsão do modelo ML: {e}")
 
@@ -236,7 +230,8 @@ def generate_signal(historical_data, timeframe, strategy_config, config, learnin
             "avg_pnl": 0.0
         }
 
-        logger.info(f"Resultado para {strategy_name} ({timeframe}): Direction={direction}, Score={score_tecnico:.2f}, Reasons={reasons}, Indicators={contributing_indicators}")
+        logger.debug("Resultado para %s (%s): Direction=%s, Score=%.2f, Reasons=%s, Indicators=%s",
+                     strategy_name, timeframe, direction, score_tecnico, reasons, contributing_indicators)
 
         return direction, score_tecnico, details, ";".join(contributing_indicators), strategy_name
 
@@ -292,7 +287,7 @@ def generate_multi_timeframe_signal(signals_by_tf, learning_engine, contributing
             "reasons": reasons
         }
 
-        logger.debug(f"Sinal multi-timeframe: Direction={final_direction}, Score={total_score:.2f}, Confidence={multi_tf_confidence:.2f}")
+        logger.debug("Sinal multi-timeframe: Direction=%s, Score=%.2f, Confidence=%.2f", final_direction, total_score, multi_tf_confidence)
 
         return final_direction, total_score, multi_tf_details
 
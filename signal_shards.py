@@ -0,0 +1,473 @@
+import copy
+import json
+import logging
+import logging.handlers
+import multiprocessing as mp
+import os
+import queue
+import time
+import uuid
+from datetime import timedelta
+import pandas as pd
+import clock
+import metrics
+import utils
+from utils import logger
+from config import TIMEFRAMES
+from binance_utils import BinanceUtils
+from learning_engine import LearningEngine
+from data_manager import get_historical_data, get_funding_rate, get_current_price, get_quantity, is_candle_closed
+from indicators import calculate_indicators
+from signal_generator import generate_signal, generate_multi_timeframe_signal, calculate_signal_quality
+from trade_manager import generate_combination_key
+from records import Signal, TabelaRegistros
+
+TF_MINUTOS = {"1m": 1, "5m": 5, "15m": 15, "1h": 60, "4h": 240, "1d": 1440}
+MIN_SCORE_THRESHOLD = 0.8
+MAX_REINICIOS = 3  # reinícios por shard antes de o coordenador desistir
+
+
+class ShardIndisponivel(RuntimeError):
+    """Um shard morreu mais vezes que MAX_REINICIOS: parte dos pares deixaria de ser avaliada."""
+
+
+def particionar(pares, n_shards):
+    """Distribui os pares (ordenados) em n_shards grupos por rodízio, com tamanhos iguais ±1."""
+    pares = sorted(set(pares))
+    return [pares[i::n_shards] for i in range(n_shards) if pares[i::n_shards]]
+
+
+def proximo_fechamento(tf, agora):
+    """Próximo horário de fechamento de vela do timeframe após `agora`."""
+    delta = timedelta(minutes=TF_MINUTOS[tf])
+    proximo = agora.replace(second=0, microsecond=0) + delta
+    while proximo <= agora:
+        proximo += delta
+    return proximo
+
+
+class EstadoPares:
+    """Agenda de fechamento e última vela processada por par/timeframe (loop principal ou shard)."""
+    def __init__(self, pares, timeframes=TIMEFRAMES):
+        self.timeframes = tuple(timeframes)
+        self.agenda = {}
+        self.ultima_vela = {}
+        for par in pares:
+            self.adicionar(par)
+
+    def adicionar(self, par):
+        """Passa a acompanhar `par` (sem efeito se já acompanhado)."""
+        if par in self.agenda:
+            return
+        agora = clock.now()
+        self.agenda[par] = {tf: proximo_fechamento(tf, agora) for tf in self.timeframes}
+        self.ultima_vela[par] = {tf: None for tf in self.timeframes}
+
+
+def _insights_grok(par):
+    try:
+        with metrics.span("grok_insights", par):
+            insights = pd.read_csv("grok_insights.csv")
+            recentes = insights[insights["pair"] == par].tail(1)
+            if not recentes.empty:
+                return json.loads(recentes.iloc[0]["insights"])
+    except Exception as e:
+        logger.warning(f"Erro ao carregar insights do Grok para {par}: {e}")
+    return {}
+
+
+def _sinal_tempo_real(client, par, tf, strategy_config, config, learning_engine, binance_utils):
+    with metrics.span("fetch", par, tf):
+        current_price = get_current_price(client, par, config)
+        if current_price is None:
+            return None
+        # Ajusta o número de candles baseado no timeframe
+        limit = 200 if tf in ["1h", "4h", "1d"] else 100
+        historical_data = get_historical_data(client, par, tf, limit=limit)
+    if historical_data.empty:
+        return None
+    # Atualiza o último preço apenas para timeframes menores
+    if tf in ["1m", "5m", "15m"]:
+        historical_data.loc[historical_data.index[-1] + 1] = historical_data.iloc[-1]
+        historical_data.iloc[-1, historical_data.columns.get_loc('close')] = current_price
+    with metrics.span("indicators", par, tf):
+        historical_data = calculate_indicators(historical_data, binance_utils)
+    with metrics.span("signal", par, tf):
+        return generate_signal(historical_data, tf, strategy_config, config, learning_engine, binance_utils)
+
+
+def gerar_candidatos(client, par, estado, active_strategies, config, learning_engine, binance_utils,
+                     limiar=MIN_SCORE_THRESHOLD):
+    """
+    Avalia um par: sinais em tempo real e de velas fechadas por estratégia/timeframe,
+    consolidação multi-timeframe e montagem do sinal candidato. Usada pelo loop principal e
+    pelos shards; limites globais e o diário ficam a cargo de quem chama.
+
+    Args:
+        estado (EstadoPares): Agenda de fechamento de velas (atualizada aqui).
+        limiar (float): Score mínimo de um sinal por timeframe.
+
+    Returns:
+        list: Sinais candidatos (dicts no formato da fila do loop principal).
+    """
+    logger.info(f"Processando par: {par}")
+    # Registra o preço atual no precos_log.csv, mesmo em modo simulado
+    try:
+        with metrics.span("fetch", par):
+            get_current_price(client, par, config)
+    except Exception as e:
+        logger.error(f"[ERRO] Falha ao salvar preço em precos_log.csv para {par}: {e}")
+    signals_by_tf = {}
+    historical_data = None
+    grok_insights = _insights_grok(par)
+
+    if config.get("realtime_signals_enabled", True):
+        tf = None
+        for strategy_name, strategy_config in active_strategies.items():
+            for tf in strategy_config.get("timeframes", TIMEFRAMES):
+                resultado = _sinal_tempo_real(client, par, tf, strategy_config, config, learning_engine, binance_utils)
+                if not resultado or not resultado[0]:
+                    continue
+                direction, score, details, contributing_indicators, _ = resultado
+                # Ajustar score com base no Grok se houver insight
+                if grok_insights:
+                    score = score * 0.7 + grok_insights.get("confidence", 0.0) * 0.3
+                    if "reasons" in details:
+                        details["reasons"].append(f"Grok: {grok_insights.get('reason', 'Sem motivo')}")
+                if score >= limiar:
+                    signals_by_tf[tf] = {"direction": direction, "score": score, "details": details,
+                                         "contributing_indicators": contributing_indicators, "strategy_name": strategy_name}
+                    logger.info(f"Sinal em tempo real gerado para {par} ({tf}): {direction} (score={score})")
+                else:
+                    logger.info(f"Sinal rejeitado para {par} ({tf}): score {score} abaixo do limite {limiar}")
+        # Salvar insights do Grok para o par
+        if grok_insights and tf is not None:
+            pd.DataFrame({
+                "pair": [par],
+                "timeframe": [tf],
+                "insights": [json.dumps(grok_insights)],
+                "timestamp": [clock.now().isoformat()]
+            }).to_csv("grok_insights.csv", mode="a", index=False, header=False)
+
+    # Gerar sinais baseados em velas fechadas
+    estado.adicionar(par)
+    agora = clock.now()
+    for tf in estado.agenda[par]:
+        if agora < estado.agenda[par][tf]:
+            logger.debug(f"Vela para {par} ({tf}) ainda não fechou. Próxima verificação em {estado.agenda[par][tf]}.")
+            continue
+        estado.agenda[par][tf] = proximo_fechamento(tf, agora)
+        is_closed, close_time = is_candle_closed(client, par, tf)
+        if not is_closed:
+            logger.debug(f"Candle para {par} ({tf}) ainda não fechou. Pulando...")
+            continue
+        if estado.ultima_vela[par][tf] == close_time:
+            logger.debug(f"Candle para {par} ({tf}) já processado. Pulando...")
+            continue
+        estado.ultima_vela[par][tf] = close_time
+        logger.info(f"Candle para {par} ({tf}) fechada em {close_time}. Processando...")
+        # Aumentar o número de candles para timeframes maiores
+        limit = 200 if tf in ["1h", "4h", "1d"] else 100
+        with metrics.span("fetch", par, tf):
+            historical_data = get_historical_data(client, par, tf, limit=limit)
+        if historical_data.empty:
+            logger.warning(f"Sem dados históricos para {par} ({tf}). Pulando...")
+            continue
+        with metrics.span("indicators", par, tf):
+            historical_data = calculate_indicators(historical_data, binance_utils)
+        for strategy_name, strategy_config in active_strategies.items():
+            if tf not in strategy_config.get("timeframes", TIMEFRAMES):
+                continue
+            with metrics.span("signal", par, tf):
+                direction, score, details, contributing_indicators, _ = generate_signal(
+                    historical_data, tf, strategy_config, config, learning_engine, binance_utils
+                )
+            if not direction:
+                logger.debug(f"Nenhum sinal gerado para {par} ({tf}) com estratégia {strategy_name}.")
+                continue
+            if score < limiar:
+                logger.info(f"Sinal rejeitado para {par} ({tf}) com estratégia {strategy_name}: score {score} abaixo do limite {limiar}")
+                continue
+            signals_by_tf[tf] = {"direction": direction, "score": score, "details": details,
+                                 "contributing_indicators": contributing_indicators, "strategy_name": strategy_name}
+            logger.info(f"Sinal gerado para {par} ({tf}) com estratégia {strategy_name}: {direction} (score={score})")
+
+    if not signals_by_tf:
+        return []
+    tf_principal = next(iter(signals_by_tf))
+    principal = signals_by_tf[tf_principal]
+    with metrics.span("multi_tf", par):
+        final_direction, final_score, multi_tf_details = generate_multi_timeframe_signal(
+            signals_by_tf, learning_engine, principal['contributing_indicators']
+        )
+    if not final_direction:
+        logger.debug(f"Nenhum sinal multi-timeframe gerado para {par}.")
+        return []
+    logger.info(f"Sinal multi-timeframe gerado para {par}: {final_direction} (score={final_score})")
+    current_price = get_current_price(client, par, config)
+    if current_price is None:
+        logger.warning(f"Não foi possível obter preço para {par}. Pulando sinal...")
+        return []
+    quantity = get_quantity(config, par, current_price)
+    if quantity is None:
+        logger.error(f"Não foi possível calcular quantidade para {par}. Pulando sinal...")
+        return []
+    if historical_data is None:
+        historical_data = calculate_indicators(get_historical_data(client, par, tf_principal, limit=100), binance_utils)
+    strategy_name = principal['strategy_name']
+    strategy_config = active_strategies[strategy_name]
+    details = principal['details']
+    signal_data = Signal({
+        "signal_id": str(uuid.uuid4()),
+        "timestamp": clock.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "par": par,
+        "timeframe": tf_principal,
+        "direcao": final_direction,
+        "preco_entrada": current_price,
+        "quantity": quantity,
+        "score_tecnico": final_score,
+        "motivos": details["reasons"] + [f"Multi-TF: {multi_tf_details.get('multi_tf_confidence', 0.0):.2f}"],
+        "funding_rate": get_funding_rate(client, par, config, mode="dry_run"),
+        "localizadores": details["locators"],
+        "parametros": {
+            "tp_percent": strategy_config.get("tp_percent", config["stop_padrao"]["tp_percent"]),
+            "sl_percent": strategy_config.get("sl_percent", config["stop_padrao"]["sl_percent"]),
+            "leverage": strategy_config.get("leverage", config["leverage"])
+        },
+        "timeframes_analisados": list(signals_by_tf.keys()),
+        "contributing_indicators": principal['contributing_indicators'],
+        "strategy_name": strategy_name,
+        "combination_key": generate_combination_key(par, final_direction, strategy_name, principal['contributing_indicators'], tf_principal),
+        "historical_win_rate": details.get("historical_win_rate", 0.0),
+        "avg_pnl": details.get("avg_pnl", 0.0),
+        "estado": "aberto",
+        "side_performance": {"LONG": 0.0, "SHORT": 0.0},
+        "timeframe_weight": 1.0 / (TIMEFRAMES.index(tf_principal) + 1)
+    })
+    signal_data['quality_score'] = calculate_signal_quality(historical_data, signal_data, binance_utils)
+    return [signal_data]
+
+
+def _executar_shard(indice, pares, active_strategies, config, fabrica_cliente, limiar, fila_sinais, fila_controle,
+                    fila_log, parar):
+    """
+    Processo de um shard: avalia seus pares em ciclo e envia ao coordenador os candidatos e, a
+    cada ciclo, o incremento das métricas do processo (o coordenador as soma ao seu registro).
+    """
+    # Logs do shard seguem pela fila do coordenador (um único escritor de bot.log)
+    utils.encerrar_logging()
+    raiz = logging.getLogger()
+    for handler in list(raiz.handlers):
+        raiz.removeHandler(handler)
+    raiz.addHandler(logging.handlers.QueueHandler(fila_log))
+    try:
+        client = fabrica_cliente()
+        binance_utils = BinanceUtils(client, config)
+        learning_engine = LearningEngine()
+        estado = EstadoPares(pares)
+    except Exception as e:
+        logger.error(f"[SHARD {indice}] Falha ao inicializar: {e}", exc_info=True)
+        fila_sinais.put(("erro", indice, str(e)))
+        return
+    logger.info(f"[SHARD {indice}] Iniciado com {len(pares)} pares: {pares}")
+    metricas_enviadas = metrics.registro.snapshot()
+    while not parar.is_set():
+        inicio = time.perf_counter()
+        try:
+            while True:
+                tipo, valor = fila_controle.get_nowait()
+                if tipo == "estrategias":
+                    active_strategies = valor
+                elif tipo == "config":
+                    config = valor
+                elif tipo == "pares":
+                    pares = valor
+                    logger.info(f"[SHARD {indice}] Pares atualizados ({len(pares)}): {pares}")
+        except queue.Empty:
+            pass
+        candidatos = []
+        for par in pares:
+            if parar.is_set():
+                break
+            try:
+                candidatos.extend(gerar_candidatos(client, par, estado, active_strategies, config, learning_engine,
+                                                   binance_utils, limiar))
+            except Exception as e:
+                logger.error(f"[SHARD {indice}] Erro ao avaliar {par}: {e}")
+        if candidatos:
+            # Um lote colunar por ciclo: uma única serialização entre processos
+            fila_sinais.put(("sinais", TabelaRegistros.de_registros(candidatos)))
+        fila_sinais.put(("ciclo", indice, time.perf_counter() - inicio))
+        metricas = metrics.registro.snapshot()
+        incremento = metrics.diferenca(metricas, metricas_enviadas)
+        if incremento:
+            fila_sinais.put(("metricas", incremento))
+            metricas_enviadas = metricas
+        parar.wait(config.get("loop_interval", 1))
+
+
+class _Reencaminhar(logging.Handler):
+    """Entrega registros vindos dos shards aos handlers do processo coordenador."""
+    def emit(self, record):
+        logging.getLogger(record.name).handle(record)
+
+
+class ShardCoordinator:
+    """
+    Modo shardado: cada processo avalia um subconjunto dos pares, com seu próprio cliente, cache
+    de velas, indicadores e LearningEngine. Os candidatos voltam por uma fila multiprocessing
+    e o coordenador (loop principal) aplica os limites globais e grava o diário. Mudanças do
+    universo (publicar_universo) são redistribuídas entre os processos já em execução.
+    """
+    def __init__(self, pares, active_strategies, config, n_workers=None, fabrica_cliente=None,
+                 limiar=MIN_SCORE_THRESHOLD, max_reinicios=MAX_REINICIOS):
+        """
+        Args:
+            pares (list): Universo de pares.
+            active_strategies (dict): Estratégias ativas {nome: config}.
+            config (dict): Configuração do bot.
+            n_workers (int): Número de processos (padrão: núcleos disponíveis, no máximo um por par).
+            fabrica_cliente (callable): Cria o cliente Binance dentro de cada processo (deve ser
+                serializável por pickle, ex.: functools.partial de uma função de módulo).
+            limiar (float): Score mínimo de um sinal por timeframe.
+            max_reinicios (int): Reinícios permitidos por shard antes de coletar() levantar ShardIndisponivel.
+        """
+        n_workers = n_workers or os.cpu_count() or 1
+        n_shards = max(1, min(n_workers, len(pares)))
+        self.shards = particionar(pares, n_shards)
+        self.shards += [[] for _ in range(n_shards - len(self.shards))]
+        self.active_strategies = dict(active_strategies)
+        # Cópia: o config do loop principal é alterado no lugar quando o config.json é recarregado
+        self.config = copy.deepcopy(config)
+        self.fabrica_cliente = fabrica_cliente
+        self.limiar = limiar
+        self.max_reinicios = max_reinicios
+        # spawn: quando os shards (re)iniciam, o processo principal já tem threads (logging, watchdog,
+        # métricas HTTP, TimerWheel, fila de auditoria); um fork com uma delas segurando um lock
+        # deixaria o filho travado. O processo novo importa este módulo e executa _executar_shard.
+        self._ctx = mp.get_context("spawn")
+        self.fila_sinais = self._ctx.Queue()
+        self.fila_log = self._ctx.Queue()
+        self.parar_evento = self._ctx.Event()
+        self.filas_controle = [None] * len(self.shards)
+        self.processos = [None] * len(self.shards)
+        self.reinicios = [0] * len(self.shards)
+        self._listener_log = None
+
+    def _iniciar_shard(self, indice):
+        fila_controle = self._ctx.Queue()
+        processo = self._ctx.Process(
+            target=_executar_shard, name=f"SignalShard-{indice}", daemon=True,
+            args=(indice, self.shards[indice], self.active_strategies, self.config, self.fabrica_cliente, self.limiar,
+                  self.fila_sinais, fila_controle, self.fila_log, self.parar_evento),
+        )
+        processo.start()
+        self.filas_controle[indice] = fila_controle
+        self.processos[indice] = processo
+
+    def iniciar(self):
+        self._listener_log = logging.handlers.QueueListener(self.fila_log, _Reencaminhar())
+        self._listener_log.start()
+        for indice in range(len(self.shards)):
+            self._iniciar_shard(indice)
+        logger.info(f"[SHARDS] {len(self.processos)} processos iniciados para {sum(map(len, self.shards))} pares.")
+
+    def publicar_estrategias(self, active_strategies):
+        """Envia as estratégias ativas aos shards quando mudarem."""
+        if active_strategies == self.active_strategies:
+            return
+        self.active_strategies = dict(active_strategies)
+        for fila in filter(None, self.filas_controle):
+            fila.put(("estrategias", self.active_strategies))
+
+    def publicar_universo(self, pares):
+        """
+        Redistribui os pares quando o universo muda (ex.: MarketScanner.ao_mudar).
+
+        Pares que saíram são retirados do seu shard; os novos vão para os shards com menos pares.
+        Os demais continuam no mesmo processo, com a agenda de velas que já tinham.
+        """
+        novos = set(pares)
+        atuais = {par for shard in self.shards for par in shard}
+        if novos == atuais:
+            return
+        alterados = set()
+        for indice, shard in enumerate(self.shards):
+            restantes = [par for par in shard if par in novos]
+            if len(restantes) != len(shard):
+                self.shards[indice] = restantes
+                alterados.add(indice)
+        for par in sorted(novos - atuais):
+            indice = min(range(len(self.shards)), key=lambda i: len(self.shards[i]))
+            self.shards[indice].append(par)
+            alterados.add(indice)
+        for indice in sorted(alterados):
+            if self.filas_controle[indice] is not None:
+                self.filas_controle[indice].put(("pares", list(self.shards[indice])))
+        logger.info(f"[SHARDS] Universo redistribuído: entraram {sorted(novos - atuais)}, "
+                    f"saíram {sorted(atuais - novos)}; pares por shard: {[len(s) for s in self.shards]}.")
+
+    def publicar_config(self, config):
+        """Envia a configuração aos shards quando mudar (ex.: após recarregar o config.json)."""
+        if config == self.config:
+            return
+        self.config = copy.deepcopy(config)
+        for fila in filter(None, self.filas_controle):
+            fila.put(("config", self.config))
+        logger.info("[SHARDS] Configuração recarregada enviada aos shards.")
+
+    def coletar(self, timeout=0.0):
+        """
+        Esvazia a fila de candidatos e reinicia shards cujo processo terminou.
+
+        Args:
+            timeout (float): Espera pelo primeiro item (0 = não bloqueia).
+
+        Returns:
+            list: Sinais candidatos recebidos.
+
+        Raises:
+            ShardIndisponivel: Um shard terminou depois de esgotar max_reinicios.
+        """
+        sinais = []
+        try:
+            item = self.fila_sinais.get(timeout=timeout) if timeout else self.fila_sinais.get_nowait()
+            while True:
+                if item[0] == "sinais":
+                    sinais.extend(item[1].registros())
+                elif item[0] == "ciclo":
+                    metrics.registro.observar("shard_cycle", item[2], f"shard{item[1]}")
+                elif item[0] == "metricas":
+                    metrics.registro.incorporar(item[1])
+                elif item[0] == "erro":
+                    logger.error(f"[SHARDS] Shard {item[1]} encerrado: {item[2]}")
+                item = self.fila_sinais.get_nowait()
+        except queue.Empty:
+            pass
+        if self.parar_evento.is_set():
+            return sinais
+        for indice, processo in enumerate(self.processos):
+            if processo is None or processo.is_alive():
+                continue
+            processo.join(0)
+            if self.reinicios[indice] >= self.max_reinicios:
+                raise ShardIndisponivel(
+                    f"Shard {indice} ({len(self.shards[indice])} pares) terminou (exitcode={processo.exitcode}) "
+                    f"após {self.reinicios[indice]} reinícios."
+                )
+            self.reinicios[indice] += 1
+            logger.error(f"[SHARDS] Processo do shard {indice} terminou (exitcode={processo.exitcode}); "
+                         f"reiniciando ({self.reinicios[indice]}/{self.max_reinicios}).")
+            self._iniciar_shard(indice)
+        return sinais
+
+    def parar(self, timeout=5.0):
+        self.parar_evento.set()
+        for processo in filter(None, self.processos):
+            processo.join(timeout)
+            if processo.is_alive():
+                processo.terminate()
+        if self._listener_log is not None:
+            self._listener_log.stop()
+            self._listener_log = None
+        logger.info("[SHARDS] Processos encerrados.")
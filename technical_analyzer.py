@@ -9,6 +9,7 @@ import time
 import logging
 from dotenv import load_dotenv
 from notification_manager import send_telegram_alert
+from journal_schema import ler_diario
 
 logging.basicConfig(
     filename="bot.log",
@@ -37,7 +38,7 @@ class GrokPeriodicCheck:
 
     async def fetch_data(self):
         try:
-            ordens_df = pd.read_csv(os.path.join(self.data_dir, "sinais_detalhados.csv"))
+            ordens_df = ler_diario(os.path.join(self.data_dir, "sinais_detalhados.csv"))
             precos_df = pd.read_csv(os.path.join(self.data_dir, "precos_log.csv"))
             return ordens_df, precos_df
         except Exception as e:
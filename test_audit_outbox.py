@@ -0,0 +1,76 @@
+import unittest
+import csv
+import os
+import shutil
+import tempfile
+import time
+import pandas as pd
+from audit_outbox import COLUNAS, OPORTUNIDADES, AuditOutbox
+
+
+class TestAuditOutbox(unittest.TestCase):
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.oportunidades = os.path.join(self.diretorio, OPORTUNIDADES)
+
+    def tearDown(self):
+        shutil.rmtree(self.diretorio)
+
+    def test_batched_rows_are_csv_encoded(self):
+        outbox = AuditOutbox(intervalo=60)
+        for i in range(250):
+            outbox.enviar(self.oportunidades, {
+                'timestamp': f"2025-04-01 10:00:{i % 60:02d}", 'robot_name': 'robo1', 'par': 'XRPUSDT',
+                'timeframe': '15m', 'direcao': 'LONG', 'contributing_indicators': 'EMA, RSI; "MACD"',
+                'reason': 'Limite de trades simultâneos atingido', 'fora_do_cabecalho': 1,
+            }, colunas=COLUNAS[OPORTUNIDADES])
+        # flush não espera o intervalo do lote
+        inicio = time.monotonic()
+        outbox.flush()
+        self.assertLess(time.monotonic() - inicio, 5)
+        df = pd.read_csv(self.oportunidades)
+        self.assertEqual(list(df.columns), COLUNAS[OPORTUNIDADES])
+        self.assertEqual(len(df), 250)
+        self.assertEqual(df['contributing_indicators'].iloc[0], 'EMA, RSI; "MACD"')
+        self.assertTrue(df['score_tecnico'].isna().all())
+
+    def test_existing_header_order_and_bounded_latency(self):
+        precos = os.path.join(self.diretorio, "precos_log.csv")
+        with open(precos, "w", encoding="utf-8") as f:
+            f.write("par,price,timestamp\nXRPUSDT,0.5,2025-04-01 10:00:00\n")
+        outbox = AuditOutbox(intervalo=0.05)
+        outbox.enviar(precos, {'timestamp': '2025-04-01 10:00:05', 'par': 'DOGEUSDT', 'price': 0.15})
+        prazo = time.monotonic() + 5
+        while time.monotonic() < prazo:
+            with open(precos, encoding="utf-8") as f:
+                linhas = list(csv.reader(f))
+            if len(linhas) == 3:
+                break
+            time.sleep(0.01)
+        self.assertEqual(linhas[2], ['DOGEUSDT', '0.15', '2025-04-01 10:00:05'])
+
+    def test_close_drains_pending_rows(self):
+        outbox = AuditOutbox(intervalo=60)
+        outbox.enviar(self.oportunidades, {'robot_name': 'robo1', 'reason': 'x'})
+        outbox.fechar()
+        self.assertEqual(pd.read_csv(self.oportunidades)['robot_name'].tolist(), ['robo1'])
+
+    def test_relative_path_is_resolved_when_enqueued(self):
+        outbox = AuditOutbox(intervalo=60)
+        original = os.getcwd()
+        outra = tempfile.mkdtemp()
+        try:
+            os.chdir(self.diretorio)
+            outbox.enviar(OPORTUNIDADES, {'robot_name': 'robo1', 'reason': 'x'})
+            os.chdir(outra)
+            outbox.flush()
+        finally:
+            os.chdir(original)
+            shutil.rmtree(outra)
+        df = pd.read_csv(self.oportunidades)
+        self.assertEqual(list(df.columns), COLUNAS[OPORTUNIDADES])
+        self.assertEqual(df['robot_name'].tolist(), ['robo1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
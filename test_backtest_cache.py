@@ -0,0 +1,43 @@
+import unittest
+import os
+import shutil
+import tempfile
+import numpy as np
+from backtest_cache import BacktestCache, hash_canonico
+
+
+class TestBacktestCache(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.csv = os.path.join(self.dir, "historical_data_XRPUSDT_1m.csv")
+        with open(self.csv, "w") as f:
+            f.write("timestamp,open,high,low,close,volume\n2025-03-19 00:00:00,1,1,1,1,1\n")
+        self.cache = BacktestCache(os.path.join(self.dir, "cache"))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_key_is_canonical_and_tracks_params_and_data(self):
+        self.assertEqual(hash_canonico({"tp": 1.0, "sl": 2.0}), hash_canonico({"sl": 2.0, "tp": 1.0}))
+        chave = self.cache.chave({"tp": 1.0, "sl": 2.0}, [self.csv])
+        self.assertEqual(chave, self.cache.chave({"sl": 2.0, "tp": 1.0}, [self.csv]))
+        self.assertNotEqual(chave, self.cache.chave({"tp": 1.5, "sl": 2.0}, [self.csv]))
+        with open(self.csv, "a") as f:
+            f.write("2025-03-19 00:01:00,1,1,1,1,1\n")
+        self.assertNotEqual(chave, self.cache.chave({"tp": 1.0, "sl": 2.0}, [self.csv]))
+
+    def test_results_persist_across_instances(self):
+        chave = self.cache.chave({"tp": 1.0}, [self.csv])
+        chamadas = []
+        calcular = lambda: chamadas.append(1) or [(np.array([0.5, -1.0]), np.array([2.0]))]
+        self.cache.obter_ou_calcular(chave, calcular)
+        outro = BacktestCache(self.cache.diretorio)
+        valor = outro.obter_ou_calcular(chave, calcular)
+        self.assertEqual(len(chamadas), 1)
+        np.testing.assert_array_equal(valor[0][0], [0.5, -1.0])
+        outro.limpar()
+        self.assertIsNone(BacktestCache(self.cache.diretorio).get(chave))
+
+
+if __name__ == '__main__':
+    unittest.main()
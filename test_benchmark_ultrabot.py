@@ -0,0 +1,37 @@
+import unittest
+import os
+from benchmark_ultrabot import gerar_diario, comparar, executar, medir, COLUNAS_DIARIO
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class TestBenchmarkUltrabot(unittest.TestCase):
+    def test_synthetic_journal_shape(self):
+        df = gerar_diario(2_000)
+        self.assertEqual(list(df.columns), COLUNAS_DIARIO)
+        self.assertEqual(len(df), 2_000)
+        self.assertTrue(df["signal_id"].is_unique)
+        fechadas = df[df["estado"] == "fechado"]
+        self.assertTrue(fechadas["pnl_realizado"].notna().all())
+        self.assertTrue(df.loc[df["estado"] == "aberto", "resultado"].isna().all())
+
+    def test_regression_threshold(self):
+        baseline = {"a": {"mediana_ms": 10.0}, "b": {"mediana_ms": 10.0}}
+        atual = {"a": {"mediana_ms": 12.0}, "b": {"mediana_ms": 13.0}, "novo": {"mediana_ms": 99.0}}
+        regressoes = comparar(atual, baseline, tolerancia=0.25)
+        self.assertEqual([r[0] for r in regressoes], ["b"])
+
+    def test_missing_or_failed_benchmark_fails_the_gate(self):
+        baseline = {"a": {"mediana_ms": 10.0}, "b": {"mediana_ms": 10.0}, "c": {"mediana_ms": 10.0}}
+        atual = {"a": {"mediana_ms": 10.0}, "b": {"erro": "boom"}}
+        self.assertEqual(comparar(atual, baseline), [("b", 10.0, None, None), ("c", 10.0, None, None)])
+
+    def test_run_filtered_benchmark(self):
+        self.assertEqual(medir(lambda: None, repeticoes=4)["repeticoes"], 4)
+        resultados = executar(tamanhos=(500,), filtro="load_signals", data_dir=DATA_DIR)
+        self.assertEqual(list(resultados), ["dashboard.load_signals[n=500]"])
+        self.assertGreater(resultados["dashboard.load_signals[n=500]"]["mediana_ms"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import threading
+from datetime import datetime
+import clock
+from clock import RelogioVirtual, RelogioReal
+from timer_wheel import TimerWheel
+
+
+class TestRelogioVirtual(unittest.TestCase):
+    def tearDown(self):
+        clock.definir_relogio(RelogioReal())
+
+    def test_driver_advances_and_workers_follow_in_lockstep(self):
+        relogio = RelogioVirtual(datetime(2025, 3, 31, 12, 0, 0))
+        clock.definir_relogio(relogio)
+        vistos = []
+
+        def trabalhador(nome, intervalo, vezes):
+            for _ in range(vezes):
+                clock.sleep(intervalo)
+                vistos.append((clock.time() - relogio_inicio, nome))
+
+        relogio_inicio = clock.time()
+        threads = [threading.Thread(target=trabalhador, args=("a", 2, 3), daemon=True),
+                   threading.Thread(target=trabalhador, args=("b", 3, 2), daemon=True)]
+        for t in threads:
+            t.start()
+        while len(relogio._dormindo) < 2:
+            pass
+        for _ in range(6):
+            clock.sleep(1)
+        self.assertEqual(clock.now(), datetime(2025, 3, 31, 12, 0, 6))
+        self.assertEqual(sorted(vistos), [(2, "a"), (3, "b"), (4, "a"), (6, "a"), (6, "b")])
+
+    def test_wait_and_timer_wheel_follow_virtual_time(self):
+        relogio = RelogioVirtual(1_700_000_000.0)
+        clock.definir_relogio(relogio)
+        roda = TimerWheel(tick=0.1, relogio=clock.monotonic)
+        relogio.ao_avancar(lambda agora: roda.avancar())
+        expirou = threading.Event()
+        roda.agendar(30, expirou.set)
+        verificacoes = []
+
+        def simulacao():
+            while not clock.wait(expirou, 0.5):
+                verificacoes.append(clock.time())
+
+        t = threading.Thread(target=simulacao, daemon=True)
+        t.start()
+        while not relogio._dormindo:
+            pass
+        while t.is_alive():
+            clock.sleep(0.5)
+        self.assertTrue(expirou.is_set())
+        self.assertAlmostEqual(clock.time() - 1_700_000_000.0, 30.0, places=6)
+        self.assertEqual(len(verificacoes), 59)
+
+
+if __name__ == '__main__':
+    unittest.main()
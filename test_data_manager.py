@@ -0,0 +1,43 @@
+import unittest
+import numpy as np
+import pandas as pd
+from data_manager import (KLINE_DTYPE, convert_timestamp_to_local, decodificar_klines, get_historical_data,
+                          klines_para_dataframe)
+
+KLINES = [
+    [1744183260000, "0.14577000", "0.14579000", "0.14561000", "0.14568000", "495166.00000000", 1744183319999,
+     "72135.78288000", 120, "250000.0", "36400.5", "0"],
+    [1744183320000, "0.14568000", "0.14592000", "0.14562000", "0.14590000", "520186.00000000", 1744183379999,
+     "75895.13740000", 98, "260000.0", "37900.1", "0"],
+]
+
+
+class ClienteKlines:
+    def get_klines(self, **kwargs):
+        return KLINES
+
+
+class TestKlineDecoder(unittest.TestCase):
+    def test_decode_is_typed_structured_array(self):
+        velas = decodificar_klines(KLINES)
+        self.assertEqual(velas.dtype, KLINE_DTYPE)
+        self.assertEqual(velas["timestamp"].tolist(), [1744183260000, 1744183320000])
+        self.assertEqual(velas["number_of_trades"].tolist(), [120, 98])
+        np.testing.assert_allclose(velas["close"], [0.14568, 0.1459])
+        self.assertEqual(len(decodificar_klines([])), 0)
+
+    def test_dataframe_matches_per_row_conversion(self):
+        df = get_historical_data(ClienteKlines(), "DOGEUSDT", "1m", limit=2)
+        self.assertEqual(list(df.columns), ["timestamp", "open", "high", "low", "close", "volume"])
+        self.assertTrue(all(df[c].dtype == np.float64 for c in df.columns[1:]))
+        esperado = [convert_timestamp_to_local(k[0]) for k in KLINES]
+        self.assertEqual([t.to_pydatetime() for t in df["timestamp"]], esperado)
+        self.assertEqual(str(df["timestamp"].dt.tz), str(esperado[0].tzinfo))
+
+        bruto = klines_para_dataframe(KLINES, colunas=["timestamp", "close_time"], horario_local=False)
+        self.assertEqual(bruto["close_time"].tolist(), [1744183319999, 1744183379999])
+        self.assertTrue(isinstance(klines_para_dataframe([]), pd.DataFrame))
+
+
+if __name__ == '__main__':
+    unittest.main()
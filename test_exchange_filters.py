@@ -0,0 +1,49 @@
+import unittest
+import os
+from clock import RelogioReal, RelogioVirtual, definir_relogio
+from exchange_filters import get_symbol_filters
+from mock_exchange import MockBinanceClient
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class TestSymbolFilterCache(unittest.TestCase):
+    def setUp(self):
+        self.relogio = RelogioVirtual(1743400000)
+        definir_relogio(self.relogio)
+        self.client = MockBinanceClient(symbols=("XRPUSDT",), data_dir=DATA_DIR, inicio="2025-03-31 02:13:00")
+
+    def tearDown(self):
+        definir_relogio(RelogioReal())
+
+    def _cargas(self):
+        return sum(1 for nome, _ in self.client.chamadas if nome == "futures_exchange_info")
+
+    def test_ttl_expiry_reloads_once(self):
+        cache = get_symbol_filters(self.client, ttl=60)
+        cache.arredondar_quantidade("XRPUSDT", 123.456)
+        cache.arredondar_preco("XRPUSDT", 0.51234)
+        self.assertEqual(self._cargas(), 1)
+        self.relogio.avancar(59)
+        cache.validar_notional("XRPUSDT", 100, 0.5)
+        self.assertEqual(self._cargas(), 1)
+        self.relogio.avancar(2)
+        cache.validar_notional("XRPUSDT", 100, 0.5)
+        self.assertEqual(self._cargas(), 2)
+
+    def test_invalidation(self):
+        cache = get_symbol_filters(self.client, ttl=3600)
+        self.assertTrue(cache.garantir_alavancagem("XRPUSDT", 7))
+        self.assertFalse(cache.garantir_alavancagem("XRPUSDT", 7))
+        cache.carregar(forcar=True)
+        self.assertEqual(self._cargas(), 2)
+
+        # Mesmo cliente: instância compartilhada; TTL explícito atualiza, None preserva
+        self.assertIs(get_symbol_filters(self.client, ttl=30), cache)
+        self.assertEqual(get_symbol_filters(self.client).ttl, 30)
+        outro = MockBinanceClient(symbols=("XRPUSDT",), data_dir=DATA_DIR, inicio="2025-03-31 02:13:00")
+        self.assertIsNot(get_symbol_filters(outro), cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+import os
+import numpy as np
+from candle_store import CandleStore
+from intrabar import primeira_saida
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class TestIntrabar(unittest.TestCase):
+    def test_intrabar_matches_linear_scan(self):
+        velas = CandleStore(DATA_DIR).get("DOGEUSDT", "1m")
+        ts, high, low = (np.asarray(velas[c]) for c in ("timestamp", "high", "low"))
+        rng = np.random.default_rng(0)
+        for _ in range(100):
+            a, d = int(rng.integers(0, len(ts) - 1)), int(rng.choice([1, -1]))
+            entrada = float(velas["close"][a])
+            tp, sl = entrada * (1 + d * rng.uniform(0.1, 3) / 100), entrada * (1 - d * rng.uniform(0.1, 3) / 100)
+            toca_tp = (high[a:] >= tp) if d == 1 else (low[a:] <= tp)
+            toca_sl = (low[a:] <= sl) if d == 1 else (high[a:] >= sl)
+            i_tp = np.argmax(toca_tp) if toca_tp.any() else len(ts)
+            i_sl = np.argmax(toca_sl) if toca_sl.any() else len(ts)
+            saida_ms, _, resultado = primeira_saida(velas, int(ts[a]), tp, sl, d)
+            if min(i_tp, i_sl) == len(ts):
+                self.assertEqual(resultado, "Timeout")
+            else:
+                self.assertEqual(resultado, "SL" if i_sl <= i_tp else "TP")
+                self.assertEqual(saida_ms, int(ts[a + min(i_tp, i_sl)]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+import json
+import os
+import shutil
+import tempfile
+import pandas as pd
+import journal_schema
+from journal_schema import COLUNAS, EscritorDiario, anexar, escrever_diario, garantir_diario, ler_diario, versao
+from records import Position
+
+LEGADO = ['signal_id', 'par', 'direcao', 'preco_entrada', 'preco_saida', 'quantity', 'lucro_percentual',
+          'pnl_realizado', 'resultado', 'timestamp', 'timestamp_saida', 'estado', 'strategy_name', 'aceito',
+          'parametros', 'indicador_legado']
+
+
+class TestJournalSchema(unittest.TestCase):
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.arquivo = os.path.join(self.diretorio, "sinais_detalhados.csv")
+
+    def tearDown(self):
+        shutil.rmtree(self.diretorio)
+
+    def _legado(self):
+        with open(self.arquivo, "w", encoding="utf-8") as f:
+            f.write(",".join(LEGADO) + "\n")
+            f.write("a1,XRPUSDT,LONG,0.51234567,,100,,,,2025-04-01 10:00:00,,aberto,robo1,True,"
+                    '"{""tp_percent"": 2}",x\n')
+            f.write("a2,DOGEUSDT,SHORT,0.15,0.14,10,6.6666666667,6.6666666667,TP,2025-04-01 11:00:00,"
+                    "2025-04-01 12:30:00,fechado,robo2,False,{},y\n")
+
+    def test_legacy_header_is_migrated_in_place(self):
+        self._legado()
+        self.assertEqual(versao(self.arquivo), 1)
+        garantir_diario(self.arquivo)
+        self.assertEqual(versao(self.arquivo), journal_schema.VERSAO)
+        df = pd.read_csv(self.arquivo)
+        self.assertEqual(list(df.columns), COLUNAS + ['indicador_legado'])
+        self.assertEqual(df['signal_id'].tolist(), ['a1', 'a2'])
+        self.assertEqual(json.loads(df['parametros'].iloc[0])['tp_percent'], 2)
+
+    def test_compact_and_exact_reads(self):
+        self._legado()
+        garantir_diario(self.arquivo)
+        df = ler_diario(self.arquivo, colunas=['par', 'estado', 'preco_entrada', 'lucro_percentual',
+                                               'timestamp_saida', 'aceito', 'score_tecnico'])
+        self.assertEqual(df['par'].dtype, 'category')
+        self.assertEqual(df['preco_entrada'].dtype, 'float32')
+        self.assertEqual(df['lucro_percentual'].dtype, 'float64')
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df['timestamp_saida']))
+        self.assertTrue(pd.isna(df['timestamp_saida'].iloc[0]))
+        self.assertEqual(df['aceito'].tolist(), [True, False])
+        self.assertTrue(df['score_tecnico'].isna().all())
+
+        exato = ler_diario(self.arquivo, compacto=False)
+        self.assertEqual(exato['preco_entrada'].iloc[0], 0.51234567)
+        exato.at[0, 'estado'] = 'fechado'
+        exato.at[0, 'timestamp_saida'] = '2025-04-02 09:00:00'
+        escrever_diario(exato, self.arquivo)
+        self.assertEqual(ler_diario(self.arquivo, ['estado'])['estado'].tolist(), ['fechado', 'fechado'])
+        self.assertFalse(os.path.exists(f"{self.arquivo}.tmp"))
+
+    def test_invalid_values_fall_back_to_nulls(self):
+        self._legado()
+        with open(self.arquivo, "a", encoding="utf-8") as f:
+            f.write("a3,XRPUSDT,LONG,erro,,1,,,,ontem,,aberto,robo1,talvez,{},z\n")
+        df = ler_diario(self.arquivo, colunas=['signal_id', 'preco_entrada', 'timestamp', 'aceito'])
+        self.assertEqual(len(df), 3)
+        self.assertTrue(pd.isna(df['preco_entrada'].iloc[2]))
+        self.assertTrue(pd.isna(df['timestamp'].iloc[2]))
+        self.assertTrue(pd.isna(df['aceito'].iloc[2]))
+
+    def test_append_follows_header_and_serializes_records(self):
+        escritor = EscritorDiario(self.arquivo)
+        posicao = Position({"signal_id": "p1", "par": "XRPUSDT", "direcao": "LONG", "preco_entrada": 0.5,
+                            "parametros": {"tp_percent": 1.5}, "motivos": ["EMA"], "aceito": True,
+                            "timestamp": "2025-04-01 10:00:00", "chave_fora_do_esquema": 1})
+        escritor.write_row(posicao)
+        anexar([{"par": "DOGEUSDT", "signal_id": "p2", "estado": "aberto"}], self.arquivo)
+        df = pd.read_csv(self.arquivo)
+        self.assertEqual(list(df.columns), COLUNAS)
+        self.assertEqual(df['signal_id'].tolist(), ['p1', 'p2'])
+        self.assertEqual(json.loads(df['parametros'].iloc[0])['tp_percent'], 1.5)
+        self.assertEqual(json.loads(df['motivos'].iloc[0]), ["EMA"])
+        lido = ler_diario(self.arquivo)
+        self.assertEqual(lido['timestamp'].iloc[0], pd.Timestamp("2025-04-01 10:00:00"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+import unittest
+import gzip
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import pandas as pd
+import journal_schema
+from journal_schema import COLUNAS, anexar, escrever_diario, ler_diario
+from journal_store import JournalStore
+
+DIRETORIO_MODULOS = os.path.dirname(os.path.abspath(__file__))
+
+
+def trade(signal_id, entrada, saida=None, estado="fechado", par="XRPUSDT", pnl=1.0):
+    return {"signal_id": signal_id, "par": par, "direcao": "LONG", "preco_entrada": 0.5, "estado": estado,
+            "timestamp": entrada, "timestamp_saida": saida, "resultado": "TP" if saida else None,
+            "pnl_realizado": pnl if saida else None, "strategy_name": "robo1"}
+
+
+class TestJournalStore(unittest.TestCase):
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.arquivo = os.path.join(self.diretorio, "sinais_detalhados.csv")
+        escrever_diario(pd.DataFrame([
+            trade("m1", "2025-02-10 10:00:00", "2025-02-10 12:00:00"),
+            trade("m2", "2025-03-05 09:00:00", "2025-03-06 09:00:00", par="DOGEUSDT", pnl=-0.5),
+            trade("m3", "2025-03-28 09:00:00", "2025-04-02 09:00:00"),
+            trade("recente", "2025-04-09 08:00:00", "2025-04-09 09:00:00"),
+            trade("aberto", "2025-03-01 08:00:00", estado="aberto"),
+            trade(None, "2025-02-01 08:00:00", "2025-02-01 09:00:00"),
+        ], columns=COLUNAS), self.arquivo)
+        self.store = JournalStore(self.arquivo, retencao_dias=7)
+
+    def tearDown(self):
+        shutil.rmtree(self.diretorio)
+
+    def test_compaction_moves_old_closed_trades_to_monthly_partitions(self):
+        self.assertEqual(self.store.compactar(agora=pd.Timestamp("2025-04-10")), 3)
+        quente = ler_diario(self.arquivo, colunas=["signal_id", "estado"])
+        self.assertEqual(quente["signal_id"].tolist()[:2], ["recente", "aberto"])
+        self.assertEqual(len(quente), 3)  # sem signal_id: nunca arquivada
+        meses = [os.path.basename(p) for p in self.store.particoes()]
+        self.assertEqual(meses, ["sinais_2025-02.csv.gz", "sinais_2025-03.csv.gz"])
+        with gzip.open(self.store.caminho_particao("2025-03"), "rt", encoding="utf-8") as f:
+            self.assertEqual(f.readline().strip().split(","), COLUNAS)
+        self.assertEqual(self.store.compactar(agora=pd.Timestamp("2025-04-10")), 0)
+
+        # Nova compactação acrescenta à partição do mês já existente
+        anexar([trade("m4", "2025-03-20 10:00:00", "2025-03-21 10:00:00")], self.arquivo)
+        self.assertEqual(self.store.compactar(agora=pd.Timestamp("2025-04-10")), 1)
+        frio = ler_diario(self.store.caminho_particao("2025-03"), colunas=["signal_id"])
+        self.assertEqual(sorted(frio["signal_id"]), ["m2", "m3", "m4"])
+
+    def test_query_spans_hot_and_cold(self):
+        antes = self.store.consultar(compacto=False)
+        self.store.compactar(agora=pd.Timestamp("2025-04-10"))
+        depois = self.store.consultar(compacto=False)
+        self.assertEqual(sorted(depois["signal_id"].dropna()), sorted(antes["signal_id"].dropna()))
+        self.assertEqual(len(depois), len(antes))
+
+        df = self.store.consultar(colunas=["par", "pnl_realizado"], estado="fechado", desde="2025-03-01",
+                                  ate="2025-03-31 23:59:59")
+        self.assertEqual(list(df.columns), ["par", "pnl_realizado"])
+        self.assertEqual(df["par"].dtype, "category")
+        self.assertEqual(sorted(df["pnl_realizado"].tolist()), [-0.5, 1.0])
+        self.assertEqual(len(self.store.particoes(desde="2025-03-01")), 1)
+        self.assertEqual(len(self.store.consultar(colunas=["signal_id"], incluir_frio=False)), 3)
+
+    def test_hot_copy_wins_after_interrupted_compaction(self):
+        self.store.compactar(agora=pd.Timestamp("2025-04-10"))
+        # Simula interrupção entre a gravação fria e a regravação quente
+        anexar([trade("m3", "2025-03-28 09:00:00", "2025-04-02 09:00:00", pnl=2.5)], self.arquivo)
+        df = self.store.consultar(colunas=["signal_id", "pnl_realizado"])
+        self.assertEqual(df["signal_id"].tolist().count("m3"), 1)
+        self.assertEqual(df.loc[df["signal_id"] == "m3", "pnl_realizado"].iloc[0], 2.5)
+
+    def test_open_and_closed_rows_of_a_trade_are_deduplicated(self):
+        # O simulador acrescenta a linha 'fechado' depois da 'aberto' do mesmo signal_id
+        anexar([trade("dry", "2025-04-09 10:00:00", estado="aberto")], self.arquivo)
+        anexar([trade("dry", "2025-04-09 10:00:00", "2025-04-09 10:30:00")], self.arquivo)
+        for incluir_frio in (False, True):
+            df = self.store.consultar(colunas=["signal_id", "estado"], incluir_frio=incluir_frio)
+            self.assertEqual(df.loc[df["signal_id"] == "dry", "estado"].tolist(), ["fechado"])
+        abertos = self.store.consultar(colunas=["signal_id"], estado="aberto")
+        self.assertEqual(abertos["signal_id"].tolist(), ["aberto"])
+
+    def test_compaction_waits_for_the_journal_lock(self):
+        segurando, liberar = threading.Event(), threading.Event()
+
+        def escritor():
+            with journal_schema.trava:
+                segurando.set()
+                liberar.wait(10)
+                anexar([trade("durante", "2025-02-11 10:00:00", "2025-02-11 11:00:00")], self.arquivo)
+
+        threading.Thread(target=escritor).start()
+        segurando.wait(10)
+        compactacao = threading.Thread(target=self.store.compactar, kwargs={"agora": pd.Timestamp("2025-04-10")})
+        compactacao.start()
+        compactacao.join(0.3)
+        self.assertTrue(compactacao.is_alive())
+        liberar.set()
+        compactacao.join(10)
+        frio = ler_diario(self.store.caminho_particao("2025-02"), colunas=["signal_id"])
+        self.assertIn("durante", frio["signal_id"].tolist())
+
+    def test_compaction_waits_for_a_writer_in_another_process(self):
+        script = (
+            "import sys, journal_schema\n"
+            "with journal_schema.trava_de(sys.argv[1]):\n"
+            "    print('segurando', flush=True)\n"
+            "    sys.stdin.readline()\n"
+            "    journal_schema.anexar([{'signal_id': 'outro_processo', 'par': 'XRPUSDT', 'estado': 'fechado',\n"
+            "                            'timestamp': '2025-02-12 10:00:00', 'timestamp_saida': '2025-02-12 11:00:00'}],\n"
+            "                           sys.argv[1])\n"
+        )
+        filho = subprocess.Popen([sys.executable, "-c", script, self.arquivo], cwd=DIRETORIO_MODULOS,
+                                 stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        try:
+            self.assertEqual(filho.stdout.readline().strip(), "segurando")
+            compactacao = threading.Thread(target=self.store.compactar, kwargs={"agora": pd.Timestamp("2025-04-10")})
+            compactacao.start()
+            compactacao.join(0.3)
+            self.assertTrue(compactacao.is_alive())
+            filho.stdin.write("\n")
+            filho.stdin.flush()
+            self.assertEqual(filho.wait(30), 0)
+            compactacao.join(10)
+        finally:
+            if filho.poll() is None:
+                filho.kill()
+            filho.stdin.close()
+            filho.stdout.close()
+        frio = ler_diario(self.store.caminho_particao("2025-02"), colunas=["signal_id"])
+        self.assertIn("outro_processo", frio["signal_id"].tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import os
+import shutil
+import tempfile
+from log_tail import LogTail
+
+
+def linha(i, nivel="INFO"):
+    return f"2025-01-01 00:00:{i % 60:02d},000 - UltraBot - {nivel} - mensagem {i}\n"
+
+
+class TestLogTail(unittest.TestCase):
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.caminho = os.path.join(self.diretorio, "bot.log")
+
+    def tearDown(self):
+        shutil.rmtree(self.diretorio)
+
+    def escrever(self, linhas, modo="a"):
+        with open(self.caminho, modo, encoding="utf-8") as f:
+            f.writelines(linhas)
+
+    def test_tail_of_large_file_and_incremental_updates(self):
+        niveis = {0: "ERROR", 1: "WARNING"}
+        self.escrever([linha(i, niveis.get(i % 97, "INFO")) for i in range(50_000)], "w")
+        tail = LogTail(self.caminho, capacidade=20)
+        self.assertEqual(tail.ultimas(3), [linha(i).strip() for i in range(49_997, 50_000)])
+        alertas = tail.ultimas_por_nivel(n=4)
+        esperados = [i for i in range(50_000) if i % 97 in niveis][-4:]
+        self.assertEqual([int(a.rsplit(" ", 1)[1]) for a in alertas], esperados)
+        # Só os bytes novos são lidos; linha parcial aguarda o "\n"
+        self.escrever([linha(50_000, "CRITICAL"), "2025-01-01 - UltraBot - ERROR - parc"])
+        self.assertTrue(tail.ultimas_por_nivel(n=1)[0].endswith("mensagem 50000"))
+        self.escrever(["ial\n"])
+        self.assertTrue(tail.ultimas_por_nivel(n=1)[0].endswith("parcial"))
+
+    def test_initial_load_stops_when_enough_alerts(self):
+        # Sem nenhum CRITICAL: a carga inicial para ao reunir `capacidade` alertas no total
+        self.escrever([linha(i, "WARNING" if i % 10 == 0 else "INFO") for i in range(200_000)], "w")
+        tail = LogTail(self.caminho, capacidade=20)
+        with open(self.caminho, "rb") as f:
+            dados = tail._carregar_do_fim(f, os.path.getsize(self.caminho))
+        self.assertLess(len(dados), 2 * 64 * 1024)
+        self.assertEqual(len(tail.ultimas_por_nivel(n=20)), 20)
+
+    def test_rotation_resets_rings(self):
+        self.escrever([linha(i, "ERROR") for i in range(10)], "w")
+        tail = LogTail(self.caminho, capacidade=5)
+        self.assertEqual(len(tail.ultimas_por_nivel(n=5)), 5)
+        os.rename(self.caminho, self.caminho + ".1")
+        self.escrever([linha(99, "WARNING")], "w")
+        self.assertEqual(tail.ultimas_por_nivel(n=5), [linha(99, "WARNING").strip()])
+        os.remove(self.caminho)
+        self.assertEqual(tail.ultimas(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
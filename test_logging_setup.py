@@ -0,0 +1,73 @@
+import unittest
+import logging
+import logging.handlers
+import os
+import shutil
+import tempfile
+from utils import ModuleLevelFilter, RateLimitFilter, RotatingTimedFileHandler, _handlers_do_filho
+
+
+def registro(nivel=logging.INFO, modulo="signal_generator", linha=10, msg="mensagem"):
+    rec = logging.LogRecord("UltraBot", nivel, f"/bot/{modulo}.py", linha, msg, None, None)
+    return rec
+
+
+class TestLoggingSetup(unittest.TestCase):
+    def test_module_levels(self):
+        filtro = ModuleLevelFilter(logging.INFO, {"signal_generator": logging.WARNING, "main": logging.DEBUG})
+        self.assertFalse(filtro.filter(registro(logging.INFO, "signal_generator")))
+        self.assertTrue(filtro.filter(registro(logging.WARNING, "signal_generator")))
+        self.assertTrue(filtro.filter(registro(logging.DEBUG, "main")))
+        self.assertFalse(filtro.filter(registro(logging.DEBUG, "trade_manager")))
+
+    def test_rate_limit_per_call_site(self):
+        filtro = RateLimitFilter(burst=3, per_seconds=3600)
+        aceitos = sum(filtro.filter(registro(linha=10)) for _ in range(10))
+        self.assertEqual(aceitos, 3)
+        # Outra linha de código e avisos não são afetados
+        self.assertTrue(filtro.filter(registro(linha=11)))
+        self.assertTrue(filtro.filter(registro(logging.WARNING, linha=10)))
+        # Ao abrir a próxima janela, a mensagem informa quantas foram suprimidas
+        filtro.per_seconds = 0
+        rec = registro(linha=10)
+        self.assertTrue(filtro.filter(rec))
+        self.assertIn("+7 mensagens semelhantes suprimidas", rec.getMessage())
+
+    def test_rotation_by_size(self):
+        diretorio = tempfile.mkdtemp()
+        try:
+            caminho = os.path.join(diretorio, "bot.log")
+            handler = RotatingTimedFileHandler(caminho, max_bytes=200, rotate_hours=24, backup_count=2)
+            for i in range(30):
+                handler.emit(registro(msg=f"linha {i:03d} " + "x" * 20))
+            handler.close()
+            self.assertTrue(os.path.exists(caminho + ".1"))
+            self.assertFalse(os.path.exists(caminho + ".3"))
+            self.assertLessEqual(os.path.getsize(caminho), 200)
+        finally:
+            shutil.rmtree(diretorio)
+
+    def test_forked_child_appends_without_rotating(self):
+        diretorio = tempfile.mkdtemp()
+        try:
+            caminho = os.path.join(diretorio, "bot.log")
+            principal = RotatingTimedFileHandler(caminho, max_bytes=200, rotate_hours=24, backup_count=2)
+            principal.setFormatter(logging.Formatter("%(message)s"))
+            filho, = _handlers_do_filho([principal])
+            self.assertNotIsInstance(filho, logging.handlers.RotatingFileHandler)
+            for i in range(30):
+                filho.emit(registro(msg=f"filho {i:03d} " + "x" * 20))
+            self.assertFalse(os.path.exists(caminho + ".1"))
+            # Depois que o principal rotaciona, o filho reabre o bot.log novo
+            principal.doRollover()
+            filho.emit(registro(msg="depois da rotacao"))
+            filho.close()
+            principal.close()
+            with open(caminho, encoding="utf-8") as f:
+                self.assertEqual(f.read(), "depois da rotacao\n")
+        finally:
+            shutil.rmtree(diretorio)
+
+
+if __name__ == '__main__':
+    unittest.main()
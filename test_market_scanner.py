@@ -0,0 +1,73 @@
+import unittest
+import numpy as np
+import market_scanner
+from market_scanner import MarketScanner, SCANNER_PADRAO, aplicar_histerese, ranquear, tabela_mercado
+
+
+class ClienteTickers:
+    """Responde às três chamadas em lote com um mercado controlado pelo teste."""
+    def __init__(self, volumes):
+        self.volumes = volumes
+        self.chamadas = 0
+
+    def futures_ticker(self):
+        self.chamadas += 1
+        return [{"symbol": s, "lastPrice": "1.0", "highPrice": "1.05", "lowPrice": "0.95", "quoteVolume": str(v)}
+                for s, v in self.volumes.items()]
+
+    def futures_orderbook_ticker(self):
+        return [{"symbol": s, "bidPrice": "0.9999", "askPrice": "1.0001"} for s in self.volumes]
+
+    def futures_mark_price(self):
+        return [{"symbol": s, "lastFundingRate": "0.0001"} for s in self.volumes]
+
+
+class TestMarketScanner(unittest.TestCase):
+    def test_filters_and_ranking(self):
+        tickers = [
+            {"symbol": "AUSDT", "lastPrice": "10", "highPrice": "11", "lowPrice": "9.5", "quoteVolume": "9e7"},
+            {"symbol": "BUSDT", "lastPrice": "10", "highPrice": "10.5", "lowPrice": "9.8", "quoteVolume": "5e7"},
+            {"symbol": "CUSDT", "lastPrice": "10", "highPrice": "11", "lowPrice": "9", "quoteVolume": "1e6"},   # volume baixo
+            {"symbol": "DUSDT", "lastPrice": "10", "highPrice": "11", "lowPrice": "9", "quoteVolume": "8e7"},   # spread largo
+            {"symbol": "EUSDT", "lastPrice": "10", "highPrice": "11", "lowPrice": "9", "quoteVolume": "8e7"},   # funding alto
+            {"symbol": "FBUSD", "lastPrice": "10", "highPrice": "11", "lowPrice": "9", "quoteVolume": "9e8"},   # outra moeda
+        ]
+        livros = [{"symbol": t["symbol"], "bidPrice": "9.999", "askPrice": "10.001"} for t in tickers]
+        livros[3] = {"symbol": "DUSDT", "bidPrice": "9.9", "askPrice": "10.1"}
+        marks = [{"symbol": "EUSDT", "lastFundingRate": "0.01"}]
+        ranking, scores = ranquear(tabela_mercado(tickers, livros, marks), SCANNER_PADRAO)
+        self.assertEqual(ranking, ["AUSDT", "BUSDT"])
+        self.assertTrue(np.all(np.diff(scores) <= 0))
+
+    def test_hysteresis_band(self):
+        opcoes = dict(SCANNER_PADRAO, max_pairs=3, min_pairs=1, exit_rank_factor=2.0, min_hold_seconds=0)
+        ranking = ["N1", "A", "B", "N2", "C"]
+        # C caiu para a 5ª posição, ainda dentro da faixa de saída (3 * 2 = 6): fica, e N1 não entra
+        self.assertEqual(aplicar_histerese(ranking, ["A", "B", "C"], {}, opcoes, 0), ["A", "B", "C"])
+        # C saiu do ranking (inelegível): a vaga vai para o melhor de fora
+        self.assertEqual(aplicar_histerese(ranking[:4], ["A", "B", "C"], {}, opcoes, 0), ["N1", "A", "B"])
+        # Fixos ficam mesmo fora do ranking
+        self.assertEqual(aplicar_histerese(ranking[:4], ["A", "X"], {}, opcoes, 0, fixos={"X"}), ["N1", "A", "X"])
+
+    def test_scan_publishes_universe_and_respects_refresh(self):
+        volumes = {f"S{i:03d}USDT": (i + 1) * 1e6 for i in range(200)}
+        cliente = ClienteTickers(volumes)
+        scanner = MarketScanner(cliente, {"max_pairs": 10, "refresh_seconds": 3600})
+        avisos = []
+        scanner.ao_mudar(lambda novo, entrou, saiu: avisos.append((entrou, saiu)))
+        universo = scanner.atualizar_se_necessario()
+        self.assertEqual(universo, [f"S{i:03d}USDT" for i in range(199, 189, -1)])
+        self.assertEqual(market_scanner.universo_atual(), universo)
+        self.assertEqual(len(avisos), 1)
+        consultas = []
+        scanner.atualizar_se_necessario(fixos=lambda: consultas.append(1) or {"S000USDT"})
+        self.assertEqual((cliente.chamadas, consultas), (1, []))
+        # Os fixos (ex.: ordens reais abertas) só são consultados quando a varredura acontece
+        scanner.ultima_varredura -= 3600
+        scanner.atualizar_se_necessario(fixos=lambda: consultas.append(1) or {"S199USDT"})
+        self.assertEqual((cliente.chamadas, consultas), (2, [1]))
+        market_scanner._publicar(market_scanner.SYMBOLS)
+
+
+if __name__ == '__main__':
+    unittest.main()
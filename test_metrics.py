@@ -0,0 +1,75 @@
+import unittest
+import threading
+import urllib.request
+from metrics import Registro, diferenca, iniciar_servidor, registro, LIMITES
+
+
+class TestMetrics(unittest.TestCase):
+    def test_percentiles_from_rolling_window(self):
+        reg = Registro()
+        for i in range(1, 1001):
+            reg.observar("fetch", i / 1000, "XRPUSDT", "1m")  # 1ms..1s uniforme
+        resumo = reg.resumo()["fetch"]
+        self.assertEqual(resumo["n"], 1000)
+        self.assertAlmostEqual(resumo["p50_ms"], 500, delta=500 * 0.15)
+        self.assertAlmostEqual(resumo["p99_ms"], 990, delta=990 * 0.15)
+        # Janela móvel: sem novas observações, o próximo resumo fica vazio
+        self.assertEqual(reg.resumo(), {})
+        reg.observar("fetch", 0.002)
+        self.assertEqual(reg.resumo()["fetch"]["n"], 1)
+
+    def test_threads_are_merged(self):
+        reg = Registro()
+
+        def trabalho():
+            for _ in range(500):
+                with reg.span("signal", "DOGEUSDT", "5m"):
+                    pass
+
+        threads = [threading.Thread(target=trabalho) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        contagens, soma, n = reg.snapshot()[("signal", "DOGEUSDT", "5m")]
+        self.assertEqual(n, 2000)
+        self.assertEqual(sum(contagens), 2000)
+        # Séries de threads encerradas são somadas ao acumulado e descartadas
+        self.assertEqual(reg._por_thread, [])
+        reg.observar("signal", 0.001, "DOGEUSDT", "5m")
+        self.assertEqual(len(reg._por_thread), 1)
+        self.assertEqual(reg.snapshot()[("signal", "DOGEUSDT", "5m")][2], 2001)
+
+    def test_increments_from_another_process_are_merged(self):
+        filho, pai = Registro(), Registro()
+        filho.observar("fetch", 0.01, "XRPUSDT")
+        enviado = filho.snapshot()
+        pai.incorporar(diferenca(enviado, {}))
+        filho.observar("fetch", 0.02, "XRPUSDT")
+        filho.observar("indicators", 0.003, "XRPUSDT", "1m")
+        incremento = diferenca(filho.snapshot(), enviado)
+        self.assertEqual(incremento[("fetch", "XRPUSDT", "")][2], 1)
+        pai.incorporar(incremento)
+        pai.observar("fetch", 0.05, "XRPUSDT")
+        self.assertEqual(diferenca(filho.snapshot(), filho.snapshot()), {})
+        self.assertEqual(pai.snapshot()[("fetch", "XRPUSDT", "")][2], 3)
+        self.assertEqual(pai.resumo()["indicators"]["n"], 1)
+
+    def test_prometheus_exposition(self):
+        registro.observar("order", 0.05, "XRPUSDT", "15m")
+        servidor = iniciar_servidor(porta=0)
+        try:
+            url = f"http://127.0.0.1:{servidor.server_address[1]}/metrics"
+            texto = urllib.request.urlopen(url, timeout=5).read().decode()
+        finally:
+            servidor.shutdown()
+        self.assertIn("# TYPE ultrabot_stage_seconds histogram", texto)
+        self.assertIn('ultrabot_stage_seconds_bucket{stage="order",pair="XRPUSDT",timeframe="15m",le="+Inf"}', texto)
+        buckets = [l for l in texto.splitlines() if l.startswith('ultrabot_stage_seconds_bucket{stage="order"')]
+        self.assertEqual(len(buckets), len(LIMITES) + 1)
+        valores = [int(l.rsplit(" ", 1)[1]) for l in buckets]
+        self.assertEqual(valores, sorted(valores))
+
+
+if __name__ == '__main__':
+    unittest.main()
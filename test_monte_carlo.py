@@ -0,0 +1,93 @@
+import unittest
+import json
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from unittest import mock
+import monte_carlo
+from monte_carlo import indices_reamostrados, metricas_caminhos, monte_carlo_por_estrategia
+
+
+class TestMonteCarlo(unittest.TestCase):
+    def test_block_indices_are_contiguous(self):
+        indices = indices_reamostrados(20, 100, n_trades=12, bloco=4, rng=np.random.default_rng(0))
+        self.assertEqual(indices.shape, (100, 12))
+        passos = np.diff(indices.reshape(100, 3, 4), axis=2) % 20
+        self.assertTrue((passos == 1).all())
+
+    def test_path_metrics_match_loop(self):
+        rng = np.random.default_rng(1)
+        retornos = rng.normal(0, 0.05, 50).astype(np.float32)
+        indices = indices_reamostrados(50, 5, rng=rng)
+        metricas = metricas_caminhos(retornos, indices, fracao_capital=1.0, perda_ruina=0.2)
+        for k in range(5):
+            equity, topo, ultimo_topo, max_dd, maior_espera = 1.0, 1.0, -1, 0.0, 0
+            for i, r in enumerate(retornos[indices[k]]):
+                equity *= 1 + float(r)
+                if equity >= topo:
+                    topo, ultimo_topo = equity, i
+                max_dd = max(max_dd, 1 - equity / topo)
+                maior_espera = max(maior_espera, i - ultimo_topo)
+            self.assertAlmostEqual(metricas["max_drawdown"][k], max_dd, places=4)
+            self.assertEqual(metricas["tempo_recuperacao"][k], maior_espera)
+        self.assertEqual(metricas["tempo_recuperacao"].dtype, np.int32)
+
+    def test_batch_rows_shrink_with_trade_count(self):
+        lotes = []
+        original = monte_carlo.indices_reamostrados
+
+        def registrar(n, n_caminhos, **kwargs):
+            lotes.append((n_caminhos, n))
+            return original(n, n_caminhos, **kwargs)
+
+        retornos = np.random.default_rng(3).normal(0, 0.02, 400)
+        with mock.patch.object(monte_carlo, "CELULAS_POR_LOTE", 1000), \
+                mock.patch.object(monte_carlo, "indices_reamostrados", registrar):
+            resultado = monte_carlo.simular(retornos, n_caminhos=7)
+        self.assertEqual(resultado["caminhos"], 7)
+        self.assertEqual([linhas for linhas, _ in lotes], [2, 2, 2, 1])
+        self.assertTrue(all(linhas * n <= 1000 for linhas, n in lotes))
+
+    def test_per_strategy_leverage_scaling_and_cache(self):
+        rng = np.random.default_rng(2)
+        df = pd.DataFrame({
+            "strategy_name": ["A"] * 200 + ["B"] * 3,
+            "estado": "fechado",
+            "lucro_percentual": np.concatenate([rng.normal(0.5, 5, 200), [1, -1, 2]]),
+            "timestamp_saida": pd.date_range("2025-01-01", periods=203, freq="h").astype(str),
+            "parametros": json.dumps({"leverage": 10}),
+        })
+        resultados = monte_carlo_por_estrategia(df, alavancagens=[5, 20], n_caminhos=2000, cache_file=None)
+        self.assertEqual(set(resultados), {"A", "B"})
+        a = resultados["A"]
+        self.assertLess(a["5"]["drawdown_p95"], a["20"]["drawdown_p95"])
+        self.assertLessEqual(a["5"]["risco_ruina"], a["20"]["risco_ruina"])
+        self.assertIs(monte_carlo_por_estrategia(df, alavancagens=[5, 20], n_caminhos=2000, cache_file=None)["A"], a)
+        # Nova ordem fechada invalida o cache da estratégia
+        novo = pd.concat([df, df.iloc[[0]].assign(timestamp_saida="2026-01-01 00:00:00")])
+        self.assertIsNot(monte_carlo_por_estrategia(novo, alavancagens=[5, 20], n_caminhos=2000, cache_file=None)["A"], a)
+
+    def test_leverage_comes_from_lucro_percentual_and_cache_is_pruned(self):
+        df = pd.DataFrame({
+            "strategy_name": "C",
+            "estado": "fechado",
+            "lucro_percentual": [20.0, -10.0, 20.0, -10.0],
+            "pnl_realizado": [2000.0, -1000.0, 2000.0, -1000.0],  # depende da quantidade, não é retorno
+            "timestamp_saida": pd.date_range("2025-02-01", periods=4, freq="h").astype(str),
+            "parametros": json.dumps({"leverage": 10}),
+        })
+        with tempfile.TemporaryDirectory() as diretorio:
+            cache_file = os.path.join(diretorio, "mc.json")
+            resultados = monte_carlo_por_estrategia(df, alavancagens=[10], n_caminhos=200, cache_file=cache_file)
+            registrada = monte_carlo_por_estrategia(df, n_caminhos=200, cache_file=cache_file)
+            self.assertEqual(resultados["C"]["10"], registrada["C"]["registrada"])
+            self.assertLess(registrada["C"]["registrada"]["drawdown_p99"], 10)
+            novo = pd.concat([df, df.iloc[[0]].assign(timestamp_saida="2025-03-01 00:00:00")])
+            monte_carlo_por_estrategia(novo, n_caminhos=200, cache_file=cache_file)
+            with open(cache_file) as f:
+                self.assertEqual(sum(1 for k in json.load(f) if k == "C"), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
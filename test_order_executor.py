@@ -0,0 +1,122 @@
+import unittest
+import math
+import os
+import tempfile
+import uuid
+import pandas as pd
+from binance.exceptions import BinanceAPIException
+from mock_exchange import MockBinanceClient
+from order_executor import OrderExecutor, gerar_client_order_id
+
+SINAIS_COLUMNS = ['signal_id', 'par', 'direcao', 'preco_entrada', 'estado', 'strategy_name', 'timeframe', 'parametros']
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+INICIO = "2025-03-31 02:13:00"
+CHAMADAS_ORDEM = {"futures_symbol_ticker", "futures_change_leverage", "futures_create_order", "futures_place_batch_order"}
+
+
+class ClienteComSalto(MockBinanceClient):
+    """Exchange local onde o preço salta durante o lote, fazendo o SL disparar imediatamente."""
+    def futures_place_batch_order(self, batchOrders, **kwargs):
+        ordens = [dict(o) for o in batchOrders]
+        ordens[1]["stopPrice"] = "0.0001" if ordens[1]["side"] == "BUY" else "1000"
+        return super().futures_place_batch_order(batchOrders=ordens, **kwargs)
+
+
+class TestBatchOrderPlacement(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        pd.DataFrame(columns=SINAIS_COLUMNS).to_csv("sinais_detalhados.csv", index=False)
+        self.config = {"strategy_name": "Robo 00", "timeframe": "1m", "leverage": 10, "order_placement_mode": "batch"}
+        self.signal_id = str(uuid.uuid4())
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def _client(self, cls=MockBinanceClient):
+        return cls(symbols=("XRPUSDT",), data_dir=DATA_DIR, inicio=INICIO)
+
+    def test_entry_before_protective_batch(self):
+        client = self._client()
+        preco = client.preco_atual("XRPUSDT")
+        result = OrderExecutor(client, self.config).executar_ordem(
+            "XRPUSDT", "LONG", 10.0, stop_loss=1.0, take_profit=2.0, dry_run_id=self.signal_id
+        )
+        kinds = [nome for nome, _ in client.chamadas if nome in CHAMADAS_ORDEM]
+        self.assertEqual(kinds[-2:], ["futures_create_order", "futures_place_batch_order"])
+        self.assertEqual(kinds[:2], ["futures_symbol_ticker", "futures_change_leverage"])
+
+        entrada, tp, sl = (client.ordens[i] for i in (1, 2, 3))
+        self.assertEqual((entrada["type"], entrada["status"]), ("MARKET", "FILLED"))
+        self.assertAlmostEqual(entrada["origQty"], math.floor(100 / preco * 10) / 10, places=6)
+        self.assertEqual(entrada["clientOrderId"], gerar_client_order_id(self.signal_id, "en"))
+        self.assertEqual((tp["type"], tp["side"], tp["status"]), ("TAKE_PROFIT_MARKET", "SELL", "NEW"))
+        self.assertAlmostEqual(tp["stopPrice"], round(preco * 1.02, 4), places=8)
+        self.assertEqual(sl["type"], "STOP_MARKET")
+        self.assertAlmostEqual(sl["stopPrice"], round(preco * 0.99, 4), places=8)
+        self.assertTrue(tp["clientOrderId"].endswith("-tp") and sl["clientOrderId"].endswith("-sl"))
+
+        self.assertEqual(result["status"], "executed")
+        self.assertEqual(set(result["latencias_ms"]), {"ticker", "alavancagem", "entrada", "protecao"})
+
+    def test_rejected_order_keeps_leverage(self):
+        client = self._client()
+        result = OrderExecutor(client, self.config).executar_ordem(
+            "XRPUSDT", "LONG", 0.0001, stop_loss=1.0, take_profit=2.0, dry_run_id=self.signal_id
+        )
+        self.assertEqual(result["reason"], "quantidade abaixo do minimo da exchange")
+        self.assertNotIn("futures_change_leverage", [nome for nome, _ in client.chamadas])
+
+    def test_rejected_leg_is_resent_individually(self):
+        client = self._client(ClienteComSalto)
+        result = OrderExecutor(client, self.config).executar_ordem(
+            "XRPUSDT", "SHORT", 10.0, stop_loss=1.0, take_profit=2.0, dry_run_id=self.signal_id
+        )
+        self.assertEqual(client.chamadas[-1][0], "futures_create_order")
+        sl = client.ordens[result["sl_order_id"]]
+        self.assertEqual((sl["type"], sl["status"]), ("STOP_MARKET", "NEW"))
+
+    def test_protections_fill_and_flatten_position(self):
+        client = self._client()
+        eventos = []
+        client.ouvintes.append(eventos.append)
+        OrderExecutor(client, self.config).executar_ordem(
+            "XRPUSDT", "LONG", 10.0, stop_loss=0.2, take_profit=0.2, dry_run_id=self.signal_id
+        )
+        client.avancar(6 * 3600)
+        self.assertEqual(float(client.futures_position_information(symbol="XRPUSDT")[0]["positionAmt"]), 0.0)
+        estados = sorted(client.ordens[i]["status"] for i in (2, 3))
+        self.assertEqual(estados, ["EXPIRED", "FILLED"])
+        self.assertTrue(any(e["e"] == "ORDER_TRADE_UPDATE" and e["o"]["X"] == "FILLED" and e["o"]["c"].endswith(("-tp", "-sl"))
+                            for e in eventos))
+
+    def test_client_order_id_fits_binance_limit(self):
+        self.assertLessEqual(len(gerar_client_order_id(self.signal_id, "tp")), 36)
+
+
+class TestMockExchange(unittest.TestCase):
+    def test_klines_do_not_leak_future_candles(self):
+        client = MockBinanceClient(symbols=("XRPUSDT",), data_dir=DATA_DIR, inicio=INICIO)
+        klines = client.futures_klines(symbol="XRPUSDT", interval="1h", limit=5)
+        self.assertEqual(len(klines), 5)
+        self.assertLessEqual(klines[-1][0], client.agora_ms())
+        self.assertEqual(float(klines[-1][4]), client.preco_atual("XRPUSDT"))
+
+    def test_rate_limit_and_error_injection(self):
+        client = MockBinanceClient(symbols=("XRPUSDT",), data_dir=DATA_DIR, inicio=INICIO, limite_peso_minuto=3)
+        for _ in range(3):
+            client.futures_symbol_ticker(symbol="XRPUSDT")
+        with self.assertRaises(BinanceAPIException) as ctx:
+            client.futures_symbol_ticker(symbol="XRPUSDT")
+        self.assertEqual(ctx.exception.code, -1003)
+
+        client = MockBinanceClient(symbols=("XRPUSDT",), data_dir=DATA_DIR, inicio=INICIO, erros_por_endpoint={"futures_create_order": 1.0})
+        with self.assertRaises(BinanceAPIException) as ctx:
+            client.futures_create_order(symbol="XRPUSDT", side="BUY", type="MARKET", quantity="10")
+        self.assertEqual(ctx.exception.code, -1001)
+
+
+if __name__ == '__main__':
+    unittest.main()
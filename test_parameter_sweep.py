@@ -0,0 +1,59 @@
+import unittest
+import logging
+import os
+import numpy as np
+import pandas as pd
+from indicators import calculate_indicators
+from signal_generator import generate_signal
+from vectorized_signals import calcular_indicadores, pontuar_sinais, direcoes, INDICADORES_SUPORTADOS
+from parameter_sweep import janelas_walk_forward, resolver_mesmo_tf, gerar_grade
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class TestVectorizedSignals(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.read_csv(os.path.join(DATA_DIR, "historical_data_XRPUSDT_1h.csv"))
+
+    def test_indicators_match_ta(self):
+        referencia = calculate_indicators(self.df, None)
+        vetorizado = calcular_indicadores(self.df["close"].to_numpy())
+        for coluna in ("EMA12", "EMA50", "RSI", "MACD", "MACD_Signal"):
+            np.testing.assert_allclose(vetorizado[coluna], referencia[coluna].to_numpy(), rtol=1e-12, equal_nan=True)
+
+    def test_scores_match_generate_signal(self):
+        estrategia = {"name": "paridade", "indicators": list(INDICADORES_SUPORTADOS), "score_tecnico_min": 0.5}
+        referencia = calculate_indicators(self.df, None)
+        close = self.df["close"].to_numpy()
+        score, tem_long, tem_short = pontuar_sinais(calcular_indicadores(close), close, estrategia["indicators"])
+        direcao = direcoes(score, tem_long, tem_short, 0.5)
+        logging.disable(logging.CRITICAL)
+        try:
+            for i in range(60, len(self.df), 13):
+                esperado, score_esperado, *_ = generate_signal(referencia.iloc[:i + 1], "1h", estrategia, {}, None, None)
+                self.assertAlmostEqual(score[i], score_esperado)
+                self.assertEqual(direcao[i], {"LONG": 1, "SHORT": -1, None: 0}[esperado])
+        finally:
+            logging.disable(logging.NOTSET)
+
+
+class TestSweepHelpers(unittest.TestCase):
+    def test_walk_forward_windows_tile_the_range(self):
+        janelas = janelas_walk_forward(0, 1000, n_janelas=4, frac_treino=0.75)
+        self.assertEqual(len(janelas), 4)
+        self.assertEqual(janelas[0][0], 0)
+        self.assertEqual(janelas[-1][3], 1000)
+        for _, treino_fim, teste_ini, _ in janelas:
+            self.assertEqual(treino_fim, teste_ini)
+
+    def test_resolver_prefers_sl_when_both_touched(self):
+        velas = {"high": np.array([1.0, 1.0, 1.05]), "low": np.array([1.0, 1.0, 0.95]), "close": np.ones(3)}
+        self.assertEqual(resolver_mesmo_tf(velas, 0, 3, 1.02, 0.98, 1), (2, 0.98, "SL"))
+        self.assertEqual(resolver_mesmo_tf(velas, 0, 2, 1.02, 0.98, 1), (1, 1.0, "Timeout"))
+
+    def test_grid_size(self):
+        self.assertEqual(len(gerar_grade({"a": [1, 2], "b": [1, 2, 3]})), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
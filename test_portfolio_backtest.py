@@ -0,0 +1,43 @@
+import unittest
+import os
+import numpy as np
+from portfolio_backtest import PortfolioBacktest
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def max_concorrentes(trades):
+    eventos = sorted([(t, 1) for t in trades["timestamp"]] + [(t, -1) for t in trades["timestamp_saida"]])
+    return int(np.max(np.cumsum([e for _, e in eventos]))) if eventos else 0
+
+
+class TestPortfolioBacktest(unittest.TestCase):
+    def setUp(self):
+        base = {"indicadores_ativos": {"EMA": True, "RSI": True, "MACD": True}, "tp_percent": 1.0, "sl_percent": 1.0,
+                "leverage": 5, "score_tecnico_min": 0.3, "max_trades_simultaneos": 10, "timeframes": ["1m", "5m", "15m"]}
+        self.strategies = {f"Robo {i}": dict(base) for i in range(4)}
+
+    def _executar(self, **kwargs):
+        return PortfolioBacktest(self.strategies, pairs=("XRPUSDT", "DOGEUSDT"), timeframes=("1m", "5m", "15m"),
+                                 config={"limits_by_timeframe": {}}, data_dir=DATA_DIR, **kwargs).executar()
+
+    def test_global_and_robot_limits_are_honored(self):
+        resultados = self._executar(max_global=5, max_por_robo=2)
+        trades, resumo = resultados["trades"], resultados["resumo"]
+        self.assertGreater(len(trades), 0)
+        self.assertLessEqual(resumo["max_posicoes_simultaneas"], 5)
+        self.assertLessEqual(max_concorrentes(trades), 5)
+        for _, por_robo in trades.groupby("strategy_name"):
+            self.assertLessEqual(max_concorrentes(por_robo), 2)
+        self.assertGreater(resumo["rejeicoes"].get("limite_global_robo", 0), 0)
+
+    def test_timeframe_direction_limit_and_equity(self):
+        resultados = self._executar(capital_inicial=10_000.0)
+        trades = resultados["trades"]
+        for _, grupo in trades.groupby(["strategy_name", "par", "timeframe", "direcao"]):
+            self.assertLessEqual(max_concorrentes(grupo), 1)
+        self.assertAlmostEqual(resultados["resumo"]["equity_final"], 10_000.0 + trades["pnl_usdt"].sum(), places=6)
+
+
+if __name__ == '__main__':
+    unittest.main()
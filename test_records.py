@@ -0,0 +1,72 @@
+import unittest
+import json
+import os
+import pickle
+import shutil
+import tempfile
+from queue import PriorityQueue
+import pandas as pd
+from records import Position, Signal, TabelaRegistros
+from utils import CsvWriter
+
+
+def sinal(**extra):
+    return Signal({
+        "signal_id": "abc", "par": "XRPUSDT", "timeframe": "15m", "direcao": "LONG", "preco_entrada": 0.5,
+        "quantity": 100.0, "strategy_name": "robo1", "quality_score": 0.9,
+        "parametros": '{"tp_percent": 1.5, "sl_percent": 0.7, "leverage": 5}',
+        "motivos": ["EMA12 > EMA50"], **extra,
+    })
+
+
+class TestRecords(unittest.TestCase):
+    def test_mapping_protocol_and_parsed_fields(self):
+        s = sinal(pnl_current=1.2)
+        self.assertEqual(s["parametros"]["sl_percent"], 0.7)
+        self.assertEqual((s.tp_percent, s.sl_percent, s.leverage), (1.5, 0.7, 5.0))
+        self.assertNotIn("modo_contrario", s)
+        s["modo_contrario"] = False
+        self.assertIn("modo_contrario", s)
+        self.assertEqual(s.get("pnl_current"), 1.2)
+        self.assertEqual(len(s), len(dict(s)))
+        self.assertFalse(hasattr(s, "__dict__"))
+        self.assertEqual(json.loads(s.para_journal()["parametros"])["leverage"], 5)
+
+        p = Position(s)
+        p["preco_saida"] = 0.51
+        self.assertIs(p["parametros"], s["parametros"])
+        self.assertEqual(pickle.loads(pickle.dumps(p))["preco_saida"], 0.51)
+        trades = [sinal(), p]
+        trades.remove(p)
+        self.assertEqual(len(trades), 1)
+
+    def test_priority_queue_ties(self):
+        fila = PriorityQueue()
+        fila.put((-0.9, sinal(signal_id="b")))
+        fila.put((-0.9, sinal(signal_id="a")))
+        self.assertEqual(fila.get()[1]["signal_id"], "a")
+
+    def test_columnar_batch_round_trip(self):
+        tabela = TabelaRegistros.de_registros([sinal(signal_id=str(i), quality_score=i / 10) for i in range(5)])
+        self.assertEqual(tabela.colunas["quality_score"].dtype.kind, "f")
+        registros = pickle.loads(pickle.dumps(tabela)).registros()
+        self.assertEqual([r["signal_id"] for r in registros], ["0", "1", "2", "3", "4"])
+        self.assertEqual(registros[3].sl_percent, 0.7)
+        df = tabela.para_dataframe(["signal_id", "parametros", "resultado"])
+        self.assertEqual(json.loads(df["parametros"].iloc[0])["tp_percent"], 1.5)
+        self.assertTrue(df["resultado"].isna().all())
+
+    def test_journal_edge_serialization(self):
+        diretorio = tempfile.mkdtemp()
+        try:
+            arquivo = os.path.join(diretorio, "sinais.csv")
+            CsvWriter(arquivo, ["signal_id", "par", "parametros", "motivos"]).write_row(sinal())
+            linha = pd.read_csv(arquivo).iloc[0]
+            self.assertEqual(json.loads(linha["parametros"])["tp_percent"], 1.5)
+            self.assertEqual(json.loads(linha["motivos"]), ["EMA12 > EMA50"])
+        finally:
+            shutil.rmtree(diretorio)
+
+
+if __name__ == '__main__':
+    unittest.main()
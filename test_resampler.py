@@ -0,0 +1,57 @@
+import unittest
+import os
+import numpy as np
+import pandas as pd
+import clock
+from clock import RelogioReal, RelogioVirtual, definir_relogio
+from mock_exchange import MockBinanceClient
+from resampler import CAMPOS, Resampler
+import synthetic_market
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class TestResampler(unittest.TestCase):
+    def test_incremental_matches_batch_aggregation(self):
+        mercado, _ = synthetic_market.gerar_mercado(pares=["AAAUSDT"], n_velas=4320, inicio="2025-01-01", seed=7)
+        velas_1m = mercado["AAAUSDT"]
+        resampler = Resampler(timeframes=["1m", "5m", "15m", "1h", "4h", "1d"], capacidade=5000)
+        rng = np.random.default_rng(1)
+        cortes = np.sort(rng.choice(np.arange(1, 4320), size=40, replace=False))
+        inicio = 0
+        for fim in list(cortes) + [4320]:
+            # Janelas sobrepostas, como buscas repetidas na exchange
+            resampler.incorporar("AAAUSDT", {c: velas_1m[c][max(inicio - 5, 0):fim] for c in CAMPOS})
+            inicio = fim
+        for tf in resampler.timeframes:
+            esperado = synthetic_market.agregar(velas_1m, tf)
+            obtido = resampler.velas("AAAUSDT", tf)
+            for c in CAMPOS:
+                np.testing.assert_allclose(obtido[c], esperado[c], err_msg=f"{tf} {c}")
+
+    def test_history_shares_one_minute_fetch(self):
+        inicio = pd.Timestamp("2025-04-05 10:37:20").timestamp()
+        definir_relogio(RelogioVirtual(inicio))
+        try:
+            cliente = MockBinanceClient(symbols=("DOGEUSDT",), data_dir=DATA_DIR, inicio="2025-04-05 10:37:20",
+                                        relogio=lambda: int(clock.time() * 1000))
+            resampler = Resampler(capacidade=300, intervalo_busca=60)
+            df_1h = resampler.historico(cliente, "DOGEUSDT", "1h", limit=50)
+            self.assertEqual(len(df_1h), 50)
+            self.assertTrue(df_1h["timestamp"].is_monotonic_increasing)
+            chamadas = len(cliente.chamadas)
+            for tf in ("5m", "15m", "4h", "1d"):
+                resampler.historico(cliente, "DOGEUSDT", tf, limit=50)
+            self.assertEqual(len(cliente.chamadas), chamadas)
+
+            # A vela de 15m em formação é a da exchange, reconstruída a partir do 1m
+            esperado = cliente.get_klines(symbol="DOGEUSDT", interval="15m", limit=3)
+            df_15m = resampler.historico(cliente, "DOGEUSDT", "15m", limit=3)
+            np.testing.assert_allclose(df_15m[["open", "high", "low", "close"]].to_numpy(),
+                                       np.array([k[1:5] for k in esperado], dtype=float))
+        finally:
+            definir_relogio(RelogioReal())
+
+
+if __name__ == '__main__':
+    unittest.main()
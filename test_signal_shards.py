@@ -0,0 +1,135 @@
+import unittest
+import json
+import os
+import queue
+import shutil
+import tempfile
+import time
+from config import CONFIG
+from mock_exchange import MockBinanceClient
+from signal_shards import ShardCoordinator, ShardIndisponivel, particionar
+import metrics
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def cliente_mock():
+    return MockBinanceClient(symbols=("XRPUSDT", "DOGEUSDT", "TRXUSDT"), data_dir=DATA_DIR, inicio="2025-05-01 00:00:00")
+
+
+def observacoes(etapa, par):
+    serie = metrics.registro.snapshot().get((etapa, par, ""))
+    return serie[2] if serie else 0
+
+
+class TestSignalShards(unittest.TestCase):
+    def test_partition_is_balanced_and_complete(self):
+        pares = [f"P{i:03d}USDT" for i in range(103)]
+        shards = particionar(pares, 8)
+        self.assertEqual(len(shards), 8)
+        self.assertEqual(sorted(p for s in shards for p in s), sorted(pares))
+        self.assertLessEqual(max(map(len, shards)) - min(map(len, shards)), 1)
+        self.assertEqual(len(particionar(["A", "B"], 4)), 2)
+
+    def test_workers_report_cycles_to_coordinator(self):
+        with open(os.path.join(DATA_DIR, "strategies.json"), encoding="utf-8") as f:
+            estrategias = dict(list(json.load(f).items())[:1])
+        diretorio = tempfile.mkdtemp()
+        anterior = os.getcwd()
+        os.chdir(diretorio)
+        coordenador = ShardCoordinator(["XRPUSDT", "DOGEUSDT"], estrategias, dict(CONFIG, loop_interval=0.2),
+                                       n_workers=2, fabrica_cliente=cliente_mock)
+        try:
+            coordenador.iniciar()
+            limite = time.monotonic() + 60
+            shards = set()
+            while len(shards) < 2 and time.monotonic() < limite:
+                for sinal in coordenador.coletar(timeout=0.5):
+                    self.assertIn(sinal["par"], ("XRPUSDT", "DOGEUSDT"))
+                    self.assertIn("quality_score", sinal)
+                shards = {par for (etapa, par, _) in metrics.registro.snapshot() if etapa == "shard_cycle"}
+            self.assertEqual(shards, {"shard0", "shard1"})
+        finally:
+            coordenador.parar()
+            os.chdir(anterior)
+            shutil.rmtree(diretorio)
+        self.assertTrue(all(not p.is_alive() for p in coordenador.processos))
+
+    def test_config_is_published_only_when_changed(self):
+        config = dict(CONFIG, loop_interval=1)
+        coordenador = ShardCoordinator(["XRPUSDT", "DOGEUSDT"], {}, config, n_workers=2)
+        coordenador.filas_controle = [queue.Queue(), queue.Queue()]
+        coordenador.publicar_config(config)
+        self.assertTrue(all(f.empty() for f in coordenador.filas_controle))
+        # O loop principal recarrega o config.json alterando o mesmo dict
+        config["loop_interval"] = 5
+        coordenador.publicar_config(config)
+        for fila in coordenador.filas_controle:
+            tipo, valor = fila.get_nowait()
+            self.assertEqual((tipo, valor["loop_interval"]), ("config", 5))
+
+    def test_universe_changes_are_redistributed_to_running_shards(self):
+        coordenador = ShardCoordinator(["A", "B", "C", "D"], {}, dict(CONFIG), n_workers=2)
+        coordenador.filas_controle = [queue.Queue(), queue.Queue()]
+        coordenador.publicar_universo(["D", "C", "B", "A"])
+        self.assertTrue(all(f.empty() for f in coordenador.filas_controle))
+        coordenador.publicar_universo(["A", "B", "C", "E", "F"])
+        self.assertEqual(coordenador.shards, [["A", "C", "F"], ["B", "E"]])
+        self.assertEqual(coordenador.filas_controle[0].get_nowait(), ("pares", ["A", "C", "F"]))
+        self.assertEqual(coordenador.filas_controle[1].get_nowait(), ("pares", ["B", "E"]))
+
+    def test_swapped_universe_and_shard_metrics_reach_the_coordinator(self):
+        diretorio = tempfile.mkdtemp()
+        anterior = os.getcwd()
+        os.chdir(diretorio)
+        coordenador = ShardCoordinator(["XRPUSDT", "DOGEUSDT"], {}, dict(CONFIG, loop_interval=0.2),
+                                       n_workers=2, fabrica_cliente=cliente_mock)
+        try:
+            coordenador.iniciar()
+            limite = time.monotonic() + 60
+            while observacoes("fetch", "DOGEUSDT") == 0 and time.monotonic() < limite:
+                coordenador.coletar(timeout=0.5)
+            # Spans registrados nos processos dos shards aparecem no registro do coordenador
+            self.assertGreater(observacoes("fetch", "DOGEUSDT"), 0)
+            coordenador.publicar_universo(["XRPUSDT", "TRXUSDT"])
+            while observacoes("fetch", "TRXUSDT") == 0 and time.monotonic() < limite:
+                coordenador.coletar(timeout=0.5)
+            self.assertGreater(observacoes("fetch", "TRXUSDT"), 0)
+            removido = observacoes("fetch", "DOGEUSDT")
+            alvo = observacoes("fetch", "TRXUSDT") + 2
+            while observacoes("fetch", "TRXUSDT") < alvo and time.monotonic() < limite:
+                coordenador.coletar(timeout=0.5)
+            self.assertGreaterEqual(observacoes("fetch", "TRXUSDT"), alvo)
+            self.assertEqual(observacoes("fetch", "DOGEUSDT"), removido)
+        finally:
+            coordenador.parar()
+            os.chdir(anterior)
+            shutil.rmtree(diretorio)
+
+    def test_dead_shard_is_restarted_then_fails_loudly(self):
+        diretorio = tempfile.mkdtemp()
+        anterior = os.getcwd()
+        os.chdir(diretorio)
+        coordenador = ShardCoordinator(["XRPUSDT"], {}, dict(CONFIG, loop_interval=0.2), n_workers=1,
+                                       fabrica_cliente=cliente_mock, max_reinicios=1)
+        try:
+            coordenador.iniciar()
+            primeiro = coordenador.processos[0]
+            primeiro.terminate()
+            primeiro.join(10)
+            coordenador.coletar()
+            self.assertIsNot(coordenador.processos[0], primeiro)
+            self.assertTrue(coordenador.processos[0].is_alive())
+            self.assertEqual(coordenador.reinicios, [1])
+            coordenador.processos[0].terminate()
+            coordenador.processos[0].join(10)
+            with self.assertRaises(ShardIndisponivel):
+                coordenador.coletar()
+        finally:
+            coordenador.parar()
+            os.chdir(anterior)
+            shutil.rmtree(diretorio)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import shutil
+import tempfile
+import numpy as np
+from synthetic_market import gerar_mercado, agregar, gerar_arquivos, sequencia_regimes, _ar1, REGIMES
+from candle_store import CandleStore
+
+
+class TestSyntheticMarket(unittest.TestCase):
+    def test_candles_are_consistent_and_reproducible(self):
+        mercado, regimes = gerar_mercado(("AUSDT", "BUSDT"), 20_000, seed=7)
+        for velas in mercado.values():
+            self.assertTrue((velas["high"] >= np.maximum(velas["open"], velas["close"])).all())
+            self.assertTrue((velas["low"] <= np.minimum(velas["open"], velas["close"])).all())
+            self.assertTrue((velas["low"] > 0).all())
+            np.testing.assert_array_equal(velas["open"][1:], velas["close"][:-1])
+        self.assertEqual(len(np.unique(regimes)), len(REGIMES))
+        np.testing.assert_array_equal(gerar_mercado(("AUSDT",), 1000, seed=7)[0]["AUSDT"]["close"],
+                                      gerar_mercado(("AUSDT",), 1000, seed=7)[0]["AUSDT"]["close"])
+        # Fator de mercado comum gera correlação positiva entre os pares
+        r = [np.diff(np.log(v["close"])) for v in mercado.values()]
+        self.assertGreater(np.corrcoef(r[0], r[1])[0, 1], 0.1)
+
+    def test_regime_runs_never_repeat_state(self):
+        regimes = sequencia_regimes(50_000, np.random.default_rng(1), duracao_media=100)
+        trocas = np.flatnonzero(np.diff(regimes))
+        self.assertGreater(len(trocas), 200)
+        # Com duração de 1 minuto cada minuto é uma sequência nova: estados consecutivos sempre diferem
+        minuto_a_minuto = sequencia_regimes(5_000, np.random.default_rng(2), duracao_media=1)
+        self.assertTrue((np.diff(minuto_a_minuto) != 0).all())
+        self.assertEqual(len(np.unique(minuto_a_minuto)), len(REGIMES))
+
+    def test_ar1_matches_recursion(self):
+        ruido = np.random.default_rng(3).normal(0, 1, 3_000)
+        for phi in (0.995, 0.97, 0.3, -0.5):
+            esperado, x = np.empty_like(ruido), 0.0
+            for t, r in enumerate(ruido):
+                x = phi * x + r
+                esperado[t] = x
+            np.testing.assert_allclose(_ar1(ruido, phi), esperado, rtol=1e-9, atol=1e-9)
+
+    def test_aggregation_and_csv_format(self):
+        mercado, _ = gerar_mercado(("AUSDT",), 3 * 60 + 7, inicio="2025-01-01 00:00:00")
+        velas = mercado["AUSDT"]
+        horas = agregar(velas, "1h")
+        self.assertEqual(len(horas["close"]), 3)
+        self.assertEqual(horas["high"][1], velas["high"][60:120].max())
+        self.assertEqual(horas["close"][2], velas["close"][179])
+        diretorio = tempfile.mkdtemp()
+        try:
+            gerar_arquivos(("AUSDT",), 600, timeframes=("1m", "5m"), data_dir=diretorio, inicio="2025-01-01")
+            lidas = CandleStore(diretorio).get("AUSDT", "5m")
+            self.assertEqual(len(lidas["close"]), 120)
+            self.assertEqual(int(lidas["timestamp"][1] - lidas["timestamp"][0]), 300_000)
+        finally:
+            shutil.rmtree(diretorio)
+
+
+if __name__ == '__main__':
+    unittest.main()
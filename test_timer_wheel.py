@@ -0,0 +1,66 @@
+import unittest
+import random
+import time
+import clock
+from clock import RelogioReal, RelogioVirtual
+from timer_wheel import TimerWheel
+
+
+class TestTimerWheel(unittest.TestCase):
+    def setUp(self):
+        self.agora = 0.0
+        self.roda = TimerWheel(tick=0.1, slots=8, niveis=3, relogio=lambda: self.agora)
+
+    def test_fires_in_order_never_early_and_skips_cancelled(self):
+        rng = random.Random(3)
+        disparos, prazos, timers = [], {}, {}
+        for i in range(2000):
+            prazos[i] = rng.uniform(0, 80)  # além de 8**3 ticks, exercita o estacionamento no último nível
+            timers[i] = self.roda.agendar(prazos[i], lambda i=i: disparos.append((i, self.agora)))
+        cancelados = set(rng.sample(range(2000), 300))
+        for i in cancelados:
+            self.roda.cancelar(timers[i])
+        while self.agora < 90:
+            self.agora += 0.05
+            self.roda.avancar()
+
+        self.assertEqual({i for i, _ in disparos}, set(range(2000)) - cancelados)
+        for i, momento in disparos:
+            self.assertGreaterEqual(momento + 1e-9, prazos[i])
+            self.assertLess(momento - prazos[i], 0.2)
+        self.assertEqual(len(self.roda), 0)
+
+    def test_cancel_after_fire_is_noop(self):
+        disparos = []
+        timer = self.roda.agendar(0.3, disparos.append, "x")
+        self.agora = 1.0
+        self.assertEqual(self.roda.avancar(), 1)
+        self.roda.cancelar(timer)
+        self.assertEqual((disparos, len(self.roda)), (["x"], 0))
+
+    def test_pending_timers_survive_a_clock_swap(self):
+        roda = TimerWheel(tick=0.1, relogio=clock.monotonic, fonte=clock.get_relogio)
+        disparos = []
+        roda.agendar(5, disparos.append, "real")
+        virtual = RelogioVirtual(1.7e9)
+        try:
+            clock.definir_relogio(virtual)
+            inicio = time.monotonic()
+            self.assertEqual(roda.avancar(), 0)
+            self.assertLess(time.monotonic() - inicio, 1)
+            virtual.avancar(4.5)
+            self.assertEqual(roda.avancar(), 0)
+            virtual.avancar(0.7)
+            self.assertEqual((roda.avancar(), disparos), (1, ["real"]))
+
+            roda.agendar(2, disparos.append, "virtual")
+            clock.definir_relogio(RelogioReal())
+            self.assertEqual(roda.avancar(), 0)
+            self.assertEqual(roda.avancar(agora=time.monotonic() + 2.5), 1)
+            self.assertEqual(disparos, ["real", "virtual"])
+        finally:
+            clock.definir_relogio(RelogioReal())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import os
+import shutil
+import tempfile
+import pandas as pd
+from timer_wheel import TimerWheel
+from trade_simulator import MonitorSimulacoes, _Simulacao
+
+
+class TestMonitorSimulacoes(unittest.TestCase):
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.agora = 0.0
+        self.roda = TimerWheel(tick=0.1, slots=8, niveis=3, relogio=lambda: self.agora)
+        self.monitor = MonitorSimulacoes(roda=self.roda, arquivo=os.path.join(self.diretorio, "sinais.csv"))
+        self.precos = {"XRPUSDT": 2.0, "DOGEUSDT": 0.1}
+        self.consultas = []
+        self.active_trades = []
+        self.combinacoes = {}
+
+    def tearDown(self):
+        shutil.rmtree(self.diretorio)
+
+    def _preco(self, client, pair, config):
+        self.consultas.append(pair)
+        return self.precos[pair]
+
+    def _registrar(self, signal_id, par, direcao, timeframe="1m"):
+        sinal = {"signal_id": signal_id, "par": par, "direcao": direcao, "preco_entrada": self.precos[par],
+                 "quantity": 1.0, "timeframe": timeframe, "strategy_name": "robo", "estado": "aberto"}
+        self.active_trades.append(sinal)
+        self.combinacoes[("robo", timeframe, direcao)] = self.combinacoes.get(("robo", timeframe, direcao), 0) + 1
+        simulacao = _Simulacao(None, sinal, {"tp_percent": 1.0, "sl_percent": 0.5, "leverage": 2},
+                               self.active_trades, self.combinacoes, self._preco)
+        self.monitor.registrar(simulacao, iniciar=False)
+        return sinal, simulacao
+
+    def test_one_price_per_pair_and_tp_sl_close(self):
+        longo, _ = self._registrar("a", "XRPUSDT", "LONG")
+        curto, _ = self._registrar("b", "XRPUSDT", "SHORT")
+        self._registrar("c", "DOGEUSDT", "LONG")
+        self.monitor.verificar()
+        self.assertEqual(sorted(self.consultas), ["DOGEUSDT", "XRPUSDT"])
+        self.assertEqual(len(self.monitor), 3)
+
+        self.precos["XRPUSDT"] = 2.03
+        self.monitor.verificar()
+        self.assertEqual((longo["resultado"], longo["lucro_percentual"]), ("TP", 2.0))
+        self.assertEqual((curto["resultado"], curto["lucro_percentual"]), ("SL", -1.0))
+        self.assertEqual(len(self.monitor), 1)
+        self.assertEqual(len(self.roda), 1)
+        self.assertEqual([t["signal_id"] for t in self.active_trades], ["c"])
+        self.assertEqual(self.combinacoes, {("robo", "1m", "LONG"): 1})
+        diario = pd.read_csv(self.monitor.arquivo)
+        self.assertEqual(sorted(diario["signal_id"]), ["a", "b"])
+
+    def test_timeout_from_wheel_closes_at_current_price(self):
+        sinal, simulacao = self._registrar("a", "DOGEUSDT", "LONG", timeframe="5m")
+        self.agora = 149.0
+        self.roda.avancar()
+        self.monitor.verificar()
+        self.assertEqual(sinal["estado"], "aberto")
+        self.agora = 151.0
+        self.roda.avancar()
+        self.precos["DOGEUSDT"] = 0.1001
+        self.monitor.verificar()
+        self.assertEqual((sinal["resultado"], sinal["preco_saida"], sinal["estado"]), ("Timeout", 0.1001, "fechado"))
+        self.assertTrue(simulacao.concluida.is_set())
+        self.assertEqual(len(self.monitor), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import json
+import random
+import pandas as pd
+from trigger_book import TriggerBook, niveis_de_saida
+
+
+class TestTriggerBook(unittest.TestCase):
+    def test_pops_only_triggered_levels(self):
+        book = TriggerBook()
+        book.adicionar("a", "XRPUSDT", "LONG", tp_preco=2.2, sl_preco=1.9)
+        book.adicionar("b", "XRPUSDT", "SHORT", tp_preco=1.8, sl_preco=2.1)
+        book.adicionar("c", "XRPUSDT", "LONG", tp_preco=2.05, sl_preco=1.95)
+
+        self.assertEqual(book.disparados("XRPUSDT", 2.0), [])
+        self.assertEqual(book.disparados("XRPUSDT", 2.1), [("c", "TP", 2.05), ("b", "SL", 2.1)])
+        self.assertEqual(len(book), 1)
+        self.assertEqual(book.disparados("XRPUSDT", 1.9), [("a", "SL", 1.9)])
+        self.assertEqual(book.disparados("XRPUSDT", 1.0), [])
+
+    def test_matches_linear_scan(self):
+        rng = random.Random(7)
+        book, posicoes = TriggerBook(), {}
+        for i in range(2000):
+            direcao = rng.choice(["LONG", "SHORT"])
+            tp, sl = niveis_de_saida(direcao, rng.uniform(1.5, 2.5), rng.uniform(0.5, 5), rng.uniform(0.5, 5))
+            posicoes[str(i)] = (direcao, tp, sl)
+            book.adicionar(str(i), "XRPUSDT", direcao, tp, sl)
+        for preco in [rng.uniform(1.4, 2.6) for _ in range(200)]:
+            esperado = set()
+            for signal_id, (direcao, tp, sl) in list(posicoes.items()):
+                if (direcao == "LONG" and preco >= tp) or (direcao == "SHORT" and preco <= tp):
+                    esperado.add((signal_id, "TP"))
+                elif (direcao == "LONG" and preco <= sl) or (direcao == "SHORT" and preco >= sl):
+                    esperado.add((signal_id, "SL"))
+            for signal_id, _ in esperado:
+                del posicoes[signal_id]
+            self.assertEqual({(s, r) for s, r, _ in book.disparados("XRPUSDT", preco)}, esperado)
+        self.assertEqual(len(book), len(posicoes))
+
+    def test_sincronizar_uses_sl_percent_and_drops_closed(self):
+        abertas = pd.DataFrame([
+            {"signal_id": "x", "par": "XRPUSDT", "direcao": "LONG", "preco_entrada": 2.0,
+             "parametros": json.dumps({"tp_percent": 4.0, "sl_percent": 1.0})},
+            {"signal_id": "y", "par": "DOGEUSDT", "direcao": "SHORT", "preco_entrada": 0.2,
+             "parametros": json.dumps({"tp_percent": 2.0, "sl_percent": 1.0})},
+        ])
+        book = TriggerBook()
+        book.sincronizar(abertas)
+        self.assertEqual(book.pares(), {"XRPUSDT", "DOGEUSDT"})
+        book.sincronizar(abertas[abertas["signal_id"] == "x"])
+        self.assertNotIn("y", book)
+        self.assertEqual(book.disparados("XRPUSDT", 1.975), [("x", "SL", 1.98)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+import os
+import tempfile
+import uuid
+import journal_schema
+from journal_schema import ler_diario
+from mock_exchange import MockBinanceClient
+from order_executor import OrderExecutor
+from user_data_stream import UserDataStream
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+INICIO = "2025-03-31 02:13:00"
+
+
+class TestUserDataStream(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        self.signal_id = str(uuid.uuid4())
+        journal_schema.garantir_diario()
+        self.client = MockBinanceClient(symbols=("XRPUSDT",), data_dir=DATA_DIR, inicio=INICIO)
+        self.config = {"strategy_name": "Robo 00", "timeframe": "1m", "leverage": 10, "order_placement_mode": "batch"}
+        self.stream = UserDataStream(self.client, state_file="estado.json")
+        self.stream.carregar_estado_inicial()
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def _executar(self):
+        resultado = OrderExecutor(self.client, self.config).executar_ordem(
+            "XRPUSDT", "LONG", 10.0, stop_loss=0.2, take_profit=0.2, dry_run_id=self.signal_id
+        )
+        journal_schema.anexar([{
+            "signal_id": self.signal_id, "par": "XRPUSDT", "direcao": "LONG", "estado": "aberto",
+            "preco_entrada": self.client.ordens[resultado["binance_order_id"]]["avgPrice"],
+            "strategy_name": "Robo 00", "timeframe": "1m", "binance_order_id": resultado["binance_order_id"],
+            "tp_order_id": resultado["tp_order_id"], "sl_order_id": resultado["sl_order_id"],
+        }])
+        return resultado
+
+    def _linha(self):
+        df = ler_diario(colunas=["signal_id", "estado", "resultado", "preco_saida", "binance_order_id"], compacto=False)
+        return df[df["signal_id"] == self.signal_id].iloc[0]
+
+    def test_fill_event_closes_journal_row(self):
+        self.client.ouvintes.append(self.stream.processar_evento)
+        resultado = self._executar()
+        self.client.avancar(6 * 3600)
+        linha = self._linha()
+        self.assertEqual(linha["estado"], "fechado")
+        self.assertIn(linha["resultado"], ("TP", "SL"))
+        perna = "tp_order_id" if linha["resultado"] == "TP" else "sl_order_id"
+        self.assertAlmostEqual(linha["preco_saida"], self.client.ordens[resultado[perna]]["avgPrice"])
+        self.assertIn("USDT", self.stream.saldos)
+        self.assertNotIn("XRPUSDT", self.stream.posicoes)
+
+    def test_reconciliation_recovers_fill_missed_while_disconnected(self):
+        self._executar()
+        self.client.avancar(6 * 3600)  # sem ouvinte: execução perdida pelo stream
+        self.assertEqual(self._linha()["estado"], "aberto")
+        self.assertEqual(self.stream.reconciliar(), 1)
+        self.assertEqual(self._linha()["estado"], "fechado")
+        self.assertEqual(self.stream.reconciliar(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
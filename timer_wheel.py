@@ -0,0 +1,189 @@
+import itertools
+import math
+import threading
+import time
+from utils import logger
+import clock
+
+
+class Timer:
+    """Handle de um prazo agendado na TimerWheel."""
+    __slots__ = ("id", "expira_tick", "callback", "args", "local", "cancelado")
+
+    def __init__(self, timer_id, expira_tick, callback, args):
+        self.id = timer_id
+        self.expira_tick = expira_tick
+        self.callback = callback
+        self.args = args
+        self.local = None
+        self.cancelado = False
+
+
+class TimerWheel:
+    """
+    Roda de temporizadores hierárquica (Varghese & Lauck).
+
+    Cada nível tem `slots` posições; o nível 0 avança um slot por tick e, a cada volta completa,
+    o slot correspondente do nível acima é redistribuído (cascata) nos níveis inferiores.
+    Agendar e cancelar custam O(1); os callbacks vencidos em um tick são disparados em lote
+    por uma única thread.
+    """
+    def __init__(self, tick=0.1, slots=64, niveis=4, relogio=time.monotonic, fonte=None):
+        """
+        Args:
+            tick (float): Resolução em segundos.
+            slots (int): Posições por nível.
+            niveis (int): Número de níveis (alcance = tick * slots ** niveis).
+            relogio (callable): Fonte de tempo monotônica.
+            fonte (callable): Identifica o relógio por trás de `relogio` (ex.: clock.get_relogio).
+                Quando muda, a roda é reancorada no novo relógio e os timers pendentes mantêm
+                o tempo que lhes restava.
+        """
+        self.tick = tick
+        self.slots = slots
+        self.niveis = niveis
+        self.relogio = relogio
+        self.fonte = fonte
+        self._fonte_atual = fonte() if fonte else None
+        self._origem = relogio()
+        self._tick_atual = 0
+        self._rodas = [[{} for _ in range(slots)] for _ in range(niveis)]
+        self._ids = itertools.count()
+        self._total = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._parar = threading.Event()
+
+    def __len__(self):
+        return self._total
+
+    def agendar(self, atraso, callback, *args):
+        """
+        Agenda callback(*args) para daqui a `atraso` segundos.
+
+        Returns:
+            Timer: Handle para cancelar().
+        """
+        with self._lock:
+            alvo = math.ceil((self._instante() + atraso - self._origem) / self.tick)
+            timer = Timer(next(self._ids), max(alvo, self._tick_atual + 1), callback, args)
+            self._inserir(timer)
+            self._total += 1
+            return timer
+
+    def cancelar(self, timer):
+        """Cancela um timer pendente (sem efeito se já disparou)."""
+        with self._lock:
+            if timer.local is not None and not timer.cancelado:
+                nivel, slot = timer.local
+                del self._rodas[nivel][slot][timer.id]
+                timer.local = None
+                self._total -= 1
+            timer.cancelado = True
+
+    def _inserir(self, timer):
+        delta = timer.expira_tick - self._tick_atual
+        for nivel in range(self.niveis):
+            if delta < self.slots ** (nivel + 1) or nivel == self.niveis - 1:
+                if delta >= self.slots ** self.niveis:
+                    # Além do alcance: estaciona no slot mais distante do último nível
+                    slot = (self._tick_atual // self.slots ** nivel - 1) % self.slots
+                else:
+                    slot = (timer.expira_tick // self.slots ** nivel) % self.slots
+                self._rodas[nivel][slot][timer.id] = timer
+                timer.local = (nivel, slot)
+                return
+
+    def avancar(self, agora=None):
+        """
+        Avança a roda até `agora` e dispara os callbacks vencidos.
+
+        Returns:
+            int: Número de timers disparados.
+        """
+        vencidos = []
+        with self._lock:
+            alvo = int((self._instante(agora) - self._origem) / self.tick)
+            if self._total == 0:
+                self._tick_atual = max(self._tick_atual, alvo)
+            while self._tick_atual < alvo:
+                self._tick_atual += 1
+                t = self._tick_atual
+                for nivel in range(self.niveis - 1, 0, -1):
+                    if t % self.slots ** nivel == 0:
+                        self._cascata(nivel, (t // self.slots ** nivel) % self.slots)
+                slot = self._rodas[0][t % self.slots]
+                if slot:
+                    for timer in slot.values():
+                        timer.local = None
+                    vencidos.extend(slot.values())
+                    self._total -= len(slot)
+                    slot.clear()
+        for timer in vencidos:
+            try:
+                timer.callback(*timer.args)
+            except Exception as e:
+                logger.error(f"[TIMER WHEEL] Erro no callback do timer {timer.id}: {e}")
+        return len(vencidos)
+
+    def _instante(self, agora=None):
+        # Chamado sob self._lock. Lê fonte e instante juntos, para não misturar dois relógios
+        if self.fonte is None:
+            return self.relogio() if agora is None else agora
+        while True:
+            fonte = self.fonte()
+            instante = self.relogio() if agora is None else agora
+            if self.fonte() is fonte:
+                break
+        if fonte is not self._fonte_atual:
+            self._reancorar(fonte, instante)
+        return instante
+
+    def _reancorar(self, fonte, instante):
+        # As origens de relógios diferentes não se comparam (ex.: monotonic real x epoch do
+        # replay): recomeça a contagem de ticks em `instante`, preservando o restante de cada timer
+        pendentes = [timer for nivel in self._rodas for slot in nivel for timer in slot.values()]
+        self._rodas = [[{} for _ in range(self.slots)] for _ in range(self.niveis)]
+        base = self._tick_atual
+        self._origem = instante
+        self._tick_atual = 0
+        for timer in pendentes:
+            timer.expira_tick = max(timer.expira_tick - base, 1)
+            self._inserir(timer)
+        self._fonte_atual = fonte
+        logger.info(f"[TIMER WHEEL] Relógio trocado; {len(pendentes)} timers pendentes reancorados.")
+
+    def _cascata(self, nivel, slot):
+        timers = list(self._rodas[nivel][slot].values())
+        self._rodas[nivel][slot].clear()
+        for timer in timers:
+            self._inserir(timer)
+
+    def iniciar(self):
+        """Inicia a thread que avança a roda a cada tick."""
+        if self._thread is None or not self._thread.is_alive():
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._executar, daemon=True, name="TimerWheel")
+            self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+
+    def _executar(self):
+        while not self._parar.wait(self.tick):
+            self.avancar()
+
+
+_roda_global = None
+_roda_lock = threading.Lock()
+
+
+def get_timer_wheel():
+    """Retorna a roda de temporizadores compartilhada do processo (iniciada na primeira chamada)."""
+    global _roda_global
+    with _roda_lock:
+        if _roda_global is None:
+            # Usa o relógio do processo (virtual no modo replay)
+            _roda_global = TimerWheel(relogio=clock.monotonic, fonte=clock.get_relogio)
+            _roda_global.iniciar()
+        return _roda_global
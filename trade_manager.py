@@ -1,26 +1,24 @@
 import pandas as pd
 import os
-from utils import logger, CsvWriter
+from utils import logger
+from journal_schema import EscritorDiario, com_trava, ler_diario, escrever_diario
 import uuid
 from datetime import datetime
+import clock
 import json
+import audit_outbox
 import pytz
 
+# Limites de trades simultâneos (globais e por robô)
+MAX_GLOBAL_TRADES = 540
+MAX_TRADES_POR_ROBO = 36
+
 def get_local_timestamp():
     """Retorna timestamp atual no timezone local"""
-    return datetime.now().astimezone().strftime("%Y-%m-%d %H:%M:%S")
+    return clock.now().astimezone().strftime("%Y-%m-%d %H:%M:%S")
 
-# Inicializar o CsvWriter com filename e columns
-csv_writer = CsvWriter(
-    filename="sinais_detalhados.csv",
-    columns=[
-        'signal_id', 'par', 'direcao', 'preco_entrada', 'preco_saida', 'quantity',
-        'lucro_percentual', 'pnl_realizado', 'resultado', 'timestamp', 'timestamp_saida',
-        'estado', 'strategy_name', 'contributing_indicators', 'localizadores',
-        'motivos', 'timeframe', 'aceito', 'parametros', 'quality_score', 'modo_contrario',
-        'visual_tag'  # Nova coluna para visualização dry run
-    ]
-)
+# Escritor do diário (colunas e ordem definidas em journal_schema)
+csv_writer = EscritorDiario("sinais_detalhados.csv")
 
 def check_active_trades():
     """
@@ -29,7 +27,7 @@ def check_active_trades():
         list: Lista de trades ativos.
     """
     try:
-        df = pd.read_csv("sinais_detalhados.csv")
+        df = ler_diario("sinais_detalhados.csv", compacto=False)
         active_trades = df[df['estado'] == 'aberto'].to_dict('records')
         logger.info(f"Trades ativos encontrados: {len(active_trades)}")
         return active_trades
@@ -70,7 +68,7 @@ def check_timeframe_direction_limit(pair, timeframe, direction, strategy_name, a
     
     return can_open
 
-def check_global_and_robot_limit(strategy_name, active_trades, max_global=540, max_per_robot=36):
+def check_global_and_robot_limit(strategy_name, active_trades, max_global=MAX_GLOBAL_TRADES, max_per_robot=MAX_TRADES_POR_ROBO):
     """
     Verifica se o limite global e o limite por robô foram atingidos.
     Retorna True se pode abrir nova ordem, False caso contrário.
@@ -123,13 +121,14 @@ def save_signal_log(signal_data, accepted, mode):
     Salva um log relacionado a um sinal e registra sinais rejeitados em oportunidades_perdidas.csv.
     """
     try:
-        log_message = f"Sinal {signal_data.get('signal_id', 'N/A')}: {signal_data}, accepted={accepted}, mode={mode}"
+        log_message = (f"Sinal {signal_data.get('signal_id', 'N/A')}: {signal_data.get('strategy_name')} {signal_data.get('par')} "
+                       f"{signal_data.get('timeframe')} {signal_data.get('direcao')} score={signal_data.get('score_tecnico', 0.0):.2f}, "
+                       f"accepted={accepted}, mode={mode}")
         if accepted:
             logger.info(log_message)
         else:
             logger.warning(log_message)
-            # Registrar sinal rejeitado
-            MISSED_OPPORTUNITIES_FILE = "oportunidades_perdidas.csv"
+            # Registrar sinal rejeitado (gravado em lote pela fila de auditoria)
             log_entry = {
                 'timestamp': get_local_timestamp(),
                 'robot_name': signal_data['strategy_name'],
@@ -140,26 +139,8 @@ def save_signal_log(signal_data, accepted, mode):
                 'contributing_indicators': signal_data['contributing_indicators'],
                 'reason': 'Limite de trades simultâneos atingido'
             }
-
-            columns = [
-                'timestamp', 'robot_name', 'par', 'timeframe', 'direcao',
-                'score_tecnico', 'contributing_indicators', 'reason'
-            ]
-            if os.path.exists(MISSED_OPPORTUNITIES_FILE):
-                df = pd.read_csv(MISSED_OPPORTUNITIES_FILE)
-                # Garantir que todas as colunas existam
-                for col in columns:
-                    if col not in df.columns:
-                        df[col] = pd.NA
-            else:
-                df = pd.DataFrame(columns=columns)
-
-            # Filtrar linhas completamente NA antes da concatenação
-            df = df.dropna(how='all')
-            df_new_entry = pd.DataFrame([log_entry], columns=columns)
-            df = pd.concat([df, df_new_entry], ignore_index=True)
-            df.to_csv(MISSED_OPPORTUNITIES_FILE, index=False)
-            logger.info(f"Sinal rejeitado registrado em {MISSED_OPPORTUNITIES_FILE}: {log_entry}")
+            audit_outbox.enviar(audit_outbox.OPORTUNIDADES, log_entry)
+            logger.info(f"Sinal rejeitado registrado em {audit_outbox.OPORTUNIDADES}: {log_entry}")
     except Exception as e:
         logger.error(f"Erro ao salvar log do sinal: {e}")
 
@@ -187,12 +168,13 @@ def save_report(report_data):
     except Exception as e:
         logger.error(f"Erro ao salvar relatório: {e}")
 
+@com_trava
 def close_order(signal_id, exit_price, result="Manual"):
     """
     Fecha uma ordem no arquivo sinais_detalhados.csv
     """
     try:
-        df = pd.read_csv("sinais_detalhados.csv")
+        df = ler_diario("sinais_detalhados.csv", compacto=False)
         order_idx = df.index[df['signal_id'] == signal_id].tolist()[0]
         modo_contrario = False
         if 'modo_contrario' in df.columns:
@@ -210,7 +192,7 @@ def close_order(signal_id, exit_price, result="Manual"):
             profit_percent = ((entry_price - exit_price) / entry_price) * 100
         df.at[order_idx, 'lucro_percentual'] = profit_percent
         df.at[order_idx, 'pnl_realizado'] = profit_percent
-        df.to_csv("sinais_detalhados.csv", index=False)
+        escrever_diario(df, "sinais_detalhados.csv")
         msg = f"Ordem {signal_id} fechada com sucesso. Resultado: {result}, PNL: {profit_percent:.2f}%"
         if modo_contrario:
             msg += " [modo ao contrario]"
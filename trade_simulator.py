@@ -4,122 +4,234 @@ import threading
 from datetime import datetime
 import pandas as pd
 import json
-from utils import logger, CsvWriter
+from utils import logger
+from journal_schema import EscritorDiario
+from timer_wheel import get_timer_wheel
+import clock
 
-def simulate_trade(client, signal_data, config, active_trades, binance_utils, order_executor, active_orders_by_combination, get_current_price, get_funding_rate):
+TIMEOUT_POR_TIMEFRAME = {
+    '1m': 30,    # 30 segundos para testes rápidos
+    '5m': 150,   # 2.5 minutos
+    '15m': 450,  # 7.5 minutos
+    '1h': 1800,  # 30 minutos
+    '4h': 7200,  # 2 horas
+    '1d': 14400  # 4 horas
+}
+
+
+class _Simulacao:
+    """Estado de uma ordem dry_run acompanhada pelo MonitorSimulacoes."""
+    def __init__(self, client, signal_data, config, active_trades, active_orders_by_combination, get_current_price):
+        self.client = client
+        self.signal_data = signal_data
+        self.config = config
+        self.active_trades = active_trades
+        self.active_orders_by_combination = active_orders_by_combination
+        self.get_current_price = get_current_price
+        self.signal_id = signal_data['signal_id']
+        self.pair = signal_data['par']
+        self.direction = signal_data['direcao']
+        self.entry_price = float(signal_data['preco_entrada'])
+        self.quantity = float(signal_data['quantity'])
+        self.timeframe = signal_data['timeframe']
+        self.strategy_name = signal_data['strategy_name']
+        self.tp_percent = float(config.get('tp_percent', 0.5))
+        self.sl_percent = float(config.get('sl_percent', 0.3))
+        self.leverage = float(config.get('leverage', 1))
+        self.timeout = TIMEOUT_POR_TIMEFRAME.get(self.timeframe, 7200)
+        if self.direction == "LONG":
+            self.tp_price = self.entry_price * (1 + self.tp_percent / 100)
+            self.sl_price = self.entry_price * (1 - self.sl_percent / 100)
+        else:
+            self.tp_price = self.entry_price * (1 - self.tp_percent / 100)
+            self.sl_price = self.entry_price * (1 + self.sl_percent / 100)
+        self.start_time = clock.time()
+        self.expirou = False
+        self.timer = None
+        self.concluida = threading.Event()
+
+    def avaliar(self, current_price):
+        """Retorna (resultado, lucro_percentual) se TP ou SL foi atingido, senão None."""
+        if self.direction == "LONG":
+            if current_price >= self.tp_price:
+                return "TP", self.tp_percent * self.leverage
+            if current_price <= self.sl_price:
+                return "SL", -self.sl_percent * self.leverage
+        else:
+            if current_price <= self.tp_price:
+                return "TP", self.tp_percent * self.leverage
+            if current_price >= self.sl_price:
+                return "SL", -self.sl_percent * self.leverage
+        return None
+
+
+class MonitorSimulacoes:
     """
-    Simula uma ordem no modo dry_run, monitorando TP, SL e timeout.
+    Acompanha todas as ordens dry_run abertas numa única thread.
+
+    A cada `intervalo` segundos o preço de cada par é consultado uma única vez e comparado ao
+    TP/SL de todas as simulações daquele par; os prazos (timeout) ficam na roda de temporizadores
+    compartilhada, cujo callback apenas marca a simulação para ser encerrada na próxima passada.
+    A thread termina quando não há simulações abertas e é recriada no próximo registrar().
     """
-    try:
-        signal_id = signal_data['signal_id']
-        pair = signal_data['par']
-        direction = signal_data['direcao']
-        entry_price = float(signal_data['preco_entrada'])
-        quantity = float(signal_data['quantity'])
-        timeframe = signal_data['timeframe']
-        strategy_name = signal_data['strategy_name']
-        tp_percent = float(config.get('tp_percent', 0.5))
-        sl_percent = float(config.get('sl_percent', 0.3))
-        leverage = float(config.get('leverage', 1))
-        
-        timeout_map = {
-            '1m': 30,    # 30 segundos para testes rápidos
-            '5m': 150,   # 2.5 minutos
-            '15m': 450,  # 7.5 minutos
-            '1h': 1800,  # 30 minutos
-            '4h': 7200,  # 2 horas
-            '1d': 14400  # 4 horas
-        }
-        timeout = timeout_map.get(timeframe, 7200)
+    def __init__(self, intervalo=0.01, roda=None, arquivo="sinais_detalhados.csv"):
+        """
+        Args:
+            intervalo (float): Segundos entre duas verificações de preço.
+            roda (TimerWheel): Roda para os timeouts (padrão: get_timer_wheel()).
+            arquivo (str): Diário onde as simulações encerradas são gravadas.
+        """
+        self.intervalo = intervalo
+        self.roda = roda
+        self.arquivo = arquivo
+        self._lock = threading.Lock()
+        self._simulacoes = {}
+        self._thread = None
+        self._parar = threading.Event()
 
-        tp_price = entry_price * (1 + tp_percent / 100) if direction == "LONG" else entry_price * (1 - tp_percent / 100)
-        sl_price = entry_price * (1 - sl_percent / 100) if direction == "LONG" else entry_price * (1 + sl_percent / 100)
+    def __len__(self):
+        return len(self._simulacoes)
+
+    def _roda(self):
+        return self.roda if self.roda is not None else get_timer_wheel()
+
+    def registrar(self, simulacao, iniciar=True):
+        """Passa a acompanhar `simulacao` e agenda o seu timeout."""
+        simulacao.timer = self._roda().agendar(simulacao.timeout, self._expirar, simulacao)
+        with self._lock:
+            self._simulacoes[simulacao.signal_id] = simulacao
+            if iniciar and self._thread is None:
+                self._thread = threading.Thread(target=self._executar, daemon=True, name="MonitorSimulacoes")
+                self._thread.start()
+        return simulacao
 
-        logger.info(f"Simulação para {pair} ({direction}) - Entry: {entry_price:.8f}, TP: {tp_price:.8f}, SL: {sl_price:.8f}, Timeout: {timeout}s")
+    def _expirar(self, simulacao):
+        # Roda na thread da roda: só marca; o preço de saída é consultado pela thread do monitor
+        simulacao.expirou = True
 
-        start_time = time.time()
+    def _executar(self):
         while True:
-            elapsed_time = time.time() - start_time
-            if elapsed_time > timeout:
-                logger.warning(f"Simulação para sinal {signal_id} ({pair}) excedeu o tempo limite ({elapsed_time:.2f}s/{timeout}s). Encerrando.")
-                mark_price = get_current_price(client, pair, config)
-                if mark_price is None:
-                    logger.error(f"Preço atual não obtido para {pair}. Usando preço de entrada: {entry_price:.8f}")
-                    mark_price = entry_price
-                result = "Timeout"
-                lucro_percentual = 0.0
-                break
-
-            current_price = get_current_price(client, pair, config)
-            if current_price is None:
-                logger.warning(f"Preço atual não obtido para {pair}. Tentando novamente...")
-                time.sleep(0.01)
-                continue
-
-            current_price = float(current_price)
-            logger.debug(f"Verificando preços para {pair}: Current: {current_price:.8f}, TP: {tp_price:.8f}, SL: {sl_price:.8f}")
-
-            if direction == "LONG":
-                if current_price >= tp_price:
-                    result = "TP"
-                    lucro_percentual = tp_percent * leverage
-                    mark_price = current_price
-                    logger.info(f"TP atingido para {pair}: {current_price:.8f} >= {tp_price:.8f}")
-                    break
-                elif current_price <= sl_price:
-                    result = "SL"
-                    lucro_percentual = -sl_percent * leverage
-                    mark_price = current_price
-                    logger.info(f"SL atingido para {pair}: {current_price:.8f} <= {sl_price:.8f}")
-                    break
-            else:
-                if current_price <= tp_price:
-                    result = "TP"
-                    lucro_percentual = tp_percent * leverage
-                    mark_price = current_price
-                    logger.info(f"TP atingido para {pair}: {current_price:.8f} <= {tp_price:.8f}")
-                    break
-                elif current_price >= sl_price:
-                    result = "SL"
-                    lucro_percentual = -sl_percent * leverage
-                    mark_price = current_price
-                    logger.info(f"SL atingido para {pair}: {current_price:.8f} >= {sl_price:.8f}")
-                    break
-
-            time.sleep(0.01)
+            with self._lock:
+                if not self._simulacoes:
+                    self._thread = None
+                    return
+            try:
+                self.verificar()
+            except Exception as e:
+                logger.error(f"Erro no monitor de simulações: {e}")
+            clock.wait(self._parar, self.intervalo)
+
+    def verificar(self):
+        """Uma passada: um preço por par, encerrando as simulações que atingiram TP, SL ou timeout."""
+        with self._lock:
+            por_par = {}
+            for simulacao in self._simulacoes.values():
+                por_par.setdefault(simulacao.pair, []).append(simulacao)
+        for pair, simulacoes in por_par.items():
+            primeira = simulacoes[0]
+            try:
+                current_price = primeira.get_current_price(primeira.client, pair, primeira.config)
+            except Exception as e:
+                logger.warning(f"Erro ao obter preço atual para {pair}: {e}")
+                current_price = None
+            if current_price is not None:
+                current_price = float(current_price)
+                logger.debug(f"Verificando preços para {pair} ({len(simulacoes)} simulações): Current: {current_price:.8f}")
+            for simulacao in simulacoes:
+                try:
+                    self._verificar_simulacao(simulacao, current_price)
+                except Exception as e:
+                    logger.error(f"Erro na simulação do sinal {simulacao.signal_id}: {e}")
+                    self._remover(simulacao)
+
+    def _verificar_simulacao(self, simulacao, current_price):
+        if simulacao.expirou:
+            elapsed_time = clock.time() - simulacao.start_time
+            logger.warning(f"Simulação para sinal {simulacao.signal_id} ({simulacao.pair}) excedeu o tempo limite "
+                           f"({elapsed_time:.2f}s/{simulacao.timeout}s). Encerrando.")
+            mark_price = current_price
+            if mark_price is None:
+                logger.error(f"Preço atual não obtido para {simulacao.pair}. Usando preço de entrada: {simulacao.entry_price:.8f}")
+                mark_price = simulacao.entry_price
+            self._encerrar(simulacao, "Timeout", 0.0, mark_price)
+            return
+        if current_price is None:
+            logger.warning(f"Preço atual não obtido para {simulacao.pair}. Tentando novamente...")
+            return
+        atingido = simulacao.avaliar(current_price)
+        if atingido is None:
+            return
+        result, lucro_percentual = atingido
+        alvo = simulacao.tp_price if result == "TP" else simulacao.sl_price
+        logger.info(f"{result} atingido para {simulacao.pair}: {current_price:.8f} / {alvo:.8f}")
+        self._encerrar(simulacao, result, lucro_percentual, current_price)
 
+    def _remover(self, simulacao):
+        with self._lock:
+            self._simulacoes.pop(simulacao.signal_id, None)
+        if simulacao.timer is not None:
+            self._roda().cancelar(simulacao.timer)
+        simulacao.concluida.set()
+
+    def _encerrar(self, simulacao, result, lucro_percentual, mark_price):
+        signal_data = simulacao.signal_data
         signal_data['preco_saida'] = mark_price
         signal_data['lucro_percentual'] = lucro_percentual
-        signal_data['pnl_realizado'] = lucro_percentual * quantity
+        signal_data['pnl_realizado'] = lucro_percentual * simulacao.quantity
         signal_data['resultado'] = result
-        signal_data['timestamp_saida'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        signal_data['timestamp_saida'] = clock.now().strftime("%Y-%m-%d %H:%M:%S")
         signal_data['estado'] = "fechado"
+        try:
+            EscritorDiario(self.arquivo).write_row(signal_data)
+            logger.info(f"Simulação {simulacao.signal_id} para {simulacao.pair} finalizada: {result}, Lucro/Perda: {lucro_percentual:.2f}%")
+
+            combination_key = (simulacao.strategy_name, simulacao.timeframe, simulacao.direction)
+            active_orders_by_combination = simulacao.active_orders_by_combination
+            if combination_key in active_orders_by_combination:
+                active_orders_by_combination[combination_key] -= 1
+                if active_orders_by_combination[combination_key] <= 0:
+                    del active_orders_by_combination[combination_key]
+                    logger.debug(f"Contagem zerada para combinação {combination_key}")
+
+            if signal_data in simulacao.active_trades:
+                simulacao.active_trades.remove(signal_data)
+                logger.debug(f"Trade {simulacao.signal_id} removido de active_trades")
+        finally:
+            self._remover(simulacao)
+
+
+_monitor_global = None
+_monitor_lock = threading.Lock()
 
-        csv_writer = CsvWriter(
-            filename="sinais_detalhados.csv",
-            columns=[
-                'signal_id', 'par', 'direcao', 'preco_entrada', 'preco_saida', 'quantity',
-                'lucro_percentual', 'pnl_realizado', 'resultado', 'timestamp', 'timestamp_saida',
-                'estado', 'strategy_name', 'contributing_indicators', 'localizadores',
-                'motivos', 'timeframe', 'aceito', 'parametros'
-            ]
-        )
-        csv_writer.write_row(signal_data)
-        logger.info(f"Simulação {signal_id} para {pair} finalizada: {result}, Lucro/Perda: {lucro_percentual:.2f}%")
-
-        combination_key = (strategy_name, timeframe, direction)
-        if combination_key in active_orders_by_combination:
-            active_orders_by_combination[combination_key] -= 1
-            if active_orders_by_combination[combination_key] <= 0:
-                del active_orders_by_combination[combination_key]
-                logger.debug(f"Contagem zerada para combinação {combination_key}")
-
-        if signal_data in active_trades:
-            active_trades.remove(signal_data)
-            logger.debug(f"Trade {signal_id} removido de active_trades")
 
+def get_monitor_simulacoes():
+    """Retorna o monitor de simulações compartilhado do processo."""
+    global _monitor_global
+    with _monitor_lock:
+        if _monitor_global is None:
+            _monitor_global = MonitorSimulacoes()
+        return _monitor_global
+
+
+def simulate_trade(client, signal_data, config, active_trades, binance_utils, order_executor, active_orders_by_combination, get_current_price, get_funding_rate):
+    """
+    Simula uma ordem no modo dry_run, monitorando TP, SL e timeout.
+
+    A ordem é registrada no monitor compartilhado (uma thread para todas as simulações) e a
+    função retorna imediatamente.
+
+    Returns:
+        threading.Event: Sinalizado quando a simulação é encerrada (None em caso de erro).
+    """
+    try:
+        simulacao = _Simulacao(client, signal_data, config, active_trades, active_orders_by_combination, get_current_price)
+        logger.info(f"Simulação para {simulacao.pair} ({simulacao.direction}) - Entry: {simulacao.entry_price:.8f}, "
+                    f"TP: {simulacao.tp_price:.8f}, SL: {simulacao.sl_price:.8f}, Timeout: {simulacao.timeout}s")
+        get_monitor_simulacoes().registrar(simulacao)
+        return simulacao.concluida
     except Exception as e:
-        logger.error(f"Erro na simulação do sinal {signal_id}: {e}")
+        logger.error(f"Erro na simulação do sinal {signal_data.get('signal_id', 'desconhecido')}: {e}")
+        return None
 
 def simulate_trade_backtest(client, signal_data, config, get_current_price, get_funding_rate):
     """
@@ -170,10 +282,10 @@ def simulate_trade_backtest(client, signal_data, config, get_current_price, get_
         signal_data['lucro_percentual'] = lucro_percentual
         signal_data['pnl_realizado'] = lucro_percentual * quantity if result in ["TP", "SL"] else 0.0
         signal_data['resultado'] = result
-        signal_data['timestamp_saida'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S") if result in ["TP", "SL"] else None
+        signal_data['timestamp_saida'] = clock.now().strftime("%Y-%m-%d %H:%M:%S") if result in ["TP", "SL"] else None
         signal_data['estado'] = "fechado" if result in ["TP", "SL"] else "aberto"
 
         return signal_data
     except Exception as e:
         logger.error(f"Erro na simulação de backtest para sinal {signal_data.get('signal_id', 'desconhecido')}: {e}")
-        return signal_data
\ No newline at end of file
+        return signal_data
@@ -0,0 +1,135 @@
+import bisect
+import itertools
+import json
+
+
+def niveis_de_saida(direcao, preco_entrada, tp_percent, sl_percent):
+    """
+    Calcula os preços de TP e SL de uma posição.
+
+    Args:
+        direcao (str): "LONG" ou "SHORT".
+        preco_entrada (float): Preço de entrada.
+        tp_percent (float): Take profit em %.
+        sl_percent (float): Stop loss em %.
+
+    Returns:
+        tuple: (tp_preco, sl_preco).
+    """
+    if direcao == "LONG":
+        return preco_entrada * (1 + tp_percent / 100), preco_entrada * (1 - sl_percent / 100)
+    return preco_entrada * (1 - tp_percent / 100), preco_entrada * (1 + sl_percent / 100)
+
+
+class TriggerBook:
+    """
+    Livro de gatilhos de TP/SL por símbolo.
+
+    Cada símbolo tem dois livros ordenados: níveis que disparam quando o preço sobe
+    (TP de LONG, SL de SHORT) e níveis que disparam quando o preço cai (SL de LONG, TP de SHORT).
+    As chaves são armazenadas de forma que os níveis disparados fiquem sempre no fim da lista,
+    então cada atualização de preço custa uma bisseção mais a remoção dos k disparados.
+    A perna oposta de uma posição encerrada é removida de forma preguiçosa.
+    """
+    def __init__(self):
+        self._sobe = {}    # par -> [(-nivel, seq, signal_id, resultado)]
+        self._desce = {}   # par -> [(nivel, seq, signal_id, resultado)]
+        self._ativos = {}  # signal_id -> (par, seq)
+        self._seq = itertools.count()
+        self._obsoletos = 0
+
+    def __len__(self):
+        return len(self._ativos)
+
+    def __contains__(self, signal_id):
+        return signal_id in self._ativos
+
+    def pares(self):
+        """Retorna os símbolos com posições pendentes."""
+        return {par for par, _ in self._ativos.values()}
+
+    def adicionar(self, signal_id, par, direcao, tp_preco, sl_preco):
+        """
+        Registra (ou substitui) os níveis de saída de uma posição.
+
+        Args:
+            signal_id (str): Identificador do sinal.
+            par (str): Símbolo (ex.: "XRPUSDT").
+            direcao (str): "LONG" ou "SHORT".
+            tp_preco (float): Preço de take profit.
+            sl_preco (float): Preço de stop loss.
+        """
+        if signal_id in self._ativos:
+            self.remover(signal_id)
+        seq = next(self._seq)
+        self._ativos[signal_id] = (par, seq)
+        sobe = self._sobe.setdefault(par, [])
+        desce = self._desce.setdefault(par, [])
+        if direcao == "LONG":
+            bisect.insort(sobe, (-tp_preco, seq, signal_id, "TP"))
+            bisect.insort(desce, (sl_preco, seq, signal_id, "SL"))
+        else:
+            bisect.insort(desce, (tp_preco, seq, signal_id, "TP"))
+            bisect.insort(sobe, (-sl_preco, seq, signal_id, "SL"))
+
+    def remover(self, signal_id):
+        """Remove uma posição do livro (as entradas são descartadas na próxima compactação)."""
+        if self._ativos.pop(signal_id, None) is not None:
+            self._obsoletos += 2
+            if self._obsoletos > len(self._ativos) * 2:
+                self._compactar()
+
+    def disparados(self, par, preco):
+        """
+        Retira do livro as posições cujo TP ou SL foi atingido pelo preço.
+
+        Args:
+            par (str): Símbolo.
+            preco (float): Preço atual.
+
+        Returns:
+            list: [(signal_id, resultado, nivel)] com resultado "TP" ou "SL".
+        """
+        saidas = []
+        for livro, chave, sinal in ((self._sobe.get(par), -preco, -1), (self._desce.get(par), preco, 1)):
+            if not livro:
+                continue
+            inicio = bisect.bisect_left(livro, (chave,))
+            for nivel, seq, signal_id, resultado in reversed(livro[inicio:]):
+                if self._ativos.get(signal_id, (None, None))[1] != seq:
+                    self._obsoletos -= 1
+                    continue
+                del self._ativos[signal_id]
+                self._obsoletos += 1  # a perna oposta ficou obsoleta
+                saidas.append((signal_id, resultado, sinal * nivel))
+            del livro[inicio:]
+        return saidas
+
+    def _compactar(self):
+        for livros in (self._sobe, self._desce):
+            for par, livro in livros.items():
+                livro[:] = [e for e in livro if self._ativos.get(e[2], (None, None))[1] == e[1]]
+        self._obsoletos = 0
+
+    def sincronizar(self, abertas):
+        """
+        Sincroniza o livro com as ordens abertas do diário, convertendo `parametros` apenas
+        para as posições novas.
+
+        Args:
+            abertas (pd.DataFrame): Linhas abertas de sinais_detalhados.csv.
+        """
+        ids = set(abertas['signal_id'])
+        for signal_id in [s for s in self._ativos if s not in ids]:
+            self.remover(signal_id)
+        novas = abertas[~abertas['signal_id'].isin(list(self._ativos))]
+        for signal_id, par, direcao, preco_entrada, parametros in novas[
+                ['signal_id', 'par', 'direcao', 'preco_entrada', 'parametros']].itertuples(index=False):
+            try:
+                params = json.loads(parametros) if isinstance(parametros, str) else {}
+                tp, sl = niveis_de_saida(direcao, float(preco_entrada), float(params.get('tp_percent', 2.0)),
+                                         float(params.get('sl_percent', 1.0)))
+            except (ValueError, TypeError):
+                continue
+            self.adicionar(signal_id, par, direcao, tp, sl)
+
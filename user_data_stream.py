@@ -0,0 +1,273 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import pandas as pd
+import websockets
+from utils import logger
+from journal_schema import ler_diario
+from order_executor import close_order, gerar_client_order_id, signal_id_de_client_order_id, SINALS_FILE
+
+STREAM_URL = "wss://fstream.binance.com/ws/"
+STATE_FILE = "user_stream_state.json"
+KEEPALIVE_INTERVAL = 30 * 60  # A Binance expira o listenKey após 60 minutos sem keepalive
+HEARTBEAT_INTERVAL = 30
+RESULTADO_POR_PERNA = {"tp": "TP", "sl": "SL"}
+PERNA_OPOSTA = {"tp": "sl", "sl": "tp"}
+
+
+class UserDataStream:
+    """
+    Consumidor do user data stream de futuros da Binance.
+
+    Recebe ORDER_TRADE_UPDATE e ACCOUNT_UPDATE pelo websocket e atualiza o diário local
+    (sinais_detalhados.csv) assim que as pernas de TP/SL são executadas, sem polling de preço.
+    A cada conexão (inclusive reconexões) as pernas das ordens reais abertas são conferidas
+    por REST (reconciliar), de modo que execuções ocorridas sem conexão não se perdem.
+    O estado de posições e saldos é publicado em STATE_FILE para o dashboard.
+    """
+    def __init__(self, client, sinais_file=SINALS_FILE, state_file=STATE_FILE, stream_url=STREAM_URL,
+                 keepalive_interval=KEEPALIVE_INTERVAL):
+        """
+        Inicializa o consumidor (a conexão só é aberta em iniciar()).
+
+        Args:
+            client: Cliente Binance (binance.client.Client).
+            sinais_file (str): Diário local de sinais.
+            state_file (str): Arquivo JSON onde o estado de posições/saldos é publicado.
+            stream_url (str): URL base do websocket de futuros.
+            keepalive_interval (int): Intervalo (s) entre keepalives do listenKey.
+        """
+        self.client = client
+        self.sinais_file = sinais_file
+        self.state_file = state_file
+        self.stream_url = stream_url
+        self.keepalive_interval = keepalive_interval
+        self.posicoes = {}
+        self.saldos = {}
+        self.alavancagens = {}
+        self.ordens_por_id = {}
+        self._thread = None
+        self._parar = threading.Event()
+
+    # --- Ciclo de vida ---
+
+    def iniciar(self):
+        """Carrega o estado inicial e inicia o consumidor numa thread daemon."""
+        self.carregar_estado_inicial()
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._executar()), daemon=True)
+        self._thread.start()
+        logger.info("User data stream iniciado.")
+
+    def parar(self):
+        """Sinaliza o encerramento do consumidor."""
+        self._parar.set()
+
+    def carregar_estado_inicial(self):
+        """
+        Semeia posições (uma chamada a futures_account) e o índice orderId -> (signal_id, perna)
+        a partir das ordens abertas do diário.
+        """
+        try:
+            conta = self.client.futures_account()
+            for pos in conta.get('positions', []):
+                if float(pos.get('positionAmt', 0)) != 0:
+                    self.posicoes[pos['symbol']] = {
+                        "positionAmt": float(pos['positionAmt']),
+                        "entryPrice": float(pos.get('entryPrice', 0)),
+                        "unrealizedProfit": float(pos.get('unrealizedProfit', 0)),
+                        "leverage": int(pos.get('leverage', 0) or 0),
+                    }
+            for ativo in conta.get('assets', []):
+                self.saldos[ativo['asset']] = {"walletBalance": float(ativo.get('walletBalance', 0))}
+        except Exception as e:
+            logger.warning(f"[USER STREAM] Não foi possível carregar posições iniciais: {e}")
+        try:
+            df = ler_diario(self.sinais_file, colunas=['signal_id', 'estado', 'tp_order_id', 'sl_order_id'], compacto=False)
+            abertas = df[df['estado'] == 'aberto']
+            for perna in ("tp", "sl"):
+                coluna = f"{perna}_order_id"
+                if coluna in abertas.columns:
+                    for signal_id, order_id in abertas[['signal_id', coluna]].dropna().itertuples(index=False):
+                        self.ordens_por_id[int(order_id)] = (signal_id, perna)
+        except Exception as e:
+            logger.warning(f"[USER STREAM] Não foi possível indexar ordens abertas do diário: {e}")
+        self._publicar_estado()
+
+    async def _executar(self):
+        espera = 1
+        while not self._parar.is_set():
+            try:
+                listen_key = await asyncio.to_thread(self.client.futures_stream_get_listen_key)
+                async with websockets.connect(self.stream_url + listen_key) as ws:
+                    logger.info("[USER STREAM] Conectado ao user data stream.")
+                    espera = 1
+                    # Execuções ocorridas enquanto não havia conexão não chegam pelo stream
+                    await asyncio.to_thread(self.reconciliar)
+                    tarefas = [
+                        asyncio.create_task(self._keepalive(listen_key)),
+                        asyncio.create_task(self._heartbeat()),
+                    ]
+                    try:
+                        async for mensagem in ws:
+                            if self.processar_evento(json.loads(mensagem)) == "reconectar" or self._parar.is_set():
+                                break
+                    finally:
+                        for tarefa in tarefas:
+                            tarefa.cancel()
+            except Exception as e:
+                logger.error(f"[USER STREAM] Conexão perdida: {e}. Reconectando em {espera}s...")
+                await asyncio.sleep(espera)
+                espera = min(espera * 2, 60)
+
+    async def _keepalive(self, listen_key):
+        while True:
+            await asyncio.sleep(self.keepalive_interval)
+            try:
+                await asyncio.to_thread(self.client.futures_stream_keepalive, listenKey=listen_key)
+                logger.debug("[USER STREAM] Keepalive do listenKey enviado.")
+            except Exception as e:
+                logger.error(f"[USER STREAM] Falha no keepalive do listenKey: {e}")
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            self._publicar_estado()
+
+    # --- Eventos ---
+
+    def processar_evento(self, evento):
+        """
+        Trata um evento do user data stream.
+
+        Args:
+            evento (dict): Payload JSON recebido do websocket.
+
+        Returns:
+            str: "reconectar" quando o listenKey expirou, senão None.
+        """
+        tipo = evento.get('e')
+        if tipo == 'ORDER_TRADE_UPDATE':
+            self._on_order_update(evento['o'])
+        elif tipo == 'ACCOUNT_UPDATE':
+            self._on_account_update(evento['a'])
+        elif tipo == 'ACCOUNT_CONFIG_UPDATE' and 'ac' in evento:
+            self.alavancagens[evento['ac']['s']] = int(evento['ac']['l'])
+            if evento['ac']['s'] in self.posicoes:
+                self.posicoes[evento['ac']['s']]['leverage'] = int(evento['ac']['l'])
+            self._publicar_estado()
+        elif tipo == 'listenKeyExpired':
+            logger.warning("[USER STREAM] listenKey expirado. Reconectando...")
+            return "reconectar"
+        return None
+
+    def _on_order_update(self, ordem):
+        if ordem.get('X') != 'FILLED':
+            return
+        signal_id, perna = signal_id_de_client_order_id(ordem.get('c', ''))
+        if signal_id is None:
+            signal_id, perna = self.ordens_por_id.get(int(ordem.get('i', 0)), (None, None))
+        if signal_id is None:
+            logger.debug(f"[USER STREAM] Execução sem sinal local associado: {ordem.get('s')} orderId={ordem.get('i')}")
+            return
+        preco = float(ordem.get('ap') or ordem.get('L') or 0)
+        if perna == "en":
+            logger.info(f"[USER STREAM] Entrada executada para sinal {signal_id}: {ordem['s']} a {preco}")
+            return
+        if perna not in RESULTADO_POR_PERNA:
+            return
+        self._fechar(signal_id, perna, ordem['s'], preco, ordem.get('i', 0))
+
+    def _fechar(self, signal_id, perna, symbol, preco, order_id):
+        # close_order roda sob a trava do diário e ignora ordens já fechadas
+        close_order(signal_id, preco, RESULTADO_POR_PERNA[perna])
+        self.ordens_por_id.pop(int(order_id), None)
+        # A perna oposta perde o sentido após a execução (comportamento OCO)
+        try:
+            self.client.futures_cancel_order(symbol=symbol, origClientOrderId=gerar_client_order_id(signal_id, PERNA_OPOSTA[perna]))
+        except Exception as e:
+            logger.debug(f"[USER STREAM] Perna {PERNA_OPOSTA[perna]} do sinal {signal_id} não cancelada: {e}")
+
+    def reconciliar(self):
+        """
+        Consulta por REST (futures_get_order) as pernas de TP/SL das ordens reais abertas no
+        diário e fecha as que já foram executadas.
+
+        Returns:
+            int: Número de ordens fechadas pela reconciliação.
+        """
+        try:
+            df = ler_diario(self.sinais_file, colunas=['signal_id', 'par', 'estado', 'binance_order_id',
+                                                       'tp_order_id', 'sl_order_id'], compacto=False)
+        except Exception as e:
+            logger.warning(f"[USER STREAM] Reconciliação ignorada: diário ilegível ({e})")
+            return 0
+        abertas = df[(df['estado'] == 'aberto') & df['binance_order_id'].notna()]
+        fechadas = 0
+        for linha in abertas.itertuples(index=False):
+            for perna in ("tp", "sl"):
+                order_id = getattr(linha, f"{perna}_order_id")
+                try:
+                    if pd.notna(order_id):
+                        ordem = self.client.futures_get_order(symbol=linha.par, orderId=int(order_id))
+                    else:
+                        ordem = self.client.futures_get_order(
+                            symbol=linha.par, origClientOrderId=gerar_client_order_id(linha.signal_id, perna))
+                except Exception as e:
+                    logger.debug(f"[USER STREAM] Perna {perna} do sinal {linha.signal_id} não consultada: {e}")
+                    continue
+                if ordem.get('status') == 'FILLED':
+                    self._fechar(linha.signal_id, perna, linha.par, float(ordem.get('avgPrice') or 0), ordem.get('orderId', 0))
+                    fechadas += 1
+                    break
+        if fechadas:
+            logger.info(f"[USER STREAM] Reconciliação: {fechadas} ordens executadas fora do stream foram fechadas.")
+        return fechadas
+
+    def _on_account_update(self, conta):
+        for saldo in conta.get('B', []):
+            self.saldos[saldo['a']] = {"walletBalance": float(saldo['wb'])}
+        for pos in conta.get('P', []):
+            quantidade = float(pos['pa'])
+            if quantidade == 0:
+                self.posicoes.pop(pos['s'], None)
+                continue
+            self.posicoes[pos['s']] = {
+                "positionAmt": quantidade,
+                "entryPrice": float(pos['ep']),
+                "unrealizedProfit": float(pos.get('up', 0)),
+                "leverage": self.alavancagens.get(pos['s'], self.posicoes.get(pos['s'], {}).get('leverage', 0)),
+            }
+        self._publicar_estado()
+
+    def _publicar_estado(self):
+        estado = {"atualizado_em": time.time(), "posicoes": self.posicoes, "saldos": self.saldos}
+        try:
+            tmp = self.state_file + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(estado, f)
+            os.replace(tmp, self.state_file)
+        except Exception as e:
+            logger.error(f"[USER STREAM] Erro ao publicar estado em {self.state_file}: {e}")
+
+
+def load_stream_state(state_file=STATE_FILE, max_age=2 * HEARTBEAT_INTERVAL):
+    """
+    Lê o estado publicado pelo user data stream.
+
+    Args:
+        state_file (str): Arquivo JSON de estado.
+        max_age (int): Idade máxima (s) para o estado ser considerado atual.
+
+    Returns:
+        dict: Estado ({"posicoes", "saldos", "atualizado_em"}) ou None se ausente/desatualizado.
+    """
+    try:
+        with open(state_file) as f:
+            estado = json.load(f)
+        if time.time() - estado.get("atualizado_em", 0) > max_age:
+            return None
+        return estado
+    except Exception:
+        return None
@@ -1,16 +1,201 @@
+import atexit
+import json
 import logging
+import logging.handlers
+import multiprocessing
+import queue
 import pandas as pd
 import os
 import time
 import requests
 import unicodedata
+import clock
+import metrics
+import journal_schema
 
-# Configuração do logger
-logging.basicConfig(
-    filename="bot.log",
-    level=logging.INFO,
-    format="%(asctime)s - UltraBot - %(levelname)s - %(message)s"
-)
+LOG_FILE = "bot.log"
+LOG_FORMAT = "%(asctime)s - UltraBot - %(levelname)s - %(message)s"
+# Padrões da seção "logging" do config.json
+LOGGING_PADRAO = {
+    "level": "INFO",
+    "modules": {},                      # nível por módulo de origem ou logger, ex.: {"signal_generator": "WARNING"}
+    "max_bytes": 50 * 1024 * 1024,      # rotação por tamanho
+    "rotate_hours": 24,                 # rotação por tempo
+    "backup_count": 7,
+    "rate_limit": {"burst": 20, "per_seconds": 60},  # mensagens INFO/DEBUG por linha de código
+}
+
+
+class RotatingTimedFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler que também rotaciona após `rotate_hours` horas (bot.log.1, bot.log.2, ...)."""
+    def __init__(self, filename, max_bytes, rotate_hours, backup_count):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True)
+        self.intervalo = rotate_hours * 3600
+        self.proxima_rotacao = time.time() + self.intervalo
+
+    def shouldRollover(self, record):
+        if self.intervalo and time.time() >= self.proxima_rotacao:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self.proxima_rotacao = time.time() + self.intervalo
+
+
+class ModuleLevelFilter(logging.Filter):
+    """Aplica o nível configurado para o módulo de origem do registro (ou para o logger raiz dele)."""
+    def __init__(self, padrao=logging.INFO, niveis=None):
+        super().__init__()
+        self.padrao = padrao
+        self.niveis = niveis or {}
+
+    def filter(self, record):
+        nivel = self.niveis.get(record.module)
+        if nivel is None:
+            nivel = self.niveis.get(record.name.split(".")[0], self.padrao)
+        return record.levelno >= nivel
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Limita mensagens abaixo de WARNING a `burst` por linha de código a cada `per_seconds` segundos.
+    A primeira mensagem após a janela informa quantas foram suprimidas. As contagens são
+    aproximadas entre threads (sem lock, para não serializar o loop principal).
+    """
+    def __init__(self, burst=20, per_seconds=60):
+        super().__init__()
+        self.burst = burst
+        self.per_seconds = per_seconds
+        self.janelas = {}
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.burst:
+            return True
+        agora = time.monotonic()
+        chave = (record.pathname, record.lineno)
+        janela = self.janelas.get(chave)
+        if janela is None or agora - janela[0] >= self.per_seconds:
+            if janela and janela[2]:
+                record.msg = f"{record.getMessage()} (+{janela[2]} mensagens semelhantes suprimidas)"
+                record.args = None
+            self.janelas[chave] = [agora, 1, 0]
+            return True
+        if janela[1] < self.burst:
+            janela[1] += 1
+            return True
+        janela[2] += 1
+        return False
+
+
+_fila_handler = None
+_listener = None
+_filtro_niveis = ModuleLevelFilter()
+_filtro_taxa = RateLimitFilter()
+
+
+def _nivel(nome):
+    return nome if isinstance(nome, int) else logging.getLevelName(str(nome).upper())
+
+
+def _ler_opcoes_logging():
+    """Seção "logging" do config.json (ao lado deste módulo) mesclada aos padrões."""
+    opcoes = dict(LOGGING_PADRAO)
+    caminho = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json")
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            opcoes.update(json.load(f).get("logging", {}))
+    except (OSError, ValueError):
+        pass
+    return opcoes
+
+
+def aplicar_niveis_log(opcoes):
+    """
+    Atualiza níveis e limites de taxa em tempo de execução (ex.: após recarregar o config.json).
+
+    Args:
+        opcoes (dict): Seção "logging" do config (chaves ausentes mantêm os padrões).
+    """
+    opcoes = {**LOGGING_PADRAO, **(opcoes or {})}
+    _filtro_niveis.padrao = _nivel(opcoes["level"])
+    _filtro_niveis.niveis = {modulo: _nivel(nivel) for modulo, nivel in opcoes["modules"].items()}
+    taxa = {**LOGGING_PADRAO["rate_limit"], **(opcoes.get("rate_limit") or {})}
+    _filtro_taxa.burst, _filtro_taxa.per_seconds = taxa["burst"], taxa["per_seconds"]
+    # O logger raiz deixa passar o menor nível configurado; o filtro decide por módulo
+    logging.getLogger().setLevel(min([_filtro_niveis.padrao, *_filtro_niveis.niveis.values()]))
+
+
+def configurar_logging(opcoes=None, arquivo=LOG_FILE):
+    """
+    Configura o logging do bot: os registros vão para uma fila (QueueHandler) e uma thread
+    (QueueListener) grava em `arquivo` com rotação por tamanho e tempo. Chamadas repetidas
+    apenas reaplicam os níveis.
+
+    Args:
+        opcoes (dict): Seção "logging" do config (padrão: lida do config.json).
+        arquivo (str): Arquivo de log.
+    """
+    global _fila_handler, _listener
+    opcoes = {**LOGGING_PADRAO, **(opcoes if opcoes is not None else _ler_opcoes_logging())}
+    aplicar_niveis_log(opcoes)
+    if _listener is not None:
+        return
+    if multiprocessing.parent_process() is None:
+        arquivo_handler = RotatingTimedFileHandler(arquivo, opcoes["max_bytes"], opcoes["rotate_hours"], opcoes["backup_count"])
+    else:
+        # Processo filho criado por spawn (ex.: shards): só o principal rotaciona o bot.log
+        arquivo_handler = logging.handlers.WatchedFileHandler(arquivo, encoding="utf-8", delay=True)
+    arquivo_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    _fila_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+    _fila_handler.addFilter(_filtro_niveis)
+    _fila_handler.addFilter(_filtro_taxa)
+    logging.getLogger().addHandler(_fila_handler)
+    _listener = logging.handlers.QueueListener(_fila_handler.queue, arquivo_handler)
+    _listener.start()
+    atexit.register(encerrar_logging)
+
+
+def encerrar_logging():
+    """Esvazia a fila e para a thread de escrita."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _handlers_do_filho(handlers):
+    """
+    Handlers de arquivo para um processo filho: só o processo principal rotaciona o bot.log.
+
+    O filho grava no mesmo arquivo com um WatchedFileHandler, que reabre o arquivo quando o
+    principal o rotaciona, em vez de renomeá-lo por conta própria (rotações concorrentes
+    renomeariam bot.log.N duas vezes e perderiam registros).
+    """
+    novos = []
+    for handler in handlers:
+        if isinstance(handler, logging.handlers.RotatingFileHandler):
+            substituto = logging.handlers.WatchedFileHandler(handler.baseFilename, encoding="utf-8", delay=True)
+            substituto.setFormatter(handler.formatter)
+            substituto.setLevel(handler.level)
+            handler = substituto
+        novos.append(handler)
+    return novos
+
+
+def _reiniciar_listener_apos_fork():
+    # A thread de escrita não sobrevive ao fork: o processo filho usa fila e thread próprias
+    global _listener
+    if _listener is not None:
+        _fila_handler.queue = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(_fila_handler.queue, *_handlers_do_filho(_listener.handlers))
+        _listener.start()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reiniciar_listener_apos_fork)
+
+configurar_logging()
 logger = logging.getLogger("UltraBot")
 
 # Classe para escrita em arquivos CSV
@@ -39,8 +224,15 @@ class CsvWriter:
         """
         Escreve uma linha no arquivo CSV.
         Args:
-            data (dict): Dicionário com os dados a serem escritos (deve corresponder às colunas).
+            data (dict): Dicionário com os dados a serem escritos (deve corresponder às colunas);
+                registros de records.py são serializados aqui, na borda do diário.
         """
+        if hasattr(data, "para_journal"):
+            data = data.para_journal()
+        with metrics.span("journal_write"):
+            self._write_row(data)
+
+    def _write_row(self, data):
         try:
             # Carregar o DataFrame existente
             if os.path.exists(self.filename) and os.path.getsize(self.filename) > 0:
@@ -76,17 +268,11 @@ def initialize_csv_files():
     """
     Inicializa os arquivos CSV necessários para o sistema.
     """
-    sinais_columns = [
-        'signal_id', 'par', 'direcao', 'preco_entrada', 'preco_saida', 'quantity',
-        'lucro_percentual', 'pnl_realizado', 'resultado', 'timestamp', 'timestamp_saida',
-        'estado', 'strategy_name', 'contributing_indicators', 'localizadores',
-        'motivos', 'timeframe', 'aceito', 'parametros', 'quality_score', 'modo_contrario', 'visual_tag', 'mode', 'binance_order_id'
-    ]
     missed_columns = [
         'timestamp', 'robot_name', 'par', 'timeframe', 'direcao', 'score_tecnico',
         'contributing_indicators', 'reason'
     ]
-    CsvWriter("sinais_detalhados.csv", sinais_columns)
+    journal_schema.garantir_diario()
     CsvWriter("oportunidades_perdidas.csv", missed_columns)
     logger.info("Arquivos CSV inicializados com sucesso.")
 
@@ -110,7 +296,7 @@ def api_call_with_retry(func, max_retries=3, delay=5, *args, **kwargs):
             logger.error(f"Erro na chamada à API (tentativa {attempt + 1}/{max_retries}): {e}")
             if attempt < max_retries - 1:
                 logger.info(f"Aguardando {delay} segundos antes da próxima tentativa...")
-                time.sleep(delay)
+                clock.sleep(delay)
             else:
                 logger.error("Número máximo de tentativas atingido. Falha na chamada à API.")
                 return None
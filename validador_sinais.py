@@ -3,6 +3,7 @@ import pandas as pd
 from sentimento_mercado import obter_oi_e_funding
 from delta_volume import calcular_delta_volume
 from icebergs import detectar_iceberg
+import journal_store
 
 def ajustar_pesos(pesos_iniciais, df_sinais):
     acertos = {ind: {"tp": 0, "sl": 0} for ind in pesos_iniciais}
@@ -65,7 +66,7 @@ def validar_sinal(
         "sentimento": 0.15, "iceberg": 0.10, "vwap": 0.10, "fibonacci": 0.10
     }
     if os.path.exists("sinais_detalhados.csv"):
-        df_sinais = pd.read_csv("sinais_detalhados.csv")
+        df_sinais = journal_store.consultar("sinais_detalhados.csv", colunas=["motivos", "resultado"])
         pesos = ajustar_pesos(pesos, df_sinais)
 
     motivos = []
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+
+INDICADORES_SUPORTADOS = ("EMA", "RSI", "MACD", "Swing Trade Composite")
+
+
+def _ema(valores, janela):
+    # Mesma definição do pacote `ta` (ewm sem ajuste, com min_periods=janela)
+    return pd.Series(valores).ewm(span=janela, min_periods=janela, adjust=False).mean().to_numpy()
+
+
+def calcular_indicadores(close):
+    """
+    Versão vetorizada de indicators.calculate_indicators sobre um array de fechamentos.
+
+    Args:
+        close (np.ndarray): Preços de fechamento.
+
+    Returns:
+        dict: Arrays EMA12, EMA50, RSI, MACD, MACD_Signal e MA20 (NaN no aquecimento).
+    """
+    close = np.asarray(close, dtype=np.float64)
+    serie = pd.Series(close)
+    delta = serie.diff()
+    # Como no `ta`, o primeiro delta (NaN) conta como variação zero
+    ganho = delta.where(delta > 0, 0.0).ewm(alpha=1 / 14, min_periods=14, adjust=False).mean()
+    perda = (-delta.where(delta < 0, 0.0)).ewm(alpha=1 / 14, min_periods=14, adjust=False).mean()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = np.where(perda.to_numpy() == 0, 100.0, 100 - 100 / (1 + ganho.to_numpy() / perda.to_numpy()))
+    rsi[np.isnan(ganho.to_numpy())] = np.nan
+    macd = _ema(close, 12) - _ema(close, 26)
+    return {
+        "EMA12": _ema(close, 12),
+        "EMA50": _ema(close, 50),
+        "RSI": rsi,
+        "MACD": macd,
+        "MACD_Signal": _ema(macd, 9),
+        "MA20": serie.rolling(window=20).mean().to_numpy(),
+    }
+
+
+def pontuar_sinais(indicadores, close, ativos, contribuicoes=False):
+    """
+    Aplica, para todas as velas de uma vez, as regras de pontuação de signal_generator.generate_signal
+    (sem o componente de ML).
+
+    Args:
+        indicadores (dict): Saída de calcular_indicadores.
+        close (np.ndarray): Preços de fechamento.
+        ativos (list): Indicadores ativos da estratégia.
+        contribuicoes (bool): Se True, retorna também a máscara de bits dos indicadores que
+            contribuíram em cada vela (bit i = INDICADORES_SUPORTADOS[i]).
+
+    Returns:
+        tuple: (score, tem_long, tem_short[, mascara]) como arrays por vela.
+    """
+    n = len(close)
+    score = np.zeros(n)
+    tem_long = np.zeros(n, dtype=bool)
+    tem_short = np.zeros(n, dtype=bool)
+    mascara = np.zeros(n, dtype=np.uint8)
+
+    def regra(condicao_long, condicao_short, peso_long, peso_short, bit):
+        score[condicao_long] += peso_long
+        score[condicao_short] += peso_short
+        tem_long[condicao_long] = True
+        tem_short[condicao_short] = True
+        mascara[condicao_long | condicao_short] |= np.uint8(1 << bit)
+
+    with np.errstate(invalid="ignore"):
+        if "EMA" in ativos:
+            ema12, ema50 = indicadores["EMA12"], indicadores["EMA50"]
+            regra(ema12 > ema50, ema12 < ema50, 0.3, 0.2, 0)
+        if "RSI" in ativos:
+            rsi = indicadores["RSI"]
+            regra(rsi < 45, rsi > 60, 0.3, 0.2, 1)
+        if "MACD" in ativos:
+            macd, sinal = indicadores["MACD"], indicadores["MACD_Signal"]
+            macd_ant, sinal_ant = np.r_[np.nan, macd[:-1]], np.r_[np.nan, sinal[:-1]]
+            validos = ~np.isnan(macd) & ~np.isnan(sinal) & ~np.isnan(macd_ant) & ~np.isnan(sinal_ant)
+            regra(validos & (macd > sinal) & (macd_ant <= sinal_ant), validos & (macd < sinal) & (macd_ant >= sinal_ant), 0.3, 0.2, 2)
+        if "Swing Trade Composite" in ativos:
+            ma20 = indicadores["MA20"]
+            regra(close > ma20, close < ma20, 0.4, 0.3, 3)
+    if contribuicoes:
+        return score, tem_long, tem_short, mascara
+    return score, tem_long, tem_short
+
+
+def nomes_contribuintes(mascara):
+    """Converte a máscara de bits de pontuar_sinais no formato "EMA;RSI" usado em contributing_indicators."""
+    return ";".join(nome for i, nome in enumerate(INDICADORES_SUPORTADOS) if int(mascara) & (1 << i))
+
+
+def direcoes(score, tem_long, tem_short, score_tecnico_min):
+    """
+    Converte pontuações em direção por vela: 1 (LONG), -1 (SHORT) ou 0, com a mesma
+    precedência de generate_signal (LONG vence quando há localizadores dos dois lados).
+    """
+    acima = score >= score_tecnico_min
+    return np.where(acima & tem_long, 1, np.where(acima & tem_short, -1, 0)).astype(np.int8)
+
+
+def indicadores_ativos(estrategia):
+    """Lista os indicadores ativos de uma estratégia de strategies.json suportados pela versão vetorizada."""
+    ativos = estrategia.get("indicators", estrategia.get("indicadores_ativos", []))
+    if isinstance(ativos, dict):
+        ativos = [nome for nome, ligado in ativos.items() if ligado]
+    # backtest_config usa nomes em minúsculas ("ema", "rsi", ...)
+    suportados = {nome.lower(): nome for nome in INDICADORES_SUPORTADOS}
+    return [suportados[nome.lower()] for nome in ativos if nome.lower() in suportados]